@@ -0,0 +1,131 @@
+# apps/core/date_filters.py
+"""
+Filtros por fecha compatibles con índices.
+
+Un predicado como ``cierre__date=hoy`` se traduce en PostgreSQL a
+``(cierre AT TIME ZONE 'America/Santiago')::date = '...'``. Como la columna
+queda envuelta en una función, el planificador no puede usar el índice B-tree
+sobre ``cierre`` y termina recorriendo la tabla completa.
+
+Este módulo reescribe esos predicados como rangos semiabiertos de timestamps
+``[inicio_del_día, inicio_del_día_siguiente)`` calculados en la zona horaria
+del proyecto (``settings.TIME_ZONE``), de modo que la columna queda "desnuda"
+y el índice se puede usar. El resultado es equivalente a ``__date`` incluso en
+los días de cambio de horario (el día puede durar 23 o 25 horas).
+
+Uso:
+    from apps.core.date_filters import rango_dia, rango_fechas
+
+    OrdenTrabajo.objects.filter(rango_dia("cierre", hoy))
+    OrdenTrabajo.objects.filter(rango_fechas("apertura", desde=inicio, hasta=fin))
+    Count("ots_asignadas", filter=Q(rango_fechas("ots_asignadas__cierre", desde=hace_7_dias)))
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django_filters import DateFilter
+
+
+def inicio_dia(fecha: date) -> datetime:
+    """
+    Retorna el primer instante (aware) del día ``fecha`` en la zona horaria local.
+
+    Args:
+        fecha: Fecha calendario (date). Si se recibe un datetime se usa su fecha.
+
+    Returns:
+        datetime aware a las 00:00 locales de ese día
+    """
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def rango_fechas(campo: str, desde: date = None, hasta: date = None) -> Q:
+    """
+    Construye un Q equivalente a ``campo__date__gte=desde`` y ``campo__date__lte=hasta``.
+
+    Ambos extremos son inclusivos (igual que ``__date__gte``/``__date__lte``),
+    pero se expresan como ``campo >= inicio_dia(desde)`` y
+    ``campo < inicio_dia(hasta + 1 día)`` para que el índice sobre ``campo``
+    sea utilizable.
+
+    Args:
+        campo: Nombre del campo DateTimeField (admite rutas como ``ordenes__apertura``)
+        desde: Fecha inicial inclusiva (opcional)
+        hasta: Fecha final inclusiva (opcional)
+
+    Returns:
+        Q con el rango; Q vacío si no se entrega ningún extremo
+    """
+    condiciones = {}
+    if desde is not None:
+        condiciones[f"{campo}__gte"] = inicio_dia(desde)
+    if hasta is not None:
+        if isinstance(hasta, datetime):
+            hasta = hasta.date()
+        condiciones[f"{campo}__lt"] = inicio_dia(hasta + timedelta(days=1))
+    return Q(**condiciones)
+
+
+def rango_dia(campo: str, fecha: date) -> Q:
+    """
+    Construye un Q equivalente a ``campo__date=fecha`` usando un rango semiabierto.
+
+    Args:
+        campo: Nombre del campo DateTimeField
+        fecha: Día calendario local
+
+    Returns:
+        Q con ``campo >= 00:00 de fecha`` y ``campo < 00:00 del día siguiente``
+    """
+    return rango_fechas(campo, desde=fecha, hasta=fecha)
+
+
+class RangoFechaFilter(DateFilter):
+    """
+    DateFilter para campos DateTimeField que filtra por día local sin castear la columna.
+
+    Reemplaza a ``DateFilter(field_name="apertura", lookup_expr="date__gte")``:
+    se declara con ``lookup_expr`` ``gte``, ``lte``, ``gt``, ``lt`` o ``exact``
+    y el valor (una fecha) se traduce a un rango de timestamps.
+
+    Ejemplo:
+        apertura_from = RangoFechaFilter(field_name="apertura", lookup_expr="gte")
+    """
+
+    LOOKUPS_SOPORTADOS = ("exact", "gte", "gt", "lte", "lt")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.lookup_expr not in self.LOOKUPS_SOPORTADOS:
+            raise ValueError(
+                f"RangoFechaFilter no soporta lookup_expr='{self.lookup_expr}'. "
+                f"Use uno de: {', '.join(self.LOOKUPS_SOPORTADOS)}"
+            )
+
+    def filter(self, qs, value):
+        if value in ([], (), {}, "", None):
+            return qs
+
+        campo = self.field_name
+        if self.lookup_expr == "exact":
+            condicion = rango_dia(campo, value)
+        elif self.lookup_expr == "gte":
+            condicion = rango_fechas(campo, desde=value)
+        elif self.lookup_expr == "gt":
+            condicion = rango_fechas(campo, desde=value + timedelta(days=1))
+        elif self.lookup_expr == "lte":
+            condicion = rango_fechas(campo, hasta=value)
+        else:  # lt
+            condicion = rango_fechas(campo, hasta=value - timedelta(days=1))
+
+        if self.exclude:
+            qs = qs.exclude(condicion)
+        else:
+            qs = qs.filter(condicion)
+        if self.distinct:
+            qs = qs.distinct()
+        return qs
@@ -0,0 +1,320 @@
+# apps/core/exports.py
+"""
+Exportación masiva en streaming (CSV y XLSX).
+
+No había exportación: para bajar un año de OTs o movimientos de stock había
+que recorrer el listado de a 200 filas por página y unir los resultados.
+Este módulo arma respuestas StreamingHttpResponse que:
+
+- Leen la base con .values_list().iterator(chunk_size=TAMANO_LOTE): en
+  PostgreSQL es un cursor del lado del servidor, así que nunca hay más de
+  un lote de filas en memoria, sin importar cuántas filas se exporten
+- Escriben cada lote al cliente apenas se lee (CSV con BOM UTF-8 para que
+  Excel muestre bien los acentos)
+- Generan XLSX sin dependencias extra: el archivo es un ZIP con XML, y
+  zipfile puede escribirlo hacia un flujo no posicionable, así que la hoja
+  también se emite lote a lote (celdas inlineStr, sin tabla de strings
+  compartidos que habría que mantener en memoria)
+- Bajo ASGI (Daphne, pgf_core/servidor_ws.py) entregan un iterador
+  asíncrono que pide cada bloque con sync_to_async. Con un iterador
+  síncrono, Django lo leería completo con sync_to_async(list) antes de
+  enviar el primer byte, y la exportación volvería a cargar todo en memoria
+
+Las vistas aplican sus filtros y el alcance por rol (filter_queryset +
+get_queryset) y entregan a este módulo las columnas y las filas.
+
+Uso:
+    from apps.core import exports
+
+    formato = exports.formato_desde(request)  # "csv" o "xlsx" (?formato=)
+    columnas = [("ID", "id"), ("Patente", "vehiculo__patente")]
+    return exports.respuesta(
+        [c[0] for c in columnas],
+        exports.filas(queryset, [c[1] for c in columnas]),
+        "ordenes_trabajo", formato, request,
+    )
+
+Relaciones:
+- Usado por: apps/workorders/views.py (OrdenTrabajoViewSet, AuditoriaViewSet),
+  apps/inventory/views.py (MovimientoStockViewSet, HistorialRepuestoVehiculoViewSet)
+"""
+
+import csv
+import json
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+# Filas por lote (tamaño del fetch del cursor y de cada bloque enviado)
+TAMANO_LOTE = 2000
+
+# Formatos soportados: tipo MIME de la respuesta
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Prefijos con los que Excel interpreta una celda CSV como fórmula
+_PREFIJOS_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+# Caracteres de control que XML 1.0 no permite (saltos de línea y tab sí)
+_CONTROL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class FormatoInvalido(ValueError):
+    """Formato de exportación no soportado (la vista responde 400)."""
+
+
+def formato_desde(request):
+    """
+    Formato pedido en ?formato= (csv por defecto).
+
+    No se usa ?format= porque DRF lo reserva para elegir el renderer.
+
+    Lanza:
+    - FormatoInvalido: Formato distinto de csv o xlsx
+    """
+    formato = request.query_params.get("formato", "csv").lower()
+    if formato not in FORMATOS:
+        raise FormatoInvalido(f"Formato '{formato}' no soportado. Use: {', '.join(FORMATOS)}")
+    return formato
+
+
+def en_lotes(iterable, tamano=TAMANO_LOTE):
+    """Agrupa un iterable en listas de hasta `tamano` elementos."""
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def filas(queryset, campos, tamano=TAMANO_LOTE):
+    """
+    Filas (tuplas) de un queryset leídas con un cursor por lotes.
+
+    Parámetros:
+    - queryset: QuerySet ya filtrado y ordenado
+    - campos: Campos o lookups para values_list ("vehiculo__patente", ...)
+    - tamano: Filas por fetch del cursor
+    """
+    return queryset.values_list(*campos).iterator(chunk_size=tamano)
+
+
+def texto(valor):
+    """Valor de una celda como texto (fechas en hora local)."""
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        return "Sí" if valor else "No"
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False, default=str)
+    return str(valor)
+
+
+# ==================== CSV ====================
+
+def _celda_csv(valor):
+    """Texto de la celda; los textos que parecen fórmulas se escapan con '."""
+    contenido = texto(valor)
+    if isinstance(valor, str) and contenido.startswith(_PREFIJOS_FORMULA):
+        return "'" + contenido
+    return contenido
+
+
+class _Buffer:
+    """Pseudo-archivo que acumula lo escrito hasta que se vacía."""
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(datos)
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        contenido = self.partes
+        self.partes = []
+        return contenido
+
+
+def generar_csv(encabezados, filas_datos, tamano=TAMANO_LOTE):
+    """
+    Genera el CSV en bloques de bytes, un bloque por lote de filas.
+
+    El primer bloque lleva el BOM UTF-8 y los encabezados.
+    """
+    buffer = _Buffer()
+    escritor = csv.writer(buffer)
+    escritor.writerow(encabezados)
+    yield ("\ufeff" + "".join(buffer.vaciar())).encode("utf-8")
+    for lote in en_lotes(filas_datos, tamano):
+        escritor.writerows([_celda_csv(valor) for valor in fila] for fila in lote)
+        yield "".join(buffer.vaciar()).encode("utf-8")
+
+
+# ==================== XLSX ====================
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+_INICIO_HOJA = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_FIN_HOJA = "</sheetData></worksheet>"
+
+
+def _columna(indice):
+    """Letra de columna de Excel para un índice desde 0 (0 → A, 26 → AA)."""
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celda(referencia, valor):
+    if isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool):
+        return f'<c r="{referencia}"><v>{valor}</v></c>'
+    contenido = escape(_CONTROL_XML.sub("", texto(valor)))
+    return f'<c r="{referencia}" t="inlineStr"><is><t xml:space="preserve">{contenido}</t></is></c>'
+
+
+def _fila_xml(numero, valores):
+    celdas = "".join(_celda(f"{_columna(i)}{numero}", valor) for i, valor in enumerate(valores))
+    return f'<row r="{numero}">{celdas}</row>'
+
+
+def generar_xlsx(encabezados, filas_datos, hoja="Datos", tamano=TAMANO_LOTE):
+    """
+    Genera un XLSX de una hoja en bloques de bytes, un bloque por lote.
+
+    El ZIP se escribe sobre un _Buffer (no posicionable): zipfile usa
+    entonces descriptores de datos en lugar de volver atrás a escribir
+    tamaños, y cada parte comprimida se puede enviar apenas se genera.
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archivo:
+        archivo.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archivo.writestr("_rels/.rels", _RELS)
+        archivo.writestr("xl/workbook.xml", _WORKBOOK.format(hoja=escape(hoja, {'"': "&quot;"})))
+        archivo.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        with archivo.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as hoja_xml:
+            hoja_xml.write((_INICIO_HOJA + _fila_xml(1, encabezados)).encode("utf-8"))
+            numero = 1
+            for lote in en_lotes(filas_datos, tamano):
+                partes = []
+                for fila in lote:
+                    numero += 1
+                    partes.append(_fila_xml(numero, fila))
+                hoja_xml.write("".join(partes).encode("utf-8"))
+                yield b"".join(buffer.vaciar())
+            hoja_xml.write(_FIN_HOJA.encode("utf-8"))
+    yield b"".join(buffer.vaciar())
+
+
+# ==================== RESPUESTA ====================
+
+_FIN = object()
+
+
+async def asincrono(bloques):
+    """
+    Iterador asíncrono sobre un generador síncrono de bloques.
+
+    Cada bloque se pide con sync_to_async (thread_sensitive): el generador
+    corre en el mismo hilo que la vista, con la misma conexión y el mismo
+    cursor del lado del servidor, y solo un bloque está en memoria a la vez.
+    """
+    siguiente = sync_to_async(next)
+    try:
+        while (bloque := await siguiente(bloques, _FIN)) is not _FIN:
+            yield bloque
+    finally:
+        # Cliente desconectado a mitad de la descarga: cerrar el cursor
+        await sync_to_async(bloques.close)()
+
+
+def respuesta(encabezados, filas_datos, nombre, formato="csv", request=None):
+    """
+    StreamingHttpResponse con el archivo exportado.
+
+    Parámetros:
+    - encabezados: Títulos de las columnas
+    - filas_datos: Iterable de filas (tuplas), idealmente filas() o un generador
+    - nombre: Nombre base del archivo (se agrega la fecha y la extensión)
+    - formato: "csv" o "xlsx"
+    - request: Request de la vista; si llegó por ASGI el contenido se
+      entrega como iterador asíncrono (ver asincrono())
+
+    Retorna:
+    - StreamingHttpResponse con Content-Disposition de descarga
+    """
+    if formato == "xlsx":
+        contenido = generar_xlsx(encabezados, filas_datos)
+    else:
+        contenido = generar_csv(encabezados, filas_datos)
+    # DRF envuelve el HttpRequest de Django en request._request
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        contenido = asincrono(contenido)
+    response = StreamingHttpResponse(contenido, content_type=FORMATOS[formato])
+    response["Content-Disposition"] = (
+        f'attachment; filename="{nombre}_{timezone.localdate():%Y%m%d}.{formato}"'
+    )
+    # Evitar que un proxy (nginx) acumule la respuesta completa antes de enviarla
+    response["X-Accel-Buffering"] = "no"
+    return response
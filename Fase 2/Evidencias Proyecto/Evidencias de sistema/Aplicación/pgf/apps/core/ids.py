@@ -0,0 +1,97 @@
+# apps/core/ids.py
+"""
+Generación de identificadores ordenados por tiempo (UUIDv7, RFC 9562).
+
+Los modelos con más inserciones (OrdenTrabajo, Evidencia, Notification,
+HistorialVehiculo, MovimientoStock) usaban uuid.uuid4 como clave primaria.
+Un UUID4 es completamente aleatorio: cada INSERT cae en una página distinta
+del índice B-tree de la PK, lo que provoca divisiones de página, índices más
+grandes y peor uso de caché.
+
+Un UUIDv7 empieza con el timestamp Unix en milisegundos, así que los IDs
+nuevos quedan siempre al final del índice (como un autoincremental), pero
+siguen siendo UUID válidos de 128 bits: no cambia el tipo de columna ni el
+formato que ve la API.
+
+Estructura (128 bits):
+- 48 bits: timestamp Unix en milisegundos
+- 4 bits: versión (7)
+- 12 bits: contador dentro del mismo milisegundo (rand_a, método 1 del RFC)
+- 2 bits: variante (10)
+- 62 bits: aleatorios
+
+Uso:
+    from apps.core.ids import uuid7
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+"""
+
+import os
+import threading
+import time
+import uuid
+
+# Estado para garantizar orden creciente dentro del proceso, incluso con
+# varios IDs en el mismo milisegundo o si el reloj retrocede levemente
+_lock = threading.Lock()
+_ultimo_ms = 0
+_contador = 0
+
+_MAX_CONTADOR = 0xFFF  # 12 bits
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Genera un UUID versión 7 (ordenado por tiempo).
+
+    Dentro de un mismo proceso los valores son estrictamente crecientes: si se
+    generan varios en el mismo milisegundo se incrementa el contador de 12 bits
+    y, si se agota, se avanza al milisegundo siguiente.
+
+    Returns:
+        uuid.UUID versión 7
+    """
+    global _ultimo_ms, _contador
+
+    with _lock:
+        ahora_ms = time.time_ns() // 1_000_000
+        if ahora_ms > _ultimo_ms:
+            _ultimo_ms = ahora_ms
+            # Iniciar el contador en un valor aleatorio de 11 bits deja margen
+            # para incrementos sin que sea predecible
+            _contador = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            # Mismo milisegundo (o reloj que retrocedió): seguir desde el último valor
+            _contador += 1
+            if _contador > _MAX_CONTADOR:
+                _ultimo_ms += 1
+                _contador = 0
+        ms = _ultimo_ms
+        contador = _contador
+
+    aleatorio = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+
+    valor = (ms & ((1 << 48) - 1)) << 80
+    valor |= 0x7 << 76
+    valor |= contador << 64
+    valor |= 0b10 << 62
+    valor |= aleatorio
+    return uuid.UUID(int=valor)
+
+
+def uuid7_timestamp(valor: uuid.UUID) -> float:
+    """
+    Retorna el timestamp Unix (en segundos) embebido en un UUIDv7.
+
+    Args:
+        valor: UUID versión 7
+
+    Returns:
+        Segundos desde epoch (con resolución de milisegundos)
+
+    Raises:
+        ValueError: Si el UUID no es versión 7
+    """
+    if valor.version != 7:
+        raise ValueError(f"El UUID {valor} no es versión 7")
+    return (valor.int >> 80) / 1000
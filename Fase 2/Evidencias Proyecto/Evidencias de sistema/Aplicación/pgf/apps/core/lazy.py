@@ -0,0 +1,74 @@
+# apps/core/lazy.py
+"""
+Importación diferida de librerías pesadas.
+
+boto3/botocore, ReportLab, matplotlib y PIL tardan cientos de milisegundos
+en importarse. Si un módulo que se carga al arrancar (urls, views, tasks)
+las importa arriba, cada proceso de gunicorn/daphne/Celery paga ese costo
+al iniciar, aunque nunca genere un PDF ni suba un archivo.
+
+La regla del proyecto es importar estas librerías dentro de la función que
+las usa. importar_diferido() cubre el caso en que el módulo necesita el
+nombre a nivel de módulo (por ejemplo, porque los tests hacen
+patch("apps.workorders.views.boto3")): retorna un módulo que se carga
+recién al acceder al primer atributo.
+
+El comando benchmark_arranque verifica que ninguna de estas librerías se
+cargue durante el arranque.
+
+Uso:
+    from apps.core.lazy import importar_diferido
+
+    boto3 = importar_diferido("boto3")  # no importa nada todavía
+    s3 = boto3.client("s3")             # aquí se carga boto3
+"""
+
+import importlib
+
+
+class ModuloDiferido:
+    """
+    Representa un módulo que todavía no se ha importado.
+
+    El primer acceso a un atributo ejecuta importlib.import_module (que
+    usa el lock de importación de Python, así que es seguro entre hilos) y
+    desde ahí delega todos los accesos en el módulo real.
+    """
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def _cargar(self):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        # Solo se llama para atributos que no existen en la instancia
+        return getattr(self._cargar(), atributo)
+
+    def __dir__(self):
+        return dir(self._cargar())
+
+    def __repr__(self):
+        estado = "cargado" if self._modulo is not None else "diferido"
+        return f"<módulo {estado} {self._nombre!r}>"
+
+
+def importar_diferido(nombre):
+    """
+    Módulo que se importa al acceder a su primer atributo.
+
+    A diferencia de importlib.util.LazyLoader, no registra nada en
+    sys.modules hasta la importación real, así que el autoreloader de
+    runserver y otras herramientas que recorren sys.modules no lo cargan
+    por accidente.
+
+    Args:
+        nombre: Nombre del módulo ("boto3", "botocore.config", ...)
+
+    Returns:
+        ModuloDiferido que se comporta como el módulo
+    """
+    return ModuloDiferido(nombre)
@@ -0,0 +1,258 @@
+"""
+Comando para medir el tiempo de arranque de los procesos del proyecto.
+
+Cada proceso de gunicorn/daphne/Celery paga al iniciar (y en cada fork)
+todo lo que se importa durante el arranque. Este benchmark lanza procesos
+nuevos de Python con `-X importtime`, simulando el arranque de:
+
+- web: django.setup() + ROOT_URLCONF + pgf_core.asgi (daphne/gunicorn)
+- celery: django.setup() + carga de todos los módulos de tareas del worker
+
+y reporta:
+- Mediana del tiempo de arranque (ms) de cada objetivo
+- Costo de importación por paquete (suma del tiempo propio de sus módulos,
+  mediana entre repeticiones), los más caros primero
+
+Falla (CommandError, código de salida 1) si:
+- Alguna librería pesada (PROHIBIDOS) se importa durante el arranque: deben
+  importarse dentro de la función que las usa (ver apps/core/lazy.py)
+- La mediana supera --max-ms
+- Con --baseline: la mediana o el costo de algún paquete crece más de
+  --tolerancia respecto de la línea base guardada con --guardar-baseline
+
+Cada medición usa un proceso nuevo; la primera ejecución se descarta
+(compila los .pyc y llena la caché del sistema de archivos).
+
+Uso:
+    python manage.py benchmark_arranque
+    python manage.py benchmark_arranque --repeticiones 10 --top 25
+    python manage.py benchmark_arranque --guardar-baseline arranque.json
+    python manage.py benchmark_arranque --baseline arranque.json --tolerancia 0.15
+"""
+
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Código que simula el arranque de cada tipo de proceso
+OBJETIVOS = {
+    "web": (
+        "import importlib\n"
+        "from django.conf import settings\n"
+        "importlib.import_module(settings.ROOT_URLCONF)\n"
+        "import pgf_core.asgi\n"
+    ),
+    "celery": (
+        "from pgf_core.celery import celery_app\n"
+        "celery_app.loader.import_default_modules()\n"
+    ),
+}
+
+# Librerías que no deben cargarse al arrancar ningún proceso
+PROHIBIDOS = ("reportlab", "matplotlib", "boto3", "botocore", "PIL", "numpy")
+
+# Crecimiento mínimo (ms) de un paquete para considerarlo regresión
+# (por debajo de esto es ruido de la medición)
+MINIMO_REGRESION_PAQUETE_MS = 25.0
+
+# Marca de la línea que imprime el proceso medido en stdout
+MARCA = "BENCHMARK_ARRANQUE "
+
+PLANTILLA = (
+    "import json, sys, time\n"
+    "inicio = time.perf_counter()\n"
+    "import django\n"
+    "django.setup()\n"
+    "{codigo}"
+    "ms = (time.perf_counter() - inicio) * 1000\n"
+    "print(" + repr(MARCA) + " + json.dumps({{'ms': ms, 'modulos': sorted(sys.modules)}}))\n"
+)
+
+# Formato de -X importtime: "import time: <propio us> | <acumulado us> | <sangría><módulo>"
+LINEA_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+def costo_por_paquete(salida_importtime):
+    """
+    Suma el tiempo propio de los módulos de cada paquete de primer nivel.
+
+    Args:
+        salida_importtime: stderr de un proceso ejecutado con -X importtime
+
+    Returns:
+        Diccionario {paquete: ms}
+    """
+    costos = defaultdict(float)
+    for linea in salida_importtime.splitlines():
+        coincidencia = LINEA_IMPORTTIME.match(linea)
+        if coincidencia:
+            propio_us, _, _, modulo = coincidencia.groups()
+            costos[modulo.split(".")[0]] += int(propio_us) / 1000
+    return dict(costos)
+
+
+class Command(BaseCommand):
+    help = "Mide el tiempo de arranque de Django/Celery y el costo de importación por paquete"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--objetivos",
+            nargs="+",
+            choices=sorted(OBJETIVOS),
+            default=sorted(OBJETIVOS),
+            help="Procesos a medir (default: todos)",
+        )
+        parser.add_argument(
+            "--repeticiones",
+            type=int,
+            default=5,
+            help="Mediciones por objetivo; se reporta la mediana (default: 5)",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=15,
+            help="Paquetes más caros a mostrar (default: 15)",
+        )
+        parser.add_argument(
+            "--max-ms",
+            type=float,
+            default=None,
+            help="Fallar si la mediana de algún objetivo supera este tiempo",
+        )
+        parser.add_argument(
+            "--baseline",
+            default=None,
+            help="Archivo JSON con la línea base contra la que comparar",
+        )
+        parser.add_argument(
+            "--tolerancia",
+            type=float,
+            default=0.2,
+            help="Crecimiento permitido sobre la línea base (default: 0.2 = 20%%)",
+        )
+        parser.add_argument(
+            "--guardar-baseline",
+            default=None,
+            help="Guardar los resultados como línea base en este archivo JSON",
+        )
+
+    def handle(self, *args, **options):
+        repeticiones = options["repeticiones"]
+        if repeticiones <= 0 or options["top"] <= 0:
+            raise CommandError("--repeticiones y --top deben ser mayores que 0")
+
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = json.loads(Path(options["baseline"]).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer la línea base {options['baseline']}: {e}")
+
+        resultados = {}
+        errores = []
+        for objetivo in options["objetivos"]:
+            self.stdout.write(f"📊 Midiendo arranque '{objetivo}' ({repeticiones} repeticiones)...")
+            resultado = self._medir(objetivo, repeticiones)
+            resultados[objetivo] = resultado
+            self._reportar(objetivo, resultado, options["top"])
+            errores += self._verificar(objetivo, resultado, options, baseline)
+
+        if options["guardar_baseline"]:
+            Path(options["guardar_baseline"]).write_text(json.dumps(resultados, indent=2, sort_keys=True))
+            self.stdout.write(f"💾 Línea base guardada en {options['guardar_baseline']}")
+
+        if errores:
+            raise CommandError("Regresión en el arranque:\n- " + "\n- ".join(errores))
+        self.stdout.write(self.style.SUCCESS("✅ Arranque dentro de los límites"))
+
+    def _ejecutar(self, objetivo):
+        """Lanza un proceso nuevo con -X importtime y retorna (ms, módulos, costos)."""
+        codigo = PLANTILLA.format(codigo=OBJETIVOS[objetivo])
+        proceso = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", codigo],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+            timeout=300,
+        )
+        linea = next((l for l in proceso.stdout.splitlines() if l.startswith(MARCA)), None)
+        if proceso.returncode != 0 or linea is None:
+            ultimas = "\n".join(proceso.stderr.splitlines()[-10:])
+            raise CommandError(f"El arranque '{objetivo}' falló (código {proceso.returncode}):\n{ultimas}")
+        datos = json.loads(linea[len(MARCA):])
+        return datos["ms"], datos["modulos"], costo_por_paquete(proceso.stderr)
+
+    def _medir(self, objetivo, repeticiones):
+        """
+        Mide un objetivo `repeticiones` veces (más una de calentamiento).
+
+        Los costos por paquete son la mediana de cada paquete entre
+        repeticiones (0 en las que no se importó).
+        """
+        self._ejecutar(objetivo)
+        tiempos = []
+        costos = []
+        cargados = set()
+        for _ in range(repeticiones):
+            ms, modulos, costo = self._ejecutar(objetivo)
+            tiempos.append(ms)
+            costos.append(costo)
+            cargados.update(modulos)
+
+        paquetes = set().union(*costos)
+        return {
+            "mediana_ms": statistics.median(tiempos),
+            "min_ms": min(tiempos),
+            "max_ms": max(tiempos),
+            "paquetes_ms": {
+                paquete: statistics.median(c.get(paquete, 0.0) for c in costos)
+                for paquete in paquetes
+            },
+            "prohibidos": sorted(p for p in PROHIBIDOS if p in cargados),
+        }
+
+    def _reportar(self, objetivo, resultado, top):
+        self.stdout.write(
+            f"  {objetivo}: mediana {resultado['mediana_ms']:.0f} ms "
+            f"(min {resultado['min_ms']:.0f}, max {resultado['max_ms']:.0f})"
+        )
+        mas_caros = sorted(resultado["paquetes_ms"].items(), key=lambda p: p[1], reverse=True)[:top]
+        for paquete, ms in mas_caros:
+            self.stdout.write(f"    {ms:8.1f} ms  {paquete}")
+
+    def _verificar(self, objetivo, resultado, options, baseline):
+        """Retorna la lista de regresiones encontradas para un objetivo."""
+        errores = []
+        if resultado["prohibidos"]:
+            errores.append(
+                f"{objetivo}: se importan al arrancar {', '.join(resultado['prohibidos'])} "
+                "(importarlas dentro de la función que las usa)"
+            )
+        if options["max_ms"] is not None and resultado["mediana_ms"] > options["max_ms"]:
+            errores.append(
+                f"{objetivo}: {resultado['mediana_ms']:.0f} ms supera el máximo de {options['max_ms']:.0f} ms"
+            )
+
+        base = (baseline or {}).get(objetivo)
+        if base:
+            factor = 1 + options["tolerancia"]
+            if resultado["mediana_ms"] > base["mediana_ms"] * factor:
+                errores.append(
+                    f"{objetivo}: {resultado['mediana_ms']:.0f} ms vs {base['mediana_ms']:.0f} ms "
+                    f"de la línea base (+{options['tolerancia']:.0%} permitido)"
+                )
+            for paquete, ms in resultado["paquetes_ms"].items():
+                anterior = base["paquetes_ms"].get(paquete, 0.0)
+                if ms > anterior * factor and ms - anterior > MINIMO_REGRESION_PAQUETE_MS:
+                    errores.append(f"{objetivo}: el paquete {paquete} pasó de {anterior:.0f} a {ms:.0f} ms")
+        return errores
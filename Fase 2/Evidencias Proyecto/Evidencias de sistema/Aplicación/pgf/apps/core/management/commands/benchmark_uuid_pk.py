@@ -0,0 +1,124 @@
+"""
+Comando para comparar claves primarias UUID4 vs UUIDv7 en PostgreSQL.
+
+Crea dos tablas temporales con la misma estructura (PK UUID + timestamp +
+texto, similar a una fila de Notification o Auditoria), inserta la misma
+cantidad de filas en cada una usando uuid.uuid4 y apps.core.ids.uuid7, y
+reporta:
+- Filas por segundo de inserción
+- Tamaño del índice de la PK (pg_relation_size)
+- Tamaño total de la tabla
+
+Las tablas son TEMPORARY, así que se eliminan al cerrar la conexión y no
+afectan los datos reales.
+
+Uso:
+    python manage.py benchmark_uuid_pk
+    python manage.py benchmark_uuid_pk --filas 500000 --lote 5000
+"""
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.core.ids import uuid7
+
+# Generadores a comparar: nombre → función
+GENERADORES = {
+    "uuid4": uuid.uuid4,
+    "uuid7": uuid7,
+}
+
+
+class Command(BaseCommand):
+    help = "Compara el rendimiento de inserción y tamaño de índice de PKs UUID4 vs UUIDv7"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--filas",
+            type=int,
+            default=200_000,
+            help="Cantidad de filas a insertar por tabla (default: 200000)",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=2_000,
+            help="Filas por INSERT (default: 2000)",
+        )
+
+    def handle(self, *args, **options):
+        filas = options["filas"]
+        lote = options["lote"]
+
+        if connection.vendor != "postgresql":
+            raise CommandError("Este benchmark requiere PostgreSQL")
+        if filas <= 0 or lote <= 0:
+            raise CommandError("--filas y --lote deben ser mayores que 0")
+
+        self.stdout.write(f"📊 Insertando {filas} filas por tabla en lotes de {lote}...")
+
+        resultados = {}
+        for nombre, generador in GENERADORES.items():
+            resultados[nombre] = self._medir(nombre, generador, filas, lote)
+            r = resultados[nombre]
+            self.stdout.write(
+                f"  {nombre}: {r['filas_por_segundo']:,.0f} filas/s, "
+                f"índice PK {r['indice_bytes'] / 1024 / 1024:.2f} MB, "
+                f"tabla {r['tabla_bytes'] / 1024 / 1024:.2f} MB"
+            )
+
+        base = resultados["uuid4"]
+        nuevo = resultados["uuid7"]
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ UUIDv7: {nuevo['filas_por_segundo'] / base['filas_por_segundo']:.2f}x filas/s, "
+            f"índice PK {nuevo['indice_bytes'] / base['indice_bytes'] * 100:.0f}% del tamaño con UUID4"
+        ))
+
+    def _medir(self, nombre, generador, filas, lote):
+        """
+        Inserta `filas` filas en una tabla temporal y retorna las métricas.
+
+        Los UUID se generan dentro del tiempo medido, igual que al crear un
+        modelo (el default se evalúa en cada save()).
+        """
+        tabla = f"benchmark_pk_{nombre}"
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {tabla}")
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {tabla} ("
+                " id uuid PRIMARY KEY,"
+                " creado_en timestamptz NOT NULL DEFAULT now(),"
+                " contenido text NOT NULL"
+                ")"
+            )
+
+            inicio = time.perf_counter()
+            insertadas = 0
+            while insertadas < filas:
+                cantidad = min(lote, filas - insertadas)
+                ids = [str(generador()) for _ in range(cantidad)]
+                cursor.execute(
+                    f"INSERT INTO {tabla} (id, contenido) "
+                    "SELECT unnest(%s::uuid[]), 'benchmark'",
+                    [ids],
+                )
+                insertadas += cantidad
+            duracion = time.perf_counter() - inicio
+
+            cursor.execute(
+                "SELECT pg_relation_size(%s::regclass), pg_relation_size(%s::regclass)",
+                [f"{tabla}_pkey", tabla],
+            )
+            indice_bytes, tabla_bytes = cursor.fetchone()
+            cursor.execute(f"DROP TABLE {tabla}")
+
+        return {
+            "filas": filas,
+            "segundos": duracion,
+            "filas_por_segundo": filas / duracion if duracion else float("inf"),
+            "indice_bytes": indice_bytes,
+            "tabla_bytes": tabla_bytes,
+        }
@@ -0,0 +1,104 @@
+# apps/core/tests/test_benchmark_arranque.py
+"""
+Tests para la importación diferida (apps/core/lazy.py) y el comando
+benchmark_arranque.
+
+Verifican que:
+- importar_diferido no importa nada hasta el primer acceso
+- El costo por paquete se calcula a partir de la salida de -X importtime
+- Ninguna librería pesada se importa al arrancar el proceso web
+- El comando falla ante librerías prohibidas o regresiones contra la línea base
+"""
+
+import json
+import sys
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.core.lazy import importar_diferido
+from apps.core.management.commands import benchmark_arranque
+
+
+SALIDA_IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   botocore.compat
+import time:      2000 |       2120 | botocore
+import time:       500 |        500 |     boto3.session
+import time:      1500 |       4120 | boto3
+import time:       300 |        300 | json
+"""
+
+
+class TestImportarDiferido:
+    """Tests para importar_diferido"""
+
+    @pytest.mark.unit
+    def test_no_importa_hasta_el_primer_acceso(self):
+        sys.modules.pop("tabnanny", None)
+
+        modulo = importar_diferido("tabnanny")
+        assert "tabnanny" not in sys.modules
+        assert "diferido" in repr(modulo)
+
+        assert callable(modulo.check)
+        assert "tabnanny" in sys.modules
+        assert "cargado" in repr(modulo)
+
+    @pytest.mark.unit
+    def test_modulo_inexistente_falla_al_usarlo(self):
+        modulo = importar_diferido("modulo_que_no_existe")
+        with pytest.raises(ModuleNotFoundError):
+            modulo.algo
+
+
+class TestBenchmarkArranque:
+    """Tests para el comando benchmark_arranque"""
+
+    @pytest.mark.unit
+    def test_costo_por_paquete(self):
+        costos = benchmark_arranque.costo_por_paquete(SALIDA_IMPORTTIME)
+        assert costos == {"botocore": pytest.approx(2.12), "boto3": pytest.approx(2.0), "json": pytest.approx(0.3)}
+
+    @pytest.mark.slow
+    def test_arranque_web_sin_librerias_pesadas(self, tmp_path):
+        """Arranque real: ni ReportLab, ni matplotlib, ni boto3 se cargan al iniciar"""
+        salida = StringIO()
+        archivo = tmp_path / "arranque.json"
+
+        call_command(
+            "benchmark_arranque", objetivos=["web"], repeticiones=1,
+            guardar_baseline=str(archivo), stdout=salida
+        )
+
+        resultado = json.loads(archivo.read_text())["web"]
+        assert resultado["prohibidos"] == []
+        assert resultado["paquetes_ms"]["django"] > 0
+        assert "web: mediana" in salida.getvalue()
+
+    @pytest.mark.unit
+    def test_falla_con_regresiones(self, monkeypatch, tmp_path):
+        """Paquetes prohibidos, el máximo y la línea base se reportan juntos"""
+        resultado = {
+            "mediana_ms": 900.0, "min_ms": 850.0, "max_ms": 950.0,
+            "paquetes_ms": {"django": 150.0, "boto3": 250.0},
+            "prohibidos": ["boto3"],
+        }
+        monkeypatch.setattr(benchmark_arranque.Command, "_medir", lambda self, objetivo, n: resultado)
+        baseline = tmp_path / "arranque.json"
+        baseline.write_text(json.dumps({"web": {"mediana_ms": 600.0, "paquetes_ms": {"django": 150.0}}}))
+
+        with pytest.raises(CommandError) as error:
+            call_command(
+                "benchmark_arranque", objetivos=["web"], baseline=str(baseline),
+                max_ms=800, stdout=StringIO()
+            )
+
+        mensaje = str(error.value)
+        assert "se importan al arrancar boto3" in mensaje
+        assert "supera el máximo de 800 ms" in mensaje
+        assert "900 ms vs 600 ms" in mensaje
+        assert "el paquete boto3 pasó de 0 a 250 ms" in mensaje
+        assert "django" not in mensaje
@@ -0,0 +1,177 @@
+# apps/core/tests/test_date_filters.py
+"""
+Tests para los filtros por fecha compatibles con índices (apps/core/date_filters.py).
+
+Verifican que los rangos semiabiertos:
+- Devuelven exactamente las mismas filas que los lookups ``__date`` en hora local
+- Respetan los días con cambio de horario
+- Permiten que PostgreSQL use los índices B-tree (verificado con EXPLAIN)
+"""
+
+import pytest
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from django.db import connection
+from django.utils import timezone
+
+from apps.core.date_filters import RangoFechaFilter, inicio_dia, rango_dia, rango_fechas
+from apps.workorders.filters import OrdenTrabajoFilter
+from apps.workorders.models import OrdenTrabajo
+from apps.vehicles.models import IngresoVehiculo
+
+
+def _crear_ot(vehiculo, supervisor, apertura, cierre=None, estado="ABIERTA"):
+    """Crea una OT y fuerza apertura/cierre (apertura es auto_now_add)."""
+    ot = OrdenTrabajo.objects.create(
+        vehiculo=vehiculo,
+        supervisor=supervisor,
+        responsable=supervisor,
+        motivo="Prueba rangos",
+        estado=estado,
+    )
+    OrdenTrabajo.objects.filter(pk=ot.pk).update(apertura=apertura, cierre=cierre)
+    return ot
+
+
+def _plan(queryset):
+    """
+    Retorna el plan de ejecución de PostgreSQL para el queryset.
+
+    Se desactiva el seq scan dentro de la transacción del test: con tablas casi
+    vacías el planificador prefiere recorrerlas completas, y lo que interesa
+    comprobar es si el predicado *permite* usar el índice.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+class TestInicioDia:
+    """Tests para inicio_dia"""
+
+    @pytest.mark.unit
+    def test_retorna_medianoche_local_aware(self):
+        """El inicio del día es las 00:00 en la zona horaria del proyecto"""
+        resultado = inicio_dia(date(2026, 3, 15))
+        assert timezone.is_aware(resultado)
+        local = timezone.localtime(resultado)
+        assert local.date() == date(2026, 3, 15)
+        assert local.time() == time.min
+
+    @pytest.mark.unit
+    def test_acepta_datetime(self):
+        """Si recibe un datetime usa solo su fecha"""
+        assert inicio_dia(datetime(2026, 3, 15, 18, 30)) == inicio_dia(date(2026, 3, 15))
+
+    @pytest.mark.unit
+    def test_dia_con_cambio_de_horario(self):
+        """En Chile el primer domingo de septiembre de 2026 dura 23 horas"""
+        # Restar en UTC: la resta entre datetimes de la misma zona usa la hora de reloj
+        duracion = (
+            inicio_dia(date(2026, 9, 7)).astimezone(dt_timezone.utc)
+            - inicio_dia(date(2026, 9, 6)).astimezone(dt_timezone.utc)
+        )
+        assert duracion == timedelta(hours=23)
+
+
+class TestRangoFechas:
+    """Tests para rango_fechas y rango_dia"""
+
+    @pytest.mark.unit
+    def test_extremos_semiabiertos(self):
+        """desde es inclusivo (gte) y hasta se traduce a < día siguiente"""
+        q = rango_fechas("cierre", desde=date(2026, 1, 1), hasta=date(2026, 1, 31))
+        condiciones = dict(q.children)
+        assert condiciones["cierre__gte"] == inicio_dia(date(2026, 1, 1))
+        assert condiciones["cierre__lt"] == inicio_dia(date(2026, 2, 1))
+
+    @pytest.mark.unit
+    def test_sin_extremos_retorna_q_vacio(self):
+        """Sin desde ni hasta no filtra nada"""
+        assert not rango_fechas("cierre")
+
+    @pytest.mark.model
+    def test_equivalente_a_lookup_date(self, vehiculo, supervisor_user):
+        """rango_dia devuelve las mismas OT que cierre__date en hora local"""
+        dia = date(2026, 5, 10)
+        medianoche = inicio_dia(dia)
+        dentro_inicio = _crear_ot(vehiculo, supervisor_user, medianoche - timedelta(days=1), medianoche, "CERRADA")
+        dentro_fin = _crear_ot(
+            vehiculo, supervisor_user, medianoche - timedelta(days=1),
+            medianoche + timedelta(days=1) - timedelta(microseconds=1), "CERRADA"
+        )
+        _crear_ot(vehiculo, supervisor_user, medianoche - timedelta(days=1), medianoche - timedelta(microseconds=1), "CERRADA")
+        _crear_ot(vehiculo, supervisor_user, medianoche - timedelta(days=1), medianoche + timedelta(days=1), "CERRADA")
+
+        por_rango = set(OrdenTrabajo.objects.filter(rango_dia("cierre", dia)).values_list("id", flat=True))
+        por_date = set(OrdenTrabajo.objects.filter(cierre__date=dia).values_list("id", flat=True))
+
+        assert por_rango == por_date == {dentro_inicio.id, dentro_fin.id}
+
+    @pytest.mark.model
+    def test_rango_en_relacion(self, vehiculo, supervisor_user):
+        """Funciona con rutas a través de relaciones (ordenes__apertura)"""
+        from apps.vehicles.models import Vehiculo
+        dia = date(2026, 5, 10)
+        _crear_ot(vehiculo, supervisor_user, inicio_dia(dia) + timedelta(hours=10))
+
+        assert Vehiculo.objects.filter(rango_dia("ordenes__apertura", dia)).count() == 1
+        assert Vehiculo.objects.filter(rango_dia("ordenes__apertura", dia + timedelta(days=1))).count() == 0
+
+
+class TestRangoFechaFilter:
+    """Tests para RangoFechaFilter en OrdenTrabajoFilter"""
+
+    @pytest.mark.unit
+    def test_rechaza_lookup_no_soportado(self):
+        """Solo acepta comparaciones simples sobre la fecha"""
+        with pytest.raises(ValueError):
+            RangoFechaFilter(field_name="apertura", lookup_expr="date__gte")
+
+    @pytest.mark.model
+    def test_apertura_from_to(self, vehiculo, supervisor_user):
+        """apertura_from/apertura_to incluyen ambos días completos"""
+        dia = date(2026, 5, 10)
+        antes = _crear_ot(vehiculo, supervisor_user, inicio_dia(dia) - timedelta(minutes=1))
+        primera = _crear_ot(vehiculo, supervisor_user, inicio_dia(dia))
+        ultima = _crear_ot(vehiculo, supervisor_user, inicio_dia(dia + timedelta(days=2)) - timedelta(minutes=1))
+        despues = _crear_ot(vehiculo, supervisor_user, inicio_dia(dia + timedelta(days=2)))
+
+        filtro = OrdenTrabajoFilter(
+            data={"apertura_from": "2026-05-10", "apertura_to": "2026-05-11"},
+            queryset=OrdenTrabajo.objects.all(),
+        )
+        ids = set(filtro.qs.values_list("id", flat=True))
+
+        assert ids == {primera.id, ultima.id}
+        assert antes.id not in ids and despues.id not in ids
+
+
+class TestUsoDeIndices:
+    """EXPLAIN: los rangos usan los índices B-tree, los lookups __date no"""
+
+    @pytest.mark.model
+    def test_cierre_rango_usa_indice(self, db):
+        """El rango sobre cierre usa workorders__cierre_789004_idx"""
+        qs = OrdenTrabajo.objects.filter(rango_dia("cierre", timezone.localdate()), estado="CERRADA")
+        assert "workorders__cierre_789004_idx" in _plan(qs)
+
+    @pytest.mark.model
+    def test_cierre_date_no_usa_indice(self, db):
+        """El lookup __date castea la columna y no puede usar el índice (caso de contraste)"""
+        qs = OrdenTrabajo.objects.filter(cierre__date=timezone.localdate(), estado="CERRADA")
+        assert "workorders__cierre_789004_idx" not in _plan(qs)
+
+    @pytest.mark.model
+    def test_filtro_apertura_usa_indice(self, db):
+        """OrdenTrabajoFilter con apertura_from/to usa el índice de apertura"""
+        filtro = OrdenTrabajoFilter(
+            data={"apertura_from": "2026-05-01", "apertura_to": "2026-05-31"},
+            queryset=OrdenTrabajo.objects.all(),
+        )
+        assert "workorders__apertur_5d43a7_idx" in _plan(filtro.qs)
+
+    @pytest.mark.model
+    def test_ingresos_del_dia_usan_indice(self, db):
+        """Los ingresos del día usan el índice de fecha_ingreso"""
+        qs = IngresoVehiculo.objects.filter(rango_dia("fecha_ingreso", timezone.localdate()))
+        assert "vehicles_in_fecha_i_2d9cb4_idx" in _plan(qs)
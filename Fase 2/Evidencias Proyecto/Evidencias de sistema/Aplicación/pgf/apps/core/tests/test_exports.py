@@ -0,0 +1,137 @@
+# apps/core/tests/test_exports.py
+"""
+Tests para la exportación en streaming (apps/core/exports.py).
+
+Verifican que:
+- El CSV se emite por lotes, con BOM y valores formateados
+- Los textos que parecen fórmulas se escapan en el CSV
+- El XLSX es un ZIP válido con la hoja completa, aunque se escriba por lotes
+- ?formato= se valida
+- Bajo ASGI la respuesta es un iterador asíncrono que lee lote a lote
+"""
+
+import csv
+import io
+import zipfile
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncRequestFactory, RequestFactory
+
+from apps.core import exports
+
+
+def _filas(n):
+    return ((i, f"Fila {i}", Decimal("10.50"), None) for i in range(n))
+
+
+class TestCSV:
+    """Tests para generar_csv"""
+
+    @pytest.mark.unit
+    def test_bloques_por_lote(self):
+        bloques = list(exports.generar_csv(["ID", "Nombre", "Monto", "Vacío"], _filas(5), tamano=2))
+
+        # Encabezados + 3 lotes (2, 2, 1)
+        assert len(bloques) == 4
+        contenido = b"".join(bloques).decode("utf-8")
+        assert contenido.startswith("\ufeff")
+        filas = list(csv.reader(io.StringIO(contenido.lstrip("\ufeff"))))
+        assert filas[0] == ["ID", "Nombre", "Monto", "Vacío"]
+        assert filas[1] == ["0", "Fila 0", "10.50", ""]
+        assert len(filas) == 6
+
+    @pytest.mark.unit
+    def test_formato_de_valores(self):
+        ts = datetime(2026, 1, 15, 15, 0, tzinfo=dt_timezone.utc)
+        filas = [(ts, True, {"campo": "ñandú"}, "=HYPERLINK(\"x\")", -5)]
+
+        contenido = b"".join(exports.generar_csv(["a", "b", "c", "d", "e"], filas)).decode("utf-8")
+        fila = list(csv.reader(io.StringIO(contenido.lstrip("\ufeff"))))[1]
+
+        # Hora local de America/Santiago (UTC-3 en verano)
+        assert fila[0] == "2026-01-15 12:00:00"
+        assert fila[1] == "Sí"
+        assert fila[2] == '{"campo": "ñandú"}'
+        assert fila[3] == "'=HYPERLINK(\"x\")"
+        assert fila[4] == "-5"
+
+
+class TestXLSX:
+    """Tests para generar_xlsx"""
+
+    @pytest.mark.unit
+    def test_zip_valido_escrito_por_lotes(self):
+        bloques = list(exports.generar_xlsx(["ID", "Nombre", "Monto", "Vacío"], _filas(5), tamano=2))
+
+        assert len(bloques) > 1
+        archivo = zipfile.ZipFile(io.BytesIO(b"".join(bloques)))
+        assert archivo.testzip() is None
+        assert "xl/workbook.xml" in archivo.namelist()
+        hoja = archivo.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        assert hoja.count("<row ") == 6
+        assert '<c r="A2"><v>0</v></c>' in hoja
+        assert '<c r="C6"><v>10.50</v></c>' in hoja
+        assert "Fila 4" in hoja
+        assert hoja.endswith("</sheetData></worksheet>")
+
+    @pytest.mark.unit
+    def test_escapa_xml(self):
+        contenido = b"".join(exports.generar_xlsx(["<a>"], [("x & y\x01",)]))
+        hoja = zipfile.ZipFile(io.BytesIO(contenido)).read("xl/worksheets/sheet1.xml").decode("utf-8")
+        assert "&lt;a&gt;" in hoja
+        assert "x &amp; y</t>" in hoja
+
+    @pytest.mark.unit
+    def test_columnas(self):
+        assert [exports._columna(i) for i in (0, 25, 26, 701, 702)] == ["A", "Z", "AA", "ZZ", "AAA"]
+
+
+class TestFormato:
+    """Tests para formato_desde y respuesta"""
+
+    @pytest.mark.unit
+    def test_formato(self):
+        request = MagicMock(query_params={"formato": "XLSX"})
+        assert exports.formato_desde(request) == "xlsx"
+        assert exports.formato_desde(MagicMock(query_params={})) == "csv"
+        with pytest.raises(exports.FormatoInvalido):
+            exports.formato_desde(MagicMock(query_params={"formato": "pdf"}))
+
+    @pytest.mark.unit
+    def test_respuesta_streaming(self):
+        response = exports.respuesta(["ID"], iter([(1,)]), "prueba", "csv")
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        assert 'filename="prueba_' in response["Content-Disposition"]
+        assert response["Content-Disposition"].endswith('.csv"')
+
+    @pytest.mark.unit
+    def test_asgi_lee_por_lotes(self):
+        """Con ASGI el primer bloque sale sin leer todas las filas"""
+        leidas = []
+
+        def filas():
+            for i in range(3 * exports.TAMANO_LOTE):
+                leidas.append(i)
+                yield (i,)
+
+        wsgi = exports.respuesta(["ID"], filas(), "prueba", "csv", RequestFactory().get("/"))
+        response = exports.respuesta(["ID"], filas(), "prueba", "csv", AsyncRequestFactory().get("/"))
+
+        @async_to_sync
+        async def primeros_bloques():
+            iterador = aiter(response)
+            bloques = [await anext(iterador), await anext(iterador)]
+            await iterador.aclose()
+            return bloques
+
+        assert not wsgi.is_async
+        assert response.is_async
+        encabezado, primer_lote = primeros_bloques()
+        assert encabezado.startswith("\ufeffID".encode("utf-8"))
+        assert primer_lote.count(b"\n") == exports.TAMANO_LOTE
+        assert len(leidas) <= 2 * exports.TAMANO_LOTE
@@ -0,0 +1,85 @@
+# apps/core/tests/test_ids.py
+"""
+Tests para el generador de UUIDv7 (apps/core/ids.py) y su uso como PK.
+"""
+
+import time
+import uuid
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from apps.core.ids import uuid7, uuid7_timestamp
+from apps.notifications.models import Notification
+from apps.workorders.models import OrdenTrabajo
+
+
+class TestUuid7:
+    """Tests para uuid7"""
+
+    @pytest.mark.unit
+    def test_version_y_variante(self):
+        """Genera UUID versión 7 con la variante RFC"""
+        valor = uuid7()
+        assert isinstance(valor, uuid.UUID)
+        assert valor.version == 7
+        assert valor.variant == uuid.RFC_4122
+
+    @pytest.mark.unit
+    def test_orden_creciente(self):
+        """Valores generados en secuencia (incluso en el mismo ms) son estrictamente crecientes"""
+        valores = [uuid7() for _ in range(10_000)]
+        assert valores == sorted(valores)
+        assert len(set(valores)) == len(valores)
+        # El orden también se mantiene como texto, que es como lo ve la API
+        textos = [str(v) for v in valores]
+        assert textos == sorted(textos)
+
+    @pytest.mark.unit
+    def test_timestamp_embebido(self):
+        """El timestamp del UUID corresponde a la hora de generación"""
+        antes = time.time()
+        valor = uuid7()
+        despues = time.time()
+        assert antes - 0.001 <= uuid7_timestamp(valor) <= despues + 0.001
+
+    @pytest.mark.unit
+    def test_timestamp_rechaza_otras_versiones(self):
+        """uuid7_timestamp solo acepta UUIDv7"""
+        with pytest.raises(ValueError):
+            uuid7_timestamp(uuid.uuid4())
+
+
+class TestPkModelos:
+    """Los modelos de alta inserción usan UUIDv7 como PK por defecto"""
+
+    @pytest.mark.model
+    def test_orden_trabajo(self, orden_trabajo):
+        """Las OT nuevas tienen PK versión 7"""
+        assert orden_trabajo.id.version == 7
+        assert OrdenTrabajo.objects.get(pk=str(orden_trabajo.id)) == orden_trabajo
+
+    @pytest.mark.model
+    def test_notificaciones_en_orden_de_creacion(self, admin_user):
+        """Ordenar por PK equivale a ordenar por creación"""
+        creadas = [
+            Notification.objects.create(usuario=admin_user, tipo="GENERAL", titulo=f"N{i}", mensaje="m")
+            for i in range(5)
+        ]
+        por_pk = list(Notification.objects.filter(usuario=admin_user).order_by("id"))
+        assert por_pk == creadas
+
+
+class TestBenchmarkCommand:
+    """Tests para el comando benchmark_uuid_pk"""
+
+    @pytest.mark.model
+    def test_reporta_ambos_generadores(self, db):
+        """El comando inserta en tablas temporales y reporta uuid4 y uuid7"""
+        salida = StringIO()
+        call_command("benchmark_uuid_pk", filas=500, lote=100, stdout=salida)
+        texto = salida.getvalue()
+        assert "uuid4:" in texto
+        assert "uuid7:" in texto
+        assert "índice PK" in texto
@@ -4,6 +4,7 @@ from django.conf import settings
 from apps.vehicles.models import Vehiculo
 from apps.workorders.models import OrdenTrabajo, ItemOT
 import uuid
+from apps.core.ids import uuid7
 
 
 class Repuesto(models.Model):
@@ -63,7 +64,7 @@ class MovimientoStock(models.Model):
         AJUSTE = "AJUSTE", "Ajuste"
         DEVOLUCION = "DEVOLUCION", "Devolución"
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     repuesto = models.ForeignKey(Repuesto, on_delete=models.PROTECT, related_name="movimientos")
     tipo = models.CharField(max_length=20, choices=TipoMovimiento.choices)
     cantidad = models.PositiveIntegerField()
@@ -0,0 +1,64 @@
+# apps/inventory/tests/test_exportacion.py
+"""
+Tests para la exportación de movimientos de stock e historial de repuestos.
+"""
+
+import csv
+import io
+
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.inventory.models import HistorialRepuestoVehiculo, MovimientoStock
+
+
+def _cliente(usuario):
+    client = APIClient()
+    client.force_authenticate(user=usuario)
+    return client
+
+
+def _csv(response):
+    assert response.status_code == status.HTTP_200_OK
+    contenido = b"".join(response.streaming_content).decode("utf-8").lstrip("\ufeff")
+    return list(csv.DictReader(io.StringIO(contenido)))
+
+
+class TestExportacionInventario:
+    """Tests para ExportacionInventarioMixin"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_movimientos_con_filtros(self, bodega_user, repuesto):
+        for tipo in ("ENTRADA", "SALIDA", "ENTRADA"):
+            MovimientoStock.objects.create(
+                repuesto=repuesto, tipo=tipo, cantidad=5, cantidad_anterior=10,
+                cantidad_nueva=15, usuario=bodega_user
+            )
+
+        filas = _csv(_cliente(bodega_user).get("/api/v1/inventory/movimientos/exportar/?tipo=ENTRADA"))
+
+        assert len(filas) == 2
+        assert {f["Tipo"] for f in filas} == {"ENTRADA"}
+        assert filas[0]["Código repuesto"] == repuesto.codigo
+        assert filas[0]["Usuario"] == bodega_user.username
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_historial(self, admin_user, repuesto, vehiculo, orden_trabajo):
+        HistorialRepuestoVehiculo.objects.create(
+            vehiculo=vehiculo, repuesto=repuesto, cantidad=2, ot=orden_trabajo
+        )
+
+        filas = _csv(_cliente(admin_user).get("/api/v1/inventory/historial/exportar/"))
+
+        assert [(f["Patente"], f["Cantidad"], f["OT"]) for f in filas] == [
+            (vehiculo.patente, "2", str(orden_trabajo.id))
+        ]
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_roles(self, mecanico_user):
+        response = _cliente(mecanico_user).get("/api/v1/inventory/movimientos/exportar/")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -17,6 +17,52 @@ from apps.workorders.models import Auditoria
 from apps.core.audit_logging import log_audit
 
 
+# Roles que pueden exportar movimientos de stock e historial de repuestos
+ROLES_EXPORTACION_INVENTARIO = ("ADMIN", "BODEGA", "JEFE_TALLER", "ADMINISTRATIVO_TALLER", "EJECUTIVO")
+
+
+class ExportacionInventarioMixin:
+    """
+    Acción GET exportar/ en streaming (CSV o XLSX) para los viewsets de inventario.
+
+    El viewset define COLUMNAS_EXPORTACION (encabezado, lookup) y
+    NOMBRE_EXPORTACION. Se aplican los mismos filtros y orden que el listado
+    (filter_queryset) y solo pueden exportar ROLES_EXPORTACION_INVENTARIO.
+    """
+    COLUMNAS_EXPORTACION = ()
+    NOMBRE_EXPORTACION = "exportacion"
+
+    @extend_schema(
+        description=(
+            "Exporta en CSV (?formato=csv) o XLSX (?formato=xlsx), en streaming, "
+            "con los mismos filtros y orden que el listado."
+        ),
+        responses={200: None}
+    )
+    @action(detail=False, methods=["get"], url_path="exportar")
+    def exportar(self, request):
+        from apps.core import exports
+
+        if request.user.rol not in ROLES_EXPORTACION_INVENTARIO:
+            return Response(
+                {"detail": "No tiene permisos para exportar inventario."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            formato = exports.formato_desde(request)
+        except exports.FormatoInvalido as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return exports.respuesta(
+            [c[0] for c in self.COLUMNAS_EXPORTACION],
+            exports.filas(queryset, [c[1] for c in self.COLUMNAS_EXPORTACION]),
+            self.NOMBRE_EXPORTACION,
+            formato,
+            request,
+        )
+
+
 class RepuestoViewSet(viewsets.ModelViewSet):
     """
     ViewSet para gestión de repuestos (catálogo).
@@ -275,7 +321,7 @@ class StockViewSet(viewsets.ModelViewSet):
         return Response(StockSerializer(stock).data)
 
 
-class MovimientoStockViewSet(viewsets.ModelViewSet):
+class MovimientoStockViewSet(ExportacionInventarioMixin, viewsets.ModelViewSet):
     queryset = MovimientoStock.objects.select_related(
         'repuesto', 'usuario', 'ot', 'vehiculo'
     )
@@ -286,6 +332,21 @@ class MovimientoStockViewSet(viewsets.ModelViewSet):
     filterset_fields = ["tipo", "repuesto", "ot", "vehiculo"]
     ordering_fields = ["fecha"]
 
+    NOMBRE_EXPORTACION = "movimientos_stock"
+    COLUMNAS_EXPORTACION = (
+        ("Fecha", "fecha"),
+        ("Tipo", "tipo"),
+        ("Código repuesto", "repuesto__codigo"),
+        ("Repuesto", "repuesto__nombre"),
+        ("Cantidad", "cantidad"),
+        ("Stock anterior", "cantidad_anterior"),
+        ("Stock nuevo", "cantidad_nueva"),
+        ("Motivo", "motivo"),
+        ("Usuario", "usuario__username"),
+        ("OT", "ot_id"),
+        ("Patente", "vehiculo__patente"),
+    )
+
 
 class SolicitudRepuestoViewSet(viewsets.ModelViewSet):
     queryset = SolicitudRepuesto.objects.select_related(
@@ -500,7 +561,7 @@ class SolicitudRepuestoViewSet(viewsets.ModelViewSet):
         return Response(SolicitudRepuestoSerializer(solicitud).data)
 
 
-class HistorialRepuestoVehiculoViewSet(viewsets.ReadOnlyModelViewSet):
+class HistorialRepuestoVehiculoViewSet(ExportacionInventarioMixin, viewsets.ReadOnlyModelViewSet):
     queryset = HistorialRepuestoVehiculo.objects.select_related(
         'vehiculo', 'repuesto', 'ot'
     )
@@ -511,3 +572,14 @@ class HistorialRepuestoVehiculoViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_fields = ["vehiculo", "repuesto", "ot"]
     ordering_fields = ["fecha_uso"]
 
+    NOMBRE_EXPORTACION = "historial_repuestos"
+    COLUMNAS_EXPORTACION = (
+        ("Fecha de uso", "fecha_uso"),
+        ("Patente", "vehiculo__patente"),
+        ("Código repuesto", "repuesto__codigo"),
+        ("Repuesto", "repuesto__nombre"),
+        ("Cantidad", "cantidad"),
+        ("Costo unitario", "costo_unitario"),
+        ("OT", "ot_id"),
+    )
+
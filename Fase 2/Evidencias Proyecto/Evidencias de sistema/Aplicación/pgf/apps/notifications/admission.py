@@ -0,0 +1,157 @@
+# apps/notifications/admission.py
+"""
+Autenticación y admisión de conexiones WebSocket (NotificationConsumer).
+
+Tras un deploy o un corte de red cientos de clientes se reconectan a la
+vez. Para que esa tormenta no llegue a PostgreSQL:
+
+- usuario_de_token(): valida el JWT en una sola pasada (UntypedToken ya
+  verifica firma y expiración; no se decodifica de nuevo) y lee el estado
+  activo y el rol del usuario desde la caché (WS_CACHE_USUARIO_SEGUNDOS);
+  solo un fallo de caché consulta la base de datos. La entrada se invalida
+  al guardar o borrar el usuario (apps/notifications/signals.py)
+- admitir_conexion(): límite global de conexiones nuevas por segundo
+  (WS_MAX_CONEXIONES_POR_SEGUNDO), compartido entre procesos vía caché
+- admitir_usuario() / renovar_usuario() / liberar_usuario(): tope de
+  conexiones simultáneas por usuario (WS_MAX_CONEXIONES_POR_USUARIO). Cada
+  conexión ocupa uno de los WS_MAX_CONEXIONES_POR_USUARIO lugares del
+  usuario en la caché, con una vida corta (WS_PRESENCIA_SEGUNDOS) que el
+  consumer renueva mientras sigue abierta. Si un proceso muere sin
+  desconectar sus clientes (deploy, caída), sus lugares expiran solos en
+  segundos y los clientes que reconectan no quedan bloqueados
+- reintento_sugerido(): segundos que el cliente debe esperar antes de
+  reintentar, con jitter para que los reintentos no vuelvan a llegar juntos
+
+Las funciones son síncronas (caché y ORM); el consumer las llama con
+database_sync_to_async.
+
+Relaciones:
+- Usado por: apps/notifications/consumers.py, apps/notifications/signals.py
+"""
+
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+User = get_user_model()
+
+# Motivos de rechazo (se envían al cliente en connection_rejected)
+SOBRECARGA = "server_busy"
+DEMASIADAS_CONEXIONES = "too_many_connections"
+
+
+
+def clave_usuario(usuario_id):
+    """Clave de caché del estado del usuario para WebSocket."""
+    return f"ws:usuario:{usuario_id}"
+
+
+def _claves_lugares(usuario_id):
+    return [f"ws:conexiones:{usuario_id}:{n}" for n in range(settings.WS_MAX_CONEXIONES_POR_USUARIO)]
+
+
+def _lugar_de(usuario_id, conexion_id):
+    """Clave del lugar que ocupa la conexión, o None si no tiene (expiró)."""
+    ocupados = cache.get_many(_claves_lugares(usuario_id))
+    return next((clave for clave, ocupante in ocupados.items() if ocupante == conexion_id), None)
+
+
+def usuario_de_token(token):
+    """
+    Usuario activo dueño de un JWT, o None si el token o el usuario no son válidos.
+
+    Retorna:
+    - Instancia de User (sin guardar) con id, rol e is_active, suficiente
+      para unirse a los grupos (apps/notifications/realtime.py)
+    """
+    try:
+        usuario_id = UntypedToken(token).payload.get(api_settings.USER_ID_CLAIM)
+    except TokenError:
+        return None
+    if not usuario_id:
+        return None
+
+    clave = clave_usuario(usuario_id)
+    datos = cache.get(clave)
+    if datos is None:
+        fila = User.objects.filter(id=usuario_id).values("id", "rol", "is_active").first()
+        # Los usuarios inexistentes también se cachean (como inactivos)
+        datos = fila or {"id": usuario_id, "rol": None, "is_active": False}
+        cache.set(clave, datos, settings.WS_CACHE_USUARIO_SEGUNDOS)
+    if not datos["is_active"]:
+        return None
+    return User(id=datos["id"], rol=datos["rol"], is_active=True)
+
+
+def invalidar_usuario(usuario_id):
+    """Descarta el estado cacheado del usuario (cambió su rol o su estado activo)."""
+    cache.delete(clave_usuario(usuario_id))
+
+
+def admitir_conexion():
+    """
+    Cuenta una conexión nueva contra el límite global por segundo.
+
+    Retorna:
+    - None si se admite, o SOBRECARGA
+    """
+    clave = f"ws:admision:{int(time.time())}"
+    cache.add(clave, 0, 5)
+    try:
+        conexiones = cache.incr(clave)
+    except ValueError:
+        # La clave expiró entre add() e incr(): se admite
+        return None
+    return SOBRECARGA if conexiones > settings.WS_MAX_CONEXIONES_POR_SEGUNDO else None
+
+
+def admitir_usuario(usuario_id, conexion_id):
+    """
+    Reserva un lugar para una conexión del usuario si no superó su tope.
+
+    Parámetros:
+    - usuario_id: Id del usuario
+    - conexion_id: Identificador único de la conexión (channel_name)
+
+    Retorna:
+    - None si se admite (renovar con renovar_usuario() y liberar con
+      liberar_usuario()), o DEMASIADAS_CONEXIONES
+    """
+    claves = _claves_lugares(usuario_id)
+    ocupados = cache.get_many(claves)
+    for clave in claves:
+        # add() es atómico: dos conexiones simultáneas no toman el mismo lugar
+        if clave not in ocupados and cache.add(clave, conexion_id, settings.WS_PRESENCIA_SEGUNDOS):
+            return None
+    return DEMASIADAS_CONEXIONES
+
+
+def renovar_usuario(usuario_id, conexion_id):
+    """
+    Extiende la vida del lugar de una conexión abierta.
+
+    Si el lugar ya expiró (p. ej. se vació la caché) se vuelve a tomar uno
+    libre; la conexión ya admitida no se cierra aunque no quede ninguno.
+    """
+    clave = _lugar_de(usuario_id, conexion_id)
+    if clave is None or not cache.touch(clave, settings.WS_PRESENCIA_SEGUNDOS):
+        admitir_usuario(usuario_id, conexion_id)
+
+
+def liberar_usuario(usuario_id, conexion_id):
+    """Libera el lugar reservado con admitir_usuario()."""
+    clave = _lugar_de(usuario_id, conexion_id)
+    if clave is not None:
+        cache.delete(clave)
+
+
+def reintento_sugerido():
+    """Segundos a esperar antes de reconectar: entre 1x y 3x WS_REINTENTO_BASE_SEGUNDOS."""
+    base = settings.WS_REINTENTO_BASE_SEGUNDOS
+    return round(random.uniform(base, 3 * base), 1)
@@ -10,3 +10,6 @@ class NotificationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.notifications'
 
+    def ready(self):
+        # Conectar señales que invalidan la caché de usuarios de WebSocket
+        from . import signals  # noqa: F401
@@ -3,18 +3,27 @@ Consumers de WebSocket para notificaciones en tiempo real.
 
 Este módulo define el consumer que maneja las conexiones WebSocket
 para enviar notificaciones en tiempo real a los usuarios.
+
+Cada conexión se une al grupo de su usuario, al de su rol y (coordinadores)
+a los de sus zonas; ver apps/notifications/realtime.py.
+
+La autenticación y la admisión (límites ante tormentas de reconexión) están
+en apps/notifications/admission.py.
 """
 
+import asyncio
 import json
+
+from django.conf import settings
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.tokens import UntypedToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from django.conf import settings
-import jwt
 
-User = get_user_model()
+from . import admission
+from .realtime import grupos_de_conexion
+from .subscriptions import Suscripcion, SuscripcionInvalida
+
+# Código de cierre WebSocket "Try Again Later" (RFC 6455, registro IANA)
+CIERRE_REINTENTAR = 1013
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
@@ -22,8 +31,9 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     Consumer de WebSocket para notificaciones en tiempo real.
     
     Maneja:
-    - Conexión y autenticación de usuarios
-    - Suscripción a notificaciones del usuario
+    - Conexión, admisión y autenticación de usuarios
+    - Suscripción a los grupos del usuario, de su rol y de sus zonas
+    - Filtros de suscripción por tipo de entidad, ids y zona (subscribe/unsubscribe)
     - Envío de notificaciones en tiempo real
     - Desconexión y limpieza
     """
@@ -32,8 +42,16 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """
         Maneja la conexión WebSocket.
         
-        Autentica al usuario usando JWT token y lo suscribe
-        a un grupo de notificaciones específico para su usuario.
+        Autentica al usuario usando JWT token y lo suscribe al grupo
+        de notificaciones de su usuario, al de su rol y, si corresponde,
+        a los de sus zonas.
+        
+        Los grupos se fijan al conectar: un cambio de rol o de zonas se
+        refleja en la siguiente conexión.
+        
+        Si el servidor está recibiendo demasiadas conexiones por segundo, o
+        el usuario ya tiene su tope de conexiones abiertas, la conexión se
+        rechaza con un connection_rejected que indica cuándo reintentar.
         """
         # Obtener token de los query params
         token = self.scope.get("query_string", b"").decode().split("token=")[-1].split("&")[0]
@@ -42,24 +60,45 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
         
+        # Límite global antes de tocar caché de usuarios o base de datos
+        rechazo = await database_sync_to_async(admission.admitir_conexion)()
+        if rechazo:
+            await self.reject(rechazo)
+            return
+        
         # Autenticar usuario
         user = await self.authenticate_user(token)
         if not user:
             await self.close()
             return
         
+        # Tope de conexiones simultáneas del usuario
+        rechazo = await database_sync_to_async(admission.admitir_usuario)(user.id, self.channel_name)
+        if rechazo:
+            await self.reject(rechazo)
+            return
+        self.admitted = True
+        self.user_id = user.id
+        
+        # El lugar en el tope expira si no se renueva (proceso caído)
+        self.presence_task = asyncio.create_task(self.renew_presence())
+        
+        # Sin filtros: recibe todas las actualizaciones de sus grupos
+        self.subscription = Suscripcion()
+        
         # Guardar usuario en scope
         self.scope["user"] = user
-        self.user_id = user.id
         
-        # Nombre del grupo para este usuario
-        self.group_name = f"notifications_{self.user_id}"
+        # Grupos de esta conexión (el primero es el del usuario)
+        self.groups_joined = await database_sync_to_async(grupos_de_conexion)(user)
+        self.group_name = self.groups_joined[0]
         
-        # Unirse al grupo
-        await self.channel_layer.group_add(
-            self.group_name,
-            self.channel_name
-        )
+        # Unirse a los grupos
+        for group_name in self.groups_joined:
+            await self.channel_layer.group_add(
+                group_name,
+                self.channel_name
+            )
         
         # Aceptar conexión
         await self.accept()
@@ -74,19 +113,35 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """
         Maneja la desconexión WebSocket.
         
-        Remueve al usuario del grupo de notificaciones.
+        Remueve la conexión de todos los grupos a los que se unió y
+        libera su lugar en el tope de conexiones del usuario.
         """
-        if hasattr(self, "group_name"):
+        if getattr(self, "admitted", False):
+            self.presence_task.cancel()
+            await database_sync_to_async(admission.liberar_usuario)(self.user_id, self.channel_name)
+        for group_name in getattr(self, "groups_joined", []):
             await self.channel_layer.group_discard(
-                self.group_name,
+                group_name,
                 self.channel_name
             )
     
+    async def renew_presence(self):
+        """
+        Renueva el lugar de la conexión en el tope del usuario cada un
+        tercio de WS_PRESENCIA_SEGUNDOS, hasta que se desconecte.
+        """
+        while True:
+            await asyncio.sleep(settings.WS_PRESENCIA_SEGUNDOS / 3)
+            await database_sync_to_async(admission.renovar_usuario)(self.user_id, self.channel_name)
+    
     async def receive(self, text_data):
         """
         Maneja mensajes recibidos del cliente.
         
-        Por ahora solo responde a pings para mantener la conexión viva.
+        - ping: responde pong para mantener la conexión viva
+        - subscribe / unsubscribe: ajusta los filtros de actualizaciones de
+          esta conexión (ver apps/notifications/subscriptions.py) y responde
+          subscribed con los filtros activos, o subscription_error
         """
         try:
             data = json.loads(text_data)
@@ -97,7 +152,23 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                     "type": "pong",
                     "message": "pong"
                 }))
-        except json.JSONDecodeError:
+            elif message_type in ("subscribe", "unsubscribe"):
+                try:
+                    if message_type == "subscribe":
+                        self.subscription.suscribir(data)
+                    else:
+                        self.subscription.desuscribir(data)
+                except SuscripcionInvalida as e:
+                    await self.send(text_data=json.dumps({
+                        "type": "subscription_error",
+                        "message": str(e)
+                    }))
+                    return
+                await self.send(text_data=json.dumps({
+                    "type": "subscribed",
+                    "subscription": self.subscription.como_dict()
+                }))
+        except (json.JSONDecodeError, AttributeError):
             pass
     
     async def notification_message(self, event):
@@ -122,9 +193,21 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         Este método es llamado cuando se envía una actualización de datos
         (OT, vehículo, asignación, etc.) al grupo del usuario.
         
+        Las actualizaciones que no pasan los filtros de suscripción de la
+        conexión se descartan aquí, sin enviarlas al cliente.
+        
+        Las que vienen del despachador traen el JSON ya armado ("frame",
+        ver apps/notifications/payloads.py) y se reenvían sin serializar de
+        nuevo; las demás se serializan aquí.
+        
         Parámetros:
         - event: Diccionario con los datos de la actualización
         """
+        if not self.subscription.acepta(event):
+            return
+        if "frame" in event:
+            await self.send(text_data=event["frame"])
+            return
         await self.send(text_data=json.dumps({
             "type": "data_update",
             "entity_type": event.get("entity_type"),  # "workorder", "vehicle", "assignment", etc.
@@ -133,6 +216,37 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             "data": event.get("data")
         }))
     
+    async def data_update_batch(self, event):
+        """
+        Maneja un lote de actualizaciones agrupadas (apps/notifications/dispatcher.py).
+        
+        El channel layer entrega un solo mensaje con todas las entidades
+        actualizadas; al cliente se le reenvían como data_update individuales.
+        
+        Parámetros:
+        - event: Diccionario con la lista "updates" de actualizaciones
+        """
+        for update in event.get("updates", []):
+            await self.data_update(update)
+    
+    async def reject(self, reason):
+        """
+        Rechaza la conexión indicando al cliente cuándo reintentar.
+        
+        Se acepta la conexión solo para enviar el motivo y el tiempo de
+        espera sugerido (con jitter) y luego se cierra con código 1013.
+        
+        Parámetros:
+        - reason: Motivo del rechazo (admission.SOBRECARGA o admission.DEMASIADAS_CONEXIONES)
+        """
+        await self.accept()
+        await self.send(text_data=json.dumps({
+            "type": "connection_rejected",
+            "reason": reason,
+            "retry_after": admission.reintento_sugerido()
+        }))
+        await self.close(code=CIERRE_REINTENTAR)
+    
     @database_sync_to_async
     def authenticate_user(self, token):
         """
@@ -142,26 +256,8 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         - token: Token JWT como string
         
         Retorna:
-        - User object si el token es válido, None en caso contrario
+        - User (id, rol, is_active) si el token es válido y el usuario está
+          activo, None en caso contrario. El token se valida una sola vez y
+          el usuario se lee de la caché (ver admission.usuario_de_token)
         """
-        try:
-            # Validar token
-            UntypedToken(token)
-            
-            # Decodificar token para obtener user_id
-            decoded_data = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            user_id = decoded_data.get("user_id")
-            
-            if not user_id:
-                return None
-            
-            # Obtener usuario
-            try:
-                user = User.objects.get(id=user_id, is_active=True)
-                return user
-            except User.DoesNotExist:
-                return None
-                
-        except (InvalidToken, TokenError, jwt.DecodeError, jwt.InvalidTokenError):
-            return None
-
+        return admission.usuario_de_token(token)
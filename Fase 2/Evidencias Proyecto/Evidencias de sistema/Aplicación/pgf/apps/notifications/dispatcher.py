@@ -0,0 +1,292 @@
+# apps/notifications/dispatcher.py
+"""
+Despacho agrupado de actualizaciones en tiempo real (data_update).
+
+Una acción sobre una OT suele disparar varias actualizaciones en pocos
+milisegundos (cambio de estado, item, evidencia, comentario, y la OT de
+nuevo por cada uno). En vez de enviar cada una por separado, publicar()
+las acumula en un buffer y las agrupa por destinatario (grupo del channel
+layer) y entidad (entity_type, entity_id):
+
+- La misma entidad publicada varias veces para un grupo se fusiona: queda
+  la última acción y los datos combinados (los más recientes ganan)
+- Cada grupo recibe UN mensaje: data_update si hay una sola entidad, o
+  data_update_batch con todas (NotificationConsumer las reenvía al cliente
+  como data_update individuales)
+
+Cuándo se vacía el buffer:
+- Dentro de agrupar() (ActualizacionesAgrupadasMiddleware lo abre por
+  request): al salir del bloque, o al confirmar la transacción si se sale
+  dentro de una
+- Fuera de agrupar() pero dentro de una transacción: al confirmarla
+  (transaction.on_commit); si se revierte, las actualizaciones se descartan
+- Fuera de ambos: se despacha de inmediato (sin agrupar)
+
+agrupar(ventana=segundos) además vacía el buffer cada `ventana` segundos
+(debounce), para ráfagas en tareas largas como la colación automática.
+
+Envío fuera del hilo del request (despachar()):
+Vaciar el buffer no envía nada: deja los mensajes en una cola en memoria
+del proceso (acotada a REALTIME_COLA_MAXIMA lotes). Un hilo despachador
+con su propio event loop la consume y envía todos los group_send
+pendientes de forma concurrente (asyncio.gather), cada uno con un timeout
+de REALTIME_TIMEOUT_ENVIO segundos. Así la latencia de la API no depende
+de la salud de Redis: si está lento o caído, los mensajes se atrasan o se
+descartan (con log), pero el request no espera. El envío era y sigue
+siendo "best effort": lo pendiente en la cola se pierde si el proceso muere.
+
+Con REALTIME_ENVIO_EN_SEGUNDO_PLANO = False se envía en el mismo hilo
+(los tests lo usan para verificar los envíos).
+
+Payloads (apps/notifications/payloads.py): al vaciar, las OT y vehículos
+se convierten en diferencias versionadas (una por entidad, no por grupo),
+y antes de enviar cada data_update se serializa una sola vez como trama
+JSON que los consumers reenvían sin volver a serializar.
+
+Relaciones:
+- Usado por: apps/notifications/realtime.py, apps/notifications/middleware.py,
+  apps/workorders/tasks_colacion.py
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+
+from . import payloads
+
+logger = logging.getLogger(__name__)
+
+# Buffer de agrupar() activo en el contexto actual (request o tarea)
+_buffer_activo = ContextVar("realtime_buffer", default=None)
+
+
+class _Buffer:
+    """Actualizaciones pendientes, por grupo y entidad."""
+
+    def __init__(self, ventana=None):
+        self.ventana = ventana
+        self.channel_layer = None
+        # grupo -> {(entity_type, entity_id): mensaje}, en orden de llegada
+        self.pendientes = {}
+        # (entity_type, entity_id) -> mensaje fusionado de todos los grupos
+        self.entidades = {}
+        self.desde = None
+
+    def agregar(self, channel_layer, grupos, mensaje):
+        self.channel_layer = channel_layer
+        if self.desde is None:
+            self.desde = time.monotonic()
+        clave = (mensaje.get("entity_type"), mensaje.get("entity_id"))
+        for grupo in grupos:
+            por_entidad = self.pendientes.setdefault(grupo, {})
+            anterior = por_entidad.get(clave)
+            por_entidad[clave] = _fusionar(anterior, mensaje) if anterior else mensaje
+        anterior = self.entidades.get(clave)
+        self.entidades[clave] = _fusionar(anterior, mensaje) if anterior else mensaje
+
+    def vencido(self):
+        return self.ventana is not None and self.desde is not None and (
+            time.monotonic() - self.desde >= self.ventana
+        )
+
+    def vaciar(self):
+        pendientes, self.pendientes, self.desde = self.pendientes, {}, None
+        entidades, self.entidades = self.entidades, {}
+        if not pendientes:
+            return
+        # Una diferencia versionada por entidad, compartida por todos sus grupos
+        versionados = payloads.versionar(entidades)
+        envios = []
+        for grupo, por_entidad in pendientes.items():
+            mensajes = [versionados.get(clave, mensaje) for clave, mensaje in por_entidad.items()]
+            if len(mensajes) == 1:
+                envios.append((grupo, mensajes[0]))
+            else:
+                envios.append((grupo, {"type": "data_update_batch", "updates": mensajes}))
+        despachar(self.channel_layer, envios)
+
+
+class _Despachador:
+    """
+    Cola en memoria + hilo con event loop propio que envía al channel layer.
+
+    El hilo se crea al primer envío (y de nuevo en cada proceso hijo tras
+    un fork: gunicorn, workers de Celery).
+    """
+
+    def __init__(self):
+        self.pid = None
+        self.cola = None
+        self.hilo = None
+        self.candado = threading.Lock()
+
+    def _iniciar(self):
+        with self.candado:
+            if self.pid == os.getpid() and self.hilo.is_alive():
+                return
+            self.pid = os.getpid()
+            self.cola = queue.Queue(maxsize=settings.REALTIME_COLA_MAXIMA)
+            self.hilo = threading.Thread(target=self._bucle, name="realtime-despachador", daemon=True)
+            self.hilo.start()
+
+    def encolar(self, channel_layer, envios):
+        if self.pid != os.getpid() or not self.hilo.is_alive():
+            self._iniciar()
+        try:
+            self.cola.put_nowait((channel_layer, envios))
+        except queue.Full:
+            logger.warning(f"Cola de tiempo real llena: se descartan {len(envios)} mensajes WebSocket")
+
+    def _bucle(self):
+        # Un event loop propio y persistente (el channel layer de Redis
+        # mantiene sus conexiones por loop)
+        loop = asyncio.new_event_loop()
+        cola = self.cola
+        while True:
+            # Espera el primer lote y toma todo lo que se haya acumulado
+            lotes = [cola.get()]
+            while True:
+                try:
+                    lotes.append(cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                # Las tramas JSON se arman aquí, fuera del hilo del request
+                lotes = [(channel_layer, payloads.empaquetar(envios)) for channel_layer, envios in lotes]
+                loop.run_until_complete(_enviar_lotes(lotes))
+            finally:
+                for _ in lotes:
+                    cola.task_done()
+
+    def esperar(self):
+        """Bloquea hasta que la cola se vacíe (tests y apagado ordenado)."""
+        if self.cola is not None and self.pid == os.getpid():
+            self.cola.join()
+
+
+async def _enviar_lotes(lotes):
+    """Envía concurrentemente todos los (grupo, mensaje) de los lotes."""
+    timeout = settings.REALTIME_TIMEOUT_ENVIO
+    envios = [
+        asyncio.wait_for(channel_layer.group_send(grupo, mensaje), timeout)
+        for channel_layer, pares in lotes
+        for grupo, mensaje in pares
+    ]
+    resultados = await asyncio.gather(*envios, return_exceptions=True)
+    errores = [r for r in resultados if isinstance(r, BaseException)]
+    if errores:
+        logger.error(
+            f"Error al enviar {len(errores)} de {len(resultados)} mensajes por WebSocket: {errores[0]!r}"
+        )
+
+
+_despachador = _Despachador()
+
+
+def despachar(channel_layer, envios):
+    """
+    Envía [(grupo, mensaje), ...] al channel layer sin bloquear al llamador.
+
+    Con REALTIME_ENVIO_EN_SEGUNDO_PLANO = False envía en el mismo hilo.
+    """
+    if not envios:
+        return
+    if settings.REALTIME_ENVIO_EN_SEGUNDO_PLANO:
+        _despachador.encolar(channel_layer, envios)
+        return
+    try:
+        group_send = async_to_sync(channel_layer.group_send)
+        for grupo, mensaje in payloads.empaquetar(envios):
+            group_send(grupo, mensaje)
+    except Exception as e:
+        logger.error(f"Error al enviar actualizaciones por WebSocket: {e}")
+
+
+def esperar_envios():
+    """Bloquea hasta que el despachador en segundo plano envíe lo encolado."""
+    _despachador.esperar()
+
+
+def _fusionar(anterior, nuevo):
+    """Fusiona dos actualizaciones de la misma entidad (la nueva gana)."""
+    datos = nuevo.get("data")
+    if isinstance(anterior.get("data"), dict) and isinstance(datos, dict):
+        datos = {**anterior["data"], **datos}
+    return {**anterior, **nuevo, "data": datos}
+
+
+def _buffer_de_transaccion():
+    """
+    Buffer registrado en on_commit de la transacción en curso (o uno nuevo).
+
+    Si la transacción se revierte, Django descarta sus callbacks y con ellos
+    el buffer: la siguiente transacción empieza con uno nuevo.
+    """
+    conexion = transaction.get_connection()
+    for _, callback, _ in conexion.run_on_commit:
+        buffer = getattr(callback, "__self__", None)
+        if isinstance(buffer, _Buffer):
+            return buffer
+    buffer = _Buffer()
+    transaction.on_commit(buffer.vaciar)
+    return buffer
+
+
+def publicar(channel_layer, grupos, mensaje):
+    """
+    Publica una actualización data_update para varios grupos.
+
+    Parámetros:
+    - channel_layer: Channel layer con el que se enviará
+    - grupos: Nombres de grupo destino
+    - mensaje: Dict data_update (type, entity_type, entity_id, action, data)
+    """
+    buffer = _buffer_activo.get()
+    if buffer is None:
+        if not transaction.get_connection().in_atomic_block:
+            buffer = _Buffer()
+            buffer.agregar(channel_layer, grupos, mensaje)
+            buffer.vaciar()
+            return
+        buffer = _buffer_de_transaccion()
+    buffer.agregar(channel_layer, grupos, mensaje)
+    # El debounce no vacía a mitad de una transacción (podría revertirse)
+    if buffer.vencido() and not transaction.get_connection().in_atomic_block:
+        buffer.vaciar()
+
+
+@contextmanager
+def agrupar(ventana=None):
+    """
+    Agrupa las actualizaciones publicadas dentro del bloque.
+
+    Parámetros:
+    - ventana: Segundos tras los cuales se vacía el buffer aunque el bloque
+      siga abierto (None: solo al salir)
+
+    Los bloques anidados comparten el buffer del más externo, que es el
+    único que lo vacía.
+    """
+    if _buffer_activo.get() is not None:
+        yield
+        return
+
+    buffer = _Buffer(ventana)
+    token = _buffer_activo.set(buffer)
+    try:
+        yield
+    finally:
+        _buffer_activo.reset(token)
+        # Sin pendientes no se toca la conexión (requests que no usan la BD);
+        # fuera de una transacción on_commit ejecuta de inmediato
+        if buffer.pendientes:
+            transaction.on_commit(buffer.vaciar)
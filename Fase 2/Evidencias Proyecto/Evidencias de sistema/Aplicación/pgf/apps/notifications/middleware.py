@@ -0,0 +1,21 @@
+# apps/notifications/middleware.py
+"""
+Middleware que agrupa las actualizaciones en tiempo real de cada request.
+
+Todas las actualizaciones data_update publicadas durante el request se
+envían al final, fusionadas por destinatario y entidad
+(ver apps/notifications/dispatcher.py).
+"""
+
+from .dispatcher import agrupar
+
+
+class ActualizacionesAgrupadasMiddleware:
+    """Abre un buffer de actualizaciones por request y lo vacía al terminar."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with agrupar():
+            return self.get_response(request)
@@ -15,6 +15,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 import uuid
+from apps.core.ids import uuid7
 
 User = get_user_model()
 
@@ -67,7 +68,7 @@ class Notification(models.Model):
         LEIDA = "LEIDA", "Leída"
         ARCHIVADA = "ARCHIVADA", "Archivada"
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     
     # Usuario destinatario de la notificación
     usuario = models.ForeignKey(
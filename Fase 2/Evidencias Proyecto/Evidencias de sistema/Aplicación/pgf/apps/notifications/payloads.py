@@ -0,0 +1,157 @@
+# apps/notifications/payloads.py
+"""
+Payloads compactos de las actualizaciones en tiempo real (data_update).
+
+Dos reducciones, aplicadas por apps/notifications/dispatcher.py:
+
+1. Diferencias versionadas (versionar()): las entidades que se publican
+   una y otra vez con su snapshot completo (OT y vehículo) se envían solo
+   con los campos que cambiaron desde la última versión publicada. El
+   último snapshot de cada entidad queda en la caché
+   (REALTIME_SNAPSHOT_SEGUNDOS) y el mensaje lleva:
+
+   - version: versión de la entidad tras este mensaje
+   - base_version: versión sobre la que se aplican los cambios, o None si
+     data es el snapshot completo (primera publicación, snapshot expirado,
+     creación o borrado)
+
+   El cliente aplica los cambios si base_version coincide con la última
+   versión que aplicó; si no (se perdió un mensaje, una transacción se
+   revirtió o dos procesos publicaron a la vez) recarga la entidad por la
+   API. data siempre incluye el id.
+
+2. Tramas preserializadas (empaquetar()): el JSON que recibe el cliente se
+   arma una sola vez por mensaje en el hilo despachador, no en cada
+   consumer conectado. Por el channel layer viaja la trama ("frame") más
+   lo mínimo para los filtros de suscripción (tipo, id, zona, ot_id), y
+   NotificationConsumer la reenvía tal cual.
+
+La compresión permessage-deflate la negocia el servidor WebSocket
+(pgf_core/servidor_ws.py), no este módulo.
+
+Relaciones:
+- Usado por: apps/notifications/dispatcher.py
+- Tramas consumidas por: apps/notifications/consumers.py
+"""
+
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Entidades que se envían como diferencias versionadas
+TIPOS_VERSIONADOS = ("workorder", "vehicle")
+
+# Acciones que siempre llevan el snapshot completo
+ACCIONES_COMPLETAS = ("created", "deleted")
+
+
+def _clave_snapshot(entity_type, entity_id):
+    return f"rt:snapshot:{entity_type}:{entity_id}"
+
+
+def versionar(mensajes):
+    """
+    Convierte los data_update de entidades versionadas en diferencias.
+
+    Parámetros:
+    - mensajes: {(entity_type, entity_id): mensaje} con el estado completo
+      de cada entidad publicada (una entrada por entidad)
+
+    Retorna:
+    - {(entity_type, entity_id): mensaje versionado} solo para las entidades
+      de TIPOS_VERSIONADOS
+
+    Lee y escribe todos los snapshots con una consulta a la caché cada vez.
+    """
+    claves = {
+        clave: _clave_snapshot(*clave)
+        for clave, mensaje in mensajes.items()
+        if clave[0] in TIPOS_VERSIONADOS and isinstance(mensaje.get("data"), dict)
+    }
+    if not claves:
+        return {}
+
+    anteriores = cache.get_many(list(claves.values()))
+    versionados, nuevos, borrados = {}, {}, []
+    for clave, clave_cache in claves.items():
+        mensaje = mensajes[clave]
+        datos = mensaje["data"]
+        anterior = anteriores.get(clave_cache)
+        version = anterior["version"] + 1 if anterior else 1
+
+        if anterior and mensaje.get("action") not in ACCIONES_COMPLETAS:
+            cambios = {
+                campo: valor for campo, valor in datos.items()
+                if campo not in anterior["data"] or anterior["data"][campo] != valor
+            }
+            if "id" in datos:
+                cambios["id"] = datos["id"]
+            versionados[clave] = {**mensaje, "data": cambios, "version": version,
+                                  "base_version": anterior["version"]}
+        else:
+            versionados[clave] = {**mensaje, "version": version, "base_version": None}
+
+        if mensaje.get("action") == "deleted":
+            borrados.append(clave_cache)
+        else:
+            nuevos[clave_cache] = {"version": version, "data": datos}
+
+    if nuevos:
+        cache.set_many(nuevos, settings.REALTIME_SNAPSHOT_SEGUNDOS)
+    if borrados:
+        cache.delete_many(borrados)
+    return versionados
+
+
+def trama(mensaje):
+    """JSON compacto que recibe el cliente para un data_update."""
+    salida = {
+        "type": "data_update",
+        "entity_type": mensaje.get("entity_type"),
+        "entity_id": mensaje.get("entity_id"),
+        "action": mensaje.get("action"),
+        "data": mensaje.get("data"),
+    }
+    if "version" in mensaje:
+        salida["version"] = mensaje["version"]
+        salida["base_version"] = mensaje.get("base_version")
+    return json.dumps(salida, separators=(",", ":"))
+
+
+def _compacto(mensaje, memo):
+    """data_update con su trama y solo los campos que filtran las suscripciones."""
+    # El mismo dict suele ir a varios grupos: se serializa una vez
+    compacto = memo.get(id(mensaje))
+    if compacto is None:
+        datos = mensaje.get("data")
+        compacto = {
+            "type": "data_update",
+            "entity_type": mensaje.get("entity_type"),
+            "entity_id": mensaje.get("entity_id"),
+            "zona": mensaje.get("zona"),
+            "ot_id": datos.get("ot_id") if isinstance(datos, dict) else None,
+            "frame": trama(mensaje),
+        }
+        memo[id(mensaje)] = compacto
+    return compacto
+
+
+def empaquetar(envios):
+    """
+    Reemplaza los data_update y data_update_batch de [(grupo, mensaje), ...]
+    por sus versiones con trama preserializada. Otros mensajes no cambian.
+    """
+    memo = {}
+    salida = []
+    for grupo, mensaje in envios:
+        tipo = mensaje.get("type")
+        if tipo == "data_update":
+            mensaje = _compacto(mensaje, memo)
+        elif tipo == "data_update_batch":
+            mensaje = {
+                "type": "data_update_batch",
+                "updates": [_compacto(update, memo) for update in mensaje["updates"]],
+            }
+        salida.append((grupo, mensaje))
+    return salida
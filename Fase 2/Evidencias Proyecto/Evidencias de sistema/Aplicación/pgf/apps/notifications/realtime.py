@@ -4,16 +4,124 @@ Utilidades para enviar actualizaciones en tiempo real por WebSocket.
 
 Este módulo proporciona funciones para enviar actualizaciones de datos
 (OTs, vehículos, asignaciones, etc.) en tiempo real a los usuarios conectados.
+
+Grupos del channel layer (NotificationConsumer se une a ellos al conectar):
+- grupo_usuario(id): un grupo por usuario (notificaciones y actualizaciones
+  dirigidas)
+- grupo_rol(rol): un grupo por rol. Las actualizaciones que ven todos los
+  usuarios de un rol (ROLES_DIFUSION, dashboards) se envían UNA vez al
+  grupo en vez de consultar y recorrer a los usuarios del rol
+- grupo_zona(zona): un grupo por zona para los roles de ROLES_CON_ZONA
+  (coordinadores), que reciben las actualizaciones de las OT de sus zonas
+
+Así una actualización de OT cuesta un group_send por grupo de rol/zona más
+uno por usuario directamente involucrado, sin consultas de usuarios.
+
+Las actualizaciones de entidades (OT, vehículo, asignación, evidencia,
+comentario, item) pasan por apps/notifications/dispatcher.py, que las
+agrupa por request/transacción y envía un mensaje por grupo. Los
+dashboards y reportes se envían sin agrupar (ya salen de una tarea). En
+ambos casos el envío lo hace el hilo despachador, no el request.
+
+Los mensajes de entidades llevan además la zona ("zona", no se reenvía al
+cliente) para los filtros de suscripción del consumer
+(apps/notifications/subscriptions.py).
 """
 
+import hashlib
+
 from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 import logging
 
+from . import dispatcher
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Roles que reciben todas las actualizaciones de OT, vehículos, evidencias,
+# comentarios e items por su grupo de rol
+ROLES_DIFUSION = ("ADMIN",)
+
+# Roles que se unen a los grupos de sus zonas (apps/reports/scopes.py)
+ROLES_CON_ZONA = ("COORDINADOR_ZONA",)
+
+
+def grupo_usuario(usuario_id):
+    """Nombre del grupo de un usuario."""
+    return f"notifications_{usuario_id}"
+
+
+def grupo_rol(rol):
+    """Nombre del grupo de un rol."""
+    return f"notifications_rol_{rol}"
+
+
+def grupo_zona(zona):
+    """
+    Nombre del grupo de una zona.
+    
+    Los nombres de grupo de Channels solo admiten ASCII alfanumérico, guiones,
+    guiones bajos y puntos (y menos de 100 caracteres), así que la zona (texto
+    libre) se reduce a un hash.
+    """
+    return "notifications_zona_" + hashlib.sha1(zona.encode()).hexdigest()[:16]
+
+
+def grupos_de_conexion(user):
+    """
+    Grupos a los que se une una conexión WebSocket del usuario.
+    
+    Parámetros:
+    - user: Usuario autenticado
+    
+    Retorna:
+    - Lista con el grupo del usuario, el de su rol y, si su rol está en
+      ROLES_CON_ZONA, los de sus zonas (consulta cacheada)
+    """
+    grupos = [grupo_usuario(user.id)]
+    if user.rol:
+        grupos.append(grupo_rol(user.rol))
+    if user.rol in ROLES_CON_ZONA:
+        from apps.reports.scopes import zonas_de_usuario
+        grupos.extend(grupo_zona(zona) for zona in zonas_de_usuario(user))
+    return grupos
+
+
+def _destinos(usuarios, roles=ROLES_DIFUSION, zona=None):
+    """
+    Grupos destino de una actualización.
+    
+    Parámetros:
+    - usuarios: Usuarios directamente involucrados (pueden venir None)
+    - roles: Roles que la reciben por su grupo de rol
+    - zona: Zona cuyo grupo también la recibe (opcional)
+    
+    Los usuarios inactivos se omiten, y también los que ya la reciben por
+    el grupo de su rol (para no duplicar el mensaje).
+    """
+    grupos = [grupo_rol(rol) for rol in roles]
+    if zona:
+        grupos.append(grupo_zona(zona))
+    vistos = set()
+    for usuario in usuarios:
+        if not usuario or not usuario.is_active or usuario.rol in roles or usuario.id in vistos:
+            continue
+        vistos.add(usuario.id)
+        grupos.append(grupo_usuario(usuario.id))
+    return grupos
+
+
+def _enviar(channel_layer, grupos, mensaje):
+    """El mismo mensaje a cada grupo, sin agrupar (fuera del hilo del llamador)."""
+    dispatcher.despachar(channel_layer, [(grupo, mensaje) for grupo in grupos])
+
+
+def _involucrados_ot(ot):
+    """Mecánico, supervisor, jefe de taller y responsable de la OT."""
+    return [ot.mecanico, ot.supervisor, ot.jefe_taller, ot.responsable]
+
 
 def enviar_actualizacion_ot(ot, action="updated", usuarios=None):
     """
@@ -29,39 +137,19 @@ def enviar_actualizacion_ot(ot, action="updated", usuarios=None):
     - Supervisor
     - Jefe de Taller
     - Responsable
-    - ADMIN
+    - ADMIN (grupo del rol)
+    - Coordinadores de la zona de la OT (grupo de la zona)
     """
     try:
         channel_layer = get_channel_layer()
         if not channel_layer:
             return
         
-        # Determinar usuarios a notificar
+        # Determinar grupos a notificar
         if usuarios is None:
-            usuarios = []
-            
-            # Agregar mecánico si existe
-            if ot.mecanico:
-                usuarios.append(ot.mecanico)
-            
-            # Agregar supervisor si existe
-            if ot.supervisor:
-                usuarios.append(ot.supervisor)
-            
-            # Agregar jefe de taller si existe
-            if ot.jefe_taller:
-                usuarios.append(ot.jefe_taller)
-            
-            # Agregar responsable si existe
-            if ot.responsable:
-                usuarios.append(ot.responsable)
-            
-            # Agregar ADMIN
-            admins = User.objects.filter(rol="ADMIN", is_active=True)
-            usuarios.extend(admins)
-            
-            # Eliminar duplicados
-            usuarios = list(set(usuarios))
+            grupos = _destinos(_involucrados_ot(ot), zona=ot.zona)
+        else:
+            grupos = _destinos(usuarios, roles=())
         
         # Serializar datos básicos de la OT
         ot_data = {
@@ -80,23 +168,14 @@ def enviar_actualizacion_ot(ot, action="updated", usuarios=None):
             "cierre": ot.cierre.isoformat() if ot.cierre else None,
         }
         
-        # Enviar a cada usuario
-        for usuario in usuarios:
-            if not usuario or not usuario.is_active:
-                continue
-                
-            group_name = f"notifications_{usuario.id}"
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    "type": "data_update",
-                    "entity_type": "workorder",
-                    "entity_id": str(ot.id),
-                    "action": action,
-                    "data": ot_data
-                }
-            )
+        dispatcher.publicar(channel_layer, grupos, {
+            "type": "data_update",
+            "entity_type": "workorder",
+            "entity_id": str(ot.id),
+            "action": action,
+            "data": ot_data,
+            "zona": ot.zona or None
+        })
     except Exception as e:
         logger.error(f"Error al enviar actualización de OT {ot.id} por WebSocket: {e}")
 
@@ -115,20 +194,11 @@ def enviar_actualizacion_vehiculo(vehiculo, action="updated", usuarios=None):
         if not channel_layer:
             return
         
-        # Determinar usuarios a notificar
+        # Determinar grupos a notificar (supervisor + ADMIN)
         if usuarios is None:
-            usuarios = []
-            
-            # Agregar supervisor si existe
-            if vehiculo.supervisor:
-                usuarios.append(vehiculo.supervisor)
-            
-            # Agregar ADMIN
-            admins = User.objects.filter(rol="ADMIN", is_active=True)
-            usuarios.extend(admins)
-            
-            # Eliminar duplicados
-            usuarios = list(set(usuarios))
+            grupos = _destinos([vehiculo.supervisor])
+        else:
+            grupos = _destinos(usuarios, roles=())
         
         # Serializar datos básicos del vehículo
         vehiculo_data = {
@@ -141,23 +211,14 @@ def enviar_actualizacion_vehiculo(vehiculo, action="updated", usuarios=None):
             "supervisor_id": str(vehiculo.supervisor.id) if vehiculo.supervisor else None,
         }
         
-        # Enviar a cada usuario
-        for usuario in usuarios:
-            if not usuario or not usuario.is_active:
-                continue
-                
-            group_name = f"notifications_{usuario.id}"
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    "type": "data_update",
-                    "entity_type": "vehicle",
-                    "entity_id": str(vehiculo.id),
-                    "action": action,
-                    "data": vehiculo_data
-                }
-            )
+        dispatcher.publicar(channel_layer, grupos, {
+            "type": "data_update",
+            "entity_type": "vehicle",
+            "entity_id": str(vehiculo.id),
+            "action": action,
+            "data": vehiculo_data,
+            "zona": vehiculo.zona or None
+        })
     except Exception as e:
         logger.error(f"Error al enviar actualización de vehículo {vehiculo.id} por WebSocket: {e}")
 
@@ -176,23 +237,8 @@ def enviar_actualizacion_asignacion(ot, mecanico, action="assigned"):
         if not channel_layer:
             return
         
-        # Usuarios a notificar: mecánico, supervisor, jefe de taller, admin
-        usuarios = []
-        
-        if mecanico:
-            usuarios.append(mecanico)
-        
-        if ot.supervisor:
-            usuarios.append(ot.supervisor)
-        
-        if ot.jefe_taller:
-            usuarios.append(ot.jefe_taller)
-        
-        admins = User.objects.filter(rol="ADMIN", is_active=True)
-        usuarios.extend(admins)
-        
-        # Eliminar duplicados
-        usuarios = list(set(usuarios))
+        # Grupos a notificar: mecánico, supervisor, jefe de taller, admin
+        grupos = _destinos([mecanico, ot.supervisor, ot.jefe_taller])
         
         # Datos de la asignación
         asignacion_data = {
@@ -203,23 +249,14 @@ def enviar_actualizacion_asignacion(ot, mecanico, action="assigned"):
             "vehiculo_patente": ot.vehiculo.patente if ot.vehiculo else None,
         }
         
-        # Enviar a cada usuario
-        for usuario in usuarios:
-            if not usuario or not usuario.is_active:
-                continue
-                
-            group_name = f"notifications_{usuario.id}"
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    "type": "data_update",
-                    "entity_type": "assignment",
-                    "entity_id": str(ot.id),
-                    "action": action,
-                    "data": asignacion_data
-                }
-            )
+        dispatcher.publicar(channel_layer, grupos, {
+            "type": "data_update",
+            "entity_type": "assignment",
+            "entity_id": str(ot.id),
+            "action": action,
+            "data": asignacion_data,
+            "zona": ot.zona or None
+        })
     except Exception as e:
         logger.error(f"Error al enviar actualización de asignación OT {ot.id} por WebSocket: {e}")
 
@@ -242,37 +279,11 @@ def enviar_actualizacion_evidencia(evidencia, action="created", usuarios=None):
         if not evidencia.ot:
             return
         
-        # Determinar usuarios a notificar
+        # Determinar grupos a notificar (involucrados de la OT, quien subió la evidencia y ADMIN)
         if usuarios is None:
-            usuarios = []
-            ot = evidencia.ot
-            
-            # Agregar mecánico si existe
-            if ot.mecanico:
-                usuarios.append(ot.mecanico)
-            
-            # Agregar supervisor si existe
-            if ot.supervisor:
-                usuarios.append(ot.supervisor)
-            
-            # Agregar jefe de taller si existe
-            if ot.jefe_taller:
-                usuarios.append(ot.jefe_taller)
-            
-            # Agregar responsable si existe
-            if ot.responsable:
-                usuarios.append(ot.responsable)
-            
-            # Agregar usuario que subió la evidencia
-            if evidencia.subido_por:
-                usuarios.append(evidencia.subido_por)
-            
-            # Agregar ADMIN
-            admins = User.objects.filter(rol="ADMIN", is_active=True)
-            usuarios.extend(admins)
-            
-            # Eliminar duplicados
-            usuarios = list(set(usuarios))
+            grupos = _destinos(_involucrados_ot(evidencia.ot) + [evidencia.subido_por])
+        else:
+            grupos = _destinos(usuarios, roles=())
         
         # Serializar datos básicos de la evidencia
         evidencia_data = {
@@ -284,23 +295,14 @@ def enviar_actualizacion_evidencia(evidencia, action="created", usuarios=None):
             "subido_en": evidencia.subido_en.isoformat() if evidencia.subido_en else None,
         }
         
-        # Enviar a cada usuario
-        for usuario in usuarios:
-            if not usuario or not usuario.is_active:
-                continue
-                
-            group_name = f"notifications_{usuario.id}"
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    "type": "data_update",
-                    "entity_type": "evidence",
-                    "entity_id": str(evidencia.id),
-                    "action": action,
-                    "data": evidencia_data
-                }
-            )
+        dispatcher.publicar(channel_layer, grupos, {
+            "type": "data_update",
+            "entity_type": "evidence",
+            "entity_id": str(evidencia.id),
+            "action": action,
+            "data": evidencia_data,
+            "zona": (evidencia.ot.zona or None) if evidencia.ot else None
+        })
     except Exception as e:
         logger.error(f"Error al enviar actualización de evidencia {evidencia.id} por WebSocket: {e}")
 
@@ -319,51 +321,26 @@ def enviar_actualizacion_comentario(comentario, action="created", usuarios=None)
         if not channel_layer:
             return
         
-        # Determinar usuarios a notificar
+        # Determinar grupos a notificar (involucrados de la OT, autor, mencionados y ADMIN)
         if usuarios is None:
-            usuarios = []
-            ot = comentario.ot
-            
-            # Agregar mecánico si existe
-            if ot.mecanico:
-                usuarios.append(ot.mecanico)
+            usuarios = _involucrados_ot(comentario.ot) + [comentario.usuario]
             
-            # Agregar supervisor si existe
-            if ot.supervisor:
-                usuarios.append(ot.supervisor)
-            
-            # Agregar jefe de taller si existe
-            if ot.jefe_taller:
-                usuarios.append(ot.jefe_taller)
-            
-            # Agregar responsable si existe
-            if ot.responsable:
-                usuarios.append(ot.responsable)
-            
-            # Agregar usuario que creó el comentario
-            if comentario.usuario:
-                usuarios.append(comentario.usuario)
-            
-            # Agregar usuarios mencionados
+            # Usuarios mencionados (ids o "@username"), en una sola consulta
             if comentario.menciones:
-                for mencion_id in comentario.menciones:
-                    try:
-                        mencion_user = User.objects.get(id=mencion_id)
-                        usuarios.append(mencion_user)
-                    except User.DoesNotExist:
-                        pass
-            
-            # Agregar ADMIN
-            admins = User.objects.filter(rol="ADMIN", is_active=True)
-            usuarios.extend(admins)
-            
-            # Eliminar duplicados
-            usuarios = list(set(usuarios))
+                ids = [m for m in comentario.menciones if str(m).isdigit()]
+                usernames = [str(m).lstrip("@") for m in comentario.menciones if not str(m).isdigit()]
+                usuarios.extend(User.objects.filter(
+                    Q(id__in=ids) | Q(username__in=usernames), is_active=True
+                ))
+            
+            grupos = _destinos(usuarios)
+        else:
+            grupos = _destinos(usuarios, roles=())
         
         # Serializar datos básicos del comentario
         comentario_data = {
             "id": str(comentario.id),
-            "texto": comentario.texto,
+            "texto": comentario.contenido,
             "ot_id": str(comentario.ot.id) if comentario.ot else None,
             "usuario_id": str(comentario.usuario.id) if comentario.usuario else None,
             "usuario_nombre": comentario.usuario.get_full_name() if comentario.usuario else None,
@@ -371,23 +348,14 @@ def enviar_actualizacion_comentario(comentario, action="created", usuarios=None)
             "creado_en": comentario.creado_en.isoformat() if comentario.creado_en else None,
         }
         
-        # Enviar a cada usuario
-        for usuario in usuarios:
-            if not usuario or not usuario.is_active:
-                continue
-                
-            group_name = f"notifications_{usuario.id}"
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    "type": "data_update",
-                    "entity_type": "comment",
-                    "entity_id": str(comentario.id),
-                    "action": action,
-                    "data": comentario_data
-                }
-            )
+        dispatcher.publicar(channel_layer, grupos, {
+            "type": "data_update",
+            "entity_type": "comment",
+            "entity_id": str(comentario.id),
+            "action": action,
+            "data": comentario_data,
+            "zona": (comentario.ot.zona or None) if comentario.ot else None
+        })
     except Exception as e:
         logger.error(f"Error al enviar actualización de comentario {comentario.id} por WebSocket: {e}")
 
@@ -406,33 +374,11 @@ def enviar_actualizacion_item(item, action="created", usuarios=None):
         if not channel_layer:
             return
         
-        # Determinar usuarios a notificar
+        # Determinar grupos a notificar (involucrados de la OT y ADMIN)
         if usuarios is None:
-            usuarios = []
-            ot = item.ot
-            
-            # Agregar mecánico si existe
-            if ot.mecanico:
-                usuarios.append(ot.mecanico)
-            
-            # Agregar supervisor si existe
-            if ot.supervisor:
-                usuarios.append(ot.supervisor)
-            
-            # Agregar jefe de taller si existe
-            if ot.jefe_taller:
-                usuarios.append(ot.jefe_taller)
-            
-            # Agregar responsable si existe
-            if ot.responsable:
-                usuarios.append(ot.responsable)
-            
-            # Agregar ADMIN
-            admins = User.objects.filter(rol="ADMIN", is_active=True)
-            usuarios.extend(admins)
-            
-            # Eliminar duplicados
-            usuarios = list(set(usuarios))
+            grupos = _destinos(_involucrados_ot(item.ot))
+        else:
+            grupos = _destinos(usuarios, roles=())
         
         # Serializar datos básicos del item
         item_data = {
@@ -445,23 +391,97 @@ def enviar_actualizacion_item(item, action="created", usuarios=None):
             "repuesto_id": str(item.repuesto.id) if item.repuesto else None,
         }
         
-        # Enviar a cada usuario
-        for usuario in usuarios:
-            if not usuario or not usuario.is_active:
-                continue
-                
-            group_name = f"notifications_{usuario.id}"
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    "type": "data_update",
-                    "entity_type": "item",
-                    "entity_id": str(item.id),
-                    "action": action,
-                    "data": item_data
-                }
-            )
+        dispatcher.publicar(channel_layer, grupos, {
+            "type": "data_update",
+            "entity_type": "item",
+            "entity_id": str(item.id),
+            "action": action,
+            "data": item_data,
+            "zona": (item.ot.zona or None) if item.ot else None
+        })
     except Exception as e:
         logger.error(f"Error al enviar actualización de item {item.id} por WebSocket: {e}")
 
+
+def enviar_actualizacion_dashboard(nombre, entrada, roles, usuarios_ids=None):
+    """
+    Envía el payload recién precalculado de un dashboard por WebSocket.
+    
+    Parámetros:
+    - nombre: Nombre del dashboard (clave en apps/reports/dashboards.py DASHBOARDS)
+    - entrada: {"datos", "generado_en", "alcance"} tal como quedó en caché
+    - roles: Roles que pueden ver el dashboard
+    - usuarios_ids: Ids de usuarios a notificar (si None, los grupos de los
+      roles: un group_send por rol, sin consultar usuarios)
+    
+    El mensaje incluye el alcance (zonas) del payload para que el cliente
+    descarte los que no corresponden a lo que está mostrando. Los ids de
+    los usuarios activos se obtienen con una sola consulta.
+    """
+    try:
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            return
+        
+        if usuarios_ids is None:
+            grupos = [grupo_rol(rol) for rol in roles]
+        else:
+            if not usuarios_ids:
+                return
+            grupos = [
+                grupo_usuario(usuario_id)
+                for usuario_id in User.objects.filter(
+                    rol__in=roles, is_active=True, id__in=usuarios_ids
+                ).values_list("id", flat=True)
+            ]
+        
+        mensaje = {
+            "type": "data_update",
+            "entity_type": "dashboard",
+            "entity_id": nombre,
+            "action": "updated",
+            "data": {
+                "datos": entrada["datos"],
+                "alcance": entrada["alcance"],
+                "generado_en": entrada["generado_en"].isoformat(),
+            }
+        }
+        
+        _enviar(channel_layer, grupos, mensaje)
+    except Exception as e:
+        logger.error(f"Error al enviar actualización del dashboard {nombre} por WebSocket: {e}")
+
+
+def enviar_actualizacion_reporte(job):
+    """
+    Avisa por WebSocket que un reporte PDF asíncrono terminó (o falló).
+    
+    Parámetros:
+    - job: Instancia de ReporteJob (apps/reports/models.py)
+    
+    Notifica al solicitante y a los usuarios que pidieron el mismo reporte
+    mientras estaba en curso. Si el job está COMPLETADO el mensaje incluye
+    la URL firmada de descarga.
+    """
+    try:
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            return
+        
+        from apps.reports.jobs import serializar
+        
+        usuarios_ids = set(job.interesados.filter(is_active=True).values_list("id", flat=True))
+        if job.solicitado_por_id:
+            usuarios_ids.add(job.solicitado_por_id)
+        
+        mensaje = {
+            "type": "data_update",
+            "entity_type": "report_job",
+            "entity_id": str(job.id),
+            "action": "completed" if job.estado == "COMPLETADO" else "failed",
+            "data": serializar(job)
+        }
+        
+        _enviar(channel_layer, [grupo_usuario(usuario_id) for usuario_id in usuarios_ids], mensaje)
+    except Exception as e:
+        logger.error(f"Error al enviar actualización del reporte {job.id} por WebSocket: {e}")
@@ -0,0 +1,24 @@
+# apps/notifications/signals.py
+"""
+Señales que invalidan el estado cacheado de los usuarios para WebSocket.
+
+apps/notifications/admission.py cachea el rol y el estado activo de cada
+usuario al conectar. Guardar o borrar el usuario descarta esa entrada, así
+un usuario desactivado no puede reconectarse con la caché vigente.
+
+Las actualizaciones masivas con .update() no disparan señales; esos
+cambios se reflejan al expirar la entrada (WS_CACHE_USUARIO_SEGUNDOS).
+"""
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .admission import invalidar_usuario
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidar_usuario_websocket(sender, instance, **kwargs):
+    """Descarta el estado cacheado del usuario guardado o borrado"""
+    invalidar_usuario(instance.pk)
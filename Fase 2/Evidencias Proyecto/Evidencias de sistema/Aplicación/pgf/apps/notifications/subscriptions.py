@@ -0,0 +1,135 @@
+# apps/notifications/subscriptions.py
+"""
+Filtros de suscripción de una conexión WebSocket (NotificationConsumer).
+
+Por defecto una conexión recibe todas las actualizaciones data_update de
+sus grupos (usuario, rol, zonas). El cliente puede acotarlas enviando:
+
+    {"type": "subscribe", "entity_types": ["workorder", "item"],
+     "entity_ids": {"workorder": ["12"]}, "zonas": ["NORTE"]}
+    {"type": "unsubscribe", "entity_ids": {"workorder": ["12"]}}
+    {"type": "unsubscribe"}            # vuelve a recibir todo
+
+y el servidor descarta lo que no corresponde antes de enviarlo:
+
+- entity_types: solo esos tipos de entidad
+- entity_ids: por tipo, solo esas entidades. Los ids de "workorder" también
+  acotan las entidades de la OT (asignación, evidencia, comentario, item),
+  vía su data.ot_id: un mecánico que mira una OT recibe sus items y
+  comentarios, pero no las actualizaciones del resto de la flota
+- zonas: solo entidades de esas zonas (las que no tienen zona pasan)
+
+Las notificaciones (notification_message) nunca se filtran.
+
+Relaciones:
+- Usado por: apps/notifications/consumers.py
+- Zona de cada mensaje: apps/notifications/realtime.py
+"""
+
+# Tipos de entidad que publica apps/notifications/realtime.py
+TIPOS_ENTIDAD = (
+    "workorder", "vehicle", "assignment", "evidence", "comment", "item", "dashboard", "report_job",
+)
+
+# Entidades que pertenecen a una OT (se filtran también por los ids de "workorder")
+TIPOS_DE_OT = ("assignment", "evidence", "comment", "item")
+
+# Tope de ids y zonas por conexión (cada mensaje se compara contra ellos)
+MAX_VALORES = 500
+
+
+class SuscripcionInvalida(ValueError):
+    """El mensaje subscribe/unsubscribe no es válido."""
+
+
+def _conjunto(valores, nombre):
+    if not isinstance(valores, list):
+        raise SuscripcionInvalida(f"{nombre} debe ser una lista.")
+    return {str(v) for v in valores}
+
+
+class Suscripcion:
+    """Filtros activos de una conexión (None: sin filtro)."""
+
+    def __init__(self):
+        self.limpiar()
+
+    def limpiar(self):
+        """Quita todos los filtros (la conexión vuelve a recibir todo)."""
+        self.tipos = None
+        self.ids = {}
+        self.zonas = None
+
+    def suscribir(self, mensaje):
+        """
+        Agrega los filtros de un mensaje subscribe.
+
+        Lanza:
+        - SuscripcionInvalida: Tipos desconocidos, valores mal formados o sobre MAX_VALORES
+        """
+        # Se valida todo antes de aplicar: un mensaje inválido no cambia nada
+        tipos, zonas = self.tipos, self.zonas
+        if "entity_types" in mensaje:
+            nuevos = _conjunto(mensaje["entity_types"], "entity_types")
+            desconocidos = nuevos - set(TIPOS_ENTIDAD)
+            if desconocidos:
+                raise SuscripcionInvalida(f"Tipos de entidad desconocidos: {', '.join(sorted(desconocidos))}.")
+            tipos = (tipos or set()) | nuevos
+        ids = mensaje.get("entity_ids") or {}
+        if not isinstance(ids, dict):
+            raise SuscripcionInvalida("entity_ids debe ser un objeto {tipo: [ids]}.")
+        ids_nuevos = dict(self.ids)
+        for tipo, valores in ids.items():
+            if tipo not in TIPOS_ENTIDAD:
+                raise SuscripcionInvalida(f"Tipo de entidad desconocido: {tipo}.")
+            ids_nuevos[tipo] = ids_nuevos.get(tipo, set()) | _conjunto(valores, f"entity_ids.{tipo}")
+        if "zonas" in mensaje:
+            zonas = (zonas or set()) | _conjunto(mensaje["zonas"], "zonas")
+        if sum(len(v) for v in ids_nuevos.values()) + len(zonas or ()) > MAX_VALORES:
+            raise SuscripcionInvalida(f"A lo sumo {MAX_VALORES} ids y zonas por conexión.")
+        self.tipos, self.ids, self.zonas = tipos, ids_nuevos, zonas
+
+    def desuscribir(self, mensaje):
+        """Quita los filtros de un mensaje unsubscribe (sin filtros: los quita todos)."""
+        if not any(k in mensaje for k in ("entity_types", "entity_ids", "zonas")):
+            self.limpiar()
+            return
+        # Un filtro que queda vacío se quita (no significa "nada")
+        if "entity_types" in mensaje and self.tipos is not None:
+            self.tipos = (self.tipos - _conjunto(mensaje["entity_types"], "entity_types")) or None
+        ids = mensaje.get("entity_ids") or {}
+        if not isinstance(ids, dict):
+            raise SuscripcionInvalida("entity_ids debe ser un objeto {tipo: [ids]}.")
+        for tipo, valores in ids.items():
+            restantes = self.ids.get(tipo, set()) - _conjunto(valores, f"entity_ids.{tipo}")
+            if restantes:
+                self.ids[tipo] = restantes
+            else:
+                self.ids.pop(tipo, None)
+        if "zonas" in mensaje and self.zonas is not None:
+            self.zonas = (self.zonas - _conjunto(mensaje["zonas"], "zonas")) or None
+
+    def acepta(self, update):
+        """Si la conexión debe recibir una actualización data_update."""
+        tipo = update.get("entity_type")
+        if self.tipos is not None and tipo not in self.tipos:
+            return False
+        if tipo in self.ids and str(update.get("entity_id")) not in self.ids[tipo]:
+            return False
+        if tipo in TIPOS_DE_OT and "workorder" in self.ids:
+            # Las actualizaciones con trama (payloads.py) traen ot_id fuera de data
+            ot_id = update.get("ot_id") or (update.get("data") or {}).get("ot_id")
+            if ot_id is not None and str(ot_id) not in self.ids["workorder"]:
+                return False
+        zona = update.get("zona")
+        if self.zonas is not None and zona and zona not in self.zonas:
+            return False
+        return True
+
+    def como_dict(self):
+        """Filtros activos, para confirmarlos al cliente."""
+        return {
+            "entity_types": sorted(self.tipos) if self.tipos is not None else None,
+            "entity_ids": {tipo: sorted(ids) for tipo, ids in self.ids.items()},
+            "zonas": sorted(self.zonas) if self.zonas is not None else None,
+        }
@@ -0,0 +1,37 @@
+# apps/notifications/tasks.py
+"""
+Tareas Celery de notificaciones.
+
+Los emails de notificación se envían aquí, fuera del request que las
+creó (ver apps/notifications/utils.py notificar()).
+"""
+import logging
+
+from celery import shared_task
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def enviar_emails_notificaciones(notificaciones_ids):
+    """
+    Envía el email de cada notificación, reutilizando una conexión SMTP.
+
+    Parámetros:
+    - notificaciones_ids: Ids de Notification (str)
+
+    Retorna:
+    - Cantidad de notificaciones procesadas
+    """
+    from .models import Notification
+    from .utils import enviar_notificacion_email
+
+    notificaciones = list(
+        Notification.objects.filter(id__in=notificaciones_ids).select_related("usuario", "ot__vehiculo")
+    )
+    with get_connection(fail_silently=True) as conexion:
+        for notificacion in notificaciones:
+            enviar_notificacion_email(notificacion, connection=conexion)
+    logger.info(f"Emails de notificación enviados: {len(notificaciones)}")
+    return len(notificaciones)
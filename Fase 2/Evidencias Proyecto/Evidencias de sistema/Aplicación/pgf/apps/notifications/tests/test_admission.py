@@ -0,0 +1,173 @@
+# apps/notifications/tests/test_admission.py
+"""
+Tests para la autenticación y admisión de WebSocket (apps/notifications/admission.py).
+
+Verifican que:
+- El usuario del token se lee de la caché tras la primera conexión
+- Guardar el usuario invalida la caché (un usuario desactivado no entra)
+- Los topes por usuario y por segundo rechazan con un reintento con jitter
+- Los lugares de conexiones que nadie renueva (proceso caído) expiran solos
+- El consumer envía connection_rejected y libera el tope al desconectar
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.notifications import admission
+from apps.notifications.consumers import NotificationConsumer
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestUsuarioDeToken:
+    """Tests para usuario_de_token"""
+
+    def test_cachea_el_usuario(self, mecanico_user):
+        token = str(AccessToken.for_user(mecanico_user))
+
+        assert admission.usuario_de_token(token).rol == "MECANICO"
+        with CaptureQueriesContext(connection) as contexto:
+            usuario = admission.usuario_de_token(token)
+
+        assert not contexto.captured_queries
+        assert (usuario.id, usuario.is_active) == (mecanico_user.id, True)
+
+    def test_guardar_invalida(self, mecanico_user):
+        token = str(AccessToken.for_user(mecanico_user))
+        admission.usuario_de_token(token)
+
+        mecanico_user.is_active = False
+        mecanico_user.save()
+
+        assert admission.usuario_de_token(token) is None
+
+    def test_token_invalido(self):
+        assert admission.usuario_de_token("no-es-un-jwt") is None
+
+
+@pytest.mark.unit
+class TestTopes:
+    """Tests para admitir_conexion, admitir_usuario y reintento_sugerido"""
+
+    def test_tope_por_usuario(self, settings):
+        settings.WS_MAX_CONEXIONES_POR_USUARIO = 2
+
+        assert admission.admitir_usuario(7, "a") is None
+        assert admission.admitir_usuario(7, "b") is None
+        assert admission.admitir_usuario(7, "c") == admission.DEMASIADAS_CONEXIONES
+        admission.liberar_usuario(7, "a")
+        assert admission.admitir_usuario(7, "c") is None
+        assert admission.admitir_usuario(8, "d") is None
+
+    def test_lugares_sin_renovar_expiran(self, settings):
+        """Tras una caída sin disconnect, el usuario vuelve a entrar al expirar los lugares"""
+        settings.WS_MAX_CONEXIONES_POR_USUARIO = 2
+        settings.WS_PRESENCIA_SEGUNDOS = 1
+        admission.admitir_usuario(7, "a")
+        admission.admitir_usuario(7, "b")
+        settings.WS_PRESENCIA_SEGUNDOS = 60
+        admission.renovar_usuario(7, "b")
+
+        time.sleep(1.2)
+
+        assert admission.admitir_usuario(7, "c") is None
+        assert admission.admitir_usuario(7, "d") == admission.DEMASIADAS_CONEXIONES
+
+    def test_renovar_sin_lugar_lo_recupera(self, settings):
+        settings.WS_MAX_CONEXIONES_POR_USUARIO = 1
+        admission.admitir_usuario(7, "a")
+        cache.clear()
+
+        admission.renovar_usuario(7, "a")
+
+        assert admission.admitir_usuario(7, "b") == admission.DEMASIADAS_CONEXIONES
+
+    def test_tope_por_segundo(self, settings):
+        settings.WS_MAX_CONEXIONES_POR_SEGUNDO = 3
+
+        with patch("apps.notifications.admission.time.time", return_value=1000.5):
+            resultados = [admission.admitir_conexion() for _ in range(5)]
+        with patch("apps.notifications.admission.time.time", return_value=1001.5):
+            siguiente_segundo = admission.admitir_conexion()
+
+        assert resultados == [None, None, None, admission.SOBRECARGA, admission.SOBRECARGA]
+        assert siguiente_segundo is None
+
+    def test_reintento_con_jitter(self, settings):
+        settings.WS_REINTENTO_BASE_SEGUNDOS = 2
+
+        reintentos = {admission.reintento_sugerido() for _ in range(50)}
+
+        assert all(2 <= r <= 6 for r in reintentos) and len(reintentos) > 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConsumerAdmision:
+    """Tests para el rechazo de conexiones en NotificationConsumer"""
+
+    def test_rechaza_sobre_el_tope_y_libera(self, settings, mecanico_user):
+        settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+        settings.WS_MAX_CONEXIONES_POR_USUARIO = 1
+        ruta = f"/ws/?token={AccessToken.for_user(mecanico_user)}"
+
+        @async_to_sync
+        async def conectar():
+            primera = WebsocketCommunicator(NotificationConsumer.as_asgi(), ruta)
+            assert (await primera.connect())[0]
+            await primera.receive_json_from()
+
+            segunda = WebsocketCommunicator(NotificationConsumer.as_asgi(), ruta)
+            await segunda.connect()
+            rechazo = await segunda.receive_json_from()
+            cierre = await segunda.receive_output()
+
+            await primera.disconnect()
+            tercera = WebsocketCommunicator(NotificationConsumer.as_asgi(), ruta)
+            await tercera.connect()
+            bienvenida = await tercera.receive_json_from()
+            await tercera.disconnect()
+            return rechazo, cierre, bienvenida
+
+        rechazo, cierre, bienvenida = conectar()
+
+        assert rechazo["type"] == "connection_rejected"
+        assert rechazo["reason"] == admission.DEMASIADAS_CONEXIONES
+        assert rechazo["retry_after"] > 0
+        assert cierre == {"type": "websocket.close", "code": 1013}
+        assert bienvenida["type"] == "connection_established"
+
+    def test_renueva_su_lugar_mientras_sigue_abierta(self, settings, mecanico_user):
+        settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+        settings.WS_MAX_CONEXIONES_POR_USUARIO = 1
+        settings.WS_PRESENCIA_SEGUNDOS = 1
+        ruta = f"/ws/?token={AccessToken.for_user(mecanico_user)}"
+
+        @async_to_sync
+        async def conectar():
+            abierta = WebsocketCommunicator(NotificationConsumer.as_asgi(), ruta)
+            await abierta.connect()
+            await abierta.receive_json_from()
+            # Más que la vida del lugar: sin renovar, otra conexión entraría
+            await asyncio.sleep(1.5)
+            otra = WebsocketCommunicator(NotificationConsumer.as_asgi(), ruta)
+            await otra.connect()
+            respuesta = await otra.receive_json_from()
+            await abierta.disconnect()
+            return respuesta
+
+        assert conectar()["reason"] == admission.DEMASIADAS_CONEXIONES
@@ -0,0 +1,143 @@
+# apps/notifications/tests/test_dispatcher.py
+"""
+Tests para el despacho agrupado de actualizaciones (apps/notifications/dispatcher.py).
+
+Verifican que:
+- Las actualizaciones de la misma entidad se fusionan por grupo
+- Cada grupo recibe un solo mensaje (data_update o data_update_batch)
+- Dentro de una transacción se envían al confirmarla y se descartan si se revierte
+- La ventana de agrupar() vacía el buffer durante ráfagas largas
+- Con envío en segundo plano, un channel layer lento o caído no bloquea al llamador
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.notifications import dispatcher
+
+
+def _mensaje(entity_type, entity_id, action="updated", **datos):
+    return {"type": "data_update", "entity_type": entity_type, "entity_id": entity_id,
+            "action": action, "data": datos}
+
+
+@pytest.fixture(autouse=True)
+def limpiar_snapshots():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def channel_layer():
+    channel_layer = MagicMock()
+    channel_layer.group_send = AsyncMock()
+    return channel_layer
+
+
+@pytest.mark.django_db
+class TestDispatcher:
+    """Tests para publicar y agrupar"""
+
+    def test_fusiona_por_grupo_y_entidad(self, channel_layer, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True), dispatcher.agrupar():
+            dispatcher.publicar(channel_layer, ["rol", "u1"], _mensaje("workorder", "1", estado="EN_PAUSA"))
+            dispatcher.publicar(channel_layer, ["rol"], _mensaje("item", "7"))
+            dispatcher.publicar(channel_layer, ["rol", "u1"], _mensaje("workorder", "1", "state_changed", motivo="X"))
+            assert not channel_layer.group_send.called
+
+        enviados = {c.args[0]: c.args[1] for c in channel_layer.group_send.call_args_list}
+        assert len(channel_layer.group_send.call_args_list) == 2
+        assert json.loads(enviados["u1"]["frame"]) == {
+            **_mensaje("workorder", "1", "state_changed", estado="EN_PAUSA", motivo="X"),
+            "version": 1, "base_version": None,
+        }
+        assert enviados["rol"]["type"] == "data_update_batch"
+        assert [u["entity_type"] for u in enviados["rol"]["updates"]] == ["workorder", "item"]
+
+    def test_transaccion(self, channel_layer, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            dispatcher.publicar(channel_layer, ["u1"], _mensaje("workorder", "1"))
+            dispatcher.publicar(channel_layer, ["u1"], _mensaje("workorder", "1"))
+            assert not channel_layer.group_send.called
+
+        assert len(callbacks) == 1
+        channel_layer.group_send.assert_called_once()
+
+    def test_rollback_descarta(self, channel_layer, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    dispatcher.publicar(channel_layer, ["u1"], _mensaje("workorder", "1"))
+                    raise ValueError
+            except ValueError:
+                pass
+            dispatcher.publicar(channel_layer, ["u2"], _mensaje("workorder", "2"))
+
+        assert [c.args[0] for c in channel_layer.group_send.call_args_list] == ["u2"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_ventana(channel_layer):
+    """Fuera de una transacción, la ventana vence y el buffer se vacía a mitad del bloque"""
+    # Solo el reloj del dispatcher (la caché de snapshots también usa time)
+    with patch("apps.notifications.dispatcher.time") as reloj:
+        reloj.monotonic.side_effect = [0, 0, 5]
+        with dispatcher.agrupar(ventana=2):
+            dispatcher.publicar(channel_layer, ["u1"], _mensaje("workorder", "1"))
+            assert not channel_layer.group_send.called
+            dispatcher.publicar(channel_layer, ["u1"], _mensaje("workorder", "2"))
+            assert channel_layer.group_send.call_count == 1
+
+    assert channel_layer.group_send.call_count == 1
+
+
+class TestEnvioEnSegundoPlano:
+    """Tests para despachar() con el hilo despachador"""
+
+    @pytest.fixture(autouse=True)
+    def segundo_plano(self, settings):
+        settings.REALTIME_ENVIO_EN_SEGUNDO_PLANO = True
+        settings.REALTIME_TIMEOUT_ENVIO = 0.2
+
+    @pytest.mark.unit
+    def test_no_bloquea_con_layer_lento(self):
+        enviados = []
+
+        async def group_send_lento(grupo, mensaje):
+            await asyncio.sleep(0.1)
+            enviados.append(grupo)
+
+        channel_layer = MagicMock()
+        channel_layer.group_send = group_send_lento
+
+        inicio = time.monotonic()
+        dispatcher.despachar(channel_layer, [(f"u{i}", _mensaje("workorder", str(i))) for i in range(20)])
+        assert time.monotonic() - inicio < 0.05
+
+        dispatcher.esperar_envios()
+        # Envíos concurrentes: 20 group_send de 100 ms no toman 2 s
+        assert sorted(enviados) == sorted(f"u{i}" for i in range(20))
+        assert time.monotonic() - inicio < 1
+
+    @pytest.mark.unit
+    def test_errores_y_timeouts_se_registran(self):
+        async def group_send_colgado(grupo, mensaje):
+            if grupo == "caido":
+                raise ConnectionError("Redis no disponible")
+            await asyncio.sleep(10)
+
+        channel_layer = MagicMock()
+        channel_layer.group_send = group_send_colgado
+
+        with patch("apps.notifications.dispatcher.logger") as logger:
+            dispatcher.despachar(channel_layer, [("caido", {}), ("lento", {})])
+            dispatcher.esperar_envios()
+
+        assert "2 de 2" in logger.error.call_args.args[0]
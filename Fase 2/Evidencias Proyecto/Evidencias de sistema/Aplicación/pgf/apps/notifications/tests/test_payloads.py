@@ -0,0 +1,132 @@
+# apps/notifications/tests/test_payloads.py
+"""
+Tests para los payloads compactos en tiempo real (apps/notifications/payloads.py).
+
+Verifican que:
+- Las OT se envían con solo los campos que cambiaron, versionadas
+- Cada mensaje se serializa una vez aunque vaya a varios grupos
+- El consumer reenvía la trama sin volver a serializarla
+- El servidor WebSocket acepta permessage-deflate según WS_COMPRESION
+"""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from autobahn.websocket.compress import PerMessageDeflateOffer, PerMessageDeflateOfferAccept
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.notifications import dispatcher, payloads, realtime
+from apps.notifications.consumers import NotificationConsumer
+from pgf_core.servidor_ws import aceptar_compresion
+
+
+@pytest.fixture(autouse=True)
+def limpiar_snapshots():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _ot(entity_id, action="updated", **datos):
+    return {"type": "data_update", "entity_type": "workorder", "entity_id": entity_id,
+            "action": action, "data": {"id": entity_id, **datos}}
+
+
+@pytest.mark.unit
+class TestVersionar:
+    """Tests para versionar"""
+
+    def test_diferencias_versionadas(self):
+        primero = payloads.versionar({("workorder", "1"): _ot("1", estado="ABIERTA", prioridad="MEDIA")})
+        segundo = payloads.versionar({("workorder", "1"): _ot("1", estado="EN_EJECUCION", prioridad="MEDIA")})
+
+        assert primero[("workorder", "1")]["data"] == {"id": "1", "estado": "ABIERTA", "prioridad": "MEDIA"}
+        assert (primero[("workorder", "1")]["version"], primero[("workorder", "1")]["base_version"]) == (1, None)
+        assert segundo[("workorder", "1")]["data"] == {"id": "1", "estado": "EN_EJECUCION"}
+        assert (segundo[("workorder", "1")]["version"], segundo[("workorder", "1")]["base_version"]) == (2, 1)
+
+    def test_borrado_reinicia(self):
+        payloads.versionar({("workorder", "1"): _ot("1", estado="ABIERTA")})
+        payloads.versionar({("workorder", "1"): _ot("1", "deleted", estado="ABIERTA")})
+
+        nuevo = payloads.versionar({("workorder", "1"): _ot("1", estado="ABIERTA")})[("workorder", "1")]
+
+        assert (nuevo["version"], nuevo["base_version"]) == (1, None)
+
+    def test_otros_tipos_sin_versionar(self):
+        item = {"type": "data_update", "entity_type": "item", "entity_id": "7", "data": {"ot_id": "1"}}
+
+        assert payloads.versionar({("item", "7"): item}) == {}
+
+
+@pytest.mark.unit
+class TestEmpaquetar:
+    """Tests para empaquetar"""
+
+    def test_una_trama_por_mensaje(self):
+        mensaje = {**_ot("1", estado="ABIERTA"), "zona": "NORTE"}
+
+        with patch("apps.notifications.payloads.trama", wraps=payloads.trama) as trama:
+            envios = payloads.empaquetar([
+                ("u1", mensaje),
+                ("u2", {"type": "data_update_batch", "updates": [mensaje]}),
+            ])
+
+        assert trama.call_count == 1
+        compacto = envios[0][1]
+        assert envios[1][1]["updates"][0] is compacto
+        assert "data" not in compacto and compacto["zona"] == "NORTE"
+        assert json.loads(compacto["frame"]) == {k: v for k, v in mensaje.items() if k != "zona"}
+
+
+@pytest.mark.django_db
+def test_actualizaciones_de_ot_compactas(orden_trabajo, django_capture_on_commit_callbacks):
+    """La segunda actualización de la OT solo lleva lo que cambió"""
+    channel_layer = MagicMock()
+    channel_layer.group_send = AsyncMock()
+
+    # Dos requests (agrupar() como ActualizacionesAgrupadasMiddleware)
+    with patch("apps.notifications.realtime.get_channel_layer", return_value=channel_layer):
+        with django_capture_on_commit_callbacks(execute=True), dispatcher.agrupar():
+            realtime.enviar_actualizacion_ot(orden_trabajo)
+        orden_trabajo.estado = "EN_EJECUCION"
+        with django_capture_on_commit_callbacks(execute=True), dispatcher.agrupar():
+            realtime.enviar_actualizacion_ot(orden_trabajo)
+
+    trama = json.loads(channel_layer.group_send.call_args.args[1]["frame"])
+    assert trama["data"] == {"id": str(orden_trabajo.id), "estado": "EN_EJECUCION"}
+    assert (trama["version"], trama["base_version"]) == (2, 1)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_consumer_reenvia_la_trama(settings, mecanico_user):
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    token = str(AccessToken.for_user(mecanico_user))
+    (_, compacto), = payloads.empaquetar([("u", _ot("1", estado="ABIERTA"))])
+
+    @async_to_sync
+    async def recibir():
+        communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), f"/ws/?token={token}")
+        assert (await communicator.connect())[0]
+        await communicator.receive_json_from()
+        await get_channel_layer().group_send(realtime.grupo_usuario(mecanico_user.id), compacto)
+        texto = await communicator.receive_from()
+        await communicator.disconnect()
+        return texto
+
+    assert recibir() == compacto["frame"]
+
+
+@pytest.mark.unit
+def test_compresion_negociable(settings):
+    oferta = PerMessageDeflateOffer()
+
+    assert isinstance(aceptar_compresion([oferta]), PerMessageDeflateOfferAccept)
+    assert aceptar_compresion([]) is None
+    settings.WS_COMPRESION = False
+    assert aceptar_compresion([oferta]) is None
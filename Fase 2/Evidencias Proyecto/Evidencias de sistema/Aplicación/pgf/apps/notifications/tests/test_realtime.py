@@ -0,0 +1,112 @@
+# apps/notifications/tests/test_realtime.py
+"""
+Tests para los grupos de difusión en tiempo real (apps/notifications/realtime.py).
+
+Verifican que:
+- Las actualizaciones de OT van a los grupos de rol/zona y a los
+  involucrados directos, sin consultar a los ADMIN
+- Los usuarios cubiertos por un grupo de rol no reciben el mensaje dos veces
+- El consumer se une al grupo de su usuario, al de su rol y a los de sus zonas
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.notifications import realtime
+from apps.notifications.consumers import NotificationConsumer
+from apps.workorders.models import ComentarioOT
+
+
+def _grupos(channel_layer):
+    return [c.args[0] for c in channel_layer.group_send.call_args_list]
+
+
+@pytest.fixture
+def channel_layer():
+    channel_layer = MagicMock()
+    channel_layer.group_send = AsyncMock()
+    with patch("apps.notifications.realtime.get_channel_layer", return_value=channel_layer):
+        yield channel_layer
+
+
+@pytest.mark.django_db
+class TestDifusion:
+    """Tests para los enviar_actualizacion_* con grupos de rol"""
+
+    def test_ot_sin_consultar_admins(
+        self, channel_layer, orden_trabajo, admin_user, mecanico_user, django_capture_on_commit_callbacks
+    ):
+        orden_trabajo.mecanico = mecanico_user
+
+        with CaptureQueriesContext(connection) as contexto, django_capture_on_commit_callbacks(execute=True):
+            realtime.enviar_actualizacion_ot(orden_trabajo)
+
+        assert not contexto.captured_queries
+        assert sorted(_grupos(channel_layer)) == sorted([
+            realtime.grupo_rol("ADMIN"),
+            realtime.grupo_zona("ZONA_TEST"),
+            realtime.grupo_usuario(mecanico_user.id),
+            realtime.grupo_usuario(orden_trabajo.supervisor_id),
+            realtime.grupo_usuario(orden_trabajo.jefe_taller_id),
+        ])
+
+    def test_comentario_sin_duplicados(
+        self, channel_layer, orden_trabajo, admin_user, mecanico_user, django_capture_on_commit_callbacks
+    ):
+        # El ADMIN mencionado ya recibe el mensaje por el grupo de su rol
+        comentario = ComentarioOT.objects.create(
+            ot=orden_trabajo, usuario=admin_user, contenido="Revisar",
+            menciones=[f"@{mecanico_user.username}", admin_user.id, 999999],
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            realtime.enviar_actualizacion_comentario(comentario)
+
+        grupos = _grupos(channel_layer)
+        assert len(grupos) == len(set(grupos))
+        assert realtime.grupo_usuario(admin_user.id) not in grupos
+        assert realtime.grupo_usuario(mecanico_user.id) in grupos
+
+    def test_usuarios_explicitos(self, channel_layer, vehiculo, mecanico_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            realtime.enviar_actualizacion_vehiculo(vehiculo, usuarios=[mecanico_user])
+
+        assert _grupos(channel_layer) == [realtime.grupo_usuario(mecanico_user.id)]
+
+    @pytest.mark.unit
+    def test_grupo_zona_es_nombre_valido(self):
+        nombre = realtime.grupo_zona("Región de Ñuble / Sector Poniente " * 5)
+
+        assert nombre.isascii() and len(nombre) < 100
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConsumer:
+    """Tests para los grupos de NotificationConsumer"""
+
+    def test_coordinador_se_une_a_rol_y_zonas(self, settings, agenda, coordinador_user):
+        settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+        token = str(AccessToken.for_user(coordinador_user))
+
+        @async_to_sync
+        async def conectar_y_difundir():
+            communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), f"/ws/?token={token}")
+            conectado, _ = await communicator.connect()
+            assert conectado
+            await communicator.receive_json_from()
+            capa = get_channel_layer()
+            recibidos = []
+            for grupo in (realtime.grupo_rol("COORDINADOR_ZONA"), realtime.grupo_zona("ZONA_TEST")):
+                await capa.group_send(grupo, {"type": "data_update", "entity_id": grupo})
+                recibidos.append((await communicator.receive_json_from())["entity_id"])
+            await communicator.disconnect()
+            return recibidos
+
+        assert conectar_y_difundir() == [realtime.grupo_rol("COORDINADOR_ZONA"), realtime.grupo_zona("ZONA_TEST")]
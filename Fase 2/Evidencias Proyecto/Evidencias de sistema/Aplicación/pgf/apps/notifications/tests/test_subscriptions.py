@@ -0,0 +1,120 @@
+# apps/notifications/tests/test_subscriptions.py
+"""
+Tests para los filtros de suscripción del WebSocket (apps/notifications/subscriptions.py).
+
+Verifican que:
+- Sin suscribirse la conexión recibe todo (compatibilidad con clientes actuales)
+- Los ids de "workorder" acotan también las entidades de la OT (items, comentarios)
+- unsubscribe quita filtros y los mensajes inválidos se rechazan
+- El consumer descarta las actualizaciones fuera de la suscripción
+"""
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.notifications import realtime
+from apps.notifications.consumers import NotificationConsumer
+from apps.notifications.subscriptions import MAX_VALORES, Suscripcion, SuscripcionInvalida
+
+
+def _update(entity_type, entity_id, zona=None, **data):
+    return {"type": "data_update", "entity_type": entity_type, "entity_id": entity_id, "zona": zona, "data": data}
+
+
+@pytest.mark.unit
+class TestSuscripcion:
+    """Tests para Suscripcion"""
+
+    def test_sin_filtros_acepta_todo(self):
+        suscripcion = Suscripcion()
+
+        assert suscripcion.acepta(_update("vehicle", "1", zona="NORTE"))
+        assert suscripcion.acepta(_update("workorder", "7"))
+
+    def test_ot_incluye_sus_entidades(self):
+        suscripcion = Suscripcion()
+        suscripcion.suscribir({"entity_types": ["workorder", "item", "comment"], "entity_ids": {"workorder": [12]}})
+
+        assert suscripcion.acepta(_update("workorder", "12"))
+        assert suscripcion.acepta(_update("item", "3", ot_id="12"))
+        assert not suscripcion.acepta(_update("workorder", "13"))
+        assert not suscripcion.acepta(_update("comment", "4", ot_id="13"))
+        assert not suscripcion.acepta(_update("vehicle", "1"))
+
+    def test_zonas(self):
+        suscripcion = Suscripcion()
+        suscripcion.suscribir({"zonas": ["NORTE"]})
+
+        assert suscripcion.acepta(_update("vehicle", "1", zona="NORTE"))
+        assert not suscripcion.acepta(_update("vehicle", "2", zona="SUR"))
+        assert suscripcion.acepta(_update("dashboard", "ejecutivo"))
+
+    def test_desuscribir(self):
+        suscripcion = Suscripcion()
+        suscripcion.suscribir({"entity_types": ["workorder", "vehicle"], "entity_ids": {"workorder": ["1", "2"]}})
+
+        suscripcion.desuscribir({"entity_types": ["vehicle"], "entity_ids": {"workorder": ["1"]}})
+        assert suscripcion.como_dict() == {
+            "entity_types": ["workorder"], "entity_ids": {"workorder": ["2"]}, "zonas": None,
+        }
+
+        suscripcion.desuscribir({})
+        assert suscripcion.como_dict() == {"entity_types": None, "entity_ids": {}, "zonas": None}
+
+    @pytest.mark.parametrize("mensaje", [
+        {"entity_types": ["nave_espacial"]},
+        {"entity_types": "workorder"},
+        {"entity_ids": ["1"]},
+        {"entity_ids": {"workorder": [str(i) for i in range(MAX_VALORES + 1)]}},
+    ])
+    def test_mensajes_invalidos(self, mensaje):
+        with pytest.raises(SuscripcionInvalida):
+            Suscripcion().suscribir(mensaje)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConsumerSuscripcion:
+    """Tests para subscribe/unsubscribe en NotificationConsumer"""
+
+    def test_descarta_fuera_de_la_suscripcion(self, settings, mecanico_user):
+        settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+        token = str(AccessToken.for_user(mecanico_user))
+        grupo = realtime.grupo_usuario(mecanico_user.id)
+
+        @async_to_sync
+        async def suscribir_y_difundir():
+            communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), f"/ws/?token={token}")
+            assert (await communicator.connect())[0]
+            await communicator.receive_json_from()
+
+            await communicator.send_json_to({
+                "type": "subscribe", "entity_types": ["workorder", "item"], "entity_ids": {"workorder": ["12"]},
+            })
+            confirmacion = await communicator.receive_json_from()
+            await communicator.send_json_to({"type": "subscribe", "entity_types": ["nave_espacial"]})
+            error = await communicator.receive_json_from()
+
+            capa = get_channel_layer()
+            await capa.group_send(grupo, _update("vehicle", "1"))
+            await capa.group_send(grupo, {"type": "data_update_batch", "updates": [
+                _update("item", "5", ot_id="13"),
+                _update("item", "6", ot_id="12"),
+            ]})
+            await capa.group_send(grupo, _update("workorder", "12"))
+            recibidos = [await communicator.receive_json_from() for _ in range(2)]
+            vacio = await communicator.receive_nothing()
+            await communicator.disconnect()
+            return confirmacion, error, recibidos, vacio
+
+        confirmacion, error, recibidos, vacio = suscribir_y_difundir()
+
+        assert confirmacion == {
+            "type": "subscribed",
+            "subscription": {"entity_types": ["item", "workorder"], "entity_ids": {"workorder": ["12"]}, "zonas": None},
+        }
+        assert error["type"] == "subscription_error"
+        assert [(r["entity_type"], r["entity_id"]) for r in recibidos] == [("item", "6"), ("workorder", "12")]
+        assert vacio
@@ -4,8 +4,12 @@ Tests para utilidades de notificaciones.
 
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from apps.notifications.models import Notification
+from apps.notifications.tasks import enviar_emails_notificaciones
 from apps.notifications.utils import (
     enviar_notificacion_websocket,
     enviar_notificacion_email,
@@ -13,9 +17,12 @@ from apps.notifications.utils import (
     crear_notificacion_ot_cerrada,
     crear_notificacion_ot_asignada,
     crear_notificacion_ot_aprobada,
-    crear_notificacion_ot_rechazada
+    crear_notificacion_ot_rechazada,
+    resolver_destinatarios
 )
 
+User = get_user_model()
+
 
 @pytest.mark.unit
 class TestEnviarNotificacionWebSocket:
@@ -234,3 +241,79 @@ class TestCrearNotificacionOtRechazada:
         notificaciones = crear_notificacion_ot_rechazada(orden_trabajo, admin_user)
         
         assert len(notificaciones) == 0
+
+
+@pytest.mark.django_db
+class TestNotificar:
+    """Tests para el fan-out de notificar y resolver_destinatarios"""
+    
+    def _crear_ejecutivos(self, cantidad, inicio=0):
+        return [
+            User.objects.create_user(
+                username=f"ejecutivo{i}", password="x", rol="EJECUTIVO", email=f"ejecutivo{i}@example.com"
+            )
+            for i in range(inicio, inicio + cantidad)
+        ]
+    
+    def _cerrar(self, orden_trabajo, admin_user, django_capture_on_commit_callbacks):
+        # Los callbacks on_commit se ejecutan al salir de la captura, con los patch activos
+        with patch("apps.notifications.dispatcher.despachar") as despachar, \
+                patch("apps.notifications.tasks.enviar_emails_notificaciones.delay") as delay, \
+                CaptureQueriesContext(connection) as contexto, \
+                django_capture_on_commit_callbacks(execute=True):
+            notificaciones = crear_notificacion_ot_cerrada(orden_trabajo, admin_user)
+        return notificaciones, len(contexto.captured_queries), despachar, delay
+    
+    def test_consultas_constantes(self, orden_trabajo, admin_user, django_capture_on_commit_callbacks):
+        """Notificar a 50 usuarios cuesta las mismas consultas que a 5"""
+        self._crear_ejecutivos(5)
+        pocas, consultas_pocas, _, _ = self._cerrar(orden_trabajo, admin_user, django_capture_on_commit_callbacks)
+        self._crear_ejecutivos(45, inicio=5)
+        muchas, consultas_muchas, despachar, delay = self._cerrar(
+            orden_trabajo, admin_user, django_capture_on_commit_callbacks
+        )
+        
+        # Supervisor de la OT + ejecutivos, sin el ADMIN que cerró
+        assert (len(pocas), len(muchas)) == (6, 51)
+        assert consultas_muchas == consultas_pocas
+        # Un lote de WebSocket con una notificación por usuario, con su propio id
+        envios = despachar.call_args.args[1]
+        assert {grupo for grupo, _ in envios} == {f"notifications_{n.usuario_id}" for n in muchas}
+        assert {m["notification"]["id"] for _, m in envios} == {str(n.id) for n in muchas}
+        # Una tarea con los emails de quienes tienen email
+        delay.assert_called_once()
+        assert len(delay.call_args.args[0]) == len([n for n in muchas if n.usuario.email])
+    
+    def test_rollback_no_envia(self, orden_trabajo, admin_user, django_capture_on_commit_callbacks):
+        self._crear_ejecutivos(2)
+        
+        with patch("apps.notifications.dispatcher.despachar") as despachar, \
+                django_capture_on_commit_callbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    crear_notificacion_ot_cerrada(orden_trabajo, admin_user)
+                    raise ValueError
+            except ValueError:
+                pass
+        
+        despachar.assert_not_called()
+        assert not Notification.objects.filter(tipo="OT_CERRADA").exists()
+    
+    def test_menciones_en_una_consulta(self, orden_trabajo, admin_user, mecanico_user, supervisor_user):
+        with CaptureQueriesContext(connection) as contexto:
+            destinatarios = resolver_destinatarios(
+                usuarios=[str(mecanico_user.id)], usernames=[supervisor_user.username, "no_existe"],
+                excluir=admin_user,
+            )
+        
+        assert len(contexto.captured_queries) == 1
+        assert {u.id for u in destinatarios} == {mecanico_user.id, supervisor_user.id}
+    
+    def test_tarea_envia_emails(self, notification, mailoutbox):
+        notification.tipo = "OT_CERRADA"
+        notification.save()
+        notification.usuario.email = "admin@example.com"
+        notification.usuario.save()
+        
+        assert enviar_emails_notificaciones([str(notification.id)]) == 1
+        assert len(mailoutbox) == 1
@@ -4,12 +4,25 @@ Utilidades para crear notificaciones.
 
 Este módulo proporciona funciones helper para crear notificaciones
 automáticamente cuando ocurren eventos importantes en el sistema.
+
+Todas las crear_notificacion_* pasan por notificar(), que hace el fan-out
+con un número constante de consultas sin importar cuántos destinatarios
+haya:
+- resolver_destinatarios(): usuarios, roles y menciones en una consulta
+- bulk_create de las notificaciones
+- una serialización (NotificationSerializer) compartida por todas
+- los WebSocket en un solo lote del despachador y los emails en una
+  tarea Celery, ambos al confirmar la transacción
 """
 
+import logging
+
 from .models import Notification
 from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from channels.layers import get_channel_layer
@@ -18,6 +31,17 @@ from .serializers import NotificationSerializer
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
+# Tipos de notificación que además se envían por email
+TIPOS_CON_EMAIL = (
+    "EVIDENCIA_SUBIDA",
+    "OT_CERRADA",
+    "OT_APROBADA",
+    "OT_RECHAZADA",
+    "OT_RETRABAJO",
+)
+
 
 def enviar_notificacion_websocket(notificacion):
     """
@@ -28,6 +52,8 @@ def enviar_notificacion_websocket(notificacion):
     
     Envía la notificación al grupo del usuario destinatario
     para que se muestre en tiempo real en el frontend.
+    
+    Para varias notificaciones usar notificar(), que las envía en lote.
     """
     try:
         channel_layer = get_channel_layer()
@@ -50,33 +76,27 @@ def enviar_notificacion_websocket(notificacion):
         )
     except Exception as e:
         # No fallar si hay error de WebSocket
-        import logging
-        logger = logging.getLogger(__name__)
         logger.error(f"Error al enviar notificación por WebSocket {notificacion.id}: {e}")
 
 
-def enviar_notificacion_email(notificacion):
+def enviar_notificacion_email(notificacion, connection=None):
     """
     Envía una notificación por email (opcional).
     
     Parámetros:
     - notificacion: Instancia de Notification
+    - connection: Conexión de email a reutilizar (None: una nueva)
     
     Solo envía email si:
     - El usuario tiene email configurado
     - La configuración de email está habilitada
-    - La notificación es importante (EVIDENCIA_SUBIDA, OT_CERRADA, etc.)
+    - La notificación es importante (TIPOS_CON_EMAIL)
+    
+    notificar() no la llama en el request: la tarea
+    enviar_emails_notificaciones (apps/notifications/tasks.py) lo hace.
     """
     # Solo enviar email para notificaciones importantes
-    tipos_importantes = [
-        "EVIDENCIA_SUBIDA",
-        "OT_CERRADA",
-        "OT_APROBADA",
-        "OT_RECHAZADA",
-        "OT_RETRABAJO",
-    ]
-    
-    if notificacion.tipo not in tipos_importantes:
+    if notificacion.tipo not in TIPOS_CON_EMAIL:
         return
     
     if not notificacion.usuario.email:
@@ -111,14 +131,107 @@ def enviar_notificacion_email(notificacion):
             recipient_list=[notificacion.usuario.email],
             html_message=html_message,
             fail_silently=True,  # No fallar si hay error de email
+            connection=connection,
         )
     except Exception as e:
         # Registrar error pero no fallar
-        import logging
-        logger = logging.getLogger(__name__)
         logger.error(f"Error al enviar email de notificación {notificacion.id}: {e}")
 
 
+def resolver_destinatarios(usuarios=(), roles=(), usernames=(), excluir=None):
+    """
+    Usuarios activos a notificar, en una sola consulta.
+    
+    Parámetros:
+    - usuarios: Usuarios o ids explícitos (se ignoran los None)
+    - roles: Roles cuyos usuarios activos se notifican
+    - usernames: Usernames (p. ej. menciones "@usuario" sin la @)
+    - excluir: Usuario que no se notifica (quien hizo la acción)
+    
+    Retorna:
+    - Lista de User sin duplicados
+    """
+    ids = [getattr(u, "id", u) for u in usuarios if u]
+    filtro = Q()
+    if ids:
+        filtro |= Q(id__in=ids)
+    if roles:
+        filtro |= Q(rol__in=roles)
+    if usernames:
+        filtro |= Q(username__in=usernames)
+    if not filtro:
+        return []
+    
+    consulta = User.objects.filter(filtro, is_active=True)
+    if excluir is not None:
+        consulta = consulta.exclude(id=excluir.id)
+    return list(consulta)
+
+
+def notificar(destinatarios, tipo, titulo, mensaje, ot=None, evidencia=None, metadata=None):
+    """
+    Crea la misma notificación para varios usuarios (fan-out).
+    
+    Parámetros:
+    - destinatarios: Lista de User (ver resolver_destinatarios)
+    - tipo, titulo, mensaje, ot, evidencia, metadata: Campos de Notification
+    
+    Retorna:
+    - Lista de Notification creadas
+    
+    Cuesta las mismas consultas con 1 o con 50 destinatarios: un
+    bulk_create, una serialización compartida (solo cambia el id), un lote
+    de group_send para el despachador (apps/notifications/dispatcher.py) y
+    una tarea Celery con los emails. WebSocket y emails salen al confirmar
+    la transacción; si se revierte, no se envían.
+    """
+    if not destinatarios:
+        return []
+    
+    notificaciones = Notification.objects.bulk_create([
+        Notification(
+            usuario=usuario, tipo=tipo, titulo=titulo, mensaje=mensaje,
+            ot=ot, evidencia=evidencia, metadata=metadata or {},
+        )
+        for usuario in destinatarios
+    ])
+    
+    # Todas comparten los datos salvo el id (y creada_en, que difiere en microsegundos)
+    datos = NotificationSerializer(notificaciones[0]).data
+    envios = [
+        (f"notifications_{n.usuario_id}", {"type": "notification_message", "notification": {**datos, "id": str(n.id)}})
+        for n in notificaciones
+    ]
+    transaction.on_commit(lambda: _enviar_websocket(envios))
+    
+    if tipo in TIPOS_CON_EMAIL:
+        ids_email = [str(n.id) for n in notificaciones if n.usuario.email]
+        if ids_email:
+            transaction.on_commit(lambda: _encolar_emails(ids_email))
+    
+    return notificaciones
+
+
+def _enviar_websocket(envios):
+    try:
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            return
+        from .dispatcher import despachar
+        despachar(channel_layer, envios)
+    except Exception as e:
+        logger.error(f"Error al enviar {len(envios)} notificaciones por WebSocket: {e}")
+
+
+def _encolar_emails(ids):
+    try:
+        from .tasks import enviar_emails_notificaciones
+        enviar_emails_notificaciones.delay(ids)
+    except Exception as e:
+        # Sin broker no se envían los emails, pero la notificación ya existe
+        logger.error(f"Error al encolar {len(ids)} emails de notificación: {e}")
+
+
 def crear_notificacion_evidencia(evidencia, usuario_subio):
     """
     Crea notificaciones cuando se sube una evidencia importante.
@@ -133,15 +246,6 @@ def crear_notificacion_evidencia(evidencia, usuario_subio):
     - ADMIN (si la evidencia es grande o importante)
     """
     ot = evidencia.ot
-    usuarios_a_notificar = []
-    
-    # Agregar supervisor si existe
-    if ot.supervisor:
-        usuarios_a_notificar.append(ot.supervisor)
-    
-    # Agregar responsable si existe
-    if ot.responsable:
-        usuarios_a_notificar.append(ot.responsable)
     
     # Agregar ADMIN si la evidencia es grande (>100MB) o es un PDF/documento importante
     es_importante = (
@@ -149,52 +253,27 @@ def crear_notificacion_evidencia(evidencia, usuario_subio):
         (hasattr(evidencia, 'url') and 'evidencias' in evidencia.url)
     )
     
-    if es_importante:
-        admins = User.objects.filter(rol="ADMIN", is_active=True)
-        usuarios_a_notificar.extend(admins)
-    
-    # Eliminar duplicados y no notificar al usuario que subió
-    usuarios_a_notificar = list(set(usuarios_a_notificar))
-    if usuario_subio in usuarios_a_notificar:
-        usuarios_a_notificar.remove(usuario_subio)
-    
-    # Crear notificaciones
-    notificaciones = []
-    for usuario in usuarios_a_notificar:
-        tipo_evidencia_display = dict(evidencia.TipoEvidencia.choices).get(evidencia.tipo, evidencia.tipo)
-        
-        notificacion = Notification.objects.create(
-            usuario=usuario,
-            tipo="EVIDENCIA_SUBIDA",
-            titulo=f"Nueva evidencia en OT #{str(ot.id)[:8]}",
-            mensaje=f"{usuario_subio.get_full_name() or usuario_subio.username} subió una {tipo_evidencia_display.lower()} a la OT del vehículo {ot.vehiculo.patente if ot.vehiculo else 'N/A'}. {evidencia.descripcion or ''}",
-            ot=ot,
-            evidencia=evidencia,
-            metadata={
-                "usuario_subio": usuario_subio.username,
-                "tipo_evidencia": evidencia.tipo,
-                "patente": ot.vehiculo.patente if ot.vehiculo else None,
-            }
-        )
-        notificaciones.append(notificacion)
-        
-        # Enviar email si está configurado
-        try:
-            enviar_notificacion_email(notificacion)
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error al enviar email para notificación {notificacion.id}: {e}")
-        
-        # Enviar notificación por WebSocket en tiempo real
-        try:
-            enviar_notificacion_websocket(notificacion)
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error al enviar notificación por WebSocket {notificacion.id}: {e}")
+    # Supervisor, responsable y (si corresponde) ADMIN, sin quien subió la evidencia
+    destinatarios = resolver_destinatarios(
+        usuarios=[ot.supervisor_id, ot.responsable_id],
+        roles=["ADMIN"] if es_importante else (),
+        excluir=usuario_subio,
+    )
     
-    return notificaciones
+    tipo_evidencia_display = dict(evidencia.TipoEvidencia.choices).get(evidencia.tipo, evidencia.tipo)
+    return notificar(
+        destinatarios,
+        tipo="EVIDENCIA_SUBIDA",
+        titulo=f"Nueva evidencia en OT #{str(ot.id)[:8]}",
+        mensaje=f"{usuario_subio.get_full_name() or usuario_subio.username} subió una {tipo_evidencia_display.lower()} a la OT del vehículo {ot.vehiculo.patente if ot.vehiculo else 'N/A'}. {evidencia.descripcion or ''}",
+        ot=ot,
+        evidencia=evidencia,
+        metadata={
+            "usuario_subio": usuario_subio.username,
+            "tipo_evidencia": evidencia.tipo,
+            "patente": ot.vehiculo.patente if ot.vehiculo else None,
+        }
+    )
 
 
 def crear_notificacion_ot_creada(ot, usuario_creo):
@@ -206,92 +285,52 @@ def crear_notificacion_ot_creada(ot, usuario_creo):
     - ADMIN
     - JEFE_TALLER
     """
-    usuarios_a_notificar = []
-    
-    # Agregar supervisor si existe
-    if ot.supervisor:
-        usuarios_a_notificar.append(ot.supervisor)
-    
-    # Agregar ADMIN y JEFE_TALLER
-    admins = User.objects.filter(rol__in=["ADMIN", "JEFE_TALLER"], is_active=True)
-    usuarios_a_notificar.extend(admins)
-    
-    # Eliminar duplicados
-    usuarios_a_notificar = list(set(usuarios_a_notificar))
-    if usuario_creo in usuarios_a_notificar:
-        usuarios_a_notificar.remove(usuario_creo)
-    
-    notificaciones = []
-    for usuario in usuarios_a_notificar:
-        notificacion = Notification.objects.create(
-            usuario=usuario,
-            tipo="OT_CREADA",
-            titulo=f"Nueva OT creada - {ot.vehiculo.patente if ot.vehiculo else 'N/A'}",
-            mensaje=f"{usuario_creo.get_full_name() or usuario_creo.username} creó una nueva OT para el vehículo {ot.vehiculo.patente if ot.vehiculo else 'N/A'}. Motivo: {ot.motivo[:100]}",
-            ot=ot,
-            metadata={
-                "usuario_creo": usuario_creo.username,
-                "patente": ot.vehiculo.patente if ot.vehiculo else None,
-                "tipo": ot.tipo if hasattr(ot, 'tipo') else None,
-            }
-        )
-        notificaciones.append(notificacion)
-        enviar_notificacion_email(notificacion)
-        enviar_notificacion_websocket(notificacion)
+    destinatarios = resolver_destinatarios(
+        usuarios=[ot.supervisor_id], roles=["ADMIN", "JEFE_TALLER"], excluir=usuario_creo
+    )
     
-    return notificaciones
+    return notificar(
+        destinatarios,
+        tipo="OT_CREADA",
+        titulo=f"Nueva OT creada - {ot.vehiculo.patente if ot.vehiculo else 'N/A'}",
+        mensaje=f"{usuario_creo.get_full_name() or usuario_creo.username} creó una nueva OT para el vehículo {ot.vehiculo.patente if ot.vehiculo else 'N/A'}. Motivo: {ot.motivo[:100]}",
+        ot=ot,
+        metadata={
+            "usuario_creo": usuario_creo.username,
+            "patente": ot.vehiculo.patente if ot.vehiculo else None,
+            "tipo": ot.tipo if hasattr(ot, 'tipo') else None,
+        }
+    )
 
 
 def crear_notificacion_ot_comentario(comentario, menciones):
     """
     Crea notificaciones cuando se agrega un comentario con menciones.
     
-    Notifica a los usuarios mencionados en el comentario.
+    Notifica a los usuarios mencionados en el comentario (por id o
+    "@username"), resueltos en una sola consulta.
     """
-    notificaciones = []
-    
-    for mencion in menciones:
-        # Extraer ID de usuario de la mención (formato: @username o @id)
-        # Por ahora, asumimos que las menciones son IDs de usuario
-        try:
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            
-            # Intentar obtener usuario por ID o username
-            if mencion.startswith("@"):
-                mencion = mencion[1:]  # Remover @
-            
-            usuario = None
-            try:
-                # Intentar por ID primero
-                usuario = User.objects.get(id=mencion)
-            except (User.DoesNotExist, ValueError):
-                try:
-                    # Intentar por username
-                    usuario = User.objects.get(username=mencion)
-                except User.DoesNotExist:
-                    pass
-            
-            if usuario and usuario != comentario.usuario:
-                notificacion = Notification.objects.create(
-                    usuario=usuario,
-                    tipo="GENERAL",
-                    titulo=f"Nueva mención en OT {comentario.ot.id}",
-                    mensaje=f"{comentario.usuario.get_full_name() if comentario.usuario else 'Usuario'} te mencionó en un comentario: {comentario.contenido[:100]}",
-                    ot=comentario.ot,
-                    metadata={
-                        "comentario_id": str(comentario.id),
-                        "usuario_comentario": comentario.usuario.username if comentario.usuario else None,
-                    }
-                )
-                notificaciones.append(notificacion)
-                enviar_notificacion_websocket(notificacion)
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error al crear notificación de mención {mencion}: {e}")
+    # Extraer ID de usuario o username de cada mención (formato: @username o @id)
+    valores = [str(mencion).lstrip("@") for mencion in menciones]
+    ids = [valor for valor in valores if valor.isdigit()]
+    usernames = [valor for valor in valores if not valor.isdigit()]
     
-    return notificaciones
+    try:
+        destinatarios = resolver_destinatarios(usuarios=ids, usernames=usernames, excluir=comentario.usuario)
+        return notificar(
+            destinatarios,
+            tipo="GENERAL",
+            titulo=f"Nueva mención en OT {comentario.ot.id}",
+            mensaje=f"{comentario.usuario.get_full_name() if comentario.usuario else 'Usuario'} te mencionó en un comentario: {comentario.contenido[:100]}",
+            ot=comentario.ot,
+            metadata={
+                "comentario_id": str(comentario.id),
+                "usuario_comentario": comentario.usuario.username if comentario.usuario else None,
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error al crear notificaciones de mención {menciones}: {e}")
+        return []
 
 
 def crear_notificacion_ot_cerrada(ot, usuario_cerro):
@@ -304,36 +343,21 @@ def crear_notificacion_ot_cerrada(ot, usuario_cerro):
     - SPONSOR
     - EJECUTIVO
     """
-    usuarios_a_notificar = []
-    
-    if ot.supervisor:
-        usuarios_a_notificar.append(ot.supervisor)
-    
-    ejecutivos = User.objects.filter(rol__in=["ADMIN", "SPONSOR", "EJECUTIVO"], is_active=True)
-    usuarios_a_notificar.extend(ejecutivos)
-    
-    usuarios_a_notificar = list(set(usuarios_a_notificar))
-    if usuario_cerro in usuarios_a_notificar:
-        usuarios_a_notificar.remove(usuario_cerro)
-    
-    notificaciones = []
-    for usuario in usuarios_a_notificar:
-        notificacion = Notification.objects.create(
-            usuario=usuario,
-            tipo="OT_CERRADA",
-            titulo=f"OT cerrada - {ot.vehiculo.patente if ot.vehiculo else 'N/A'}",
-            mensaje=f"La OT del vehículo {ot.vehiculo.patente if ot.vehiculo else 'N/A'} fue cerrada por {usuario_cerro.get_full_name() or usuario_cerro.username}.",
-            ot=ot,
-            metadata={
-                "usuario_cerro": usuario_cerro.username,
-                "patente": ot.vehiculo.patente if ot.vehiculo else None,
-            }
-        )
-        notificaciones.append(notificacion)
-        enviar_notificacion_email(notificacion)
-        enviar_notificacion_websocket(notificacion)
+    destinatarios = resolver_destinatarios(
+        usuarios=[ot.supervisor_id], roles=["ADMIN", "SPONSOR", "EJECUTIVO"], excluir=usuario_cerro
+    )
     
-    return notificaciones
+    return notificar(
+        destinatarios,
+        tipo="OT_CERRADA",
+        titulo=f"OT cerrada - {ot.vehiculo.patente if ot.vehiculo else 'N/A'}",
+        mensaje=f"La OT del vehículo {ot.vehiculo.patente if ot.vehiculo else 'N/A'} fue cerrada por {usuario_cerro.get_full_name() or usuario_cerro.username}.",
+        ot=ot,
+        metadata={
+            "usuario_cerro": usuario_cerro.username,
+            "patente": ot.vehiculo.patente if ot.vehiculo else None,
+        }
+    )
 
 
 def crear_notificacion_ot_asignada(ot, usuario_asignado):
@@ -345,8 +369,8 @@ def crear_notificacion_ot_asignada(ot, usuario_asignado):
     if not usuario_asignado or usuario_asignado.rol != "MECANICO":
         return []
     
-    notificacion = Notification.objects.create(
-        usuario=usuario_asignado,
+    return notificar(
+        [usuario_asignado],
         tipo="OT_ASIGNADA",
         titulo=f"OT asignada - {ot.vehiculo.patente if ot.vehiculo else 'N/A'}",
         mensaje=f"Se te asignó una nueva OT para el vehículo {ot.vehiculo.patente if ot.vehiculo else 'N/A'}. Motivo: {ot.motivo[:100]}",
@@ -355,9 +379,6 @@ def crear_notificacion_ot_asignada(ot, usuario_asignado):
             "patente": ot.vehiculo.patente if ot.vehiculo else None,
         }
     )
-    
-    enviar_notificacion_websocket(notificacion)
-    return [notificacion]
 
 
 def crear_notificacion_ot_aprobada(ot, usuario_aprobo):
@@ -369,8 +390,8 @@ def crear_notificacion_ot_aprobada(ot, usuario_aprobo):
     if not ot.responsable:
         return []
     
-    notificacion = Notification.objects.create(
-        usuario=ot.responsable,
+    return notificar(
+        [ot.responsable],
         tipo="OT_APROBADA",
         titulo=f"OT aprobada - {ot.vehiculo.patente if ot.vehiculo else 'N/A'}",
         mensaje=f"La OT del vehículo {ot.vehiculo.patente if ot.vehiculo else 'N/A'} fue aprobada por {usuario_aprobo.get_full_name() or usuario_aprobo.username}.",
@@ -380,10 +401,6 @@ def crear_notificacion_ot_aprobada(ot, usuario_aprobo):
             "patente": ot.vehiculo.patente if ot.vehiculo else None,
         }
     )
-    
-    enviar_notificacion_email(notificacion)
-    enviar_notificacion_websocket(notificacion)
-    return [notificacion]
 
 
 def crear_notificacion_ot_rechazada(ot, usuario_rechazo):
@@ -395,8 +412,8 @@ def crear_notificacion_ot_rechazada(ot, usuario_rechazo):
     if not ot.responsable:
         return []
     
-    notificacion = Notification.objects.create(
-        usuario=ot.responsable,
+    return notificar(
+        [ot.responsable],
         tipo="OT_RECHAZADA",
         titulo=f"OT rechazada - {ot.vehiculo.patente if ot.vehiculo else 'N/A'}",
         mensaje=f"La OT del vehículo {ot.vehiculo.patente if ot.vehiculo else 'N/A'} fue rechazada por {usuario_rechazo.get_full_name() or usuario_rechazo.username}. Revisa los comentarios.",
@@ -406,8 +423,3 @@ def crear_notificacion_ot_rechazada(ot, usuario_rechazo):
             "patente": ot.vehiculo.patente if ot.vehiculo else None,
         }
     )
-    
-    enviar_notificacion_email(notificacion)
-    enviar_notificacion_websocket(notificacion)
-    return [notificacion]
-
@@ -0,0 +1,405 @@
+# apps/reports/aggregation.py
+"""
+Motor de agregación compartido por los dashboards.
+
+Cada dashboard repetía sus propias consultas: un COUNT por estado, un Avg por
+estado en un loop, y series de 7 días / 4 semanas con una consulta por
+período. Este módulo centraliza esas métricas:
+
+- METRICAS declara cada métrica como una agregación condicional
+  (Count/Sum/Avg con filter=Q(...)) sobre una fuente (OT, vehículos o KPIs
+  diarios). calcular() agrupa las métricas pedidas por fuente y ejecuta UNA
+  consulta .aggregate() por fuente, sin importar cuántas métricas se pidan.
+- serie() agrupa en SQL por cubetas de fechas (días, semanas o rangos
+  arbitrarios) con CASE WHEN, en una sola consulta GROUP BY.
+- Las duraciones reales por estado (promedio y percentiles) salen del
+  ledger TramoEstado (fuente "tramo"): tramos cerrados en los últimos 30
+  días, con percentile_cont de PostgreSQL (Percentil).
+
+Cada dashboard declara sus métricas y su presupuesto de queries
+(apps/reports/dashboards.py), y los tests verifican ese presupuesto.
+
+Uso:
+    from apps.reports import aggregation
+
+    valores = aggregation.calcular(["estado_ABIERTA", "ot_atrasadas", "vehiculos_en_taller"])
+    semanas = aggregation.serie(
+        "kpi", "fecha",
+        aggregation.cubetas_semanales(inicio_mes, hoy, 4),
+        aggregation.SUMAS_KPI,
+    )
+
+Relaciones:
+- Usa: apps/reports/models.py (KPIDiario), apps/workorders/models.py (OrdenTrabajo, TramoEstado),
+  apps/vehicles/models.py
+- Usado por: apps/reports/dashboards.py, apps/reports/views.py (ReporteProductividadView)
+"""
+
+from datetime import timedelta
+
+from django.db.models import (
+    Aggregate, Avg, Case, Count, DateTimeField, F, FloatField, IntegerField, Q, Sum, Value, When,
+)
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from apps.core.date_filters import rango_fechas
+from apps.vehicles.models import Vehiculo
+from apps.workorders.models import OrdenTrabajo, TramoEstado
+
+from .models import KPIDiario
+from .rollups import METRICAS as METRICAS_KPI
+
+
+# Estados de OT (mismo orden que OrdenTrabajo.ESTADOS)
+ESTADOS_OT = [estado for estado, _ in OrdenTrabajo.ESTADOS]
+
+# Estados en los que una OT cuenta como atrasada si venció su SLA
+ESTADOS_ACTIVOS = ["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA", "EN_QA"]
+
+# Estados "pendientes" para el coordinador (sin QA)
+ESTADOS_PENDIENTES = ["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
+
+# Estados con tiempo promedio desde la apertura
+ESTADOS_TIEMPO = ["ABIERTA", "EN_EJECUCION", "EN_PAUSA", "EN_QA"]
+
+# Estados con duración medida en el ledger (los no terminales)
+ESTADOS_DURACION = ["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA", "EN_QA", "RETRABAJO"]
+
+
+# Fuentes: queryset base de cada fuente
+FUENTES = {
+    "ot": lambda: OrdenTrabajo.objects.all(),
+    "vehiculo": lambda: Vehiculo.objects.all(),
+    "kpi": lambda: KPIDiario.objects.all(),
+    "tramo": lambda: TramoEstado.objects.all(),
+}
+
+
+class Percentil(Aggregate):
+    """
+    Percentil continuo (percentile_cont de PostgreSQL).
+
+    Ej: Percentil("segundos", 0.9, filter=Q(estado="EN_QA"))
+    """
+
+    function = "PERCENTILE_CONT"
+    name = "Percentil"
+    template = "%(function)s(%(fraccion)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expresion, fraccion, **extra):
+        super().__init__(expresion, fraccion=float(fraccion), **extra)
+
+
+def contexto():
+    """
+    Valores de referencia comunes a todas las métricas de una misma pasada.
+
+    Se calculan una vez para que todas las métricas usen el mismo "ahora".
+    """
+    ahora = timezone.now()
+    hoy = timezone.localdate()
+    return {
+        "ahora": ahora,
+        "hoy": hoy,
+        "inicio_mes": hoy.replace(day=1),
+        "hace_7_dias": hoy - timedelta(days=7),
+        "hace_30_dias": hoy - timedelta(days=30),
+    }
+
+
+def _conteo_estado_kpi(estado):
+    """Suma la foto por estado del día actual (JSON por_estado) en SQL."""
+    return lambda c: Sum(
+        Cast(KT(f"por_estado__{estado}"), IntegerField()),
+        filter=Q(fecha=c["hoy"])
+    )
+
+
+def _suma_kpi(campo, desde):
+    """Suma una métrica de KPIDiario desde la fecha indicada en el contexto (inclusive)."""
+    return lambda c: Sum(campo, filter=Q(fecha__gte=c[desde]))
+
+
+def _tiempo_actual(estado):
+    """Promedio de (ahora - apertura) de las OT en el estado."""
+    return lambda c: Avg(Value(c["ahora"], output_field=DateTimeField()) - F("apertura"), filter=Q(estado=estado))
+
+
+def _tiempo_30_dias(estado):
+    """
+    Promedio de tiempo de las OT abiertas en los últimos 30 días en el estado.
+
+    Para CERRADA es (cierre - apertura); para el resto (ahora - apertura).
+    """
+    def expresion(c):
+        filtro = Q(rango_fechas("apertura", desde=c["hace_30_dias"]), estado=estado)
+        if estado == "CERRADA":
+            return Avg(F("cierre") - F("apertura"), filter=filtro & Q(cierre__isnull=False))
+        return Avg(Value(c["ahora"], output_field=DateTimeField()) - F("apertura"), filter=filtro)
+    return expresion
+
+
+def _agregados_duracion(estado, filtro=None):
+    """Agregados de duración de un estado sobre TramoEstado (nombres de las métricas duracion_*)."""
+    filtro = Q(estado=estado) & (filtro or Q())
+    return {
+        # Solo tramos con duración conocida (ver TramoEstado.inicio)
+        f"duracion_tramos_{estado}": Count("segundos", filter=filtro),
+        f"duracion_promedio_{estado}": Avg("segundos", filter=filtro),
+        f"duracion_p50_{estado}": Percentil("segundos", 0.5, filter=filtro),
+        f"duracion_p90_{estado}": Percentil("segundos", 0.9, filter=filtro),
+    }
+
+
+def _duracion(nombre, estado):
+    """Métrica duracion_* del estado sobre los tramos cerrados en los últimos 30 días."""
+    return lambda c: _agregados_duracion(estado, rango_fechas("fin", desde=c["hace_30_dias"]))[nombre]
+
+
+# Métricas disponibles: nombre → {"fuente", "expresion": fn(contexto) → agregación, "vacio"}
+# "vacio" es el valor cuando la agregación no encuentra filas (Sum/Avg retornan NULL)
+METRICAS = {}
+
+for _estado in ESTADOS_OT:
+    METRICAS[f"estado_{_estado}"] = {"fuente": "kpi", "expresion": _conteo_estado_kpi(_estado), "vacio": 0}
+
+METRICAS.update({
+    # ---- KPIs diarios (una consulta sobre KPIDiario) ----
+    "ot_cerradas_hoy": {"fuente": "kpi", "expresion": _suma_kpi("ot_cerradas", "hoy"), "vacio": 0},
+    "ot_cerradas_7_dias": {"fuente": "kpi", "expresion": _suma_kpi("ot_cerradas", "hace_7_dias"), "vacio": 0},
+    "ot_cerradas_30_dias": {"fuente": "kpi", "expresion": _suma_kpi("ot_cerradas", "hace_30_dias"), "vacio": 0},
+    "sla_cumplido_30_dias": {"fuente": "kpi", "expresion": _suma_kpi("sla_cumplido", "hace_30_dias"), "vacio": 0},
+    "sla_incumplido_30_dias": {"fuente": "kpi", "expresion": _suma_kpi("sla_incumplido", "hace_30_dias"), "vacio": 0},
+    "ciclo_segundos_30_dias": {"fuente": "kpi", "expresion": _suma_kpi("ciclo_segundos", "hace_30_dias"), "vacio": 0},
+    "ot_creadas_mes": {"fuente": "kpi", "expresion": _suma_kpi("ot_creadas", "inicio_mes"), "vacio": 0},
+    "ot_cerradas_mes": {"fuente": "kpi", "expresion": _suma_kpi("ot_cerradas", "inicio_mes"), "vacio": 0},
+
+    # ---- OT en vivo (una consulta sobre OrdenTrabajo) ----
+    "ot_atrasadas": {
+        "fuente": "ot",
+        "expresion": lambda c: Count("id", filter=Q(fecha_limite_sla__lt=c["ahora"], estado__in=ESTADOS_ACTIVOS)),
+        "vacio": 0,
+    },
+    "ot_atrasadas_pendientes": {
+        "fuente": "ot",
+        "expresion": lambda c: Count("id", filter=Q(fecha_limite_sla__lt=c["ahora"], estado__in=ESTADOS_PENDIENTES)),
+        "vacio": 0,
+    },
+
+    # ---- Vehículos (una consulta sobre Vehiculo) ----
+    "vehiculos_en_taller": {
+        "fuente": "vehiculo",
+        "expresion": lambda c: Count("id", filter=Q(estado__in=["EN_ESPERA", "EN_MANTENIMIENTO"])),
+        "vacio": 0,
+    },
+    "vehiculos_flota": {
+        "fuente": "vehiculo",
+        "expresion": lambda c: Count("id", filter=Q(estado__in=["ACTIVO", "EN_ESPERA", "EN_MANTENIMIENTO"])),
+        "vacio": 0,
+    },
+    "vehiculos_operativos": {
+        "fuente": "vehiculo",
+        "expresion": lambda c: Count("id", filter=Q(estado="ACTIVO")),
+        "vacio": 0,
+    },
+})
+
+for _estado in ESTADOS_TIEMPO:
+    METRICAS[f"tiempo_actual_{_estado}"] = {"fuente": "ot", "expresion": _tiempo_actual(_estado), "vacio": None}
+
+for _estado in ESTADOS_TIEMPO + ["CERRADA"]:
+    METRICAS[f"tiempo_30_dias_{_estado}"] = {"fuente": "ot", "expresion": _tiempo_30_dias(_estado), "vacio": None}
+
+# Duraciones por estado desde el ledger (una consulta sobre TramoEstado)
+for _estado in ESTADOS_DURACION:
+    for _agregado in ("tramos", "promedio", "p50", "p90"):
+        _nombre = f"duracion_{_agregado}_{_estado}"
+        METRICAS[_nombre] = {
+            "fuente": "tramo",
+            "expresion": _duracion(_nombre, _estado),
+            "vacio": 0 if _agregado == "tramos" else None,
+        }
+
+# Métricas de duración de todos los estados (para la lista de métricas de un dashboard)
+METRICAS_DURACION = tuple(
+    f"duracion_{agregado}_{estado}"
+    for estado in ESTADOS_DURACION
+    for agregado in ("tramos", "promedio", "p50", "p90")
+)
+
+
+# Sumas de todas las métricas de KPIDiario, para serie() sobre la fuente "kpi"
+SUMAS_KPI = {metrica: Sum(metrica) for metrica in METRICAS_KPI}
+
+
+def calcular(nombres, ctx=None, filtros=None):
+    """
+    Calcula las métricas pedidas con una consulta por fuente.
+
+    Parámetros:
+    - nombres: Iterable de nombres de METRICAS
+    - ctx: Contexto de contexto() (opcional; se crea si no se entrega)
+    - filtros: Dict {fuente: Q} para acotar cada fuente (ej: por zona)
+
+    Retorna:
+    - Dict {nombre: valor}
+
+    Lanza:
+    - KeyError: Si alguna métrica no existe
+    """
+    ctx = ctx or contexto()
+    filtros = filtros or {}
+
+    por_fuente = {}
+    for nombre in nombres:
+        metrica = METRICAS[nombre]
+        por_fuente.setdefault(metrica["fuente"], {})[nombre] = metrica["expresion"](ctx)
+
+    resultado = {}
+    for fuente, agregados in por_fuente.items():
+        queryset = FUENTES[fuente]()
+        if fuente in filtros:
+            queryset = queryset.filter(filtros[fuente])
+        valores = queryset.aggregate(**agregados)
+        for nombre, valor in valores.items():
+            resultado[nombre] = METRICAS[nombre]["vacio"] if valor is None else valor
+    return resultado
+
+
+def cubetas_diarias(desde, hasta):
+    """Cubetas de un día entre desde y hasta (inclusive): [(dia, dia), ...]."""
+    return [(desde + timedelta(days=i), desde + timedelta(days=i)) for i in range((hasta - desde).days + 1)]
+
+
+def cubetas_semanales(inicio, hoy, semanas):
+    """
+    Cubetas de 7 días a partir de `inicio`, recortadas a `hoy`.
+
+    Una semana que empieza después de hoy queda vacía (hasta < desde), igual
+    que las tendencias semanales del dashboard de subgerencia.
+    """
+    cubetas = []
+    for i in range(semanas):
+        desde = inicio + timedelta(weeks=i)
+        cubetas.append((desde, min(desde + timedelta(days=6), hoy)))
+    return cubetas
+
+
+def serie(fuente, campo, cubetas, agregados, filtro=None):
+    """
+    Agrega por cubetas de fechas en una sola consulta GROUP BY.
+
+    La cubeta de cada fila se calcula en SQL con CASE WHEN sobre `campo`
+    (DateField o DateTimeField; en el segundo caso se usan rangos
+    semiabiertos en hora local, compatibles con índices).
+
+    Parámetros:
+    - fuente: Nombre de FUENTES
+    - campo: Campo de fecha de la fuente
+    - cubetas: Lista de (desde, hasta) inclusivos
+    - agregados: Dict {nombre: agregación}
+    - filtro: Q adicional (opcional)
+
+    Retorna:
+    - Lista con un dict por cubeta: {"desde", "hasta", nombre: valor, ...}
+      (0 para cubetas sin filas)
+    """
+    queryset = FUENTES[fuente]()
+    if filtro is not None:
+        queryset = queryset.filter(filtro)
+
+    es_datetime = isinstance(queryset.model._meta.get_field(campo), DateTimeField)
+
+    def rango(desde, hasta):
+        if es_datetime:
+            return rango_fechas(campo, desde=desde, hasta=hasta)
+        return Q(**{f"{campo}__gte": desde, f"{campo}__lte": hasta})
+
+    condiciones = [(i, rango(desde, hasta)) for i, (desde, hasta) in enumerate(cubetas) if desde <= hasta]
+    resultado = [{"desde": desde, "hasta": hasta, **{nombre: 0 for nombre in agregados}} for desde, hasta in cubetas]
+    if not condiciones:
+        return resultado
+
+    total = Q()
+    for _, condicion in condiciones:
+        total |= condicion
+
+    filas = queryset.filter(total).annotate(
+        cubeta=Case(
+            *[When(condicion, then=Value(i)) for i, condicion in condiciones],
+            output_field=IntegerField()
+        )
+    ).values("cubeta").annotate(**agregados).order_by()
+
+    for fila in filas:
+        if fila["cubeta"] is None:
+            continue
+        for nombre in agregados:
+            resultado[fila["cubeta"]][nombre] = fila[nombre] or 0
+    return resultado
+
+
+def horas(duracion):
+    """Convierte un timedelta (o None) a horas redondeadas a 2 decimales."""
+    if duracion is None:
+        return None
+    return round(duracion.total_seconds() / 3600, 2)
+
+
+def horas_segundos(segundos):
+    """Convierte segundos (o None) a horas redondeadas a 2 decimales."""
+    if segundos is None:
+        return None
+    return round(float(segundos) / 3600, 2)
+
+
+def duraciones(valores, estados=None):
+    """
+    Duraciones por estado (en horas) a partir de las métricas duracion_*.
+
+    Retorna:
+    - Dict {estado: {"tramos", "promedio_horas", "p50_horas", "p90_horas"}}
+    """
+    estados = estados or ESTADOS_DURACION
+    return {
+        estado: {
+            "tramos": valores[f"duracion_tramos_{estado}"],
+            "promedio_horas": horas_segundos(valores[f"duracion_promedio_{estado}"]),
+            "p50_horas": horas_segundos(valores[f"duracion_p50_{estado}"]),
+            "p90_horas": horas_segundos(valores[f"duracion_p90_{estado}"]),
+        }
+        for estado in estados
+    }
+
+
+def duraciones_en_periodo(desde, hasta, estados=None, por=None):
+    """
+    Duraciones por estado de los tramos cerrados entre desde y hasta.
+
+    Una consulta sobre TramoEstado (rango por fin, con índice).
+
+    Parámetros:
+    - desde, hasta: datetimes del período (inclusivos)
+    - estados: Estados a medir (default: ESTADOS_DURACION)
+    - por: Campo para agrupar (ej: "ot__responsable_id"); sin agrupar si es None
+
+    Retorna:
+    - Resultado de duraciones(), o {valor de `por`: duraciones()} si se agrupa
+    """
+    estados = estados or ESTADOS_DURACION
+    agregados = {}
+    for estado in estados:
+        agregados.update(_agregados_duracion(estado))
+    queryset = FUENTES["tramo"]().filter(fin__gte=desde, fin__lte=hasta)
+    if por is None:
+        return duraciones(queryset.aggregate(**agregados), estados)
+    filas = queryset.values(por).annotate(**agregados).order_by()
+    return {fila[por]: duraciones(fila, estados) for fila in filas}
+
+
+def porcentaje(parte, total):
+    """Porcentaje redondeado a 1 decimal (0.0 si total es 0)."""
+    return round(parte / total * 100, 1) if total else 0.0
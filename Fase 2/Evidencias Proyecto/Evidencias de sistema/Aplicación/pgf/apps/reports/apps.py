@@ -5,3 +5,6 @@ class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reports'
 
+    def ready(self):
+        # Conectar señales de precálculo de dashboards
+        from . import signals  # noqa: F401
@@ -0,0 +1,288 @@
+# apps/reports/charts.py
+"""
+Gráficos para los reportes PDF.
+
+Los generadores dibujaban con la máquina de estados global de pyplot
+(plt.subplots / plt.savefig / plt.close), que no es segura con workers en
+hilos (dos reportes simultáneos pueden dibujar sobre la figura "actual" del
+otro), y rasterizaban cada gráfico a 150 dpi en cada llamada.
+
+Este módulo ofrece dos formas de dibujar, ambas seguras entre hilos:
+
+- Vectorial (ReportLab): VerticalBarChart, HorizontalBarChart y
+  HorizontalLineChart dentro de un Drawing. No rasteriza nada y es lo que
+  usan por defecto los gráficos simples de barras y líneas.
+- PNG (matplotlib): API orientada a objetos (Figure + FigureCanvasAgg, sin
+  pyplot), con los PNG memorizados por hash de datos, tamaño y dpi: un
+  mismo gráfico se rasteriza una sola vez por proceso.
+
+El modo por defecto se configura con settings.REPORTES_GRAFICOS_VECTORIALES
+(True si no está definido) y se puede forzar por llamada con vectorial=.
+
+Relaciones:
+- Usado por: apps/reports/pdf_generator.py (generar_reporte_semanal_pdf)
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from django.conf import settings
+from reportlab.graphics.charts.barcharts import HorizontalBarChart, VerticalBarChart
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import Image
+
+
+# Resolución de los PNG (a 6 pulgadas de ancho en el PDF, 800 px bastan)
+DPI = 100
+
+# Cantidad máxima de PNG memorizados por proceso
+MAX_PNG_MEMORIZADOS = 128
+
+# Colores corporativos
+AZUL = "#003DA5"
+VERDE = "#10b981"
+PALETA = ["#003DA5", "#f59e0b", "#ef4444", "#8b5cf6", "#10b981"]
+
+_png_memorizados = OrderedDict()
+_lock = threading.Lock()
+
+
+def _vectorial(vectorial):
+    if vectorial is None:
+        return getattr(settings, "REPORTES_GRAFICOS_VECTORIALES", True)
+    return vectorial
+
+
+def _clave(tipo, datos, ancho, alto, dpi):
+    """Hash de los datos, tamaño y dpi de un gráfico."""
+    contenido = json.dumps([tipo, datos, ancho, alto, dpi], sort_keys=True, default=str)
+    return hashlib.sha256(contenido.encode()).hexdigest()
+
+
+def _png(tipo, datos, ancho, alto, dpi=DPI):
+    """
+    PNG de un gráfico, memorizado por hash de (tipo, datos, tamaño, dpi).
+
+    Dos hilos que piden el mismo gráfico a la vez pueden rasterizarlo los
+    dos; el resultado es idéntico y solo se guarda una copia.
+    """
+    clave = _clave(tipo, datos, ancho, alto, dpi)
+    with _lock:
+        if clave in _png_memorizados:
+            _png_memorizados.move_to_end(clave)
+            return _png_memorizados[clave]
+
+    png = _DIBUJANTES[tipo](datos, ancho, alto, dpi)
+
+    with _lock:
+        _png_memorizados[clave] = png
+        while len(_png_memorizados) > MAX_PNG_MEMORIZADOS:
+            _png_memorizados.popitem(last=False)
+    return png
+
+
+def limpiar_memoria():
+    """Vacía los PNG memorizados (tests y cambios de estilo)."""
+    with _lock:
+        _png_memorizados.clear()
+
+
+# ==================== MATPLOTLIB (PNG) ====================
+
+def _figura(ancho, alto):
+    """Figura independiente (sin pyplot ni estado global)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=(ancho, alto))
+    FigureCanvasAgg(figura)
+    return figura
+
+
+def _a_png(figura, dpi):
+    buffer = BytesIO()
+    figura.tight_layout()
+    figura.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def _dibujar_lineas(datos, ancho, alto, dpi):
+    figura = _figura(ancho, alto)
+    ax = figura.add_subplot()
+    posiciones = range(len(datos["etiquetas"]))
+    ax.plot(posiciones, datos["valores"], marker="o", linewidth=2, color=AZUL, markersize=8)
+    ax.fill_between(posiciones, datos["valores"], alpha=0.3, color=AZUL)
+    ax.set_xticks(list(posiciones), datos["etiquetas"], rotation=45)
+    ax.set_xlabel(datos["eje_x"], fontsize=10)
+    ax.set_ylabel(datos["eje_y"], fontsize=10)
+    ax.set_title(datos["titulo"], fontsize=12, fontweight="bold")
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(bottom=0)
+    return _a_png(figura, dpi)
+
+
+def _dibujar_barras(datos, ancho, alto, dpi):
+    figura = _figura(ancho, alto)
+    ax = figura.add_subplot()
+    barras = ax.bar(datos["etiquetas"], datos["valores"], color=PALETA[:len(datos["etiquetas"])], alpha=0.8)
+    ax.set_xlabel(datos["eje_x"], fontsize=10)
+    ax.set_ylabel(datos["eje_y"], fontsize=10)
+    ax.set_title(datos["titulo"], fontsize=12, fontweight="bold")
+    ax.grid(True, alpha=0.3, axis="y")
+    ax.set_ylim(bottom=0)
+    ax.bar_label(barras, labels=[f"{int(v)}" if v > 0 else "" for v in datos["valores"]], fontsize=9)
+    ax.tick_params(axis="x", labelrotation=45)
+    for etiqueta in ax.get_xticklabels():
+        etiqueta.set_horizontalalignment("right")
+    return _a_png(figura, dpi)
+
+
+def _dibujar_barras_horizontales(datos, ancho, alto, dpi):
+    figura = _figura(ancho, alto)
+    ax = figura.add_subplot()
+    barras = ax.barh(datos["etiquetas"], datos["valores"], color=VERDE, alpha=0.8)
+    ax.set_xlabel(datos["eje_x"], fontsize=10)
+    ax.set_ylabel(datos["eje_y"], fontsize=10)
+    ax.set_title(datos["titulo"], fontsize=12, fontweight="bold")
+    ax.grid(True, alpha=0.3, axis="x")
+    ax.set_xlim(left=0)
+    ax.bar_label(barras, labels=[f"{int(v)}" if v > 0 else "" for v in datos["valores"]], fontsize=9)
+    return _a_png(figura, dpi)
+
+
+_DIBUJANTES = {
+    "lineas": _dibujar_lineas,
+    "barras": _dibujar_barras,
+    "barras_horizontales": _dibujar_barras_horizontales,
+}
+
+
+# ==================== REPORTLAB (VECTORIAL) ====================
+
+def _dibujo(ancho, alto, titulo):
+    """Drawing de ancho x alto pulgadas con el título arriba."""
+    dibujo = Drawing(ancho * inch, alto * inch)
+    dibujo.add(String(
+        ancho * inch / 2, alto * inch - 14, titulo,
+        fontName="Helvetica-Bold", fontSize=11, textAnchor="middle"
+    ))
+    return dibujo
+
+
+def _ubicar(grafico, ancho, alto, margen_izquierdo=45, margen_inferior=45):
+    grafico.x = margen_izquierdo
+    grafico.y = margen_inferior
+    grafico.width = ancho * inch - margen_izquierdo - 15
+    grafico.height = alto * inch - margen_inferior - 30
+
+
+def _escala(grafico_eje, valores):
+    """Eje de valores desde 0 con pasos enteros."""
+    maximo = max(valores) if valores else 0
+    grafico_eje.valueMin = 0
+    grafico_eje.valueMax = max(maximo, 1)
+    grafico_eje.valueStep = max(1, -(-maximo // 5))
+    grafico_eje.labels.fontSize = 8
+
+
+def _vector_lineas(datos, ancho, alto):
+    dibujo = _dibujo(ancho, alto, datos["titulo"])
+    grafico = HorizontalLineChart()
+    _ubicar(grafico, ancho, alto)
+    grafico.data = [tuple(datos["valores"])]
+    grafico.categoryAxis.categoryNames = list(datos["etiquetas"])
+    grafico.categoryAxis.labels.fontSize = 8
+    grafico.categoryAxis.labels.angle = 45
+    grafico.categoryAxis.labels.boxAnchor = "ne"
+    _escala(grafico.valueAxis, datos["valores"])
+    grafico.valueAxis.visibleGrid = True
+    grafico.valueAxis.gridStrokeColor = colors.HexColor("#e5e7eb")
+    grafico.lines[0].strokeColor = colors.HexColor(AZUL)
+    grafico.lines[0].strokeWidth = 2
+    grafico.joinedLines = 1
+    dibujo.add(grafico)
+    return dibujo
+
+
+def _vector_barras(datos, ancho, alto):
+    dibujo = _dibujo(ancho, alto, datos["titulo"])
+    grafico = VerticalBarChart()
+    _ubicar(grafico, ancho, alto, margen_inferior=55)
+    grafico.data = [tuple(datos["valores"])]
+    grafico.categoryAxis.categoryNames = list(datos["etiquetas"])
+    grafico.categoryAxis.labels.fontSize = 8
+    grafico.categoryAxis.labels.angle = 45
+    grafico.categoryAxis.labels.boxAnchor = "ne"
+    _escala(grafico.valueAxis, datos["valores"])
+    grafico.valueAxis.visibleGrid = True
+    grafico.valueAxis.gridStrokeColor = colors.HexColor("#e5e7eb")
+    for i in range(len(datos["valores"])):
+        grafico.bars[(0, i)].fillColor = colors.HexColor(PALETA[i % len(PALETA)])
+    grafico.barLabelFormat = "%d"
+    grafico.barLabels.nudge = 7
+    grafico.barLabels.fontSize = 8
+    dibujo.add(grafico)
+    return dibujo
+
+
+def _vector_barras_horizontales(datos, ancho, alto):
+    dibujo = _dibujo(ancho, alto, datos["titulo"])
+    grafico = HorizontalBarChart()
+    _ubicar(grafico, ancho, alto, margen_izquierdo=110, margen_inferior=30)
+    grafico.data = [tuple(datos["valores"])]
+    grafico.categoryAxis.categoryNames = list(datos["etiquetas"])
+    grafico.categoryAxis.labels.fontSize = 8
+    grafico.categoryAxis.reverseDirection = 1
+    _escala(grafico.valueAxis, datos["valores"])
+    grafico.bars[0].fillColor = colors.HexColor(VERDE)
+    grafico.barLabelFormat = "%d"
+    grafico.barLabels.nudge = 7
+    grafico.barLabels.fontSize = 8
+    dibujo.add(grafico)
+    return dibujo
+
+
+_VECTORIALES = {
+    "lineas": _vector_lineas,
+    "barras": _vector_barras,
+    "barras_horizontales": _vector_barras_horizontales,
+}
+
+
+# ==================== API ====================
+
+def grafico(tipo, etiquetas, valores, titulo, eje_x="", eje_y="",
+            ancho=6, alto=3, vectorial=None, dpi=DPI):
+    """
+    Gráfico listo para agregar a un documento ReportLab.
+
+    Parámetros:
+    - tipo: "lineas", "barras" o "barras_horizontales"
+    - etiquetas: Categorías (strings)
+    - valores: Números, uno por etiqueta
+    - titulo, eje_x, eje_y: Textos del gráfico (los ejes solo en PNG)
+    - ancho, alto: Tamaño en pulgadas dentro del PDF
+    - vectorial: True = Drawing de ReportLab, False = PNG de matplotlib,
+      None = settings.REPORTES_GRAFICOS_VECTORIALES
+    - dpi: Resolución del PNG
+
+    Retorna:
+    - Drawing (vectorial) o Image (PNG memorizado)
+    """
+    datos = {
+        "etiquetas": [str(e) for e in etiquetas],
+        "valores": [float(v) if isinstance(v, float) else int(v) for v in valores],
+        "titulo": titulo,
+        "eje_x": eje_x,
+        "eje_y": eje_y,
+    }
+    if _vectorial(vectorial):
+        return _VECTORIALES[tipo](datos, ancho, alto)
+    png = _png(tipo, datos, ancho * 4 / 3, alto * 4 / 3, dpi)
+    return Image(BytesIO(png), width=ancho * inch, height=alto * inch)
@@ -0,0 +1,310 @@
+# apps/reports/cube.py
+"""
+Cubo de análisis ad-hoc sobre la tabla de hechos HechoOT.
+
+Cada pregunta nueva ("OT por zona y tipo del último trimestre", "SLA por
+marca") era una vista nueva. El cubo responde cualquier combinación de:
+
+- Dimensiones (DIMENSIONES): cubeta de fecha (dia, semana, mes,
+  trimestre), zona, tipo, prioridad, marca, mecanico
+- Medidas (MEDIDAS): ot, cerradas, sla_pct, ciclo_promedio_horas,
+  ciclo_p90_horas, costo_total, costo_promedio
+- Filtros (FILTROS): listas de valores por dimensión
+- Período: rango de fecha de apertura o de cierre (base)
+
+con UNA consulta GROUP BY sobre HechoOT (una fila por OT, sin joins,
+indexada por fecha y zona), refrescada junto con KPIDiario.
+
+Límites (para que nadie lance un recorrido sin cota):
+- Período de a lo sumo MAX_DIAS días y MAX_DIMENSIONES dimensiones
+- Costo estimado por el planificador (EXPLAIN) bajo
+  REPORTES_CUBO_COSTO_MAXIMO; si lo supera, la consulta no se ejecuta
+- statement_timeout de REPORTES_CUBO_TIMEOUT_MS como respaldo (la vista
+  responde 503 pidiendo acotar la consulta)
+- A lo sumo MAX_FILAS filas (el resultado indica si se truncó)
+
+Los resultados se cachean por (consulta normalizada, alcance, watermark
+de los KPIs): un refresco de los hechos invalida la caché sin borrarla.
+
+Relaciones:
+- Usa: apps/reports/models.py (HechoOT, ControlRollup), apps/reports/aggregation.py (Percentil)
+- Usa: apps/reports/scopes.py (alcance por zonas)
+- Usado por: apps/reports/views.py (ReporteCuboView)
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.db.models import Avg, Count, F, Q, Sum, Value
+from django.db.models.functions import TruncDay, TruncMonth, TruncQuarter, TruncWeek
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from . import scopes
+from .aggregation import Percentil
+from .models import ControlRollup, HechoOT
+from .rollups import NOMBRE_ROLLUP
+
+
+# Cubetas de fecha: se aplican sobre la fecha base (apertura o cierre)
+CUBETAS_FECHA = {
+    "dia": TruncDay,
+    "semana": TruncWeek,
+    "mes": TruncMonth,
+    "trimestre": TruncQuarter,
+}
+
+# Dimensiones por atributo: nombre en la API -> campo de HechoOT
+DIMENSIONES_ATRIBUTO = {
+    "zona": "zona",
+    "tipo": "tipo",
+    "prioridad": "prioridad",
+    "marca": "marca",
+    "mecanico": "mecanico_id",
+}
+
+DIMENSIONES = list(CUBETAS_FECHA) + list(DIMENSIONES_ATRIBUTO)
+
+# Filtros aceptados (mismos nombres que las dimensiones por atributo)
+FILTROS = list(DIMENSIONES_ATRIBUTO)
+
+# Fechas base del período
+BASES = {"apertura": "fecha_apertura", "cierre": "fecha_cierre"}
+
+_CERRADA = Q(estado="CERRADA")
+
+# Medidas: nombre -> agregaciones, con alias "m_..." para no chocar con los
+# campos del modelo (sla_pct se arma en _medidas_finales)
+MEDIDAS = {
+    "ot": lambda: {"m_ot": Count("pk")},
+    "cerradas": lambda: {"m_cerradas": Count("pk", filter=_CERRADA)},
+    "sla_pct": lambda: {
+        "m_sla_cumplido": Count("pk", filter=Q(sla_cumplido=True)),
+        "m_sla_total": Count("sla_cumplido"),
+    },
+    "ciclo_promedio_horas": lambda: {"m_ciclo_promedio_horas": Avg("ciclo_segundos") / 3600.0},
+    "ciclo_p90_horas": lambda: {"m_ciclo_p90_horas": Percentil("ciclo_segundos", 0.9) / 3600.0},
+    "costo_total": lambda: {"m_costo_total": Sum("costo")},
+    "costo_promedio": lambda: {"m_costo_promedio": Avg("costo")},
+}
+
+# Límites estructurales
+MAX_DIAS = 2 * 366
+MAX_DIMENSIONES = 3
+MAX_FILAS = 5000
+
+# Segundos que se cachea un resultado (además se invalida con el watermark)
+TTL_CACHE = 10 * 60
+
+
+class CuboCostoExcedido(ValidationError):
+    """La consulta supera el costo máximo estimado por el planificador."""
+
+    default_code = "costo_excedido"
+
+
+class CuboTiempoExcedido(APIException):
+    """La consulta superó REPORTES_CUBO_TIMEOUT_MS y PostgreSQL la canceló."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = (
+        "La consulta tardó demasiado y fue cancelada. "
+        "Acote el período, agregue filtros o use menos dimensiones."
+    )
+    default_code = "tiempo_excedido"
+
+
+def _lista(valor):
+    if not valor:
+        return []
+    if isinstance(valor, str):
+        valor = valor.split(",")
+    return [v.strip() for v in valor if v and v.strip()]
+
+
+def normalizar(dimensiones, medidas, filtros, desde, hasta, base="apertura"):
+    """
+    Valida y normaliza una consulta del cubo.
+
+    Parámetros:
+    - dimensiones, medidas: Listas (o texto separado por comas)
+    - filtros: Dict {dimension: lista de valores}
+    - desde, hasta: date (inclusivos)
+    - base: "apertura" o "cierre"
+
+    Retorna:
+    - Dict con la consulta normalizada (listas ordenadas, fechas ISO)
+
+    Lanza:
+    - ValidationError: Si algún valor no es válido o excede los límites
+    """
+    dimensiones = _lista(dimensiones)
+    medidas = _lista(medidas) or ["ot"]
+    errores = {}
+    desconocidas = [d for d in dimensiones if d not in DIMENSIONES]
+    if desconocidas:
+        errores["dimensiones"] = f"Dimensiones desconocidas: {', '.join(desconocidas)}. Use: {', '.join(DIMENSIONES)}."
+    elif len(dimensiones) > MAX_DIMENSIONES:
+        errores["dimensiones"] = f"A lo sumo {MAX_DIMENSIONES} dimensiones."
+    elif sum(d in CUBETAS_FECHA for d in dimensiones) > 1:
+        errores["dimensiones"] = "Solo una cubeta de fecha (dia, semana, mes o trimestre)."
+    desconocidas = [m for m in medidas if m not in MEDIDAS]
+    if desconocidas:
+        errores["medidas"] = f"Medidas desconocidas: {', '.join(desconocidas)}. Use: {', '.join(MEDIDAS)}."
+    if base not in BASES:
+        errores["base"] = "Use apertura o cierre."
+    if desde > hasta:
+        errores["fecha_inicio"] = "La fecha de inicio no puede ser mayor que la fecha de fin."
+    elif (hasta - desde).days + 1 > MAX_DIAS:
+        errores["fecha_inicio"] = f"El período no puede superar {MAX_DIAS} días."
+    filtros_normalizados = {}
+    for nombre, valores in (filtros or {}).items():
+        valores = _lista(valores)
+        if nombre not in FILTROS:
+            errores[nombre] = f"Filtro desconocido. Use: {', '.join(FILTROS)}."
+        elif valores:
+            if nombre == "mecanico" and not all(v.isdigit() for v in valores):
+                errores[nombre] = "El filtro mecanico recibe IDs numéricos."
+            filtros_normalizados[nombre] = sorted(set(valores))
+    if errores:
+        raise ValidationError(errores)
+
+    return {
+        "dimensiones": dimensiones,
+        "medidas": list(dict.fromkeys(medidas)),
+        "filtros": filtros_normalizados,
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "base": base,
+    }
+
+
+def construir(consulta, alcance=scopes.GLOBAL):
+    """
+    QuerySet agrupado de HechoOT para una consulta normalizada.
+
+    Retorna:
+    - QuerySet de dicts (una fila por combinación de dimensiones, con
+      cada dimensión en la clave "g_<dimension>")
+    """
+    campo_fecha = BASES[consulta["base"]]
+    queryset = HechoOT.objects.filter(
+        scopes.filtro(alcance),
+        **{f"{campo_fecha}__gte": consulta["desde"], f"{campo_fecha}__lte": consulta["hasta"]},
+    )
+    for nombre, valores in consulta["filtros"].items():
+        queryset = queryset.filter(**{f"{DIMENSIONES_ATRIBUTO[nombre]}__in": valores})
+
+    # Alias con prefijo: "zona" o "mecanico" chocarían con los campos del modelo
+    grupos = {}
+    for dimension in consulta["dimensiones"]:
+        if dimension in CUBETAS_FECHA:
+            grupos[f"g_{dimension}"] = CUBETAS_FECHA[dimension](campo_fecha)
+        else:
+            grupos[f"g_{dimension}"] = F(DIMENSIONES_ATRIBUTO[dimension])
+
+    agregados = {}
+    for medida in consulta["medidas"]:
+        agregados.update(MEDIDAS[medida]())
+
+    if not grupos:
+        # Sin dimensiones: una fila con los totales (la constante no entra al GROUP BY)
+        grupos = {"g_total": Value(True)}
+    return queryset.annotate(**grupos).values(*grupos).annotate(**agregados).order_by(*grupos)
+
+
+def costo_estimado(queryset):
+    """
+    Costo total estimado por el planificador de PostgreSQL (EXPLAIN, sin ejecutar).
+
+    Retorna:
+    - float (unidades de costo del planificador)
+    """
+    plan = json.loads(queryset.explain(format="json"))
+    return float(plan[0]["Plan"]["Total Cost"])
+
+
+def _clave_cache(consulta, alcance):
+    watermark = ControlRollup.objects.filter(nombre=NOMBRE_ROLLUP).values_list("watermark", flat=True).first()
+    contenido = json.dumps([consulta, list(alcance), watermark.isoformat() if watermark else None], sort_keys=True)
+    return "reportes:cubo:" + hashlib.sha256(contenido.encode()).hexdigest()
+
+
+def _medidas_finales(fila, medidas):
+    """Convierte los agregados de una fila en las medidas pedidas (redondeadas)."""
+    resultado = {}
+    for medida in medidas:
+        if medida == "sla_pct":
+            total = fila["m_sla_total"]
+            resultado[medida] = round(fila["m_sla_cumplido"] / total * 100, 1) if total else None
+        elif medida in ("ot", "cerradas"):
+            resultado[medida] = fila[f"m_{medida}"]
+        else:
+            valor = fila[f"m_{medida}"]
+            resultado[medida] = round(float(valor), 2) if valor is not None else None
+    return resultado
+
+
+def _valor_dimension(valor):
+    return valor.isoformat() if hasattr(valor, "isoformat") else valor
+
+
+def consultar(consulta, alcance=scopes.GLOBAL):
+    """
+    Ejecuta una consulta normalizada del cubo (o la lee de la caché).
+
+    Parámetros:
+    - consulta: Dict retornado por normalizar()
+    - alcance: Tupla de zonas visibles (apps/reports/scopes.py)
+
+    Retorna:
+    - Dict {"filas": [...], "truncado": bool, "costo_estimado": float}
+
+    Lanza:
+    - CuboCostoExcedido: Si el costo estimado supera REPORTES_CUBO_COSTO_MAXIMO
+    - CuboTiempoExcedido: Si la consulta supera REPORTES_CUBO_TIMEOUT_MS
+    """
+    clave = _clave_cache(consulta, alcance)
+    resultado = cache.get(clave)
+    if resultado is not None:
+        return resultado
+
+    queryset = construir(consulta, alcance)
+    costo = costo_estimado(queryset)
+    if costo > settings.REPORTES_CUBO_COSTO_MAXIMO:
+        raise CuboCostoExcedido({
+            "detail": (
+                f"La consulta es demasiado costosa (costo estimado {costo:.0f}, "
+                f"máximo {settings.REPORTES_CUBO_COSTO_MAXIMO:.0f}). "
+                "Acote el período, agregue filtros o use menos dimensiones."
+            )
+        })
+
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = %s", [int(settings.REPORTES_CUBO_TIMEOUT_MS)])
+            filas = list(queryset[:MAX_FILAS + 1])
+    except OperationalError as e:
+        # 57014 (query_canceled): lo canceló el statement_timeout
+        if getattr(e.__cause__, "pgcode", None) != "57014":
+            raise
+        raise CuboTiempoExcedido()
+
+    dimensiones = consulta["dimensiones"]
+    resultado = {
+        "filas": [
+            {
+                **{d: _valor_dimension(fila[f"g_{d}"]) for d in dimensiones},
+                **_medidas_finales(fila, consulta["medidas"]),
+            }
+            for fila in filas[:MAX_FILAS]
+        ],
+        "truncado": len(filas) > MAX_FILAS,
+        "costo_estimado": round(costo, 1),
+    }
+    cache.set(clave, resultado, TTL_CACHE)
+    return resultado
@@ -0,0 +1,834 @@
+# apps/reports/dashboards.py
+"""
+Precálculo de los dashboards por rol.
+
+Antes cada GET de un dashboard calculaba su payload si la caché (120 s)
+había expirado, así que el primer usuario después de cada expiración pagaba
+el cálculo completo y nadie veía números nuevos sin recargar. Ahora:
+
+- Los payloads se calculan fuera del request, en tareas Celery
+  (apps/reports/tasks.py): cada minuto desde CELERY_BEAT_SCHEDULE y, con un
+  pequeño retardo, después de ráfagas de escrituras sobre OT, pausas y
+  vehículos (apps/reports/signals.py).
+- Cada payload queda en caché por dashboard y por alcance de datos
+  (zonas, ver apps/reports/scopes.py) con un TTL holgado (TTL_CACHE) junto
+  con la hora en que se generó, y se empuja como "data_update" (entity_type
+  "dashboard") por NotificationConsumer a los usuarios que lo ven.
+- Los dashboards de un mismo alcance se calculan juntos
+  (precalcular_alcance()): las métricas que comparten, como los conteos por
+  estado, se consultan una sola vez.
+- Las vistas solo leen la caché (leer()). Si no hay payload encolan el
+  cálculo (solicitar_precalculo()) y responden 202; ?refresh=true pasa por
+  solicitar_refresco(), que limita la frecuencia por usuario y agrupa los
+  refrescos del mismo dashboard y alcance en un solo cálculo.
+
+DASHBOARDS registra, por nombre, la función que arma el payload, sus
+métricas, los roles que pueden verlo y su presupuesto de queries
+(verificado en apps/reports/tests/test_aggregation.py).
+
+Relaciones:
+- Usa: apps/reports/aggregation.py, apps/reports/rollups.py, apps/reports/scopes.py
+- Usa: apps/notifications/realtime.py (push por WebSocket)
+- Usado por: apps/reports/views.py, apps/reports/tasks.py, apps/reports/signals.py
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.core.date_filters import rango_dia, rango_fechas
+from apps.users.models import User
+from apps.vehicles.models import Vehiculo
+from apps.workorders.models import OrdenTrabajo, Pausa
+
+from . import aggregation, rollups, scopes
+
+logger = logging.getLogger(__name__)
+
+
+# Tiempo que un payload precalculado sigue siendo válido en caché. Es mucho
+# mayor que el intervalo del beat: si el worker se atrasa se sirve el último
+# payload (con su generado_en) en vez de calcular en el request.
+TTL_CACHE = 15 * 60
+
+# Segundos que dura el candado que evita encolar el mismo cálculo varias veces
+TTL_EN_COLA = 60
+
+# Retardo tras una escritura antes de recalcular: agrupa las ráfagas de
+# escrituras (p. ej. una transición de estado + su pausa) en un solo cálculo
+RETARDO_ESCRITURAS = 10
+
+# Segundos que se sugieren al cliente (Retry-After) cuando no hay payload
+REINTENTAR_EN = 5
+
+# Un alcance distinto de GLOBAL se sigue precalculando mientras alguien lo
+# haya consultado en este lapso
+TTL_ALCANCE_ACTIVO = 30 * 60
+
+# ?refresh=true: un refresco por usuario cada INTERVALO_REFRESCO_USUARIO
+# segundos, y no se recalcula un payload más nuevo que ANTIGUEDAD_MINIMA_REFRESCO
+INTERVALO_REFRESCO_USUARIO = 30
+ANTIGUEDAD_MINIMA_REFRESCO = 30
+
+
+# ==================== MÉTRICAS POR DASHBOARD ====================
+# Métricas del motor de agregación (apps/reports/aggregation.py)
+
+# Una consulta sobre KPIDiario, una sobre OrdenTrabajo, una sobre Vehiculo
+# y una sobre TramoEstado (duraciones por estado)
+METRICAS_EJECUTIVO = (
+    "estado_ABIERTA", "estado_EN_DIAGNOSTICO", "estado_EN_EJECUCION",
+    "estado_EN_PAUSA", "estado_EN_QA", "estado_RETRABAJO",
+    "ot_cerradas_hoy", "ot_cerradas_7_dias",
+    "sla_cumplido_30_dias", "sla_incumplido_30_dias",
+    "ot_atrasadas", "vehiculos_en_taller",
+) + tuple(f"tiempo_actual_{estado}" for estado in aggregation.ESTADOS_TIEMPO) + aggregation.METRICAS_DURACION
+
+# Conteos por estado (una consulta)
+METRICAS_JEFE_TALLER = tuple(f"estado_{estado}" for estado in aggregation.ESTADOS_OT)
+
+# Una consulta sobre KPIDiario (estados, cierres y SLA de 30 días), una
+# sobre OrdenTrabajo (tiempos por estado) y una sobre TramoEstado (duraciones)
+METRICAS_SUPERVISOR = (
+    "estado_ABIERTA", "estado_EN_DIAGNOSTICO", "estado_EN_EJECUCION",
+    "estado_EN_PAUSA", "estado_EN_QA",
+    "ot_cerradas_30_dias", "sla_cumplido_30_dias", "sla_incumplido_30_dias",
+) + tuple(
+    f"tiempo_30_dias_{estado}" for estado in aggregation.ESTADOS_TIEMPO + ["CERRADA"]
+) + aggregation.METRICAS_DURACION
+
+# Estados pendientes (KPIDiario) y atrasadas (OrdenTrabajo)
+METRICAS_COORDINADOR = tuple(
+    f"estado_{estado}" for estado in aggregation.ESTADOS_PENDIENTES
+) + ("ot_atrasadas_pendientes",)
+
+# Una consulta sobre KPIDiario y una sobre Vehiculo
+METRICAS_SUBGERENTE = (
+    "ot_creadas_mes", "ot_cerradas_mes",
+    "ot_cerradas_30_dias", "ciclo_segundos_30_dias",
+    "vehiculos_flota", "vehiculos_operativos",
+)
+
+
+# ==================== CÁLCULO DE PAYLOADS ====================
+
+def calcular_ejecutivo(alcance=scopes.GLOBAL, valores=None):
+    """
+    KPIs, gráficos y listados del dashboard ejecutivo.
+
+    Parámetros:
+    - alcance: Zonas a las que se acota el cálculo (apps/reports/scopes.py)
+    - valores: Métricas ya calculadas para el alcance (opcional, ver precalcular_alcance())
+    """
+    # Fecha actual para cálculos (día local, igual que los rangos de rango_dia/rango_fechas)
+    hoy = timezone.localdate()
+
+    # ==================== KPIs DE OT ====================
+    # Todas las métricas escalares en una consulta por fuente:
+    # conteos por estado (foto del día), cierres, SLA, atrasadas,
+    # tiempos promedio por estado y vehículos en taller
+    if valores is None:
+        valores = aggregation.calcular(METRICAS_EJECUTIVO, filtros=scopes.filtros_fuentes(alcance))
+    ot_abiertas = valores["estado_ABIERTA"]
+    ot_en_diagnostico = valores["estado_EN_DIAGNOSTICO"]
+    ot_en_ejecucion = valores["estado_EN_EJECUCION"]
+    ot_en_pausa = valores["estado_EN_PAUSA"]
+    ot_en_qa = valores["estado_EN_QA"]
+    ot_retrabajo = valores["estado_RETRABAJO"]
+
+    # Serie de los últimos 7 días (incluye hoy): cierres y SLA por día,
+    # agrupada en SQL en una sola consulta
+    serie_7_dias = aggregation.serie(
+        "kpi", "fecha",
+        aggregation.cubetas_diarias(hoy - timedelta(days=6), hoy),
+        aggregation.SUMAS_KPI,
+        filtro=scopes.filtro(alcance),
+    )
+
+    # OT cerradas hoy
+    ot_cerradas_hoy = valores["ot_cerradas_hoy"]
+
+    # ==================== OTs ATRASADAS ====================
+    # OTs que tienen fecha_limite_sla vencida y aún no están cerradas
+    ot_atrasadas = valores["ot_atrasadas"]
+
+    # ==================== ÚLTIMAS 5 OT ====================
+    # Obtener las 5 OT más recientes con optimización
+    ultimas_5_ot = OrdenTrabajo.objects.filter(scopes.filtro(alcance)).select_related(
+        'vehiculo', 'responsable', 'chofer'
+    ).order_by('-apertura')[:5]
+
+    # Serializar datos de las últimas 5 OT
+    ultimas_5_ot_data = [{
+        "id": str(ot.id),
+        "patente": ot.vehiculo.patente if ot.vehiculo else "N/A",
+        "estado": ot.estado,
+        "responsable": f"{ot.responsable.first_name} {ot.responsable.last_name}" if ot.responsable else "Sin responsable",
+        "apertura": ot.apertura.isoformat(),
+        "tipo": ot.tipo if hasattr(ot, 'tipo') else None,
+    } for ot in ultimas_5_ot]
+
+    # ==================== VEHÍCULOS EN TALLER ====================
+    # Total vehículos en taller (EN_ESPERA o EN_MANTENIMIENTO)
+    vehiculos_en_taller = valores["vehiculos_en_taller"]
+
+    # ==================== INFORMACIÓN DE GUARDIAS ====================
+    # Ingresos registrados hoy por guardia
+    from apps.vehicles.models import IngresoVehiculo
+    ingresos_hoy_por_guardia = User.objects.filter(
+        rol="GUARDIA"
+    ).annotate(
+        ingresos_hoy=Count('ingresos_registrados', filter=rango_dia(
+            "ingresos_registrados__fecha_ingreso", hoy
+        ) & scopes.filtro(alcance, "ingresos_registrados__vehiculo__"), distinct=True)
+    ).filter(ingresos_hoy__gt=0).order_by('-ingresos_hoy')
+
+    guardias_data = [{
+        "id": str(g.id),
+        "nombre": f"{g.first_name} {g.last_name}",
+        "username": g.username,
+        "ingresos_hoy": g.ingresos_hoy
+    } for g in ingresos_hoy_por_guardia]
+
+    # ==================== PRODUCTIVIDAD ====================
+    # Productividad del taller (OT cerradas en los últimos 7 días)
+    hace_7_dias = hoy - timedelta(days=7)
+    ot_cerradas_7_dias = valores["ot_cerradas_7_dias"]
+
+    # ==================== DATOS PARA GRÁFICOS ====================
+    # OT cerradas por día (últimos 7 días) para gráfico de línea
+    ot_cerradas_por_dia = [{
+        "fecha": dia["desde"].isoformat(),
+        "cantidad": dia["ot_cerradas"],
+        "dia": dia["desde"].strftime("%d/%m")
+    } for dia in serie_7_dias]
+
+    # OT por estado para gráfico de barras
+    ot_por_estado = [
+        {"estado": "Abiertas", "cantidad": ot_abiertas},
+        {"estado": "En Diagnóstico", "cantidad": ot_en_diagnostico},
+        {"estado": "En Ejecución", "cantidad": ot_en_ejecucion},
+        {"estado": "En Pausa", "cantidad": ot_en_pausa},
+        {"estado": "En QA", "cantidad": ot_en_qa},
+        {"estado": "Retrabajo", "cantidad": ot_retrabajo},
+    ]
+
+    # Productividad por mecánico (últimos 7 días) para gráfico de barras
+    # Sumar los KPIs diarios por mecánico (dimensión OrdenTrabajo.mecanico)
+    mecanicos_productividad = rollups.kpis(
+        desde=hace_7_dias,
+        mecanico__rol="MECANICO"
+    ).filter(scopes.filtro(alcance)).values(
+        "mecanico_id", "mecanico__first_name", "mecanico__last_name"
+    ).annotate(
+        ot_cerradas=Sum("ot_cerradas")
+    ).filter(ot_cerradas__gt=0).order_by('-ot_cerradas')[:10]
+
+    mecanicos_productividad_data = [{
+        "nombre": f"{m['mecanico__first_name']} {m['mecanico__last_name']}",
+        "ot_cerradas": m["ot_cerradas"]
+    } for m in mecanicos_productividad]
+
+    # ==================== PAUSAS MÁS FRECUENTES ====================
+    # Agrupar pausas por motivo y contar
+    pausas_frecuentes = Pausa.objects.filter(scopes.filtro(alcance, "ot__")).values('motivo').annotate(
+        cantidad=Count('id')
+    ).order_by('-cantidad')[:5]  # Top 5
+
+    # ==================== MECÁNICOS CON MÁS CARGA ====================
+    # Mecánicos con más carga de trabajo (OT activas)
+    mecanicos_carga = User.objects.filter(
+        scopes.filtro(alcance, "ots_responsable__"),
+        rol="MECANICO",
+        ots_responsable__estado__in=["ABIERTA", "EN_EJECUCION", "EN_PAUSA"]
+    ).annotate(
+        total_ots=Count('ots_responsable')
+    ).order_by('-total_ots')[:5]  # Top 5
+
+    # Serializar datos de mecánicos
+    mecanicos_carga_data = [{
+        "id": m.id,
+        "nombre": f"{m.first_name} {m.last_name}",
+        "total_ots": m.total_ots
+    } for m in mecanicos_carga]
+
+    # ==================== TIEMPOS PROMEDIO ====================
+    # Tiempo promedio desde la apertura por estado (Avg condicional,
+    # calculado en la misma consulta que las atrasadas)
+    tiempos_promedio = {}
+    for estado in aggregation.ESTADOS_TIEMPO:
+        promedio = valores[f"tiempo_actual_{estado}"]
+        tiempos_promedio[estado] = str(promedio) if promedio else None
+
+    # Duración real de cada estado (tramos cerrados en 30 días, ledger TramoEstado)
+    duraciones_por_estado = aggregation.duraciones(valores)
+
+    # ==================== CUMPLIMIENTO SLA ====================
+    # Calcular cumplimiento SLA (OT cerradas dentro del plazo / Total OT cerradas)
+    # Solo considerar OT cerradas en los últimos 30 días para tener una muestra representativa
+    sla_cumplimiento = aggregation.porcentaje(
+        valores["sla_cumplido_30_dias"],
+        valores["sla_cumplido_30_dias"] + valores["sla_incumplido_30_dias"]
+    )
+
+    # Datos para gráfico de cumplimiento SLA (últimos 7 días)
+    cumplimiento_sla_por_dia = []
+    for dia in serie_7_dias:
+        total_dia = dia["sla_cumplido"] + dia["sla_incumplido"]
+        cumplimiento_sla_por_dia.append({
+            "fecha": dia["desde"].isoformat(),
+            "dia": dia["desde"].strftime("%d/%m"),
+            "cumplimiento": aggregation.porcentaje(dia["sla_cumplido"], total_dia) if total_dia > 0 else 0,
+            "total": total_dia,
+            "cumplieron": dia["sla_cumplido"]
+        })
+
+    # ==================== CONSTRUIR RESPUESTA ====================
+    response_data = {
+        "kpis": {
+            "ot_abiertas": ot_abiertas,
+            "ot_en_diagnostico": ot_en_diagnostico,
+            "ot_en_ejecucion": ot_en_ejecucion,
+            "ot_en_pausa": ot_en_pausa,
+            "ot_en_qa": ot_en_qa,
+            "ot_retrabajo": ot_retrabajo,
+            "ot_cerradas_hoy": ot_cerradas_hoy,
+            "ot_atrasadas": ot_atrasadas,
+            "vehiculos_en_taller": vehiculos_en_taller,
+            "productividad_7_dias": ot_cerradas_7_dias,
+            "sla_cumplimiento": sla_cumplimiento,
+        },
+        "guardias": guardias_data,
+        "ultimas_5_ot": ultimas_5_ot_data,
+        "pausas_frecuentes": list(pausas_frecuentes),
+        "mecanicos_carga": mecanicos_carga_data,
+        "tiempos_promedio": tiempos_promedio,
+        "duraciones_por_estado": duraciones_por_estado,
+        # Datos para gráficos
+        "graficos": {
+            "ot_cerradas_por_dia": ot_cerradas_por_dia,
+            "ot_por_estado": ot_por_estado,
+            "mecanicos_productividad": mecanicos_productividad_data,
+            "cumplimiento_sla_por_dia": cumplimiento_sla_por_dia,
+        }
+    }
+    return response_data
+
+
+def calcular_jefe_taller(alcance=scopes.GLOBAL, valores=None):
+    """
+    OT por estado, atrasadas e historial por vehículo/mecánico.
+
+    Parámetros:
+    - alcance: Zonas a las que se acota el cálculo (apps/reports/scopes.py)
+    - valores: Métricas ya calculadas para el alcance (opcional, ver precalcular_alcance())
+    """
+    hoy = timezone.localdate()
+
+    # OTs por estado (foto del día en KPIDiario)
+    if valores is None:
+        valores = aggregation.calcular(METRICAS_JEFE_TALLER, filtros=scopes.filtros_fuentes(alcance))
+    ot_por_estado = [
+        {"estado": estado, "cantidad": valores[f"estado_{estado}"]}
+        for estado in sorted(aggregation.ESTADOS_OT)
+        if valores[f"estado_{estado}"]
+    ]
+
+    # OTs atrasadas (con fecha_limite_sla vencida)
+    ot_atrasadas = OrdenTrabajo.objects.filter(
+        scopes.filtro(alcance),
+        fecha_limite_sla__lt=timezone.now(),
+        estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA", "EN_QA"]
+    ).select_related('vehiculo', 'mecanico', 'responsable').order_by('fecha_limite_sla')
+
+    ot_atrasadas_data = [{
+        "id": str(ot.id),
+        "patente": ot.vehiculo.patente if ot.vehiculo else "N/A",
+        "estado": ot.estado,
+        "mecanico": f"{ot.mecanico.first_name} {ot.mecanico.last_name}" if ot.mecanico else "Sin asignar",
+        "fecha_limite_sla": ot.fecha_limite_sla.isoformat() if ot.fecha_limite_sla else None,
+        "dias_atraso": (timezone.now() - ot.fecha_limite_sla).days if ot.fecha_limite_sla else 0,
+    } for ot in ot_atrasadas]
+
+    # Historial de OTs por vehículo (últimos 30 días)
+    hace_30_dias = hoy - timedelta(days=30)
+    historial_por_vehiculo = Vehiculo.objects.filter(
+        rango_fechas("ordenes__apertura", desde=hace_30_dias),
+        scopes.filtro(alcance)
+    ).select_related("marca").annotate(
+        total_ots=Count('ordenes', distinct=True),
+        ot_cerradas=Count('ordenes', filter=Q(ordenes__estado="CERRADA"), distinct=True),
+        ot_activas=Count('ordenes', filter=Q(ordenes__estado__in=["ABIERTA", "EN_EJECUCION", "EN_PAUSA"]), distinct=True)
+    ).filter(total_ots__gt=0).order_by('-total_ots')[:20]
+
+    historial_vehiculos_data = [{
+        "patente": v.patente,
+        "marca": v.marca.nombre if v.marca else "N/A",
+        "modelo": v.modelo,
+        "total_ots": v.total_ots,
+        "ot_cerradas": v.ot_cerradas,
+        "ot_activas": v.ot_activas,
+    } for v in historial_por_vehiculo]
+
+    # Historial de OTs por mecánico (últimos 30 días)
+    historial_por_mecanico = User.objects.filter(
+        rango_fechas("ots_asignadas__apertura", desde=hace_30_dias),
+        scopes.filtro(alcance, "ots_asignadas__"),
+        rol="MECANICO"
+    ).annotate(
+        total_ots=Count('ots_asignadas', distinct=True),
+        ot_cerradas=Count('ots_asignadas', filter=Q(ots_asignadas__estado="CERRADA"), distinct=True),
+        ot_activas=Count('ots_asignadas', filter=Q(ots_asignadas__estado__in=["ABIERTA", "EN_EJECUCION", "EN_PAUSA"]), distinct=True)
+    ).filter(total_ots__gt=0).order_by('-total_ots')
+
+    historial_mecanicos_data = [{
+        "id": str(m.id),
+        "nombre": f"{m.first_name} {m.last_name}",
+        "total_ots": m.total_ots,
+        "ot_cerradas": m.ot_cerradas,
+        "ot_activas": m.ot_activas,
+    } for m in historial_por_mecanico]
+
+    return {
+        "ot_por_estado": ot_por_estado,
+        "ot_atrasadas": ot_atrasadas_data,
+        "total_atrasadas": len(ot_atrasadas_data),
+        "historial_por_vehiculo": historial_vehiculos_data,
+        "historial_por_mecanico": historial_mecanicos_data,
+    }
+
+
+def calcular_supervisor(alcance=scopes.GLOBAL, valores=None):
+    """
+    Carga de trabajo, tiempos promedio y comparación entre talleres.
+
+    Parámetros:
+    - alcance: Zonas a las que se acota el cálculo (apps/reports/scopes.py)
+    - valores: Métricas ya calculadas para el alcance (opcional, ver precalcular_alcance())
+    """
+    if valores is None:
+        valores = aggregation.calcular(METRICAS_SUPERVISOR, filtros=scopes.filtros_fuentes(alcance))
+
+    # Carga de trabajo (OT activas por estado)
+    carga_trabajo = [
+        {"estado": estado, "cantidad": valores[f"estado_{estado}"]}
+        for estado in sorted(["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA", "EN_QA"])
+        if valores[f"estado_{estado}"]
+    ]
+
+    # Tiempos promedio por estado (últimos 30 días), en horas
+    # Un Avg condicional por estado en la misma consulta
+    tiempos_promedio = {
+        estado: aggregation.horas(valores[f"tiempo_30_dias_{estado}"])
+        for estado in aggregation.ESTADOS_TIEMPO + ["CERRADA"]
+    }
+
+    # Comparación entre talleres (solo Santa Marta por ahora, pero estructura lista para múltiples)
+    # SLA cumplimiento y cierres de los últimos 30 días desde KPIDiario
+    talleres_data = [{
+        "nombre": "Santa Marta",
+        "ot_activas": sum(valores[f"estado_{estado}"] for estado in ["ABIERTA", "EN_EJECUCION", "EN_PAUSA"]),
+        "ot_cerradas_mes": valores["ot_cerradas_30_dias"],
+        "sla_cumplimiento": aggregation.porcentaje(
+            valores["sla_cumplido_30_dias"],
+            valores["sla_cumplido_30_dias"] + valores["sla_incumplido_30_dias"]
+        ),
+    }]
+
+    # Duración real de cada estado: promedio y percentiles de los tramos
+    # cerrados en los últimos 30 días (ledger TramoEstado), en horas
+    duraciones_por_estado = aggregation.duraciones(valores)
+
+    return {
+        "carga_trabajo": carga_trabajo,
+        "tiempos_promedio": tiempos_promedio,
+        "duraciones_por_estado": duraciones_por_estado,
+        "comparacion_talleres": talleres_data,
+    }
+
+
+def calcular_coordinador(alcance=scopes.GLOBAL, valores=None):
+    """
+    Backlog por taller, vehículos críticos y emergencias.
+
+    Parámetros:
+    - alcance: Zonas a las que se acota el cálculo (apps/reports/scopes.py)
+    - valores: Métricas ya calculadas para el alcance (opcional, ver precalcular_alcance())
+    """
+    hoy = timezone.localdate()
+    if valores is None:
+        valores = aggregation.calcular(METRICAS_COORDINADOR, filtros=scopes.filtros_fuentes(alcance))
+
+    # Backlog de OTs por taller (solo Santa Marta por ahora)
+    backlog_talleres = [{
+        "taller": "Santa Marta",
+        "ot_pendientes": sum(
+            valores[f"estado_{estado}"] for estado in aggregation.ESTADOS_PENDIENTES
+        ),
+        "ot_atrasadas": valores["ot_atrasadas_pendientes"],
+    }]
+
+    # Vehículos críticos (con múltiples OTs activas o con OT atrasada)
+    vehiculos_criticos = Vehiculo.objects.filter(
+        scopes.filtro(alcance),
+        ordenes__estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
+    ).annotate(
+        ot_activas=Count('ordenes', filter=Q(
+            ordenes__estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
+        ), distinct=True),
+        tiene_ot_atrasada=Count('ordenes', filter=Q(
+            ordenes__fecha_limite_sla__lt=timezone.now(),
+            ordenes__estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
+        ), distinct=True)
+    ).filter(
+        Q(ot_activas__gte=2) | Q(tiene_ot_atrasada__gt=0)
+    ).select_related("marca").distinct()[:20]
+
+    vehiculos_criticos_data = [{
+        "patente": v.patente,
+        "marca": v.marca.nombre if v.marca else "N/A",
+        "modelo": v.modelo,
+        "ot_activas": v.ot_activas,
+        "tiene_ot_atrasada": v.tiene_ot_atrasada > 0,
+    } for v in vehiculos_criticos]
+
+    # Emergencias (OTs con prioridad ALTA y estado activo)
+    emergencias = OrdenTrabajo.objects.filter(
+        scopes.filtro(alcance),
+        prioridad="ALTA",
+        estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
+    ).select_related('vehiculo', 'mecanico').order_by('-apertura')[:10]
+
+    emergencias_data = [{
+        "id": str(ot.id),
+        "patente": ot.vehiculo.patente if ot.vehiculo else "N/A",
+        "estado": ot.estado,
+        "mecanico": f"{ot.mecanico.first_name} {ot.mecanico.last_name}" if ot.mecanico else "Sin asignar",
+        "apertura": ot.apertura.isoformat(),
+    } for ot in emergencias]
+
+    return {
+        "backlog_talleres": backlog_talleres,
+        "vehiculos_criticos": vehiculos_criticos_data,
+        "emergencias": emergencias_data,
+    }
+
+
+def calcular_subgerente(alcance=scopes.GLOBAL, valores=None):
+    """
+    KPIs globales del mes y tendencias semanales.
+
+    Parámetros:
+    - alcance: Zonas a las que se acota el cálculo (apps/reports/scopes.py)
+    - valores: Métricas ya calculadas para el alcance (opcional, ver precalcular_alcance())
+    """
+    hoy = timezone.localdate()
+    inicio_mes = hoy.replace(day=1)
+    if valores is None:
+        valores = aggregation.calcular(METRICAS_SUBGERENTE, filtros=scopes.filtros_fuentes(alcance))
+
+    # OTs mensuales
+    ot_mensuales = valores["ot_creadas_mes"]
+    ot_cerradas_mes = valores["ot_cerradas_mes"]
+
+    # Tiempos de reparación promedio (últimos 30 días)
+    # KPIDiario guarda la suma de (cierre - apertura); promedio = suma / cerradas
+    tiempo_promedio_horas = None
+    if valores["ot_cerradas_30_dias"] and valores["ciclo_segundos_30_dias"]:
+        total_seconds = valores["ciclo_segundos_30_dias"] / valores["ot_cerradas_30_dias"]
+        tiempo_promedio_horas = round(total_seconds / 3600, 2)
+
+    # Disponibilidad estimada de flota
+    total_vehiculos = valores["vehiculos_flota"]
+    vehiculos_operativos = valores["vehiculos_operativos"]
+    disponibilidad = aggregation.porcentaje(vehiculos_operativos, total_vehiculos) if total_vehiculos > 0 else 0
+
+    # Tendencias (OTs por semana en el último mes), agrupadas en SQL
+    semanas = aggregation.serie(
+        "kpi", "fecha",
+        aggregation.cubetas_semanales(inicio_mes, hoy, 4),
+        aggregation.SUMAS_KPI,
+        filtro=scopes.filtro(alcance),
+    )
+    tendencias_semanales = [{
+        "semana": f"Semana {i+1}",
+        "fecha_inicio": semana["desde"].isoformat(),
+        "fecha_fin": semana["hasta"].isoformat(),
+        "ot_creadas": semana["ot_creadas"],
+        "ot_cerradas": semana["ot_cerradas"],
+    } for i, semana in enumerate(semanas)]
+
+    return {
+        "kpis": {
+            "ot_mensuales": ot_mensuales,
+            "ot_cerradas_mes": ot_cerradas_mes,
+            "tiempo_reparacion_promedio_horas": tiempo_promedio_horas,
+            "disponibilidad_flota": disponibilidad,
+            "vehiculos_operativos": vehiculos_operativos,
+            "total_vehiculos": total_vehiculos,
+        },
+        "tendencias_semanales": tendencias_semanales,
+    }
+
+
+# ==================== REGISTRO ====================
+
+# nombre -> función de cálculo, métricas del motor de agregación, roles que
+# ven el dashboard y queries de un cálculo completo (sin el watermark de los
+# KPIs diarios, que se verifica una vez por ciclo de precálculo)
+DASHBOARDS = {
+    "ejecutivo": {
+        "calcular": calcular_ejecutivo,
+        "metricas": METRICAS_EJECUTIVO,
+        "roles": ("EJECUTIVO", "ADMIN", "SPONSOR", "JEFE_TALLER", "SUPERVISOR", "COORDINADOR_ZONA"),
+        # 4 agregaciones + serie de 7 días + últimas OT + guardias
+        # + productividad por mecánico + pausas + carga de mecánicos
+        "presupuesto_queries": 10,
+    },
+    "jefe_taller": {
+        "calcular": calcular_jefe_taller,
+        "metricas": METRICAS_JEFE_TALLER,
+        "roles": ("JEFE_TALLER", "ADMIN"),
+        # conteos por estado + atrasadas + historial por vehículo y por mecánico
+        "presupuesto_queries": 4,
+    },
+    "supervisor": {
+        "calcular": calcular_supervisor,
+        "metricas": METRICAS_SUPERVISOR,
+        "roles": ("SUPERVISOR", "ADMIN"),
+        # 3 agregaciones
+        "presupuesto_queries": 3,
+    },
+    "coordinador": {
+        "calcular": calcular_coordinador,
+        "metricas": METRICAS_COORDINADOR,
+        "roles": ("COORDINADOR_ZONA", "ADMIN"),
+        # 2 agregaciones + vehículos críticos + emergencias
+        "presupuesto_queries": 4,
+    },
+    "subgerente": {
+        "calcular": calcular_subgerente,
+        "metricas": METRICAS_SUBGERENTE,
+        "roles": ("SUBGERENTE_NACIONAL", "EJECUTIVO", "ADMIN"),
+        # 2 agregaciones + tendencias semanales
+        "presupuesto_queries": 3,
+    },
+}
+
+
+def clave_cache(nombre, alcance=scopes.GLOBAL):
+    """Clave de caché del payload precalculado de un dashboard para un alcance"""
+    return f"dashboard:{nombre}:{scopes.clave(alcance)}"
+
+
+def _clave_en_cola(nombre, alcance):
+    return f"{clave_cache(nombre, alcance)}:en_cola"
+
+
+# ==================== ALCANCES ACTIVOS ====================
+# Los alcances distintos de GLOBAL solo se precalculan mientras alguien los
+# consulte: cada GET registra (usuario, alcance) y el beat recalcula los
+# alcances vistos en los últimos TTL_ALCANCE_ACTIVO segundos.
+
+CLAVE_ALCANCES_ACTIVOS = "dashboard:alcances_activos"
+
+
+def registrar_alcance(alcance, usuario_id):
+    """
+    Marca un alcance como consultado por un usuario.
+
+    Solo escribe en caché si el usuario no lo había registrado en la última
+    mitad de TTL_ALCANCE_ACTIVO, para no escribir en cada GET.
+    """
+    if not alcance:
+        return
+    ahora = time.time()
+    activos = cache.get(CLAVE_ALCANCES_ACTIVOS) or {}
+    entrada = activos.setdefault(scopes.clave(alcance), {"zonas": tuple(alcance), "usuarios": {}})
+    if ahora - entrada["usuarios"].get(usuario_id, 0) < TTL_ALCANCE_ACTIVO / 2:
+        return
+    entrada["usuarios"][usuario_id] = ahora
+    cache.set(CLAVE_ALCANCES_ACTIVOS, activos, TTL_ALCANCE_ACTIVO)
+
+
+def alcances_activos():
+    """
+    Alcances consultados recientemente.
+
+    Retorna:
+    - Dict {clave: {"zonas": tupla, "usuarios": [ids]}}
+    """
+    limite = time.time() - TTL_ALCANCE_ACTIVO
+    resultado = {}
+    for clave, entrada in (cache.get(CLAVE_ALCANCES_ACTIVOS) or {}).items():
+        usuarios = [usuario_id for usuario_id, visto in entrada["usuarios"].items() if visto >= limite]
+        if usuarios:
+            resultado[clave] = {"zonas": entrada["zonas"], "usuarios": usuarios}
+    return resultado
+
+
+# ==================== LECTURA Y PRECÁLCULO ====================
+
+def leer(nombre, alcance=scopes.GLOBAL):
+    """
+    Retorna el último payload precalculado de un dashboard, o None.
+
+    Retorna:
+    - {"datos": payload, "generado_en": datetime, "alcance": [zonas]} o None
+      si aún no se calculó
+    """
+    return cache.get(clave_cache(nombre, alcance))
+
+
+def precalcular(nombre, alcance=scopes.GLOBAL, valores=None, notificar=True):
+    """
+    Calcula el payload de un dashboard, lo guarda en caché y lo empuja por WebSocket.
+
+    No refresca los KPIs diarios: quien llama decide cuándo hacerlo (una vez
+    por ciclo en precalcular_todos(), o en la tarea precalcular_dashboard).
+
+    Parámetros:
+    - nombre: Clave en DASHBOARDS
+    - alcance: Zonas a las que se acota el cálculo (GLOBAL por defecto)
+    - valores: Métricas ya calculadas para el alcance (opcional)
+    - notificar: Si True, envía el "data_update" a los usuarios del dashboard
+      (todos los de sus roles si el alcance es GLOBAL; si no, solo los que
+      consultaron ese alcance)
+
+    Retorna:
+    - Entrada guardada en caché ({"datos", "generado_en", "alcance"})
+    """
+    dashboard = DASHBOARDS[nombre]
+    try:
+        entrada = {
+            "datos": dashboard["calcular"](alcance=alcance, valores=valores),
+            "generado_en": timezone.now(),
+            "alcance": list(alcance),
+        }
+        cache.set(clave_cache(nombre, alcance), entrada, TTL_CACHE)
+    finally:
+        cache.delete(_clave_en_cola(nombre, alcance))
+
+    if notificar:
+        from apps.notifications.realtime import enviar_actualizacion_dashboard
+        usuarios_ids = None
+        if alcance:
+            activo = alcances_activos().get(scopes.clave(alcance))
+            usuarios_ids = activo["usuarios"] if activo else []
+        enviar_actualizacion_dashboard(nombre, entrada, dashboard["roles"], usuarios_ids=usuarios_ids)
+    return entrada
+
+
+def precalcular_alcance(alcance=scopes.GLOBAL, nombres=None):
+    """
+    Precalcula varios dashboards de un mismo alcance compartiendo sus métricas.
+
+    Las métricas de todos los dashboards pedidos (p. ej. los conteos por
+    estado, que usan cuatro dashboards) se resuelven juntas, con una
+    consulta por fuente para el alcance, y cada dashboard arma su payload a
+    partir de ese resultado. Un error en un dashboard no impide calcular los
+    demás.
+
+    Retorna:
+    - Lista con los nombres de los dashboards precalculados
+    """
+    nombres = list(nombres or DASHBOARDS)
+    metricas = dict.fromkeys(
+        metrica for nombre in nombres for metrica in DASHBOARDS[nombre]["metricas"]
+    )
+    valores = aggregation.calcular(metricas, filtros=scopes.filtros_fuentes(alcance))
+
+    calculados = []
+    for nombre in nombres:
+        try:
+            precalcular(nombre, alcance, valores=valores)
+            calculados.append(nombre)
+        except Exception as e:
+            logger.error(f"Error al precalcular el dashboard {nombre} ({scopes.clave(alcance)}): {e}")
+    return calculados
+
+
+def precalcular_todos(forzar=False):
+    """
+    Precalcula todos los dashboards para el alcance GLOBAL y los alcances activos.
+
+    Los KPIs diarios se refrescan una sola vez al inicio.
+
+    Retorna:
+    - Dict {clave de alcance: [dashboards precalculados]}
+    """
+    rollups.asegurar_frescos(forzar=forzar)
+    resultado = {scopes.clave(scopes.GLOBAL): precalcular_alcance(scopes.GLOBAL)}
+    for clave, activo in alcances_activos().items():
+        resultado[clave] = precalcular_alcance(tuple(activo["zonas"]))
+    return resultado
+
+
+def solicitar_precalculo(nombre, alcance=scopes.GLOBAL, forzar=False):
+    """
+    Encola el cálculo de un dashboard si no hay otro ya encolado para el alcance.
+
+    Usado por las vistas cuando no hay payload en caché o cuando el usuario
+    pide ?refresh=true: el request nunca calcula el dashboard.
+
+    Retorna:
+    - True si se encoló un cálculo, False si ya había uno pendiente
+    """
+    if not cache.add(_clave_en_cola(nombre, alcance), True, TTL_EN_COLA):
+        return False
+    from .tasks import precalcular_dashboard
+    try:
+        precalcular_dashboard.delay(nombre, alcance=list(alcance), forzar=forzar)
+    except Exception as e:
+        cache.delete(_clave_en_cola(nombre, alcance))
+        logger.error(f"No se pudo encolar el cálculo del dashboard {nombre}: {e}")
+        return False
+    return True
+
+
+def solicitar_refresco(nombre, alcance, usuario_id):
+    """
+    Atiende un ?refresh=true con límite de frecuencia y agrupación.
+
+    - Cada usuario puede pedir un refresco cada INTERVALO_REFRESCO_USUARIO segundos
+    - Un payload generado hace menos de ANTIGUEDAD_MINIMA_REFRESCO segundos no se recalcula
+    - Varios refrescos del mismo dashboard y alcance comparten un solo cálculo encolado
+
+    Retorna:
+    - "encolado", "limitado" (usuario sobre el límite), "reciente" (payload
+      fresco) o "en_curso" (ya había un cálculo encolado)
+    """
+    if not cache.add(f"dashboard:refresco:{usuario_id}", True, INTERVALO_REFRESCO_USUARIO):
+        return "limitado"
+    entrada = leer(nombre, alcance)
+    if entrada and (timezone.now() - entrada["generado_en"]).total_seconds() < ANTIGUEDAD_MINIMA_REFRESCO:
+        return "reciente"
+    if solicitar_precalculo(nombre, alcance, forzar=True):
+        return "encolado"
+    return "en_curso"
+
+
+def programar_precalculo():
+    """
+    Programa un recálculo de todos los dashboards tras una escritura.
+
+    La primera escritura de una ráfaga programa la tarea con RETARDO_ESCRITURAS
+    segundos de countdown (al confirmar la transacción); las siguientes, mientras
+    el candado siga vigente, no programan nada más.
+    """
+    if not cache.add("dashboard:precalculo_programado", True, RETARDO_ESCRITURAS):
+        return
+
+    def _encolar():
+        from .tasks import precalcular_dashboards
+        try:
+            precalcular_dashboards.apply_async(kwargs={"forzar": True}, countdown=RETARDO_ESCRITURAS)
+        except Exception as e:
+            logger.error(f"No se pudo programar el precálculo de dashboards: {e}")
+
+    transaction.on_commit(_encolar)
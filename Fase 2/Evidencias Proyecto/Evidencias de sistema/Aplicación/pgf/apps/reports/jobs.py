@@ -0,0 +1,382 @@
+# apps/reports/jobs.py
+"""
+Generación de reportes PDF en segundo plano (ReporteJob).
+
+Los reportes PDF (ReportLab + gráficos matplotlib) tardan varios segundos
+y bloqueaban un worker web durante toda la generación. Este módulo:
+
+- Normaliza los parámetros de un reporte (parametros_desde) para que dos
+  solicitudes equivalentes produzcan la misma huella
+- Crea el job o reutiliza el que ya está en curso para la misma huella
+  (solicitar), y lo encola en Celery al confirmar la transacción
+- Marca en ERROR los jobs atascados (expirar_atascados): un worker que
+  murió a mitad de la tarea o un encolado que falló dejarían el job en
+  curso para siempre, y cada solicitud igual se sumaría a él
+- Genera el PDF (renderizar), lo sube a S3 y entrega URLs de descarga
+  firmadas (subir_pdf, url_descarga)
+
+El camino síncrono (GET /api/v1/reports/pdf/) se mantiene solo para rangos
+de hasta DIAS_MAXIMOS_SINCRONO días; los rangos mayores se derivan a un job.
+
+Relaciones:
+- Usa: apps/reports/models.py (ReporteJob), apps/reports/pdf_generator.py,
+  apps/reports/pdf_generator_completo.py
+- Usado por: apps/reports/views.py, apps/reports/tasks.py (generar_reporte_pdf)
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ReporteJob
+
+logger = logging.getLogger(__name__)
+
+# Rango máximo (en días) que se sigue generando dentro del request
+DIAS_MAXIMOS_SINCRONO = 7
+
+# Vigencia de las URLs firmadas de descarga (segundos)
+EXPIRACION_DESCARGA = 3600
+
+# Tiempo máximo (segundos) que un job puede esperar un worker o estar
+# generándose antes de considerarlo atascado (los reintentos de la tarea
+# vuelven a PENDIENTE, por eso se mide desde iniciado_en si lo hay)
+PENDIENTE_MAXIMO_SEGUNDOS = 15 * 60
+EN_PROCESO_MAXIMO_SEGUNDOS = 30 * 60
+
+# Prefijo de las claves S3 de los reportes generados
+PREFIJO_S3 = "reportes"
+
+# Reportes por período (?tipo=) y reportes completos (?tipo_reporte=)
+TIPOS_PERIODO = ("diario", "semanal", "mensual")
+TIPOS_COMPLETOS = ("estado_flota", "ordenes_trabajo", "por_site")
+
+# Reportes completos aún sin generador
+NO_DISPONIBLES = {
+    "uso_vehiculo": "Reporte de uso de vehículo no está disponible aún. Use 'ordenes_trabajo'.",
+    "mantenimientos": "Reporte de mantenimientos recurrentes no está disponible aún.",
+    "cumplimiento": "Reporte de cumplimiento y política no está disponible aún.",
+    "inventario": "Reporte de inventario no está disponible aún.",
+}
+
+# Días por defecto de cada tipo cuando no se indica fecha_inicio
+DIAS_POR_DEFECTO = {"semanal": 7, "mensual": 30, "ordenes_trabajo": 30, "por_site": 30}
+
+
+class ParametrosInvalidos(ValueError):
+    """Parámetros de reporte inválidos (la vista responde 400 con el mensaje)."""
+
+
+def _fecha(valor, nombre):
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except ValueError:
+        raise ParametrosInvalidos(f"Formato de {nombre} inválido. Use YYYY-MM-DD.")
+
+
+def parametros_desde(datos):
+    """
+    Normaliza los parámetros de un reporte PDF.
+
+    Acepta los mismos parámetros que GET /api/v1/reports/pdf/ (tipo o
+    tipo_reporte, fecha_inicio, fecha_fin y filtros de estado_flota) y
+    resuelve los valores por defecto, de modo que "semanal sin fechas" y
+    "semanal de los últimos 7 días" tengan la misma huella.
+
+    Parámetros:
+    - datos: query params o body (cualquier mapeo con .get())
+
+    Retorna:
+    - Diccionario {"tipo", "fecha_inicio", "fecha_fin", ...} con fechas ISO
+
+    Lanza:
+    - ParametrosInvalidos: Tipo desconocido, fechas mal formadas o rango invertido
+    """
+    fecha_inicio = _fecha(datos.get("fecha_inicio"), "fecha_inicio")
+    fecha_fin = _fecha(datos.get("fecha_fin"), "fecha_fin")
+    if fecha_inicio and fecha_fin:
+        from apps.core.validators import validar_rango_fechas
+        es_valido, mensaje = validar_rango_fechas(fecha_inicio, fecha_fin)
+        if not es_valido:
+            raise ParametrosInvalidos(mensaje)
+
+    hoy = timezone.localdate()
+    tipo = datos.get("tipo_reporte")
+    if tipo:
+        if tipo in NO_DISPONIBLES:
+            raise ParametrosInvalidos(NO_DISPONIBLES[tipo])
+        if tipo not in TIPOS_COMPLETOS:
+            raise ParametrosInvalidos(f"Tipo de reporte '{tipo}' no válido.")
+    else:
+        tipo = datos.get("tipo", "semanal")
+        if tipo not in TIPOS_PERIODO:
+            raise ParametrosInvalidos("Tipo de reporte inválido. Use: diario, semanal o mensual")
+
+    parametros = {"tipo": tipo}
+    if tipo in ("diario", "estado_flota"):
+        # Reportes de un día: fecha_inicio o hoy
+        fecha_inicio = fecha_fin = fecha_inicio or hoy
+    elif not fecha_inicio:
+        fecha_fin = hoy
+        fecha_inicio = fecha_fin - timedelta(days=DIAS_POR_DEFECTO[tipo])
+    elif not fecha_fin:
+        fecha_fin = hoy
+    parametros["fecha_inicio"] = fecha_inicio.isoformat()
+    parametros["fecha_fin"] = fecha_fin.isoformat()
+
+    if tipo == "estado_flota":
+        for filtro in ("supervisor", "tipo_vehiculo", "estado_operativo"):
+            parametros[filtro] = datos.get(filtro) or None
+    elif tipo in ("ordenes_trabajo", "por_site"):
+        # Modo completo: todas las OT del período (ver pdf_sections)
+        parametros["completo"] = str(datos.get("completo", "")).lower() in ("1", "true", "si", "sí")
+    return parametros
+
+
+def dias(parametros):
+    """Días que cubre el reporte (0 para reportes de un día)."""
+    return (date.fromisoformat(parametros["fecha_fin"])
+            - date.fromisoformat(parametros["fecha_inicio"])).days
+
+
+def es_sincrono(parametros):
+    """True si el reporte es lo bastante chico para generarse dentro del request."""
+    # El modo completo siempre va a un job, sin importar el rango
+    return not parametros.get("completo") and dias(parametros) <= DIAS_MAXIMOS_SINCRONO
+
+
+def huella(parametros):
+    """sha256 de los parámetros normalizados (identifica el reporte pedido)."""
+    return hashlib.sha256(
+        json.dumps(parametros, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def renderizar(parametros):
+    """
+    Genera el PDF de un reporte.
+
+    Parámetros:
+    - parametros: Resultado de parametros_desde()
+
+    Retorna:
+    - (pdf_bytes, nombre_archivo)
+    """
+    from .pdf_generator import generar_reporte_diario_pdf, generar_reporte_semanal_pdf
+    from .pdf_generator_completo import generar_reporte_estado_flota, generar_reporte_ordenes_trabajo
+
+    tipo = parametros["tipo"]
+    fecha_inicio = date.fromisoformat(parametros["fecha_inicio"])
+    fecha_fin = date.fromisoformat(parametros["fecha_fin"])
+
+    if tipo == "diario":
+        return generar_reporte_diario_pdf(fecha_inicio), f"reporte_diario_{fecha_inicio}.pdf"
+    if tipo in ("semanal", "mensual"):
+        # El mensual usa el generador semanal con 30 días
+        pdf_bytes = generar_reporte_semanal_pdf(fecha_inicio, fecha_fin)
+        return pdf_bytes, f"reporte_{tipo}_{fecha_inicio}_al_{fecha_fin}.pdf"
+    if tipo == "estado_flota":
+        pdf_bytes = generar_reporte_estado_flota(
+            fecha=fecha_inicio,
+            supervisor=parametros.get("supervisor"),
+            tipo_vehiculo=parametros.get("tipo_vehiculo"),
+            estado_operativo=parametros.get("estado_operativo"),
+        )
+    else:
+        # ordenes_trabajo y por_site usan el reporte de órdenes de trabajo
+        pdf_bytes = generar_reporte_ordenes_trabajo(
+            fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, completo=parametros.get("completo", False)
+        )
+    return pdf_bytes, f"reporte_{tipo}_{fecha_inicio:%Y-%m-%d}.pdf"
+
+
+def solicitar(parametros, usuario):
+    """
+    Crea un job para el reporte o reutiliza el que está en curso.
+
+    Si ya hay un job PENDIENTE o EN_PROCESO con la misma huella, el usuario
+    se agrega a sus interesados (recibirá el mismo aviso por WebSocket) y no
+    se encola nada. La restricción única parcial de ReporteJob resuelve la
+    carrera entre dos solicitudes simultáneas.
+
+    Parámetros:
+    - parametros: Resultado de parametros_desde()
+    - usuario: Usuario que solicita el reporte
+
+    Retorna:
+    - (job, creado): creado es False si se reutilizó un job en curso
+    """
+    clave = huella(parametros)
+    # Un job atascado no se reutiliza: se marca en ERROR y se crea otro
+    expirar_atascados(ReporteJob.objects.filter(huella=clave))
+    for _ in range(2):
+        existente = ReporteJob.objects.filter(huella=clave, estado__in=ReporteJob.EN_CURSO).first()
+        if existente:
+            existente.interesados.add(usuario)
+            return existente, False
+        try:
+            with transaction.atomic():
+                job = ReporteJob.objects.create(
+                    tipo=parametros["tipo"], parametros=parametros, huella=clave, solicitado_por=usuario
+                )
+        except IntegrityError:
+            # Otra solicitud igual creó el job entre el filter y el create
+            continue
+        job.interesados.add(usuario)
+        job_id = str(job.id)
+        transaction.on_commit(lambda: _encolar(job_id))
+        return job, True
+    raise RuntimeError("No se pudo crear ni reutilizar el job de reporte.")
+
+
+def _encolar(job_id):
+    from .tasks import generar_reporte_pdf
+    try:
+        generar_reporte_pdf.delay(job_id)
+    except Exception as e:
+        # El job ya está confirmado: sin esto quedaría PENDIENTE sin tarea
+        # (y el request respondería 500 desde on_commit)
+        logger.error(f"No se pudo encolar el ReporteJob {job_id}: {e}", exc_info=True)
+        _marcar_error(ReporteJob.objects.filter(id=job_id), "No se pudo encolar la generación del reporte.")
+
+
+def _marcar_error(jobs_en_curso, motivo):
+    """
+    Pasa a ERROR los jobs en curso de un queryset y avisa a sus interesados.
+
+    Retorna:
+    - Cantidad de jobs marcados
+    """
+    from apps.notifications.realtime import enviar_actualizacion_reporte
+
+    ids = list(jobs_en_curso.filter(estado__in=ReporteJob.EN_CURSO).values_list("id", flat=True))
+    if not ids:
+        return 0
+    # El filtro por estado evita pisar un job que terminó entre medio
+    marcados = ReporteJob.objects.filter(id__in=ids, estado__in=ReporteJob.EN_CURSO).update(
+        estado=ReporteJob.Estado.ERROR, error=motivo, terminado_en=timezone.now()
+    )
+    for job in ReporteJob.objects.filter(id__in=ids, estado=ReporteJob.Estado.ERROR, error=motivo):
+        enviar_actualizacion_reporte(job)
+    return marcados
+
+
+def expirar_atascados(queryset=None):
+    """
+    Marca en ERROR los jobs en curso que llevan demasiado tiempo así.
+
+    - PENDIENTE: más de PENDIENTE_MAXIMO_SEGUNDOS desde que se creó (o desde
+      el último intento, si la tarea lo volvió a PENDIENTE para reintentar)
+    - EN_PROCESO: más de EN_PROCESO_MAXIMO_SEGUNDOS desde que empezó
+
+    Parámetros:
+    - queryset: Jobs a revisar (por defecto todos)
+
+    Retorna:
+    - Cantidad de jobs marcados en ERROR
+    """
+    from django.db.models import Q
+    from django.db.models.functions import Coalesce
+
+    ahora = timezone.now()
+    queryset = ReporteJob.objects.all() if queryset is None else queryset
+    atascados = queryset.annotate(desde=Coalesce("iniciado_en", "creado_en")).filter(
+        Q(estado=ReporteJob.Estado.PENDIENTE, desde__lt=ahora - timedelta(seconds=PENDIENTE_MAXIMO_SEGUNDOS))
+        | Q(estado=ReporteJob.Estado.EN_PROCESO, desde__lt=ahora - timedelta(seconds=EN_PROCESO_MAXIMO_SEGUNDOS))
+    )
+    marcados = _marcar_error(atascados, "El reporte no terminó a tiempo. Solicítelo nuevamente.")
+    if marcados:
+        logger.warning(f"ReporteJob atascados marcados en ERROR: {marcados}")
+    return marcados
+
+
+def _cliente_s3():
+    """Cliente S3 (LocalStack en desarrollo), igual que apps/workorders/tasks.py."""
+    import boto3
+    from botocore.config import Config
+
+    endpoint = os.getenv("AWS_S3_ENDPOINT_URL", "http://localstack:4566")
+    use_local = "localstack" in endpoint.lower() or "localhost:4566" in endpoint.lower()
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint if use_local else None,
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", "test"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", "test"),
+        region_name=os.getenv("AWS_S3_REGION_NAME", "us-east-1"),
+        config=Config(s3={"addressing_style": "path"}) if use_local else None
+    )
+
+
+def _bucket():
+    return os.getenv("AWS_STORAGE_BUCKET_NAME", "pgf-evidencias-dev")
+
+
+def subir_pdf(job, pdf_bytes):
+    """
+    Sube el PDF del job a S3.
+
+    Retorna:
+    - Clave S3 donde quedó el archivo
+    """
+    import io
+
+    key = f"{PREFIJO_S3}/{job.tipo}/{job.id}.pdf"
+    _cliente_s3().upload_fileobj(
+        io.BytesIO(pdf_bytes), _bucket(), key,
+        ExtraArgs={
+            "ContentType": "application/pdf",
+            "ContentDisposition": f'attachment; filename="{job.nombre_archivo}"',
+        }
+    )
+    return key
+
+
+def url_descarga(job):
+    """URL firmada (EXPIRACION_DESCARGA segundos) del PDF de un job completado."""
+    if job.estado != ReporteJob.Estado.COMPLETADO or not job.s3_key:
+        return None
+    return _cliente_s3().generate_presigned_url(
+        "get_object",
+        Params={"Bucket": _bucket(), "Key": job.s3_key},
+        ExpiresIn=EXPIRACION_DESCARGA
+    )
+
+
+def serializar(job, con_descarga=True):
+    """
+    Representación JSON de un job (API y mensaje WebSocket).
+
+    Parámetros:
+    - job: ReporteJob
+    - con_descarga: Incluir la URL firmada si el job está COMPLETADO
+    """
+    datos = {
+        "id": str(job.id),
+        "tipo": job.tipo,
+        "parametros": job.parametros,
+        "estado": job.estado,
+        "nombre_archivo": job.nombre_archivo or None,
+        "tamano_bytes": job.tamano_bytes,
+        "error": job.error or None,
+        "creado_en": job.creado_en.isoformat() if job.creado_en else None,
+        "terminado_en": job.terminado_en.isoformat() if job.terminado_en else None,
+        "url": f"/api/v1/reports/jobs/{job.id}/",
+    }
+    if con_descarga:
+        datos["download_url"] = url_descarga(job)
+        datos["expires_in"] = EXPIRACION_DESCARGA if datos["download_url"] else None
+    return datos
+
+
+def puede_ver(job, usuario):
+    """El solicitante, los interesados y ADMIN pueden ver un job."""
+    if usuario.rol == "ADMIN" or job.solicitado_por_id == usuario.id:
+        return True
+    return job.interesados.filter(id=usuario.id).exists()
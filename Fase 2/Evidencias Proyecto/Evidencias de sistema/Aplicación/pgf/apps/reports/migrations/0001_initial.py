@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ControlRollup',
+            fields=[
+                ('nombre', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='KPIDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('zona', models.CharField(blank=True, default='', max_length=100)),
+                ('tipo', models.CharField(blank=True, default='', max_length=50)),
+                ('ot_creadas', models.PositiveIntegerField(default=0)),
+                ('ot_cerradas', models.PositiveIntegerField(default=0)),
+                ('sla_cumplido', models.PositiveIntegerField(default=0)),
+                ('sla_incumplido', models.PositiveIntegerField(default=0)),
+                ('ciclo_segundos', models.BigIntegerField(default=0, help_text='Suma de (cierre - apertura) de las OT cerradas')),
+                ('pausa_segundos', models.BigIntegerField(default=0, help_text='Suma de duración de las pausas terminadas')),
+                ('por_estado', models.JSONField(blank=True, default=dict)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('mecanico', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='kpis_diarios', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha'], name='reports_kpi_fecha_9e0b1e_idx'), models.Index(fields=['zona', 'fecha'], name='reports_kpi_zona_74a6fe_idx'), models.Index(fields=['mecanico', 'fecha'], name='reports_kpi_mecanic_46cc8a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:03
+
+import apps.core.ids
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReporteJob',
+            fields=[
+                ('id', models.UUIDField(default=apps.core.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(max_length=50)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('huella', models.CharField(help_text='sha256 de tipo + parámetros', max_length=64)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20)),
+                ('s3_key', models.CharField(blank=True, default='', max_length=255)),
+                ('nombre_archivo', models.CharField(blank=True, default='', max_length=255)),
+                ('tamano_bytes', models.PositiveIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_en', models.DateTimeField(blank=True, null=True)),
+                ('terminado_en', models.DateTimeField(blank=True, null=True)),
+                ('interesados', models.ManyToManyField(blank=True, related_name='reportes_interesado', to=settings.AUTH_USER_MODEL)),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reportes_solicitados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-creado_en'],
+                'indexes': [models.Index(fields=['solicitado_por', '-creado_en'], name='reports_rep_solicit_48bec5_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('estado__in', ['PENDIENTE', 'EN_PROCESO'])), fields=('huella',), name='reportejob_unico_en_curso')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_reportejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDFCacheado',
+            fields=[
+                ('clave', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(max_length=50)),
+                ('fecha_inicio', models.DateField()),
+                ('fecha_fin', models.DateField()),
+                ('abierto', models.BooleanField(default=False)),
+                ('version', models.CharField(blank=True, default='', max_length=32)),
+                ('ruta', models.CharField(max_length=255)),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('tamano_bytes', models.PositiveIntegerField()),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('ultimo_acceso', models.DateTimeField(default=django.utils.timezone.now)),
+                ('accesos', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ultimo_acceso'], name='reports_pdf_ultimo__e61ab2_idx')],
+            },
+        ),
+    ]
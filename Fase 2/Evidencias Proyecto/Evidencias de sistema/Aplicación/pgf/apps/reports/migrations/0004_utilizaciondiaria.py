@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_pdfcacheado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UtilizacionDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('productivo_segundos', models.PositiveIntegerField(default=0)),
+                ('pausa_segundos', models.PositiveIntegerField(default=0)),
+                ('ocioso_segundos', models.PositiveIntegerField(default=0)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('mecanico', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='utilizacion_diaria', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha'], name='reports_uti_fecha_d343d8_idx')],
+                'constraints': [models.UniqueConstraint(fields=('mecanico', 'fecha'), name='utilizacion_mecanico_fecha')],
+            },
+        ),
+    ]
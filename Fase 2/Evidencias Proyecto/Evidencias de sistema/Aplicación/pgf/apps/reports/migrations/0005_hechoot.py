@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_utilizaciondiaria'),
+        ('workorders', '0022_tramoestado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HechoOT',
+            fields=[
+                ('ot', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='hecho', serialize=False, to='workorders.ordentrabajo')),
+                ('fecha_apertura', models.DateField()),
+                ('fecha_cierre', models.DateField(blank=True, null=True)),
+                ('zona', models.CharField(blank=True, default='', max_length=100)),
+                ('tipo', models.CharField(blank=True, default='', max_length=50)),
+                ('prioridad', models.CharField(blank=True, default='', max_length=20)),
+                ('marca', models.CharField(blank=True, default='', max_length=100)),
+                ('estado', models.CharField(max_length=20)),
+                ('sla_cumplido', models.BooleanField(blank=True, null=True)),
+                ('ciclo_segundos', models.BigIntegerField(blank=True, null=True)),
+                ('costo', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('mecanico', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='hechos_ot', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['fecha_apertura'], name='reports_hec_fecha_a_c45bdd_idx'), models.Index(fields=['fecha_cierre'], name='reports_hec_fecha_c_f13e96_idx'), models.Index(fields=['zona', 'fecha_apertura'], name='reports_hec_zona_db12e4_idx'), models.Index(fields=['zona', 'fecha_cierre'], name='reports_hec_zona_317c58_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,361 @@
+# apps/reports/models.py
+"""
+Modelos de agregados (rollups) para dashboards y reportes.
+
+Los dashboards calculaban sus KPIs con un COUNT por estado, un COUNT por día
+para los gráficos de 7 días y recorridos de 30 días de OT cerradas en cada
+request. Estos modelos guardan esos números ya agregados por día, y los
+dashboards leen unas pocas filas en lugar de recorrer OrdenTrabajo y Pausa.
+
+- KPIDiario: Métricas de OT por día, zona, tipo de OT y mecánico
+- ControlRollup: Marca de agua (watermark) del último refresco incremental
+- ReporteJob: Generación asíncrona de un reporte PDF (Celery + S3)
+- PDFCacheado: Índice de la caché de PDFs ya generados (apps/reports/pdf_cache.py)
+- UtilizacionDiaria: Minutos productivos/en pausa/ociosos por mecánico y día
+- HechoOT: Una fila desnormalizada por OT para el cubo de análisis (apps/reports/cube.py)
+
+Relaciones:
+- KPIDiario -> User (mecánico, opcional)
+- ReporteJob -> User (solicitante e interesados)
+- Calculado por: apps/reports/rollups.py (refrescar_kpis_diarios)
+- Refrescado por: apps/reports/tasks.py (tarea Celery beat)
+- Usado por: apps/reports/rollups.py, apps/reports/dashboards.py
+- ReporteJob: apps/reports/jobs.py, apps/reports/tasks.py (generar_reporte_pdf)
+- PDFCacheado: apps/reports/pdf_cache.py
+- UtilizacionDiaria -> User (mecánico); calculado por apps/reports/utilization.py
+- HechoOT -> OrdenTrabajo, User (mecánico); refrescado junto con KPIDiario (apps/reports/rollups.py)
+"""
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from apps.core.ids import uuid7
+
+
+class KPIDiario(models.Model):
+    """
+    Métricas diarias de Órdenes de Trabajo agregadas por dimensión.
+
+    Cada fila agrupa las OT de un día (hora local) con la misma zona, tipo y
+    mecánico asignado. Las métricas de eventos se asignan al día en que
+    ocurrió el evento:
+    - ot_creadas: OT con apertura ese día
+    - ot_cerradas, sla_cumplido, sla_incumplido, ciclo_segundos: OT en estado
+      CERRADA con cierre ese día
+    - pausa_segundos: pausas terminadas ese día
+
+    por_estado es una foto del número de OT en cada estado tomada el mismo
+    día (se actualiza en cada refresco mientras el día está en curso). La
+    foto del día actual es la que usan los dashboards para los conteos por
+    estado; las de días anteriores quedan como histórico del backlog.
+
+    El tiempo de ciclo promedio se obtiene como ciclo_segundos / ot_cerradas.
+    """
+
+    # Día (hora local America/Santiago)
+    fecha = models.DateField()
+
+    # Dimensiones (mismos valores que en OrdenTrabajo)
+    zona = models.CharField(max_length=100, blank=True, default="")
+    tipo = models.CharField(max_length=50, blank=True, default="")
+    mecanico = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="kpis_diarios"
+    )
+
+    # Métricas de eventos del día
+    ot_creadas = models.PositiveIntegerField(default=0)
+    ot_cerradas = models.PositiveIntegerField(default=0)
+    sla_cumplido = models.PositiveIntegerField(default=0)
+    sla_incumplido = models.PositiveIntegerField(default=0)
+    ciclo_segundos = models.BigIntegerField(default=0, help_text="Suma de (cierre - apertura) de las OT cerradas")
+    pausa_segundos = models.BigIntegerField(default=0, help_text="Suma de duración de las pausas terminadas")
+
+    # Foto del número de OT por estado: {"ABIERTA": 3, "EN_PAUSA": 1, ...}
+    por_estado = models.JSONField(default=dict, blank=True)
+
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Configuración del modelo.
+
+        - indexes: los dashboards siempre filtran por rango de fecha,
+          opcionalmente por zona o mecánico
+        """
+        indexes = [
+            models.Index(fields=["fecha"]),
+            models.Index(fields=["zona", "fecha"]),
+            models.Index(fields=["mecanico", "fecha"]),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.zona or '-'} {self.tipo or '-'} {self.mecanico_id or '-'}"
+
+
+class ControlRollup(models.Model):
+    """
+    Marca de agua de un rollup.
+
+    watermark es el instante en que empezó el último refresco exitoso; el
+    siguiente refresco solo recalcula los días tocados por cambios
+    posteriores a ese instante.
+    """
+
+    nombre = models.CharField(max_length=50, primary_key=True)
+    watermark = models.DateTimeField(null=True, blank=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.nombre} @ {self.watermark}"
+
+
+class ReporteJob(models.Model):
+    """
+    Solicitud de generación de un reporte PDF en segundo plano.
+
+    El PDF se genera en Celery (apps/reports/tasks.py), se sube a S3 y los
+    interesados reciben un "data_update" por WebSocket con el link de
+    descarga; también pueden consultar el estado del job.
+
+    huella identifica el reporte pedido (tipo + parámetros normalizados).
+    Solo puede haber un job en curso (PENDIENTE o EN_PROCESO) por huella:
+    si llega otra solicitud igual se agrega el usuario a interesados en
+    lugar de generar el mismo PDF dos veces.
+
+    Estados:
+    - PENDIENTE: Encolado, esperando un worker
+    - EN_PROCESO: Generándose
+    - COMPLETADO: PDF disponible en S3 (s3_key)
+    - ERROR: Falló después de los reintentos (ver error)
+    """
+
+    class Estado(models.TextChoices):
+        """
+        Estados del job.
+        """
+        PENDIENTE = "PENDIENTE", "Pendiente"
+        EN_PROCESO = "EN_PROCESO", "En proceso"
+        COMPLETADO = "COMPLETADO", "Completado"
+        ERROR = "ERROR", "Error"
+
+    # Estados en los que el job todavía puede producir un PDF
+    EN_CURSO = (Estado.PENDIENTE, Estado.EN_PROCESO)
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+
+    # Reporte pedido: tipo ("diario", "semanal", "estado_flota", ...) y
+    # parámetros normalizados (fechas ISO y filtros)
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    huella = models.CharField(max_length=64, help_text="sha256 de tipo + parámetros")
+
+    estado = models.CharField(max_length=20, choices=Estado.choices, default=Estado.PENDIENTE)
+
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reportes_solicitados"
+    )
+    # Usuarios que pidieron el mismo reporte mientras estaba en curso
+    interesados = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        blank=True,
+        related_name="reportes_interesado"
+    )
+
+    # Resultado
+    s3_key = models.CharField(max_length=255, blank=True, default="")
+    nombre_archivo = models.CharField(max_length=255, blank=True, default="")
+    tamano_bytes = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    creado_en = models.DateTimeField(auto_now_add=True)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    terminado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """
+        Configuración del modelo.
+
+        - constraints: un solo job en curso por huella (deduplicación a
+          nivel de base de datos, sin carreras entre dos POST simultáneos)
+        - indexes: listado de jobs de un usuario, más recientes primero
+        """
+        ordering = ["-creado_en"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["huella"],
+                condition=models.Q(estado__in=["PENDIENTE", "EN_PROCESO"]),
+                name="reportejob_unico_en_curso",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["solicitado_por", "-creado_en"]),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.estado} ({self.id})"
+
+
+class PDFCacheado(models.Model):
+    """
+    PDF de reporte ya generado, direccionado por contenido.
+
+    clave es el sha256 de (tipo + parámetros + marca de agua de los datos +
+    versión de la plantilla): si los datos del período no cambiaron, la
+    misma solicitud produce la misma clave y se sirve el archivo guardado
+    en lugar de regenerarlo. Los bytes viven en el storage por defecto de
+    Django (ruta), esta tabla solo los indexa.
+
+    - abierto: el período incluye la semana en curso (o es una foto del
+      estado actual); su marca de agua es una versión que se renueva con
+      cada escritura, así que las escrituras lo invalidan
+    - ultimo_acceso: orden de desalojo LRU cuando se supera el tamaño máximo
+    """
+
+    clave = models.CharField(max_length=64, primary_key=True)
+
+    tipo = models.CharField(max_length=50)
+    fecha_inicio = models.DateField()
+    fecha_fin = models.DateField()
+    abierto = models.BooleanField(default=False)
+    # Versión de datos abiertos con la que se generó (vacía si es cerrado)
+    version = models.CharField(max_length=32, blank=True, default="")
+
+    ruta = models.CharField(max_length=255)
+    nombre_archivo = models.CharField(max_length=255)
+    tamano_bytes = models.PositiveIntegerField()
+
+    creado_en = models.DateTimeField(auto_now_add=True)
+    ultimo_acceso = models.DateTimeField(default=timezone.now)
+    accesos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """
+        Configuración del modelo.
+
+        - indexes: el desalojo recorre por ultimo_acceso (LRU)
+        """
+        indexes = [
+            models.Index(fields=["ultimo_acceso"]),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre_archivo} ({self.clave[:12]})"
+
+
+class UtilizacionDiaria(models.Model):
+    """
+    Uso del tiempo de un mecánico en un día laboral.
+
+    Se calcula cada noche (apps/reports/utilization.py) cruzando, dentro de
+    la jornada del taller, los intervalos de ejecución de las OT asignadas al
+    mecánico (fecha_inicio_ejecucion → cierre) con sus pausas (incluida la
+    colación automática):
+    - productivo_segundos: alguna OT en ejecución y sin pausa
+    - pausa_segundos: con OT en ejecución, pero todas en pausa (cada pausa
+      solo detiene su propia OT)
+    - ocioso_segundos: sin ninguna OT en ejecución
+
+    Los tres suman la duración de la jornada de ese día.
+    """
+
+    fecha = models.DateField()
+    mecanico = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="utilizacion_diaria"
+    )
+
+    productivo_segundos = models.PositiveIntegerField(default=0)
+    pausa_segundos = models.PositiveIntegerField(default=0)
+    ocioso_segundos = models.PositiveIntegerField(default=0)
+
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        Configuración del modelo.
+
+        - constraints: una fila por mecánico y día
+        - indexes: la API siempre filtra por rango de fecha
+        """
+        constraints = [
+            models.UniqueConstraint(fields=["mecanico", "fecha"], name="utilizacion_mecanico_fecha"),
+        ]
+        indexes = [
+            models.Index(fields=["fecha"]),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.mecanico_id}"
+
+
+class HechoOT(models.Model):
+    """
+    Tabla de hechos del cubo de análisis: una fila por Orden de Trabajo.
+
+    Copia desnormalizada de las dimensiones y medidas de la OT (la marca
+    viene del vehículo y el costo de los ítems), para que el cubo agrupe
+    sin joins sobre una tabla angosta e indexada por fecha. Se refresca en
+    el mismo refresco incremental que KPIDiario (rollups.recalcular_dias):
+    OT abiertas o cerradas en los días tocados y todas las OT activas.
+
+    - sla_cumplido: None si la OT no está cerrada o no tiene SLA
+    - ciclo_segundos: cierre - apertura, solo para OT cerradas
+    - costo: suma de cantidad × costo_unitario de sus ítems
+    """
+
+    ot = models.OneToOneField(
+        "workorders.OrdenTrabajo",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="hecho"
+    )
+
+    # Días locales de apertura y cierre
+    fecha_apertura = models.DateField()
+    fecha_cierre = models.DateField(null=True, blank=True)
+
+    # Dimensiones
+    zona = models.CharField(max_length=100, blank=True, default="")
+    tipo = models.CharField(max_length=50, blank=True, default="")
+    prioridad = models.CharField(max_length=20, blank=True, default="")
+    marca = models.CharField(max_length=100, blank=True, default="")
+    mecanico = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="hechos_ot"
+    )
+    estado = models.CharField(max_length=20)
+
+    # Medidas
+    sla_cumplido = models.BooleanField(null=True, blank=True)
+    ciclo_segundos = models.BigIntegerField(null=True, blank=True)
+    costo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        """
+        Configuración del modelo.
+
+        - indexes: el cubo siempre filtra por rango de fecha de apertura o
+          de cierre, opcionalmente por zona (alcance del usuario)
+        """
+        indexes = [
+            models.Index(fields=["fecha_apertura"]),
+            models.Index(fields=["fecha_cierre"]),
+            models.Index(fields=["zona", "fecha_apertura"]),
+            models.Index(fields=["zona", "fecha_cierre"]),
+        ]
+
+    def __str__(self):
+        return f"{self.ot_id} {self.fecha_apertura}"
@@ -0,0 +1,244 @@
+# apps/reports/pdf_cache.py
+"""
+Caché direccionada por contenido de los reportes PDF generados.
+
+Los reportes de períodos ya cerrados no cambian, pero se regeneraban
+completos (consultas + gráficos + ReportLab) en cada descarga. Ahora cada
+PDF generado se guarda bajo una clave derivada de:
+
+- La huella del reporte (tipo + parámetros normalizados, apps/reports/jobs.py)
+- Una marca de agua de los datos del período:
+  - Período cerrado: última actualización y número de filas de KPIDiario en
+    el rango (el rollup reescribe los días tocados por cualquier cambio)
+  - Período abierto (incluye la semana en curso, o estado_flota que es una
+    foto del estado actual): una versión que se renueva en cada escritura
+    de OT, pausa o vehículo (apps/reports/signals.py)
+- VERSION_PLANTILLA, para invalidar todo al cambiar los generadores
+
+Una solicitud repetida con los mismos datos calcula la misma clave y se
+sirve el archivo guardado en streaming, sin regenerarlo.
+
+Almacenamiento:
+- Los bytes van al storage por defecto de Django (PREFIJO_RUTA/<clave>.pdf);
+  PDFCacheado los indexa con tamaño y último acceso
+- Al superar MAX_BYTES o MAX_ENTRADAS se desaloja por LRU (ultimo_acceso);
+  la tarea de beat desalojar_pdfs_cacheados además borra los PDFs de
+  períodos abiertos con una versión ya superada
+
+Relaciones:
+- Usa: apps/reports/models.py (PDFCacheado, KPIDiario), apps/reports/rollups.py
+- Usado por: apps/reports/views.py (ReportePDFView), apps/reports/tasks.py
+"""
+
+import hashlib
+import logging
+import time
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, F, Max, Sum
+from django.utils import timezone
+
+from . import rollups
+from .jobs import huella
+from .models import KPIDiario, PDFCacheado
+
+logger = logging.getLogger(__name__)
+
+
+# Cambiar al modificar pdf_generator.py / pdf_generator_completo.py
+VERSION_PLANTILLA = 2
+
+# Límites de la caché (se desaloja por LRU al superarlos)
+MAX_BYTES = 256 * 1024 * 1024
+MAX_ENTRADAS = 1000
+
+# Ruta dentro del storage por defecto
+PREFIJO_RUTA = "reportes/cache"
+
+# Clave (caché de Django) de la versión de los datos de períodos abiertos
+CLAVE_VERSION_ABIERTA = "reportes:pdf:version_abierta"
+
+# Reportes que siempre reflejan el estado actual, sin importar el rango
+TIPOS_FOTO_ACTUAL = ("estado_flota",)
+
+
+def es_abierto(parametros):
+    """
+    True si el reporte incluye la semana en curso o es una foto del estado actual.
+    """
+    if parametros["tipo"] in TIPOS_FOTO_ACTUAL:
+        return True
+    hoy = timezone.localdate()
+    inicio_semana = hoy - timedelta(days=hoy.weekday())
+    return date.fromisoformat(parametros["fecha_fin"]) >= inicio_semana
+
+
+def version_abierta():
+    """
+    Versión actual de los datos de períodos abiertos.
+
+    Es un timestamp en nanosegundos, así que nunca se repite: si la caché de
+    Django se vacía se genera una versión nueva y los PDFs abiertos
+    anteriores simplemente dejan de coincidir.
+    """
+    version = cache.get(CLAVE_VERSION_ABIERTA)
+    if version is None:
+        cache.add(CLAVE_VERSION_ABIERTA, str(time.time_ns()), None)
+        version = cache.get(CLAVE_VERSION_ABIERTA)
+    return version
+
+
+def invalidar_abiertos():
+    """Renueva la versión de los períodos abiertos (llamado tras escrituras)."""
+    cache.set(CLAVE_VERSION_ABIERTA, str(time.time_ns()), None)
+
+
+def marca_de_agua(parametros):
+    """
+    Marca de agua de los datos que usa el reporte.
+
+    Retorna:
+    - (marca, version): version es la versión abierta ("" si es cerrado)
+    """
+    if es_abierto(parametros):
+        version = version_abierta()
+        return f"abierto:{version}", version
+
+    # Mismo criterio de frescura que los dashboards (normalmente no refresca)
+    rollups.asegurar_frescos()
+    datos = KPIDiario.objects.filter(
+        fecha__gte=parametros["fecha_inicio"], fecha__lte=parametros["fecha_fin"]
+    ).aggregate(ultima=Max("actualizado_en"), filas=Count("id"))
+    ultima = datos["ultima"].isoformat() if datos["ultima"] else "-"
+    return f"cerrado:{ultima}:{datos['filas']}", ""
+
+
+def clave(parametros):
+    """
+    Clave de contenido del reporte con los datos actuales.
+
+    Retorna:
+    - (clave, version): sha256 hex y la versión abierta usada ("" si es cerrado)
+    """
+    marca, version = marca_de_agua(parametros)
+    contenido = f"{VERSION_PLANTILLA}|{huella(parametros)}|{marca}"
+    return hashlib.sha256(contenido.encode()).hexdigest(), version
+
+
+def obtener(clave_pdf):
+    """
+    Busca un PDF en la caché y registra el acceso.
+
+    Si el índice apunta a un archivo que ya no existe en el storage, la
+    entrada se descarta.
+
+    Retorna:
+    - PDFCacheado o None
+    """
+    entrada = PDFCacheado.objects.filter(clave=clave_pdf).first()
+    if entrada is None:
+        return None
+    if not default_storage.exists(entrada.ruta):
+        logger.warning(f"PDF cacheado {clave_pdf} sin archivo en el storage; se descarta")
+        entrada.delete()
+        return None
+    PDFCacheado.objects.filter(clave=clave_pdf).update(
+        ultimo_acceso=timezone.now(), accesos=F("accesos") + 1
+    )
+    return entrada
+
+
+def abrir(entrada):
+    """Abre el archivo de una entrada para leerlo en streaming (modo binario)."""
+    return default_storage.open(entrada.ruta, "rb")
+
+
+def leer(entrada):
+    """Bytes completos de una entrada (para subirlos a S3 desde un job)."""
+    with abrir(entrada) as archivo:
+        return archivo.read()
+
+
+def guardar(clave_pdf, version, parametros, pdf_bytes, nombre_archivo):
+    """
+    Guarda un PDF recién generado y desaloja por LRU si se superan los límites.
+
+    Los errores del storage se registran y no interrumpen la descarga: sin
+    caché el reporte simplemente se regenera la próxima vez.
+
+    Retorna:
+    - PDFCacheado o None si no se pudo guardar
+    """
+    ruta = f"{PREFIJO_RUTA}/{clave_pdf}.pdf"
+    try:
+        if not default_storage.exists(ruta):
+            default_storage.save(ruta, ContentFile(pdf_bytes))
+        entrada, _ = PDFCacheado.objects.update_or_create(
+            clave=clave_pdf,
+            defaults={
+                "tipo": parametros["tipo"],
+                "fecha_inicio": parametros["fecha_inicio"],
+                "fecha_fin": parametros["fecha_fin"],
+                "abierto": bool(version),
+                "version": version,
+                "ruta": ruta,
+                "nombre_archivo": nombre_archivo,
+                "tamano_bytes": len(pdf_bytes),
+                "ultimo_acceso": timezone.now(),
+            }
+        )
+    except Exception as e:
+        logger.error(f"No se pudo guardar el PDF {nombre_archivo} en la caché: {e}")
+        return None
+    desalojar()
+    return entrada
+
+
+def _borrar(entradas):
+    """Borra archivos e índice de las entradas indicadas."""
+    claves = []
+    for clave_pdf, ruta in entradas:
+        try:
+            default_storage.delete(ruta)
+        except Exception as e:
+            logger.warning(f"No se pudo borrar {ruta} del storage: {e}")
+        claves.append(clave_pdf)
+    PDFCacheado.objects.filter(clave__in=claves).delete()
+    return len(claves)
+
+
+def desalojar(max_bytes=MAX_BYTES, max_entradas=MAX_ENTRADAS, purgar_abiertos=False):
+    """
+    Mantiene la caché dentro de los límites (LRU por ultimo_acceso).
+
+    Parámetros:
+    - max_bytes, max_entradas: Límites de tamaño total y cantidad
+    - purgar_abiertos: Además, borrar los PDFs abiertos de versiones superadas
+
+    Retorna:
+    - Número de entradas borradas
+    """
+    borradas = 0
+    if purgar_abiertos:
+        obsoletas = PDFCacheado.objects.filter(abierto=True).exclude(version=version_abierta())
+        borradas += _borrar(obsoletas.values_list("clave", "ruta"))
+
+    totales = PDFCacheado.objects.aggregate(bytes=Sum("tamano_bytes"), entradas=Count("clave"))
+    exceso_bytes = (totales["bytes"] or 0) - max_bytes
+    exceso_entradas = totales["entradas"] - max_entradas
+    if exceso_bytes <= 0 and exceso_entradas <= 0:
+        return borradas
+
+    a_borrar = []
+    for clave_pdf, ruta, tamano in PDFCacheado.objects.order_by("ultimo_acceso").values_list(
+        "clave", "ruta", "tamano_bytes"
+    ).iterator():
+        if exceso_bytes <= 0 and exceso_entradas <= 0:
+            break
+        a_borrar.append((clave_pdf, ruta))
+        exceso_bytes -= tamano
+        exceso_entradas -= 1
+    return borradas + _borrar(a_borrar)
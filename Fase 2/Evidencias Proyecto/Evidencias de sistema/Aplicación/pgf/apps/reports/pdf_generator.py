@@ -10,16 +10,11 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.barcharts import VerticalBarChart
-from reportlab.graphics.charts.linecharts import HorizontalLineChart
 from io import BytesIO
 from django.utils import timezone
 from datetime import timedelta
-import matplotlib
-matplotlib.use('Agg')  # Usar backend sin GUI
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+from apps.core.date_filters import rango_dia, rango_fechas
+from . import charts  # Gráficos vectoriales o PNG memorizados (sin pyplot)
 # No importar views aquí para evitar circular imports
 
 
@@ -194,7 +189,7 @@ def generar_reporte_semanal_pdf(fecha_inicio=None, fecha_fin=None):
     Genera un reporte semanal en PDF con productividad del taller
     """
     if not fecha_inicio:
-        fecha_fin = timezone.now().date()
+        fecha_fin = timezone.localdate()
         fecha_inicio = fecha_fin - timedelta(days=7)
     
     # Crear buffer para el PDF
@@ -240,9 +235,8 @@ def generar_reporte_semanal_pdf(fecha_inicio=None, fecha_fin=None):
     
     # KPIs principales
     ot_cerradas = OrdenTrabajo.objects.filter(
-        estado="CERRADA",
-        cierre__date__gte=fecha_inicio,
-        cierre__date__lte=fecha_fin
+        rango_fechas("cierre", desde=fecha_inicio, hasta=fecha_fin),
+        estado="CERRADA"
     )
     
     total_cerradas = ot_cerradas.count()
@@ -265,33 +259,29 @@ def generar_reporte_semanal_pdf(fecha_inicio=None, fecha_fin=None):
     mecanicos_stats = User.objects.filter(
         rol="MECANICO"
     ).annotate(
-        total_cerradas=Count('ots_asignadas', filter=Q(ots_asignadas__estado="CERRADA", ots_asignadas__cierre__date__gte=fecha_inicio, ots_asignadas__cierre__date__lte=fecha_fin))
+        total_cerradas=Count('ots_asignadas', filter=Q(rango_fechas("ots_asignadas__cierre", desde=fecha_inicio, hasta=fecha_fin), ots_asignadas__estado="CERRADA"))
     ).filter(total_cerradas__gt=0).order_by('-total_cerradas')
     
     # Retrabajos
     retrabajos = OrdenTrabajo.objects.filter(
-        estado="RETRABAJO",
-        apertura__date__gte=fecha_inicio,
-        apertura__date__lte=fecha_fin
+        rango_fechas("apertura", desde=fecha_inicio, hasta=fecha_fin),
+        estado="RETRABAJO"
     ).count()
     
     # Mantenciones vs Reparaciones
     mantenciones = OrdenTrabajo.objects.filter(
-        tipo="MANTENCION",
-        cierre__date__gte=fecha_inicio,
-        cierre__date__lte=fecha_fin
+        rango_fechas("cierre", desde=fecha_inicio, hasta=fecha_fin),
+        tipo="MANTENCION"
     ).count()
     
     reparaciones = OrdenTrabajo.objects.filter(
-        tipo="REPARACION",
-        cierre__date__gte=fecha_inicio,
-        cierre__date__lte=fecha_fin
+        rango_fechas("cierre", desde=fecha_inicio, hasta=fecha_fin),
+        tipo="REPARACION"
     ).count()
     
     # Pausas más frecuentes
     pausas_frecuentes = Pausa.objects.filter(
-        inicio__date__gte=fecha_inicio,
-        inicio__date__lte=fecha_fin
+        rango_fechas("inicio", desde=fecha_inicio, hasta=fecha_fin)
     ).values('tipo').annotate(
         total=Count('id')
     ).order_by('-total')[:5]
@@ -390,8 +380,8 @@ def generar_reporte_semanal_pdf(fecha_inicio=None, fecha_fin=None):
     for i in range(7):
         fecha = fecha_fin - timedelta(days=6-i)
         cantidad = OrdenTrabajo.objects.filter(
-            estado="CERRADA",
-            cierre__date=fecha
+            rango_dia("cierre", fecha),
+            estado="CERRADA"
         ).count()
         ot_cerradas_por_dia.append({
             "fecha": fecha,
@@ -401,33 +391,14 @@ def generar_reporte_semanal_pdf(fecha_inicio=None, fecha_fin=None):
     if ot_cerradas_por_dia and any(d['cantidad'] > 0 for d in ot_cerradas_por_dia):
         elements.append(Paragraph("Gráfico: Productividad - OT Cerradas por Día", heading_style))
         
-        # Crear gráfico con matplotlib
-        fig, ax = plt.subplots(figsize=(8, 4))
-        fechas = [d['fecha'] for d in ot_cerradas_por_dia]
-        cantidades = [d['cantidad'] for d in ot_cerradas_por_dia]
-        
-        ax.plot(fechas, cantidades, marker='o', linewidth=2, color='#003DA5', markersize=8)
-        ax.fill_between(fechas, cantidades, alpha=0.3, color='#003DA5')
-        ax.set_xlabel('Fecha', fontsize=10)
-        ax.set_ylabel('OT Cerradas', fontsize=10)
-        ax.set_title('Productividad - OT Cerradas (Últimos 7 Días)', fontsize=12, fontweight='bold')
-        ax.grid(True, alpha=0.3)
-        ax.set_ylim(bottom=0)
-        
-        # Formatear fechas en el eje X
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m'))
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # Guardar gráfico en buffer
-        img_buffer = BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-        img_buffer.seek(0)
-        plt.close()
-        
-        # Agregar imagen al PDF
-        img = Image(img_buffer, width=6*inch, height=3*inch)
-        elements.append(img)
+        elements.append(charts.grafico(
+            "lineas",
+            [d['fecha'].strftime('%d/%m') for d in ot_cerradas_por_dia],
+            [d['cantidad'] for d in ot_cerradas_por_dia],
+            titulo='Productividad - OT Cerradas (Últimos 7 Días)',
+            eje_x='Fecha',
+            eje_y='OT Cerradas',
+        ))
         elements.append(Spacer(1, 0.3*inch))
     
     # Gráfico de OT por estado
@@ -442,76 +413,29 @@ def generar_reporte_semanal_pdf(fecha_inicio=None, fecha_fin=None):
     if ot_por_estado and any(e['cantidad'] > 0 for e in ot_por_estado):
         elements.append(Paragraph("Gráfico: Distribución de OT por Estado", heading_style))
         
-        # Crear gráfico de barras
-        fig, ax = plt.subplots(figsize=(8, 4))
-        estados = [e['estado'] for e in ot_por_estado]
-        cantidades = [e['cantidad'] for e in ot_por_estado]
-        colors_list = ['#003DA5', '#f59e0b', '#ef4444', '#8b5cf6', '#10b981']
-        
-        bars = ax.bar(estados, cantidades, color=colors_list[:len(estados)], alpha=0.8)
-        ax.set_xlabel('Estado', fontsize=10)
-        ax.set_ylabel('Cantidad', fontsize=10)
-        ax.set_title('Distribución de OT por Estado', fontsize=12, fontweight='bold')
-        ax.grid(True, alpha=0.3, axis='y')
-        ax.set_ylim(bottom=0)
-        
-        # Agregar valores en las barras
-        for bar in bars:
-            height = bar.get_height()
-            if height > 0:
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}',
-                       ha='center', va='bottom', fontsize=9)
-        
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        
-        # Guardar gráfico en buffer
-        img_buffer = BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-        img_buffer.seek(0)
-        plt.close()
-        
-        # Agregar imagen al PDF
-        img = Image(img_buffer, width=6*inch, height=3*inch)
-        elements.append(img)
+        elements.append(charts.grafico(
+            "barras",
+            [e['estado'] for e in ot_por_estado],
+            [e['cantidad'] for e in ot_por_estado],
+            titulo='Distribución de OT por Estado',
+            eje_x='Estado',
+            eje_y='Cantidad',
+        ))
         elements.append(Spacer(1, 0.3*inch))
     
     # Gráfico de productividad por mecánico
     if mecanicos_stats:
         elements.append(Paragraph("Gráfico: Productividad por Mecánico", heading_style))
         
-        # Crear gráfico de barras horizontal
-        fig, ax = plt.subplots(figsize=(8, max(4, len(mecanicos_stats) * 0.5)))
-        nombres = [f"{m.first_name} {m.last_name}".strip() or m.username for m in mecanicos_stats]
-        ot_cerradas = [m.total_cerradas for m in mecanicos_stats]
-        
-        bars = ax.barh(nombres, ot_cerradas, color='#10b981', alpha=0.8)
-        ax.set_xlabel('OT Cerradas', fontsize=10)
-        ax.set_ylabel('Mecánico', fontsize=10)
-        ax.set_title('Productividad por Mecánico (Últimos 7 Días)', fontsize=12, fontweight='bold')
-        ax.grid(True, alpha=0.3, axis='x')
-        ax.set_xlim(left=0)
-        
-        # Agregar valores en las barras
-        for i, bar in enumerate(bars):
-            width = bar.get_width()
-            if width > 0:
-                ax.text(width, bar.get_y() + bar.get_height()/2.,
-                       f'{int(width)}',
-                       ha='left', va='center', fontsize=9)
-        
-        plt.tight_layout()
-        
-        # Guardar gráfico en buffer
-        img_buffer = BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-        img_buffer.seek(0)
-        plt.close()
-        
-        # Agregar imagen al PDF
-        img = Image(img_buffer, width=6*inch, height=max(3*inch, len(mecanicos_stats) * 0.4*inch))
-        elements.append(img)
+        elements.append(charts.grafico(
+            "barras_horizontales",
+            [f"{m.first_name} {m.last_name}".strip() or m.username for m in mecanicos_stats],
+            [m.total_cerradas for m in mecanicos_stats],
+            titulo='Productividad por Mecánico (Últimos 7 Días)',
+            eje_x='OT Cerradas',
+            eje_y='Mecánico',
+            alto=max(3, len(mecanicos_stats) * 0.4),
+        ))
         elements.append(Spacer(1, 0.3*inch))
     
     # Pie de página
@@ -532,7 +456,7 @@ def generar_reporte_diario_pdf(fecha=None):
     Genera un reporte diario en PDF con operación del día
     """
     if not fecha:
-        fecha = timezone.now().date()
+        fecha = timezone.localdate()
     
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
@@ -568,8 +492,8 @@ def generar_reporte_diario_pdf(fecha=None):
     ot_en_pausa = OrdenTrabajo.objects.filter(estado="EN_PAUSA").count()
     ot_en_qa = OrdenTrabajo.objects.filter(estado="EN_QA").count()
     ot_cerradas_hoy = OrdenTrabajo.objects.filter(
-        estado="CERRADA",
-        cierre__date=fecha
+        rango_dia("cierre", fecha),
+        estado="CERRADA"
     ).count()
     
     # Pausas activas
@@ -18,53 +18,21 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+import os
+import tempfile
 from io import BytesIO
 from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Count, Avg, Sum, Q, F, Max, Min
-from django.db.models.functions import Extract
+from django.db.models.functions import Coalesce, Extract
+from apps.core.date_filters import rango_fechas
+from apps.core.exports import en_lotes
+from . import pdf_sections
 
 
-def _get_styles():
-    """Retorna estilos reutilizables para los PDFs."""
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#003DA5'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#003DA5'),
-        spaceAfter=12,
-        spaceBefore=12
-    )
-    return styles, title_style, heading_style
-
-
-def _create_table(data, col_widths=None):
-    """Crea una tabla con estilo PepsiCo."""
-    if col_widths is None:
-        col_widths = [4*inch] * (len(data[0]) - 1) + [2*inch]
-    
-    table = Table(data, colWidths=col_widths)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003DA5')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-    ]))
-    return table
+# Estilos y tabla compartidos con el renderizado por secciones (pdf_sections)
+_get_styles = pdf_sections.estilos
+_create_table = pdf_sections.tabla
 
 
 def generar_reporte_estado_flota(fecha=None, supervisor=None, tipo_vehiculo=None, estado_operativo=None):
@@ -77,7 +45,7 @@ def generar_reporte_estado_flota(fecha=None, supervisor=None, tipo_vehiculo=None
     - Filtros: Supervisor, Tipo de vehículo, Estado operativo
     """
     if not fecha:
-        fecha = timezone.now().date()
+        fecha = timezone.localdate()
     
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
@@ -116,7 +84,7 @@ def generar_reporte_estado_flota(fecha=None, supervisor=None, tipo_vehiculo=None
     vehiculos_fuera_politica = vehiculos.filter(cumplimiento="FUERA_POLITICA").count()
     
     # Vehículos con revisión vencida
-    hoy = timezone.now().date()
+    hoy = timezone.localdate()
     vehiculos_revision_vencida = vehiculos.filter(
         proxima_revision__lt=hoy
     ).count()
@@ -142,16 +110,14 @@ def generar_reporte_estado_flota(fecha=None, supervisor=None, tipo_vehiculo=None
     # OT por semana (últimos 7 días)
     fecha_semana = fecha - timedelta(days=7)
     ot_semana = OrdenTrabajo.objects.filter(
-        apertura__date__gte=fecha_semana,
-        apertura__date__lte=fecha,
+        rango_fechas("apertura", desde=fecha_semana, hasta=fecha),
         vehiculo__in=vehiculos
     ).count()
     
     # OT por mes (últimos 30 días)
     fecha_mes = fecha - timedelta(days=30)
     ot_mes = OrdenTrabajo.objects.filter(
-        apertura__date__gte=fecha_mes,
-        apertura__date__lte=fecha,
+        rango_fechas("apertura", desde=fecha_mes, hasta=fecha),
         vehiculo__in=vehiculos
     ).count()
     
@@ -203,51 +169,27 @@ def generar_reporte_estado_flota(fecha=None, supervisor=None, tipo_vehiculo=None
     return buffer.getvalue()
 
 
-def generar_reporte_ordenes_trabajo(fecha_inicio=None, fecha_fin=None):
+def _resumen_ordenes_trabajo(fecha_inicio, fecha_fin, filtros):
     """
-    ✅ 2. Reporte de Órdenes de Trabajo (OT)
-    
-    Incluye:
-    - Open Dashboard: OT abiertas, en ejecución, en QA, cerradas, rechazadas
-    - Información por OT: número, vehículo, estado, tiempos de proceso, causa de ingreso/salida
-    - Alertas: OT con SLA vencido, OT sin actividad, pausas prolongadas
+    Tablas de conteos del reporte de OT: (Open Dashboard, Alertas).
+
+    Son las mismas en el modo normal y en el completo; solo cambia el
+    detalle por OT.
     """
-    if not fecha_inicio:
-        fecha_fin = timezone.now().date()
-        fecha_inicio = fecha_fin - timedelta(days=30)
-    
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
-    elements = []
-    
-    styles, title_style, heading_style = _get_styles()
-    
-    # Título
-    elements.append(Paragraph("REPORTE DE ÓRDENES DE TRABAJO", title_style))
-    elements.append(Paragraph(f"PepsiCo Chile - Sistema PGF", styles['Normal']))
-    elements.append(Paragraph(f"Período: {fecha_inicio} al {fecha_fin}", styles['Normal']))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Importar modelos
     from apps.workorders.models import OrdenTrabajo, Pausa
-    
-    # Filtros
-    filtros = {}
-    
+
     # Open Dashboard
     ot_abiertas = OrdenTrabajo.objects.filter(estado="ABIERTA", **filtros).count()
     ot_en_ejecucion = OrdenTrabajo.objects.filter(estado="EN_EJECUCION", **filtros).count()
     ot_en_qa = OrdenTrabajo.objects.filter(estado="EN_QA", **filtros).count()
     ot_cerradas = OrdenTrabajo.objects.filter(
+        rango_fechas("cierre", desde=fecha_inicio, hasta=fecha_fin),
         estado="CERRADA",
-        cierre__date__gte=fecha_inicio,
-        cierre__date__lte=fecha_fin,
         **filtros
     ).count()
     ot_rechazadas = OrdenTrabajo.objects.filter(
+        rango_fechas("apertura", desde=fecha_inicio, hasta=fecha_fin),
         estado="RETRABAJO",
-        apertura__date__gte=fecha_inicio,
-        apertura__date__lte=fecha_fin,
         **filtros
     ).count()
     
@@ -260,34 +202,6 @@ def generar_reporte_ordenes_trabajo(fecha_inicio=None, fecha_fin=None):
         ['OT Rechazadas', str(ot_rechazadas)],
     ]
     
-    elements.append(Paragraph("Open Dashboard", heading_style))
-    elements.append(_create_table(dashboard_data))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Información por OT
-    ot_list = OrdenTrabajo.objects.filter(
-        apertura__date__gte=fecha_inicio,
-        apertura__date__lte=fecha_fin,
-        **filtros
-    ).select_related('vehiculo', 'supervisor', 'mecanico').order_by('-apertura')[:50]  # Limitar a 50 para el PDF
-    
-    if ot_list:
-        ot_data = [['OT', 'Vehículo', 'Estado', 'Tiempo Total (días)', 'Causa Ingreso']]
-        for ot in ot_list:
-            tiempo_total = ot.tiempo_total_reparacion or 0
-            causa_ingreso = (ot.causa_ingreso or ot.motivo or "")[:50]
-            ot_data.append([
-                str(ot.id)[:8],
-                ot.vehiculo.patente if ot.vehiculo else "N/A",
-                ot.estado,
-                f"{tiempo_total:.2f}",
-                causa_ingreso
-            ])
-        
-        elements.append(Paragraph("Información por OT (primeras 50)", heading_style))
-        elements.append(_create_table(ot_data, col_widths=[1*inch, 1*inch, 1.5*inch, 1*inch, 2.5*inch]))
-        elements.append(Spacer(1, 0.3*inch))
-    
     # Alertas
     ahora = timezone.now()
     ot_sla_vencido = OrdenTrabajo.objects.filter(
@@ -297,10 +211,13 @@ def generar_reporte_ordenes_trabajo(fecha_inicio=None, fecha_fin=None):
     ).count()
     
     # OT sin actividad por más de X horas (default 24)
+    # OrdenTrabajo no tiene updated_at: la última marca es el inicio de ejecución (o la apertura)
     fecha_sin_actividad = ahora - timedelta(hours=24)
-    ot_sin_actividad = OrdenTrabajo.objects.filter(
+    ot_sin_actividad = OrdenTrabajo.objects.annotate(
+        ultima_actividad=Coalesce("fecha_inicio_ejecucion", "apertura")
+    ).filter(
         estado__in=["EN_EJECUCION", "EN_PAUSA"],
-        updated_at__lt=fecha_sin_actividad,
+        ultima_actividad__lt=fecha_sin_actividad,
         **filtros
     ).count()
     
@@ -317,6 +234,88 @@ def generar_reporte_ordenes_trabajo(fecha_inicio=None, fecha_fin=None):
         ['OT Sin Actividad (>24h)', str(ot_sin_actividad)],
         ['Pausas Prolongadas (>4h)', str(pausas_prolongadas)],
     ]
+    return dashboard_data, alertas_data
+
+
+# Columnas del detalle por OT (encabezado, anchos en pulgadas)
+ENCABEZADO_OT = ['OT', 'Vehículo', 'Estado', 'Tiempo Total (días)', 'Causa Ingreso']
+ANCHOS_OT = [1, 1, 1.5, 1, 2.5]
+
+
+def _fila_ot(ot_id, patente, estado, tiempo_total, causa_ingreso, motivo):
+    return [
+        str(ot_id)[:8],
+        patente or "N/A",
+        estado,
+        f"{tiempo_total or 0:.2f}",
+        (causa_ingreso or motivo or "")[:50],
+    ]
+
+
+def generar_reporte_ordenes_trabajo(fecha_inicio=None, fecha_fin=None, completo=False):
+    """
+    ✅ 2. Reporte de Órdenes de Trabajo (OT)
+    
+    Incluye:
+    - Open Dashboard: OT abiertas, en ejecución, en QA, cerradas, rechazadas
+    - Información por OT: número, vehículo, estado, tiempos de proceso, causa de ingreso/salida
+    - Alertas: OT con SLA vencido, OT sin actividad, pausas prolongadas
+
+    Con completo=True el detalle incluye todas las OT del período (no solo
+    las primeras 50) y se genera por secciones: ver _reporte_ordenes_trabajo_completo.
+    """
+    if not fecha_inicio:
+        fecha_fin = timezone.localdate()
+        fecha_inicio = fecha_fin - timedelta(days=30)
+
+    if completo:
+        return _reporte_ordenes_trabajo_completo(fecha_inicio, fecha_fin)
+    
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+    elements = []
+    
+    styles, title_style, heading_style = _get_styles()
+    
+    # Título
+    elements.append(Paragraph("REPORTE DE ÓRDENES DE TRABAJO", title_style))
+    elements.append(Paragraph(f"PepsiCo Chile - Sistema PGF", styles['Normal']))
+    elements.append(Paragraph(f"Período: {fecha_inicio} al {fecha_fin}", styles['Normal']))
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Importar modelos
+    from apps.workorders.models import OrdenTrabajo
+    
+    # Filtros
+    filtros = {}
+    
+    dashboard_data, alertas_data = _resumen_ordenes_trabajo(fecha_inicio, fecha_fin, filtros)
+    
+    elements.append(Paragraph("Open Dashboard", heading_style))
+    elements.append(_create_table(dashboard_data))
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Información por OT
+    ot_list = OrdenTrabajo.objects.filter(
+        rango_fechas("apertura", desde=fecha_inicio, hasta=fecha_fin),
+        **filtros
+    ).select_related('vehiculo', 'supervisor', 'mecanico').order_by('-apertura')[:50]  # Limitar a 50 para el PDF
+    
+    if ot_list:
+        ot_data = [ENCABEZADO_OT]
+        for ot in ot_list:
+            ot_data.append(_fila_ot(
+                ot.id,
+                ot.vehiculo.patente if ot.vehiculo else None,
+                ot.estado,
+                ot.tiempo_total_reparacion,
+                ot.causa_ingreso,
+                ot.motivo,
+            ))
+        
+        elements.append(Paragraph("Información por OT (primeras 50)", heading_style))
+        elements.append(_create_table(ot_data, col_widths=[ancho*inch for ancho in ANCHOS_OT]))
+        elements.append(Spacer(1, 0.3*inch))
     
     elements.append(Paragraph("Alertas", heading_style))
     elements.append(_create_table(alertas_data))
@@ -331,3 +330,57 @@ def generar_reporte_ordenes_trabajo(fecha_inicio=None, fecha_fin=None):
     buffer.seek(0)
     return buffer.getvalue()
 
+
+def _reporte_ordenes_trabajo_completo(fecha_inicio, fecha_fin):
+    """
+    Reporte de OT con todas las OT del período, con memoria acotada.
+
+    - Las OT se leen con .values_list().iterator(): en PostgreSQL es un
+      cursor del lado del servidor, nunca hay más de un lote en memoria
+    - Cada FILAS_POR_SECCION filas forman una sección que se dibuja en un
+      proceso aparte (settings.REPORTES_PDF_PROCESOS) y se escribe a un
+      archivo temporal
+    - Las secciones se concatenan en un archivo temporal y recién al final
+      se leen los bytes (la caché y S3 reciben bytes, como en el modo normal)
+    """
+    from django.conf import settings
+    from apps.workorders.models import OrdenTrabajo
+
+    filtros = {}
+    dashboard_data, alertas_data = _resumen_ordenes_trabajo(fecha_inicio, fecha_fin, filtros)
+    filas = OrdenTrabajo.objects.filter(
+        rango_fechas("apertura", desde=fecha_inicio, hasta=fecha_fin),
+        **filtros
+    ).order_by('-apertura').values_list(
+        'id', 'vehiculo__patente', 'estado', 'tiempo_total_reparacion', 'causa_ingreso', 'motivo'
+    ).iterator(chunk_size=pdf_sections.FILAS_POR_SECCION)
+
+    def secciones():
+        yield [
+            ("titulo", "REPORTE DE ÓRDENES DE TRABAJO"),
+            ("texto", "PepsiCo Chile - Sistema PGF"),
+            ("texto", f"Período: {fecha_inicio} al {fecha_fin}"),
+            ("espacio", 0.3),
+            ("encabezado", "Open Dashboard"),
+            ("tabla", dashboard_data, None),
+            ("espacio", 0.3),
+            ("encabezado", "Alertas"),
+            ("tabla", alertas_data, None),
+            ("espacio", 0.3),
+            ("texto", f"Generado el {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"),
+            ("texto", "Sistema PGF - PepsiCo Chile"),
+        ]
+        for numero, lote in enumerate(en_lotes(filas, pdf_sections.FILAS_POR_SECCION)):
+            bloques = [("encabezado", "Información por OT")] if numero == 0 else []
+            bloques.append(("tabla", [ENCABEZADO_OT] + [_fila_ot(*fila) for fila in lote], ANCHOS_OT))
+            yield bloques
+
+    with tempfile.TemporaryDirectory(prefix="reporte_ot_") as directorio:
+        rutas = pdf_sections.renderizar_secciones(
+            secciones(), directorio, procesos=getattr(settings, "REPORTES_PDF_PROCESOS", 2)
+        )
+        ruta_final = os.path.join(directorio, "reporte.pdf")
+        with open(ruta_final, "wb") as destino:
+            pdf_sections.concatenar(rutas, destino)
+        with open(ruta_final, "rb") as origen:
+            return origen.read()
@@ -0,0 +1,376 @@
+# apps/reports/pdf_sections.py
+"""
+Renderizado de reportes PDF grandes por secciones.
+
+Los generadores arman toda la "story" de platypus en memoria y la
+construyen en un único BytesIO. Con miles de filas, los Table/Paragraph
+y el layout de doc.build hacen crecer el RSS del worker con el rango del
+reporte. Este módulo permite un modo por secciones:
+
+- El generador describe cada sección como una lista de bloques simples
+  (tuplas con texto y filas), que se puede enviar a otro proceso
+- renderizar_secciones() dibuja cada sección en un proceso del pool
+  (contexto "spawn") y la escribe en un archivo temporal; como máximo
+  hay 2 × procesos secciones en vuelo, así que el generador puede ir
+  leyendo filas con .iterator() sin adelantarse demasiado
+- concatenar() une los PDF de las secciones, en orden, en un solo archivo,
+  leyendo una sección a la vez
+
+La memoria máxima queda acotada por el tamaño de una sección
+(FILAS_POR_SECCION), sin importar cuántas filas tenga el reporte.
+
+Este módulo no importa Django: los procesos "spawn" solo cargan este
+archivo y ReportLab (no heredan conexiones a la base de datos).
+
+Bloques de una sección:
+- ("titulo", texto) / ("encabezado", texto) / ("texto", texto)
+- ("tabla", filas, anchos_en_pulgadas_o_None): la primera fila es el
+  encabezado y se repite en cada página
+- ("espacio", alto_en_pulgadas)
+
+Relaciones:
+- Usado por: apps/reports/pdf_generator_completo.py
+"""
+
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+logger = logging.getLogger(__name__)
+
+
+# Filas de tabla por sección (acota la memoria de cada proceso)
+FILAS_POR_SECCION = 500
+
+# Márgenes de los reportes completos (puntos)
+MARGENES = {"rightMargin": 30, "leftMargin": 30, "topMargin": 30, "bottomMargin": 30}
+
+
+def estilos():
+    """Retorna estilos reutilizables para los PDFs: (styles, titulo, encabezado)."""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#003DA5'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#003DA5'),
+        spaceAfter=12,
+        spaceBefore=12
+    )
+    return styles, title_style, heading_style
+
+
+def tabla(data, col_widths=None):
+    """Crea una tabla con estilo PepsiCo (el encabezado se repite en cada página)."""
+    if col_widths is None:
+        col_widths = [4*inch] * (len(data[0]) - 1) + [2*inch]
+
+    table = Table(data, colWidths=col_widths, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003DA5')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+    ]))
+    return table
+
+
+def _flowables(bloques):
+    styles, title_style, heading_style = estilos()
+    por_tipo = {"titulo": title_style, "encabezado": heading_style, "texto": styles["Normal"]}
+    elementos = []
+    for bloque in bloques:
+        tipo = bloque[0]
+        if tipo in por_tipo:
+            elementos.append(Paragraph(bloque[1], por_tipo[tipo]))
+        elif tipo == "tabla":
+            anchos = [a * inch for a in bloque[2]] if bloque[2] else None
+            elementos.append(tabla(bloque[1], anchos))
+        elif tipo == "espacio":
+            elementos.append(Spacer(1, bloque[1] * inch))
+        else:
+            raise ValueError(f"Bloque de PDF desconocido: {tipo}")
+    return elementos
+
+
+def renderizar_seccion(bloques, ruta):
+    """
+    Dibuja una sección en un archivo PDF (se ejecuta en un proceso del pool).
+
+    Parámetros:
+    - bloques: Lista de bloques (ver docstring del módulo)
+    - ruta: Archivo de salida
+
+    Retorna:
+    - ruta
+    """
+    doc = SimpleDocTemplate(ruta, pagesize=A4, **MARGENES)
+    doc.build(_flowables(bloques))
+    return ruta
+
+
+def renderizar_secciones(secciones, directorio, procesos=2):
+    """
+    Dibuja las secciones en paralelo, cada una en su propio archivo.
+
+    Las secciones se consumen de a poco: nunca hay más de 2 × procesos
+    secciones esperando, así que un generador que lee filas de la base
+    con .iterator() mantiene la memoria acotada.
+
+    Parámetros:
+    - secciones: Iterable de listas de bloques
+    - directorio: Directorio temporal donde escribir las partes
+    - procesos: Procesos del pool; 0 o 1 dibuja en el proceso actual (también
+      si el proceso actual es daemon)
+
+    Retorna:
+    - Lista de rutas de los PDF, en el orden de las secciones
+    """
+    secciones = iter(secciones)
+    rutas = []
+
+    def siguiente_ruta():
+        ruta = os.path.join(directorio, f"seccion_{len(rutas):05d}.pdf")
+        rutas.append(ruta)
+        return ruta
+
+    if procesos > 1 and multiprocessing.current_process().daemon:
+        # Los procesos daemon (workers prefork de Celery) no pueden tener hijos
+        procesos = 1
+
+    if procesos > 1:
+        pendientes = {}
+        sin_enviar = None
+        try:
+            contexto = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+                for bloques in secciones:
+                    sin_enviar = (bloques, siguiente_ruta())
+                    pendientes[pool.submit(renderizar_seccion, *sin_enviar)] = sin_enviar
+                    sin_enviar = None
+                    if len(pendientes) >= 2 * procesos:
+                        listos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                        for futuro in listos:
+                            futuro.result()
+                            del pendientes[futuro]
+                for futuro in list(pendientes):
+                    futuro.result()
+                    del pendientes[futuro]
+            return rutas
+        except (BrokenProcessPool, OSError, AssertionError) as exc:
+            # Sin procesos disponibles: se sigue en este proceso
+            logger.warning(f"Pool de PDF no disponible, se dibuja en el proceso actual: {exc}")
+            # Incluye la sección que no se alcanzó a enviar (su ruta ya está en rutas)
+            for bloques, ruta in [*pendientes.values(), *([sin_enviar] if sin_enviar else [])]:
+                renderizar_seccion(bloques, ruta)
+
+    for bloques in secciones:
+        renderizar_seccion(bloques, siguiente_ruta())
+    return rutas
+
+
+# ==================== CONCATENACIÓN ====================
+
+_REFERENCIA = re.compile(rb"(\d+) 0 R\b")
+_INICIO_STREAM = re.compile(rb">>\s*stream\r?\n")
+_CANTIDAD = re.compile(rb"/Count (\d+)")
+
+# Referencia indirecta "N G R" a partir de un número (el R termina el token)
+_REFERENCIA_EN = re.compile(rb"(\d+)\s+(\d+)\s+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])")
+_ENCABEZADO_OBJETO = re.compile(rb"\s*(\d+)(\s+\d+\s+obj)")
+_DELIMITADORES = b"\x00\t\n\x0c\r ()<>[]{}/%"
+
+
+def _leer_partes(datos):
+    """
+    Objetos de un PDF generado por ReportLab (tabla xref clásica).
+
+    Las entradas libres ("f") de la tabla xref no tienen objeto y se omiten.
+
+    Retorna:
+    - (objetos, raiz, total): objetos es una lista (número, bytes) en
+      orden de aparición, raiz el número del objeto /Root y total el
+      /Size de la tabla xref
+    """
+    inicio_xref = int(re.search(rb"startxref\s+(\d+)", datos[-100:] if len(datos) > 100 else datos).group(1))
+    encabezado = re.match(rb"xref\s+0 (\d+)\s+", datos[inicio_xref:])
+    total = int(encabezado.group(1))
+    posicion = inicio_xref + encabezado.end()
+    desplazamientos = []
+    for numero in range(total):
+        entrada = datos[posicion + numero * 20:posicion + numero * 20 + 20]
+        if entrada[17:18] == b"n":
+            desplazamientos.append((int(entrada[:10]), numero))
+    desplazamientos.sort()
+
+    objetos = []
+    for i, (desde, numero) in enumerate(desplazamientos):
+        hasta = desplazamientos[i + 1][0] if i + 1 < len(desplazamientos) else inicio_xref
+        objetos.append((numero, datos[desde:hasta]))
+    raiz = int(re.search(rb"/Root (\d+) 0 R", datos[inicio_xref:]).group(1))
+    return objetos, raiz, total
+
+
+def _fin_de_string(datos, i):
+    """Posición siguiente al ")" que cierra el string literal que abre en i."""
+    profundidad = 0
+    while i < len(datos):
+        caracter = datos[i:i + 1]
+        if caracter == b"\\":
+            i += 2
+            continue
+        if caracter == b"(":
+            profundidad += 1
+        elif caracter == b")":
+            profundidad -= 1
+            if not profundidad:
+                return i + 1
+        i += 1
+    return i
+
+
+def _referencias(datos):
+    """
+    Referencias indirectas de un objeto PDF (fuera de su stream).
+
+    Recorre los tokens: los strings literales "(...)" (con paréntesis
+    anidados y escapes), los strings hexadecimales "<...>", los nombres y
+    los comentarios se saltan enteros, así que un "5 0 R" dentro de un
+    texto no se toma como referencia.
+
+    Retorna:
+    - Iterador de matches de _REFERENCIA_EN (grupo 1: número, 2: generación)
+    """
+    i = 0
+    while i < len(datos):
+        caracter = datos[i:i + 1]
+        if caracter == b"(":
+            i = _fin_de_string(datos, i)
+        elif caracter == b"<":
+            # "<<" abre un diccionario; "<" solo, un string hexadecimal
+            i = i + 2 if datos[i + 1:i + 2] == b"<" else (datos.find(b">", i) + 1 or len(datos))
+        elif caracter == b"%":
+            saltos = [p for p in (datos.find(b"\n", i), datos.find(b"\r", i)) if p >= 0]
+            i = min(saltos) if saltos else len(datos)
+        elif caracter == b"/" or (caracter.isdigit() and (i == 0 or datos[i - 1:i] in _DELIMITADORES)):
+            referencia = _REFERENCIA_EN.match(datos, i) if caracter.isdigit() else None
+            if referencia:
+                yield referencia
+                i = referencia.end()
+                continue
+            # Nombre o número: se salta el token completo
+            i += 1
+            while i < len(datos) and datos[i:i + 1] not in _DELIMITADORES:
+                i += 1
+        else:
+            i += 1
+
+
+def _renumerar(objeto, base):
+    """Suma `base` al número del objeto y a sus referencias (fuera del stream)."""
+    stream = _INICIO_STREAM.search(objeto)
+    diccionario, resto = (objeto[:stream.end()], objeto[stream.end():]) if stream else (objeto, b"")
+    encabezado = _ENCABEZADO_OBJETO.match(diccionario)
+    partes = [diccionario[:encabezado.start(1)], b"%d" % (int(encabezado.group(1)) + base)]
+    anterior = encabezado.end(1)
+    for referencia in _referencias(diccionario[encabezado.end():]):
+        inicio, fin = referencia.start() + encabezado.end(), referencia.end() + encabezado.end()
+        partes.append(diccionario[anterior:inicio])
+        partes.append(b"%d %s R" % (int(referencia.group(1)) + base, referencia.group(2)))
+        anterior = fin
+    partes.append(diccionario[anterior:])
+    return b"".join(partes) + resto
+
+
+def concatenar(rutas, destino):
+    """
+    Une PDFs generados por ReportLab en un único PDF.
+
+    Cada parte conserva sus objetos (renumerados) y su árbol de páginas,
+    que pasa a colgar de un nuevo /Pages raíz. Solo hay una parte en
+    memoria a la vez.
+
+    Parámetros:
+    - rutas: PDFs a unir, en orden
+    - destino: Archivo binario abierto para escritura
+
+    Retorna:
+    - Número total de páginas
+    """
+    escrito = 0
+    desplazamientos = {}
+
+    def escribir(datos):
+        nonlocal escrito
+        destino.write(datos)
+        escrito += len(datos)
+
+    escribir(b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n")
+
+    # Primero se leen los tamaños para reservar los números de la raíz
+    bases = []
+    base = 0
+    for ruta in rutas:
+        with open(ruta, "rb") as archivo:
+            _, _, total = _leer_partes(archivo.read())
+        bases.append(base)
+        base += total - 1
+    raiz_paginas = base + 1
+    catalogo = base + 2
+
+    hijos = []
+    paginas = 0
+    for ruta, base in zip(rutas, bases):
+        with open(ruta, "rb") as archivo:
+            objetos, raiz, _ = _leer_partes(archivo.read())
+        catalogo_parte = dict(objetos)[raiz]
+        paginas_parte = int(_REFERENCIA.search(catalogo_parte[catalogo_parte.index(b"/Pages"):]).group(1))
+        for numero, objeto in objetos:
+            objeto = _renumerar(objeto, base)
+            if numero == paginas_parte:
+                # El /Pages de la parte pasa a ser un nodo intermedio
+                objeto = objeto.replace(b"<<", b"<< /Parent %d 0 R" % raiz_paginas, 1)
+                paginas += int(_CANTIDAD.search(objeto).group(1))
+                hijos.append(numero + base)
+            desplazamientos[numero + base] = escrito
+            escribir(objeto)
+
+    desplazamientos[raiz_paginas] = escrito
+    kids = b" ".join(b"%d 0 R" % hijo for hijo in hijos)
+    escribir(b"%d 0 obj\n<< /Type /Pages /Kids [ %s ] /Count %d >>\nendobj\n" % (raiz_paginas, kids, paginas))
+    desplazamientos[catalogo] = escrito
+    escribir(b"%d 0 obj\n<< /Type /Catalog /Pages %d 0 R /PageMode /UseNone >>\nendobj\n" % (catalogo, raiz_paginas))
+
+    inicio_xref = escrito
+    escribir(b"xref\n0 %d\n0000000000 65535 f \n" % (catalogo + 1))
+    for numero in range(1, catalogo + 1):
+        if numero in desplazamientos:
+            escribir(b"%010d 00000 n \n" % desplazamientos[numero])
+        else:
+            # Entrada libre de alguna parte: se mantiene libre
+            escribir(b"0000000000 00001 f \n")
+    escribir(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (catalogo + 1, catalogo, inicio_xref))
+    return paginas
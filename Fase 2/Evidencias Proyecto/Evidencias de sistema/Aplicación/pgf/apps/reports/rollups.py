@@ -0,0 +1,436 @@
+# apps/reports/rollups.py
+"""
+Cálculo y lectura de los KPIs diarios (apps/reports/models.py → KPIDiario).
+
+Refresco incremental:
+- ControlRollup guarda el instante en que empezó el último refresco (watermark)
+- En cada refresco se buscan los días "tocados" desde el watermark: días de
+  apertura y cierre de OT nuevas o cerradas, días de fin de pausas nuevas y
+  días de apertura/cierre de OT con eventos de auditoría (cambios de estado,
+  reasignaciones, reaperturas). El día actual siempre se recalcula para
+  mantener al día la foto por estado.
+- Los días tocados se recalculan completos con unas pocas consultas GROUP BY
+  (una por tipo de evento, con TruncDate en SQL) y sus filas se reemplazan en
+  una transacción.
+- El primer refresco (sin watermark) reconstruye desde la primera OT.
+- En el mismo refresco se actualizan los HechoOT (cubo de análisis) de las
+  OT abiertas o cerradas en los días tocados y de todas las OT activas. Si
+  la tabla de hechos está vacía se construye completa.
+
+Lectura:
+- totales(): suma de métricas en un rango de días
+- serie_por_dia(): métricas por día para gráficos
+- conteo_por_estado(): foto por estado del día actual
+- asegurar_frescos(): refresca si el watermark es más antiguo que el máximo
+
+Relaciones:
+- Usa: apps/workorders/models.py (OrdenTrabajo, Pausa, Auditoria, ItemOT)
+- Usado por: apps/reports/tasks.py (refrescar_kpis_diarios)
+- Usado por: apps/reports/dashboards.py, apps/reports/aggregation.py, apps/reports/cube.py
+"""
+
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Min, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.core.date_filters import rango_fechas
+from apps.workorders.models import Auditoria, ItemOT, OrdenTrabajo, Pausa
+
+from .models import ControlRollup, HechoOT, KPIDiario
+
+# Nombre del rollup en ControlRollup
+NOMBRE_ROLLUP = "kpi_diario"
+
+# Margen hacia atrás al buscar cambios desde el watermark: cubre transacciones
+# que escribieron antes del watermark pero hicieron commit después
+MARGEN_WATERMARK = timedelta(minutes=5)
+
+# Antigüedad máxima aceptada al leer desde un dashboard
+MAX_ANTIGUEDAD_SEGUNDOS = 60
+
+# Métricas de eventos que se suman al leer
+METRICAS = (
+    "ot_creadas",
+    "ot_cerradas",
+    "sla_cumplido",
+    "sla_incumplido",
+    "ciclo_segundos",
+    "pausa_segundos",
+)
+
+
+# ==================== REFRESCO ====================
+
+def _tramos(fechas):
+    """
+    Agrupa un conjunto de fechas en tramos contiguos [(desde, hasta), ...].
+
+    Permite filtrar los días tocados con pocos rangos (usables por el índice)
+    en lugar de un OR por cada día.
+    """
+    tramos = []
+    for fecha in sorted(set(fechas)):
+        if tramos and fecha == tramos[-1][1] + timedelta(days=1):
+            tramos[-1][1] = fecha
+        else:
+            tramos.append([fecha, fecha])
+    return [tuple(tramo) for tramo in tramos]
+
+
+def _filtro_dias(campo, fechas):
+    """Q que selecciona las filas cuyo `campo` cae en alguno de los días dados."""
+    filtro = Q()
+    for desde, hasta in _tramos(fechas):
+        filtro |= rango_fechas(campo, desde=desde, hasta=hasta)
+    return filtro
+
+
+def _dias_de(queryset, campo):
+    """Días locales distintos de `campo` en el queryset (una query)."""
+    return set(
+        queryset.annotate(dia=TruncDate(campo))
+        .order_by()
+        .values_list("dia", flat=True)
+        .distinct()
+    )
+
+
+def dias_afectados(desde):
+    """
+    Retorna los días cuyas métricas pueden haber cambiado desde `desde`.
+
+    Parámetros:
+    - desde: datetime aware (watermark menos el margen)
+
+    Retorna:
+    - Set de date, siempre incluye el día actual
+    """
+    dias = {timezone.localdate()}
+
+    dias |= _dias_de(OrdenTrabajo.objects.filter(apertura__gte=desde), "apertura")
+    dias |= _dias_de(OrdenTrabajo.objects.filter(cierre__gte=desde), "cierre")
+    dias |= _dias_de(Pausa.objects.filter(fin__gte=desde), "fin")
+
+    # OT modificadas después de creadas (cambios de estado, reasignación de
+    # mecánico, reaperturas): afectan el día de apertura y el de cierre
+    ot_ids = set()
+    modificadas = Auditoria.objects.filter(
+        ts__gte=desde,
+        objeto_tipo="OrdenTrabajo"
+    ).order_by().values_list("objeto_id", flat=True).distinct()
+    for objeto_id in modificadas:
+        try:
+            ot_ids.add(uuid.UUID(objeto_id))
+        except (ValueError, TypeError):
+            continue
+
+    if ot_ids:
+        for apertura, cierre in OrdenTrabajo.objects.filter(id__in=ot_ids).values_list("apertura", "cierre"):
+            dias.add(timezone.localdate(apertura))
+            if cierre:
+                dias.add(timezone.localdate(cierre))
+
+    return dias
+
+
+def recalcular_dias(fechas):
+    """
+    Recalcula y reemplaza las filas de KPIDiario de los días indicados.
+
+    Ejecuta una consulta GROUP BY por tipo de evento (aperturas, cierres y
+    pausas) para todos los días a la vez, más la foto por estado si el día
+    actual está incluido. La foto por estado de días anteriores se conserva.
+
+    Parámetros:
+    - fechas: Iterable de date
+
+    Retorna:
+    - Número de filas escritas
+    """
+    fechas = set(fechas)
+    if not fechas:
+        return 0
+    hoy = timezone.localdate()
+    filas = {}
+
+    def fila(fecha, zona, tipo, mecanico_id):
+        clave = (fecha, zona or "", tipo or "", mecanico_id)
+        if clave not in filas:
+            filas[clave] = {metrica: 0 for metrica in METRICAS}
+            filas[clave]["por_estado"] = {}
+        return filas[clave]
+
+    # Fotos por estado de días anteriores: no se pueden reconstruir, se conservan
+    fotos = KPIDiario.objects.filter(
+        fecha__in=fechas - {hoy}
+    ).exclude(por_estado={}).values_list("fecha", "zona", "tipo", "mecanico_id", "por_estado")
+    for fecha, zona, tipo, mecanico_id, por_estado in fotos:
+        fila(fecha, zona, tipo, mecanico_id)["por_estado"] = por_estado
+
+    # OT creadas por día
+    creadas = OrdenTrabajo.objects.filter(
+        _filtro_dias("apertura", fechas)
+    ).annotate(dia=TruncDate("apertura")).values(
+        "dia", "zona", "tipo", "mecanico_id"
+    ).annotate(total=Count("id")).order_by()
+    for r in creadas:
+        if r["dia"] in fechas:
+            fila(r["dia"], r["zona"], r["tipo"], r["mecanico_id"])["ot_creadas"] = r["total"]
+
+    # OT cerradas por día, con cumplimiento de SLA y tiempo de ciclo
+    cierres = OrdenTrabajo.objects.filter(
+        _filtro_dias("cierre", fechas),
+        estado="CERRADA"
+    ).annotate(dia=TruncDate("cierre")).values(
+        "dia", "zona", "tipo", "mecanico_id"
+    ).annotate(
+        total=Count("id"),
+        cumplido=Count("id", filter=Q(fecha_limite_sla__isnull=False, cierre__lte=F("fecha_limite_sla"))),
+        incumplido=Count("id", filter=Q(fecha_limite_sla__isnull=False, cierre__gt=F("fecha_limite_sla"))),
+        ciclo=Sum(F("cierre") - F("apertura")),
+    ).order_by()
+    for r in cierres:
+        if r["dia"] in fechas:
+            datos = fila(r["dia"], r["zona"], r["tipo"], r["mecanico_id"])
+            datos["ot_cerradas"] = r["total"]
+            datos["sla_cumplido"] = r["cumplido"]
+            datos["sla_incumplido"] = r["incumplido"]
+            datos["ciclo_segundos"] = int(r["ciclo"].total_seconds()) if r["ciclo"] else 0
+
+    # Pausas terminadas por día
+    pausas = Pausa.objects.filter(
+        _filtro_dias("fin", fechas)
+    ).annotate(dia=TruncDate("fin")).values(
+        "dia", "ot__zona", "ot__tipo", "ot__mecanico_id"
+    ).annotate(duracion=Sum(F("fin") - F("inicio"))).order_by()
+    for r in pausas:
+        if r["dia"] in fechas:
+            datos = fila(r["dia"], r["ot__zona"], r["ot__tipo"], r["ot__mecanico_id"])
+            datos["pausa_segundos"] = int(r["duracion"].total_seconds()) if r["duracion"] else 0
+
+    # Foto por estado del día actual
+    if hoy in fechas:
+        foto = OrdenTrabajo.objects.values(
+            "zona", "tipo", "mecanico_id", "estado"
+        ).annotate(total=Count("id")).order_by()
+        for r in foto:
+            fila(hoy, r["zona"], r["tipo"], r["mecanico_id"])["por_estado"][r["estado"]] = r["total"]
+
+    nuevas = [
+        KPIDiario(fecha=fecha, zona=zona, tipo=tipo, mecanico_id=mecanico_id, **datos)
+        for (fecha, zona, tipo, mecanico_id), datos in filas.items()
+    ]
+    with transaction.atomic():
+        KPIDiario.objects.filter(fecha__in=fechas).delete()
+        KPIDiario.objects.bulk_create(nuevas, batch_size=1000)
+    return len(nuevas)
+
+
+# Campos de HechoOT que se reescriben en cada refresco
+CAMPOS_HECHO = (
+    "fecha_apertura", "fecha_cierre", "zona", "tipo", "prioridad", "marca",
+    "mecanico", "estado", "sla_cumplido", "ciclo_segundos", "costo",
+)
+
+
+def recalcular_hechos(fechas=None):
+    """
+    Recalcula los HechoOT de las OT tocadas (una consulta + un upsert).
+
+    Parámetros:
+    - fechas: Días tocados; se recalculan las OT abiertas o cerradas en
+      esos días y todas las OT activas. None recalcula todas las OT.
+
+    Retorna:
+    - Número de hechos escritos
+    """
+    ots = OrdenTrabajo.objects.all()
+    if fechas is not None:
+        fechas = set(fechas)
+        if not fechas:
+            return 0
+        ots = ots.filter(
+            _filtro_dias("apertura", fechas) | _filtro_dias("cierre", fechas)
+            | ~Q(estado__in=["CERRADA", "ANULADA"])
+        )
+    costo = ItemOT.objects.filter(ot=OuterRef("pk")).order_by().values("ot").annotate(
+        total=Sum(F("cantidad") * F("costo_unitario"))
+    ).values("total")
+    filas = ots.annotate(
+        marca_nombre=F("vehiculo__marca__nombre"),
+        costo_items=Subquery(costo),
+    ).values_list(
+        "id", "apertura", "cierre", "zona", "tipo", "prioridad", "marca_nombre",
+        "mecanico_id", "estado", "fecha_limite_sla", "costo_items",
+    ).order_by()
+
+    hechos = []
+    for (ot_id, apertura, cierre, zona, tipo, prioridad, marca, mecanico_id,
+         estado, limite_sla, costo_items) in filas.iterator(chunk_size=2000):
+        cerrada = estado == "CERRADA" and cierre is not None
+        hechos.append(HechoOT(
+            ot_id=ot_id,
+            fecha_apertura=timezone.localdate(apertura),
+            fecha_cierre=timezone.localdate(cierre) if cierre else None,
+            zona=zona or "",
+            tipo=tipo or "",
+            prioridad=prioridad or "",
+            marca=marca or "",
+            mecanico_id=mecanico_id,
+            estado=estado,
+            sla_cumplido=(cierre <= limite_sla) if cerrada and limite_sla else None,
+            ciclo_segundos=int((cierre - apertura).total_seconds()) if cerrada else None,
+            costo=costo_items or 0,
+        ))
+    HechoOT.objects.bulk_create(
+        hechos, batch_size=1000,
+        update_conflicts=True, unique_fields=["ot"], update_fields=list(CAMPOS_HECHO),
+    )
+    return len(hechos)
+
+
+def refrescar_kpis_diarios(desde=None):
+    """
+    Refresca KPIDiario (y HechoOT) de forma incremental.
+
+    Parámetros:
+    - desde: date opcional; si se indica, reconstruye todos los días desde esa
+      fecha hasta hoy sin importar el watermark
+
+    Retorna:
+    - Dict con los días recalculados, filas escritas y el nuevo watermark
+    """
+    hoy = timezone.localdate()
+    ahora = timezone.now()
+
+    with transaction.atomic():
+        # Bloquear el control serializa refrescos concurrentes (beat + dashboard)
+        ControlRollup.objects.get_or_create(nombre=NOMBRE_ROLLUP)
+        control = ControlRollup.objects.select_for_update().get(nombre=NOMBRE_ROLLUP)
+
+        if desde is None and control.watermark is None:
+            # Primer refresco: reconstruir desde la primera OT
+            primera = OrdenTrabajo.objects.aggregate(primera=Min("apertura"))["primera"]
+            desde = timezone.localdate(primera) if primera else hoy
+
+        if desde is not None:
+            dias = {desde + timedelta(days=i) for i in range((hoy - desde).days + 1)} or {hoy}
+        else:
+            dias = dias_afectados(control.watermark - MARGEN_WATERMARK)
+
+        filas = recalcular_dias(dias)
+        recalcular_hechos(None if not HechoOT.objects.exists() else dias)
+
+        control.watermark = ahora
+        control.save(update_fields=["watermark", "actualizado_en"])
+
+    return {
+        "dias": len(dias),
+        "filas": filas,
+        "watermark": ahora.isoformat(),
+    }
+
+
+def asegurar_frescos(max_antiguedad=MAX_ANTIGUEDAD_SEGUNDOS, forzar=False):
+    """
+    Refresca los KPIs diarios si el último refresco es más antiguo que el máximo.
+
+    La tarea de Celery beat normalmente los mantiene al día; esto cubre el
+    caso en que beat no esté corriendo o el usuario pida ?refresh=true.
+
+    Parámetros:
+    - max_antiguedad: Segundos de antigüedad aceptados
+    - forzar: Refrescar siempre (incremental)
+    """
+    watermark = ControlRollup.objects.filter(
+        nombre=NOMBRE_ROLLUP
+    ).values_list("watermark", flat=True).first()
+    if forzar or watermark is None or timezone.now() - watermark > timedelta(seconds=max_antiguedad):
+        refrescar_kpis_diarios()
+
+
+# ==================== LECTURA ====================
+
+def kpis(desde=None, hasta=None, **filtros):
+    """
+    QuerySet de KPIDiario en el rango [desde, hasta] (ambos inclusivos).
+
+    Parámetros:
+    - desde, hasta: date opcionales
+    - filtros: filtros adicionales (zona=..., mecanico=..., tipo=...)
+    """
+    queryset = KPIDiario.objects.filter(**filtros)
+    if desde is not None:
+        queryset = queryset.filter(fecha__gte=desde)
+    if hasta is not None:
+        queryset = queryset.filter(fecha__lte=hasta)
+    return queryset
+
+
+def totales(desde=None, hasta=None, **filtros):
+    """
+    Suma las métricas de eventos en el rango (una query).
+
+    Retorna:
+    - Dict {metrica: total} con todas las METRICAS (0 si no hay filas)
+    """
+    resultado = kpis(desde, hasta, **filtros).aggregate(
+        **{metrica: Sum(metrica) for metrica in METRICAS}
+    )
+    return {metrica: resultado[metrica] or 0 for metrica in METRICAS}
+
+
+def serie_por_dia(desde, hasta, **filtros):
+    """
+    Métricas de eventos por día en el rango, incluyendo los días sin datos (una query).
+
+    Retorna:
+    - Lista ordenada de dicts {"fecha": date, metrica: total, ...}
+    """
+    por_dia = {
+        r["fecha"]: r
+        for r in kpis(desde, hasta, **filtros).values("fecha").annotate(
+            **{f"{metrica}_total": Sum(metrica) for metrica in METRICAS}
+        ).order_by()
+    }
+    serie = []
+    for i in range((hasta - desde).days + 1):
+        fecha = desde + timedelta(days=i)
+        r = por_dia.get(fecha, {})
+        dia = {"fecha": fecha}
+        for metrica in METRICAS:
+            dia[metrica] = r.get(f"{metrica}_total") or 0
+        serie.append(dia)
+    return serie
+
+
+def conteo_por_estado(**filtros):
+    """
+    Número actual de OT por estado según la foto del día (una query).
+
+    Retorna:
+    - Dict {estado: cantidad}
+    """
+    conteo = {}
+    fotos = kpis(timezone.localdate(), timezone.localdate(), **filtros).exclude(
+        por_estado={}
+    ).values_list("por_estado", flat=True)
+    for por_estado in fotos:
+        for estado, cantidad in por_estado.items():
+            conteo[estado] = conteo.get(estado, 0) + cantidad
+    return conteo
+
+
+def porcentaje_sla(datos):
+    """
+    Porcentaje de cumplimiento de SLA a partir de un dict de totales.
+
+    Retorna:
+    - float redondeado a 1 decimal (0.0 si no hay OT con SLA)
+    """
+    total = datos["sla_cumplido"] + datos["sla_incumplido"]
+    return round(datos["sla_cumplido"] / total * 100, 1) if total else 0.0
@@ -0,0 +1,139 @@
+# apps/reports/scopes.py
+"""
+Alcance de datos de los dashboards (zonas visibles para quien consulta).
+
+Los payloads precalculados (apps/reports/dashboards.py) se guardan por
+dashboard Y por alcance, para que dos usuarios con alcances distintos no
+compartan (ni se pisen) la misma entrada de caché.
+
+El alcance es una tupla ordenada de zonas (GLOBAL = sin restricción):
+- SUPERVISOR: zonas de los vehículos que supervisa
+- COORDINADOR_ZONA: zonas de las agendas que ha creado
+- Resto de roles: GLOBAL
+- ?zona=X acota a una sola zona (dentro de las del usuario, si tiene)
+
+Si un supervisor/coordinador aún no tiene zonas asociadas ve el alcance
+GLOBAL, igual que antes de separar la caché por alcance.
+
+Todas las fuentes de los dashboards tienen dimensión zona (OrdenTrabajo.zona,
+Vehiculo.zona, KPIDiario.zona y TramoEstado.zona), así que filtro() sirve
+para todas.
+
+Relaciones:
+- Usa: apps/vehicles/models.py (Vehiculo), apps/workorders/models.py (OrdenTrabajo),
+  apps/scheduling/models.py (Agenda)
+- Usado por: apps/reports/dashboards.py, apps/reports/views.py
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from apps.scheduling.models import Agenda
+from apps.vehicles.models import Vehiculo
+from apps.workorders.models import OrdenTrabajo
+
+
+# Alcance sin restricción de zona
+GLOBAL = ()
+
+# Segundos que se cachean las zonas de un usuario y las zonas existentes
+TTL_ZONAS = 5 * 60
+
+
+def zonas_de_usuario(user):
+    """
+    Zonas asociadas al usuario según su rol (cacheadas TTL_ZONAS segundos).
+
+    Retorna:
+    - Tupla ordenada de zonas (vacía si el rol no tiene zonas asociadas)
+    """
+    if user.rol not in ("SUPERVISOR", "COORDINADOR_ZONA"):
+        return GLOBAL
+
+    def _zonas():
+        if user.rol == "SUPERVISOR":
+            queryset = Vehiculo.objects.filter(supervisor=user)
+        else:
+            queryset = Agenda.objects.filter(coordinador=user)
+        return tuple(sorted(
+            queryset.exclude(zona="").values_list("zona", flat=True).distinct()
+        ))
+
+    clave = f"dashboard:zonas_usuario:{user.id}"
+    zonas = cache.get(clave)
+    if zonas is None:
+        zonas = _zonas()
+        cache.set(clave, zonas, TTL_ZONAS)
+    return zonas
+
+
+def zonas_existentes():
+    """Zonas con vehículos u OT registradas (cacheadas TTL_ZONAS segundos)."""
+    zonas = cache.get("dashboard:zonas_existentes")
+    if zonas is None:
+        zonas = set(Vehiculo.objects.exclude(zona="").values_list("zona", flat=True).distinct())
+        zonas |= set(OrdenTrabajo.objects.exclude(zona="").values_list("zona", flat=True).distinct())
+        zonas = frozenset(zonas)
+        cache.set("dashboard:zonas_existentes", zonas, TTL_ZONAS)
+    return zonas
+
+
+def alcance_de(user, zona=None):
+    """
+    Alcance de datos con el que un usuario ve los dashboards.
+
+    Parámetros:
+    - user: Usuario autenticado
+    - zona: Zona pedida con ?zona= (opcional)
+
+    Retorna:
+    - Tupla ordenada de zonas (GLOBAL si no hay restricción)
+
+    Lanza:
+    - ValidationError: Si la zona pedida no existe
+    - PermissionDenied: Si la zona pedida está fuera de las zonas del usuario
+    """
+    zonas = zonas_de_usuario(user)
+    if not zona:
+        return zonas
+    if zonas:
+        if zona not in zonas:
+            raise PermissionDenied(f"No autorizado para ver la zona {zona}.")
+    elif zona not in zonas_existentes():
+        # Validar contra las zonas existentes evita una entrada de caché por
+        # cada valor arbitrario de ?zona=
+        raise ValidationError({"zona": f"Zona desconocida: {zona}."})
+    return (zona,)
+
+
+def clave(alcance):
+    """Fragmento de clave de caché para un alcance ("global" o hash de las zonas)."""
+    if not alcance:
+        return "global"
+    return "zonas:" + hashlib.md5("|".join(alcance).encode()).hexdigest()[:12]
+
+
+def filtro(alcance, prefijo=""):
+    """
+    Q que acota un queryset al alcance.
+
+    Parámetros:
+    - alcance: Tupla de zonas
+    - prefijo: Ruta hasta el modelo con campo zona (ej: "ot__", "ordenes__")
+    """
+    if not alcance:
+        return Q()
+    return Q(**{f"{prefijo}zona__in": list(alcance)})
+
+
+def filtros_fuentes(alcance):
+    """Filtros por fuente para aggregation.calcular() (todas tienen campo zona)."""
+    if not alcance:
+        return {}
+    return {
+        "ot": filtro(alcance), "vehiculo": filtro(alcance),
+        "kpi": filtro(alcance), "tramo": filtro(alcance),
+    }
@@ -0,0 +1,37 @@
+# apps/reports/signals.py
+"""
+Señales que reprograman el precálculo de dashboards tras escrituras.
+
+Cualquier alta, cambio o baja de OT, pausa o vehículo programa un recálculo
+de todos los dashboards (apps/reports/dashboards.py programar_precalculo()).
+Las escrituras de una misma ráfaga comparten un solo recálculo.
+
+Las mismas escrituras invalidan los PDFs cacheados de períodos abiertos
+(apps/reports/pdf_cache.py invalidar_abiertos()).
+
+Las actualizaciones masivas con .update() no disparan señales; esos cambios
+se reflejan en el siguiente ciclo del beat (cada minuto).
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.vehicles.models import Vehiculo
+from apps.workorders.models import OrdenTrabajo, Pausa
+
+from .dashboards import programar_precalculo
+from .pdf_cache import invalidar_abiertos
+
+
+@receiver(post_save, sender=OrdenTrabajo)
+@receiver(post_delete, sender=OrdenTrabajo)
+@receiver(post_save, sender=Pausa)
+@receiver(post_delete, sender=Pausa)
+@receiver(post_save, sender=Vehiculo)
+@receiver(post_delete, sender=Vehiculo)
+def reprogramar_dashboards(sender, **kwargs):
+    """Programa el recálculo de los dashboards al confirmar la transacción"""
+    programar_precalculo()
+    # Tras el commit, para no cachear un PDF con datos previos a la escritura
+    transaction.on_commit(invalidar_abiertos)
@@ -0,0 +1,164 @@
+# apps/reports/tasks.py
+"""
+Tareas Celery para los agregados de dashboards y los reportes PDF asíncronos.
+"""
+import logging
+
+from celery import shared_task
+
+from .rollups import refrescar_kpis_diarios as _refrescar_kpis_diarios
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refrescar_kpis_diarios():
+    """
+    Refresca KPIDiario de forma incremental (solo días tocados desde el watermark).
+
+    Programada en CELERY_BEAT_SCHEDULE cada 5 minutos.
+    """
+    resultado = _refrescar_kpis_diarios()
+    logger.info(
+        f"KPIs diarios refrescados: {resultado['dias']} días, {resultado['filas']} filas"
+    )
+    return resultado
+
+
+@shared_task
+def precalcular_dashboards(forzar=False):
+    """
+    Precalcula todos los dashboards por rol (alcance global y alcances
+    consultados recientemente) y los empuja por WebSocket.
+
+    Programada en CELERY_BEAT_SCHEDULE cada minuto y encolada (con retardo)
+    tras ráfagas de escrituras desde apps/reports/signals.py.
+    """
+    from .dashboards import precalcular_todos
+    resultado = precalcular_todos(forzar=forzar)
+    logger.info(f"Dashboards precalculados: {resultado}")
+    return resultado
+
+
+@shared_task
+def precalcular_dashboard(nombre, alcance=None, forzar=False):
+    """
+    Precalcula un dashboard para un alcance (encolada desde las vistas cuando
+    no hay payload en caché o se pide ?refresh=true).
+    """
+    from .dashboards import precalcular
+    from .rollups import asegurar_frescos
+    asegurar_frescos(forzar=forzar)
+    precalcular(nombre, tuple(alcance or ()))
+    return nombre
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=30)
+def generar_reporte_pdf(self, job_id):
+    """
+    Genera el PDF de un ReporteJob, lo sube a S3 y avisa por WebSocket.
+
+    Encolada por apps/reports/jobs.py (solicitar) al confirmar la creación
+    del job. Los errores se reintentan hasta max_retries veces; después el
+    job queda en ERROR y también se avisa a los interesados.
+
+    Args:
+        self: Instancia de la tarea (para retry)
+        job_id: ID del ReporteJob
+
+    Returns:
+        Clave S3 del PDF generado (None si el job ya no está en curso)
+    """
+    from django.utils import timezone
+
+    from apps.notifications.realtime import enviar_actualizacion_reporte
+
+    from . import jobs, pdf_cache
+    from .models import ReporteJob
+
+    actualizados = ReporteJob.objects.filter(id=job_id, estado__in=ReporteJob.EN_CURSO).update(
+        estado=ReporteJob.Estado.EN_PROCESO, iniciado_en=timezone.now()
+    )
+    if not actualizados:
+        logger.warning(f"ReporteJob {job_id} no existe o ya terminó")
+        return None
+    job = ReporteJob.objects.get(id=job_id)
+
+    try:
+        # Reutilizar el PDF si ya se generó con los mismos datos
+        clave_pdf, version = pdf_cache.clave(job.parametros)
+        entrada = pdf_cache.obtener(clave_pdf)
+        if entrada is not None:
+            pdf_bytes, job.nombre_archivo = pdf_cache.leer(entrada), entrada.nombre_archivo
+        else:
+            pdf_bytes, job.nombre_archivo = jobs.renderizar(job.parametros)
+            pdf_cache.guardar(clave_pdf, version, job.parametros, pdf_bytes, job.nombre_archivo)
+        job.s3_key = jobs.subir_pdf(job, pdf_bytes)
+    except Exception as e:
+        logger.error(f"Error al generar el reporte {job.tipo} ({job_id}): {e}", exc_info=True)
+        if self.request.retries < self.max_retries:
+            ReporteJob.objects.filter(id=job_id).update(estado=ReporteJob.Estado.PENDIENTE)
+            raise self.retry(exc=e)
+        job.estado = ReporteJob.Estado.ERROR
+        job.error = str(e)[:1000]
+        job.terminado_en = timezone.now()
+        job.save(update_fields=["estado", "error", "terminado_en"])
+        enviar_actualizacion_reporte(job)
+        return None
+
+    job.estado = ReporteJob.Estado.COMPLETADO
+    job.tamano_bytes = len(pdf_bytes)
+    job.terminado_en = timezone.now()
+    job.save(update_fields=["estado", "nombre_archivo", "s3_key", "tamano_bytes", "terminado_en"])
+    enviar_actualizacion_reporte(job)
+    logger.info(f"Reporte {job.tipo} generado ({job_id}): {job.tamano_bytes} bytes")
+    return job.s3_key
+
+
+@shared_task
+def expirar_reportes_atascados():
+    """
+    Marca en ERROR los ReporteJob que quedaron en curso (worker caído o
+    tarea perdida) para que las nuevas solicitudes no se sumen a ellos.
+
+    Programada en CELERY_BEAT_SCHEDULE cada 5 minutos.
+    """
+    from .jobs import expirar_atascados
+    marcados = expirar_atascados()
+    if marcados:
+        logger.info(f"Reportes atascados marcados en ERROR: {marcados}")
+    return marcados
+
+
+@shared_task
+def desalojar_pdfs_cacheados():
+    """
+    Borra los PDFs de períodos abiertos ya invalidados y mantiene la caché
+    de PDFs dentro de sus límites (LRU).
+
+    Programada en CELERY_BEAT_SCHEDULE cada hora.
+    """
+    from .pdf_cache import desalojar
+    borradas = desalojar(purgar_abiertos=True)
+    logger.info(f"PDFs cacheados desalojados: {borradas}")
+    return borradas
+
+
+@shared_task
+def calcular_utilizacion_mecanicos(desde=None, hasta=None):
+    """
+    Recalcula la utilización diaria de los mecánicos (UtilizacionDiaria).
+
+    Programada en CELERY_BEAT_SCHEDULE todas las noches: recalcula los
+    últimos días hasta ayer. Con desde/hasta (fechas ISO) sirve para
+    reconstruir un período histórico.
+    """
+    from datetime import date
+
+    from .utilization import recalcular
+    filas = recalcular(
+        desde=date.fromisoformat(desde) if desde else None,
+        hasta=date.fromisoformat(hasta) if hasta else None,
+    )
+    logger.info(f"Utilización de mecánicos recalculada: {filas} filas")
+    return filas
@@ -0,0 +1,33 @@
+# apps/reports/tests/conftest.py
+"""
+Fixtures compartidas por los tests de reportes.
+"""
+
+import pytest
+
+from pgf_core.celery import celery_app
+
+
+@pytest.fixture(autouse=True)
+def celery_eager():
+    """
+    Ejecuta las tareas Celery en línea.
+
+    Los dashboards se precalculan en Celery (apps/reports/dashboards.py): con
+    tareas eager, el primer GET encola el cálculo y lo encuentra en caché.
+    """
+    anterior = celery_app.conf.task_always_eager, celery_app.conf.task_eager_propagates
+    celery_app.conf.task_always_eager = True
+    celery_app.conf.task_eager_propagates = True
+    yield
+    celery_app.conf.task_always_eager, celery_app.conf.task_eager_propagates = anterior
+
+
+@pytest.fixture(autouse=True)
+def storage_temporal(settings, tmp_path):
+    """
+    Storage por defecto en un directorio temporal.
+
+    Los PDFs generados se guardan en la caché de apps/reports/pdf_cache.py.
+    """
+    settings.MEDIA_ROOT = tmp_path / "media"
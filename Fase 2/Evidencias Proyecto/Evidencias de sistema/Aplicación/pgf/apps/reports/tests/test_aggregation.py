@@ -0,0 +1,228 @@
+# apps/reports/tests/test_aggregation.py
+"""
+Tests para el motor de agregación de dashboards (apps/reports/aggregation.py).
+
+Incluye el benchmark de queries por dashboard: cada dashboard declara
+presupuesto_queries (apps/reports/dashboards.py DASHBOARDS) y el test
+verifica que un cálculo completo no lo supere, con datos en todas las fuentes.
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Avg, Count, F, Q
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.core.date_filters import inicio_dia
+from apps.reports import aggregation, dashboards, rollups
+from apps.workorders.models import OrdenTrabajo, Pausa, TramoEstado
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache():
+    """Los dashboards y el rate limiting usan caché"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def datos(vehiculo, supervisor_user, mecanico_user):
+    """OT en varios estados y días, con SLA vencido, cierres y una pausa."""
+    hoy = timezone.localdate()
+    ordenes = []
+    for dias_atras, estado in [(0, "ABIERTA"), (1, "EN_EJECUCION"), (2, "EN_PAUSA"), (3, "EN_QA"),
+                               (4, "CERRADA"), (9, "CERRADA"), (12, "ABIERTA")]:
+        apertura = inicio_dia(hoy - timedelta(days=dias_atras)) + timedelta(hours=9)
+        ot = OrdenTrabajo.objects.create(
+            vehiculo=vehiculo, supervisor=supervisor_user, responsable=supervisor_user,
+            mecanico=mecanico_user, motivo="Motor", estado=estado, prioridad="ALTA",
+        )
+        cambios = {"apertura": apertura, "fecha_limite_sla": apertura + timedelta(hours=6)}
+        if estado == "CERRADA":
+            cambios["cierre"] = apertura + timedelta(hours=4 + dias_atras)
+        OrdenTrabajo.objects.filter(pk=ot.pk).update(**cambios)
+        ordenes.append(ot)
+    pausa = Pausa.objects.create(ot=ordenes[2], usuario=mecanico_user, motivo="Repuesto")
+    Pausa.objects.filter(pk=pausa.pk).update(fin=timezone.now())
+    return ordenes
+
+
+class TestCalcular:
+    """Tests para aggregation.calcular"""
+
+    @pytest.mark.model
+    def test_una_query_por_fuente(self, datos):
+        """Pedir más métricas de la misma fuente no agrega queries"""
+        rollups.refrescar_kpis_diarios()
+        nombres = list(aggregation.METRICAS)
+        with CaptureQueriesContext(connection) as contexto:
+            aggregation.calcular(nombres)
+        assert len(contexto.captured_queries) == len(aggregation.FUENTES)
+
+    @pytest.mark.model
+    def test_valores_coinciden_con_consultas_directas(self, datos):
+        """Las agregaciones condicionales dan lo mismo que un filter().count()/aggregate()"""
+        rollups.refrescar_kpis_diarios()
+        ctx = aggregation.contexto()
+        valores = aggregation.calcular(aggregation.METRICAS, ctx=ctx)
+
+        for estado in aggregation.ESTADOS_OT:
+            assert valores[f"estado_{estado}"] == OrdenTrabajo.objects.filter(estado=estado).count()
+
+        assert valores["ot_atrasadas"] == OrdenTrabajo.objects.filter(
+            fecha_limite_sla__lt=ctx["ahora"], estado__in=aggregation.ESTADOS_ACTIVOS
+        ).count()
+
+        esperado = OrdenTrabajo.objects.filter(estado="CERRADA").aggregate(
+            promedio=Avg(F("cierre") - F("apertura"))
+        )["promedio"]
+        assert valores["tiempo_30_dias_CERRADA"] == esperado
+        en_qa = OrdenTrabajo.objects.get(estado="EN_QA")
+        assert valores["tiempo_actual_EN_QA"] == ctx["ahora"] - en_qa.apertura
+        assert valores["ot_cerradas_30_dias"] == 2
+
+    @pytest.mark.model
+    def test_sin_datos_usa_valor_vacio(self, db):
+        """Sin filas, los conteos son 0 y los promedios None"""
+        valores = aggregation.calcular(["estado_ABIERTA", "tiempo_actual_ABIERTA", "ot_cerradas_mes"])
+        assert valores == {"estado_ABIERTA": 0, "tiempo_actual_ABIERTA": None, "ot_cerradas_mes": 0}
+
+    @pytest.mark.model
+    def test_filtro_por_fuente(self, datos):
+        """filtros acota solo la fuente indicada"""
+        valores = aggregation.calcular(
+            ["ot_atrasadas"], filtros={"ot": Q(estado="EN_QA")}
+        )
+        assert valores["ot_atrasadas"] == 1
+
+    @pytest.mark.unit
+    def test_metrica_inexistente(self):
+        """Una métrica no declarada lanza KeyError"""
+        with pytest.raises(KeyError):
+            aggregation.calcular(["no_existe"])
+
+
+class TestSerie:
+    """Tests para aggregation.serie"""
+
+    @pytest.mark.model
+    def test_cubetas_sobre_datetime(self, datos):
+        """Las cubetas sobre un DateTimeField usan días locales"""
+        hoy = timezone.localdate()
+        cubetas = aggregation.cubetas_diarias(hoy - timedelta(days=4), hoy)
+        with CaptureQueriesContext(connection) as contexto:
+            resultado = aggregation.serie("ot", "apertura", cubetas, {"total": Count("id")})
+
+        assert len(contexto.captured_queries) == 1
+        assert [c["total"] for c in resultado] == [1, 1, 1, 1, 1]
+
+    @pytest.mark.model
+    def test_cubetas_semanales_sobre_kpis(self, datos):
+        """Las tendencias semanales suman los KPIs diarios de cada semana"""
+        rollups.refrescar_kpis_diarios()
+        hoy = timezone.localdate()
+        inicio = hoy - timedelta(days=13)
+        resultado = aggregation.serie(
+            "kpi", "fecha", aggregation.cubetas_semanales(inicio, hoy, 3), aggregation.SUMAS_KPI
+        )
+        assert sum(c["ot_creadas"] for c in resultado) == 7
+        assert resultado[2]["ot_creadas"] == 0
+        assert resultado[2]["hasta"] < resultado[2]["desde"]
+
+    @pytest.mark.unit
+    def test_cubetas_semanales_recortadas(self):
+        """La última semana se recorta a hoy"""
+        hoy = timezone.localdate()
+        cubetas = aggregation.cubetas_semanales(hoy - timedelta(days=9), hoy, 2)
+        assert cubetas[0] == (hoy - timedelta(days=9), hoy - timedelta(days=3))
+        assert cubetas[1] == (hoy - timedelta(days=2), hoy)
+
+
+class TestPresupuestoDashboards:
+    """Benchmark: queries de un cálculo completo de cada dashboard"""
+
+    @pytest.mark.model
+    @pytest.mark.parametrize("nombre", list(dashboards.DASHBOARDS))
+    def test_presupuesto(self, datos, nombre):
+        """El cálculo del dashboard no supera su presupuesto de queries"""
+        rollups.refrescar_kpis_diarios()
+        dashboard = dashboards.DASHBOARDS[nombre]
+
+        with CaptureQueriesContext(connection) as contexto:
+            dashboard["calcular"]()
+
+        assert len(contexto.captured_queries) <= dashboard["presupuesto_queries"], [
+            q["sql"] for q in contexto.captured_queries
+        ]
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_supervisor_tiempos_en_horas(self, datos, admin_user):
+        """Los tiempos promedio del supervisor se reportan en horas"""
+        rollups.refrescar_kpis_diarios()
+        client = APIClient()
+        client.force_authenticate(user=admin_user)
+        response = client.get("/api/v1/reports/dashboard-supervisor/")
+
+        assert response.status_code == status.HTTP_200_OK
+        # Cerradas: 4+4 y 4+9 horas de ciclo
+        assert response.data["tiempos_promedio"]["CERRADA"] == 10.5
+        assert response.data["comparacion_talleres"][0]["ot_cerradas_mes"] == 2
+
+
+class TestDuraciones:
+    """Duraciones por estado desde el ledger TramoEstado"""
+
+    @pytest.fixture
+    def tramos(self, datos):
+        """Tramos EN_EJECUCION cerrados de 1, 2, 3 y 10 horas (uno fuera de los 30 días) y uno abierto"""
+        ahora = timezone.now()
+        for i, (horas, zona) in enumerate([(1, "NORTE"), (2, "NORTE"), (3, "SUR"), (10, "SUR")]):
+            fin = ahora - timedelta(days=40 if horas == 10 else 1, hours=i)
+            TramoEstado.objects.create(
+                ot=datos[i], estado="EN_EJECUCION", inicio=fin - timedelta(hours=horas),
+                fin=fin, segundos=horas * 3600, zona=zona,
+            )
+        TramoEstado.objects.create(ot=datos[0], estado="EN_EJECUCION", inicio=ahora, zona="NORTE")
+
+    @pytest.mark.model
+    def test_promedio_y_percentiles(self, tramos):
+        valores = aggregation.calcular(aggregation.METRICAS_DURACION)
+        ejecucion = aggregation.duraciones(valores)["EN_EJECUCION"]
+
+        # Solo los tramos cerrados en los últimos 30 días: 1, 2 y 3 horas
+        assert ejecucion == {"tramos": 3, "promedio_horas": 2.0, "p50_horas": 2.0, "p90_horas": 2.8}
+        assert aggregation.duraciones(valores)["EN_QA"]["promedio_horas"] is None
+
+    @pytest.mark.model
+    def test_alcance_y_periodo(self, tramos):
+        norte = aggregation.calcular(
+            aggregation.METRICAS_DURACION, filtros={"tramo": Q(zona__in=["NORTE"])}
+        )
+        assert aggregation.duraciones(norte)["EN_EJECUCION"]["promedio_horas"] == 1.5
+
+        ahora = timezone.now()
+        periodo = aggregation.duraciones_en_periodo(ahora - timedelta(days=60), ahora, estados=["EN_EJECUCION"])
+        assert periodo["EN_EJECUCION"]["tramos"] == 4
+        assert periodo["EN_EJECUCION"]["p50_horas"] == 2.5
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_productividad(self, tramos, admin_user, mecanico_user):
+        # Las OT del mecánico: las cerradas lo incluyen en el reporte, las otras aportan tramos
+        OrdenTrabajo.objects.update(responsable=mecanico_user)
+        client = APIClient()
+        client.force_authenticate(user=admin_user)
+
+        response = client.get("/api/v1/reports/productividad/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["duraciones_por_estado"]["EN_EJECUCION"]["tramos"] == 3
+        mecanico = response.data["estadisticas_mecanicos"][0]
+        assert mecanico["ejecucion"]["promedio_horas"] == 2.0
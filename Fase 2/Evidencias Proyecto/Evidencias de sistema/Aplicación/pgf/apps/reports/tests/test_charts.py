@@ -0,0 +1,127 @@
+# apps/reports/tests/test_charts.py
+"""
+Tests para el servicio de gráficos de reportes (apps/reports/charts.py).
+
+Verifican que:
+- El modo vectorial retorna un Drawing de ReportLab (sin rasterizar)
+- Los PNG se memorizan por datos y tamaño
+- Varios hilos pueden dibujar a la vez sin mezclar figuras
+- El reporte semanal se genera con ambos modos
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from reportlab.graphics.shapes import Drawing
+from reportlab.platypus import Image
+
+from apps.reports import charts
+
+FIRMA_PNG = b"\x89PNG\r\n\x1a\n"
+
+
+def _png_minimo():
+    from io import BytesIO
+
+    from PIL import Image as PILImage
+    buffer = BytesIO()
+    PILImage.new("RGB", (1, 1)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+PNG = _png_minimo()
+
+
+@pytest.fixture(autouse=True)
+def sin_memoria():
+    charts.limpiar_memoria()
+    yield
+    charts.limpiar_memoria()
+
+
+def _png(datos):
+    """PNG memorizado de un gráfico (el Image de ReportLab no expone los bytes)"""
+    clave = charts._clave("barras", datos, 8.0, 4.0, charts.DPI)
+    return charts._png_memorizados[clave]
+
+
+class TestGraficos:
+    """API charts.grafico()"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("tipo", ["lineas", "barras", "barras_horizontales"])
+    def test_vectorial(self, tipo):
+        with patch.dict(charts._DIBUJANTES, {tipo: None}):
+            dibujo = charts.grafico(tipo, ["a", "b"], [1, 3], titulo="T", vectorial=True)
+
+        assert isinstance(dibujo, Drawing)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("tipo", ["lineas", "barras", "barras_horizontales"])
+    def test_png(self, tipo):
+        imagen = charts.grafico(tipo, ["a", "b"], [1, 3], titulo="T", vectorial=False)
+
+        assert isinstance(imagen, Image)
+        (png,) = charts._png_memorizados.values()
+        assert png.startswith(FIRMA_PNG)
+
+    @pytest.mark.unit
+    def test_png_memorizado_por_datos_y_tamano(self):
+        llamadas = []
+
+        def dibujar(*args):
+            llamadas.append(args)
+            return PNG
+
+        with patch.object(charts, "_DIBUJANTES", {"barras": dibujar}):
+            charts.grafico("barras", ["a"], [1], titulo="T", vectorial=False)
+            charts.grafico("barras", ["a"], [1], titulo="T", vectorial=False)
+            charts.grafico("barras", ["a"], [2], titulo="T", vectorial=False)
+            charts.grafico("barras", ["a"], [1], titulo="T", vectorial=False, alto=4)
+
+        assert len(llamadas) == 3
+
+    @pytest.mark.unit
+    def test_limite_de_memoria(self):
+        with patch.object(charts, "MAX_PNG_MEMORIZADOS", 2), \
+                patch.object(charts, "_DIBUJANTES", {"barras": lambda *a: PNG}):
+            for valor in range(5):
+                charts.grafico("barras", ["a"], [valor], titulo="T", vectorial=False)
+
+        assert len(charts._png_memorizados) == 2
+
+    @pytest.mark.unit
+    def test_hilos_concurrentes(self):
+        """Cada hilo obtiene el PNG de sus propios datos"""
+        def dibujar(valor):
+            charts.grafico("barras", ["a", "b"], [valor, 1], titulo=str(valor), vectorial=False)
+            return _png({"etiquetas": ["a", "b"], "valores": [valor, 1], "titulo": str(valor),
+                         "eje_x": "", "eje_y": ""})
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            concurrentes = list(pool.map(dibujar, range(8)))
+        charts.limpiar_memoria()
+        secuenciales = [dibujar(valor) for valor in range(8)]
+
+        assert concurrentes == secuenciales
+
+
+class TestReporteSemanal:
+    """Integración con pdf_generator.generar_reporte_semanal_pdf"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("vectorial", [True, False])
+    def test_genera_pdf(self, settings, orden_trabajo, vectorial):
+        from django.utils import timezone
+
+        from apps.reports.pdf_generator import generar_reporte_semanal_pdf
+
+        settings.REPORTES_GRAFICOS_VECTORIALES = vectorial
+        orden_trabajo.estado = "CERRADA"
+        orden_trabajo.cierre = timezone.now()
+        orden_trabajo.save()
+
+        pdf = generar_reporte_semanal_pdf()
+
+        assert pdf.startswith(b"%PDF")
@@ -0,0 +1,203 @@
+# apps/reports/tests/test_cube.py
+"""
+Tests para el cubo de análisis (apps/reports/cube.py) y su tabla de hechos.
+
+Verifican que:
+- El refresco de KPIs también escribe HechoOT (marca, costo, SLA y ciclo)
+- El cubo agrupa por dimensiones arbitrarias con una sola consulta
+- Los filtros y el alcance por zonas acotan las filas
+- Las consultas inválidas o demasiado costosas se rechazan con 400
+- Las consultas canceladas por statement_timeout responden 503
+- Los resultados se sirven desde la caché hasta el siguiente refresco
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from apps.core.date_filters import inicio_dia
+from apps.reports import cube, rollups
+from apps.reports.models import HechoOT
+from apps.workorders.models import ItemOT, OrdenTrabajo
+
+URL = "/api/v1/reports/cube/"
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache():
+    """El cubo cachea sus resultados"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _crear_ot(vehiculo, supervisor, zona="NORTE", tipo="MANTENCION", prioridad="MEDIA",
+              horas_ciclo=None, sla_horas=None, costo=None, dias_atras=1):
+    apertura = inicio_dia(timezone.localdate() - timedelta(days=dias_atras)) + timedelta(hours=10)
+    ot = OrdenTrabajo.objects.create(
+        vehiculo=vehiculo, supervisor=supervisor, motivo="Cubo", zona=zona, tipo=tipo, prioridad=prioridad
+    )
+    cambios = {"apertura": apertura}
+    if horas_ciclo is not None:
+        cambios.update(estado="CERRADA", cierre=apertura + timedelta(hours=horas_ciclo))
+    if sla_horas is not None:
+        cambios["fecha_limite_sla"] = apertura + timedelta(hours=sla_horas)
+    OrdenTrabajo.objects.filter(pk=ot.pk).update(**cambios)
+    if costo is not None:
+        ItemOT.objects.create(ot=ot, tipo="REPUESTO", descripcion="Filtro", cantidad=2, costo_unitario=costo / 2)
+    return ot
+
+
+def _consulta(dimensiones="", medidas="ot", filtros=None, dias=30, base="apertura"):
+    hoy = timezone.localdate()
+    return cube.normalizar(dimensiones, medidas, filtros or {}, hoy - timedelta(days=dias), hoy, base=base)
+
+
+@pytest.mark.django_db
+class TestHechos:
+    """Tests para rollups.recalcular_hechos"""
+
+    def test_refresco_escribe_hechos(self, vehiculo, supervisor_user):
+        cerrada = _crear_ot(vehiculo, supervisor_user, horas_ciclo=4, sla_horas=8, costo=1000)
+        abierta = _crear_ot(vehiculo, supervisor_user, zona="SUR")
+
+        rollups.refrescar_kpis_diarios()
+
+        hecho = HechoOT.objects.get(ot=cerrada)
+        assert (hecho.marca, hecho.sla_cumplido, hecho.ciclo_segundos, hecho.costo) == ("Toyota", True, 4 * 3600, 1000)
+        assert HechoOT.objects.get(ot=abierta).ciclo_segundos is None
+        # Un refresco posterior actualiza el hecho de la OT activa
+        OrdenTrabajo.objects.filter(pk=abierta.pk).update(prioridad="CRITICA")
+        rollups.refrescar_kpis_diarios()
+        assert HechoOT.objects.get(ot=abierta).prioridad == "CRITICA"
+
+
+@pytest.mark.django_db
+class TestConsultar:
+    """Tests para cube.consultar"""
+
+    @pytest.fixture(autouse=True)
+    def hechos(self, vehiculo, supervisor_user):
+        _crear_ot(vehiculo, supervisor_user, zona="NORTE", horas_ciclo=2, sla_horas=8, costo=500)
+        _crear_ot(vehiculo, supervisor_user, zona="NORTE", horas_ciclo=10, sla_horas=8, costo=1500)
+        _crear_ot(vehiculo, supervisor_user, zona="NORTE", tipo="CORRECTIVO")
+        _crear_ot(vehiculo, supervisor_user, zona="SUR", horas_ciclo=6)
+        _crear_ot(vehiculo, supervisor_user, zona="SUR", dias_atras=200)
+        rollups.refrescar_kpis_diarios()
+
+    def test_dimensiones_y_medidas(self):
+        consulta = _consulta("zona,tipo", "ot,cerradas,sla_pct,ciclo_promedio_horas,costo_total")
+
+        with CaptureQueriesContext(connection) as contexto:
+            filas = cube.consultar(consulta)["filas"]
+
+        assert filas == [
+            {"zona": "NORTE", "tipo": "CORRECTIVO", "ot": 1, "cerradas": 0, "sla_pct": None,
+             "ciclo_promedio_horas": None, "costo_total": 0.0},
+            {"zona": "NORTE", "tipo": "MANTENCION", "ot": 2, "cerradas": 2, "sla_pct": 50.0,
+             "ciclo_promedio_horas": 6.0, "costo_total": 2000.0},
+            {"zona": "SUR", "tipo": "MANTENCION", "ot": 1, "cerradas": 1, "sla_pct": None,
+             "ciclo_promedio_horas": 6.0, "costo_total": 0.0},
+        ]
+        # Una sola consulta sobre la tabla de hechos (más su EXPLAIN)
+        sobre_hechos = [q["sql"] for q in contexto.captured_queries if "reports_hechoot" in q["sql"]]
+        assert len(sobre_hechos) == 2 and sobre_hechos[0].startswith("EXPLAIN")
+
+    def test_totales_filtros_y_alcance(self):
+        totales = cube.consultar(_consulta(medidas="ot,ciclo_p90_horas"))["filas"]
+        filtrada = cube.consultar(_consulta("mes", "ot", {"zona": "NORTE", "tipo": "MANTENCION"}))["filas"]
+        por_cierre = cube.consultar(_consulta("zona", "cerradas", base="cierre"), alcance=("SUR",))["filas"]
+
+        assert totales == [{"ot": 4, "ciclo_p90_horas": 9.2}]
+        assert [f["ot"] for f in filtrada] and sum(f["ot"] for f in filtrada) == 2
+        assert por_cierre == [{"zona": "SUR", "cerradas": 1}]
+
+    def test_cache_hasta_el_refresco(self, vehiculo, supervisor_user):
+        consulta = _consulta(medidas="ot")
+        cube.consultar(consulta)
+        _crear_ot(vehiculo, supervisor_user)
+
+        with CaptureQueriesContext(connection) as contexto:
+            assert cube.consultar(consulta)["filas"] == [{"ot": 4}]
+        assert len(contexto.captured_queries) == 1
+
+        rollups.refrescar_kpis_diarios()
+        assert cube.consultar(consulta)["filas"] == [{"ot": 5}]
+
+    def test_costo_maximo(self, settings):
+        settings.REPORTES_CUBO_COSTO_MAXIMO = 0.01
+
+        with pytest.raises(cube.CuboCostoExcedido):
+            cube.consultar(_consulta("zona"))
+
+    def test_timeout(self, settings):
+        """La cancelación por statement_timeout se informa, no termina en 500"""
+        settings.REPORTES_CUBO_TIMEOUT_MS = 50
+        lenta = RawSQL("(SELECT true FROM pg_sleep(0.5))", [], output_field=BooleanField())
+        construir = cube.construir
+
+        with patch.object(cube, "construir", lambda *args: construir(*args).filter(lenta)):
+            with pytest.raises(cube.CuboTiempoExcedido):
+                cube.consultar(_consulta("zona"))
+
+        # La conexión sigue usable después de la cancelación
+        assert cube.consultar(_consulta("zona"))["filas"]
+
+    @pytest.mark.unit
+    def test_validacion(self):
+        hoy = timezone.localdate()
+        invalidas = [
+            ("color", "ot", {}, 30),
+            ("zona,tipo,marca,prioridad", "ot", {}, 30),
+            ("dia,mes", "ot", {}, 30),
+            ("zona", "mediana", {}, 30),
+            ("zona", "ot", {"mecanico": "juan"}, 30),
+            ("zona", "ot", {}, cube.MAX_DIAS + 1),
+        ]
+        for dimensiones, medidas, filtros, dias in invalidas:
+            with pytest.raises(ValidationError):
+                cube.normalizar(dimensiones, medidas, filtros, hoy - timedelta(days=dias), hoy)
+
+
+@pytest.mark.api
+@pytest.mark.django_db
+class TestReporteCuboView:
+    """Tests para GET /api/v1/reports/cube/"""
+
+    def test_consulta(self, authenticated_client, vehiculo, supervisor_user):
+        _crear_ot(vehiculo, supervisor_user, prioridad="ALTA", horas_ciclo=3)
+        rollups.refrescar_kpis_diarios()
+
+        response = authenticated_client.get(URL, {"dimensiones": "prioridad,marca", "medidas": "ot,cerradas"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["filas"] == [{"prioridad": "ALTA", "marca": "Toyota", "ot": 1, "cerradas": 1}]
+        assert response.data["truncado"] is False
+
+    def test_permisos_y_errores(self, authenticated_client, settings, mecanico_user):
+        mecanico_client = APIClient()
+        mecanico_client.force_authenticate(user=mecanico_user)
+        settings.REPORTES_CUBO_COSTO_MAXIMO = 0.01
+
+        assert mecanico_client.get(URL).status_code == status.HTTP_403_FORBIDDEN
+        assert authenticated_client.get(URL, {"dimensiones": "color"}).status_code == status.HTTP_400_BAD_REQUEST
+        assert authenticated_client.get(URL, {"fecha_inicio": "ayer"}).status_code == status.HTTP_400_BAD_REQUEST
+        costosa = authenticated_client.get(URL, {"dimensiones": "zona"})
+        assert costosa.status_code == status.HTTP_400_BAD_REQUEST
+        assert "costosa" in str(costosa.data)
+
+        settings.REPORTES_CUBO_COSTO_MAXIMO = 1e9
+        with patch.object(cube, "consultar", side_effect=cube.CuboTiempoExcedido):
+            lenta = authenticated_client.get(URL, {"dimensiones": "zona"})
+        assert lenta.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert "Acote" in str(lenta.data)
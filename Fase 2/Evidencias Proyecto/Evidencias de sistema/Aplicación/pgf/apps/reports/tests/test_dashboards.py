@@ -0,0 +1,278 @@
+# apps/reports/tests/test_dashboards.py
+"""
+Tests para el precálculo de dashboards (apps/reports/dashboards.py).
+
+Verifican que:
+- El GET solo lee la caché (sin queries de cálculo)
+- Sin payload, el GET encola un único cálculo y responde 202
+- ?refresh=true encola un recálculo forzado sin invalidar la caché
+- El precálculo empuja un "data_update" a los usuarios con los roles del dashboard
+- Las ráfagas de escrituras programan un solo recálculo
+- La caché se separa por alcance (zonas) y los refrescos se limitan y agrupan
+"""
+
+import json
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.reports import aggregation, dashboards, rollups, scopes
+from apps.workorders.models import OrdenTrabajo
+from pgf_core.celery import celery_app
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache():
+    """Los dashboards y el rate limiting usan caché"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def sin_worker():
+    """Tareas encoladas sin ejecutarse (como con un worker ocupado)"""
+    celery_app.conf.task_always_eager = False
+    with patch("apps.reports.tasks.precalcular_dashboard.delay") as delay:
+        yield delay
+
+
+def _precalcular_antiguo(nombre, alcance=scopes.GLOBAL):
+    """Deja en caché un payload generado hace 5 minutos"""
+    entrada = dashboards.precalcular(nombre, alcance, notificar=False)
+    entrada["generado_en"] -= timedelta(minutes=5)
+    cache.set(dashboards.clave_cache(nombre, alcance), entrada, dashboards.TTL_CACHE)
+
+
+def _crear_ot(vehiculo, supervisor, zona, estado="ABIERTA"):
+    return OrdenTrabajo.objects.create(
+        vehiculo=vehiculo, supervisor=supervisor, motivo="Alcance", estado=estado, zona=zona
+    )
+
+
+@pytest.fixture
+def client(admin_user):
+    client = APIClient()
+    client.force_authenticate(user=admin_user)
+    return client
+
+
+class TestLectura:
+    """Las vistas solo leen el payload precalculado"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_get_no_calcula(self, client, orden_trabajo):
+        """Con el payload en caché, el GET no ejecuta queries"""
+        rollups.asegurar_frescos()
+        dashboards.precalcular("ejecutivo", notificar=False)
+
+        with CaptureQueriesContext(connection) as contexto:
+            response = client.get("/api/v1/reports/dashboard-ejecutivo/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["kpis"]["ot_abiertas"] == 1
+        assert "X-Dashboard-Generado-En" in response
+        assert len(contexto.captured_queries) == 0
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_sin_payload_encola_y_responde_202(self, client, sin_worker):
+        """Sin payload se encola un solo cálculo, aunque lleguen varios GET"""
+        response = client.get("/api/v1/reports/dashboard-supervisor/")
+        client.get("/api/v1/reports/dashboard-supervisor/")
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response["Retry-After"] == str(dashboards.REINTENTAR_EN)
+        sin_worker.assert_called_once_with("supervisor", alcance=[], forzar=False)
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_refresh_no_invalida_la_cache(self, client, sin_worker):
+        """?refresh=true encola un recálculo forzado y sirve el último payload"""
+        _precalcular_antiguo("subgerente")
+
+        response = client.get("/api/v1/reports/dashboard-subgerente/?refresh=true")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "kpis" in response.data
+        assert response["X-Dashboard-Refresh"] == "encolado"
+        sin_worker.assert_called_once_with("subgerente", alcance=[], forzar=True)
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_roles(self, mecanico_user):
+        """Los roles autorizados salen del registro de dashboards"""
+        client = APIClient()
+        client.force_authenticate(user=mecanico_user)
+        for url in ("dashboard-ejecutivo", "dashboard-jefe-taller", "dashboard-supervisor",
+                    "dashboard-coordinador", "dashboard-subgerente"):
+            response = client.get(f"/api/v1/reports/{url}/")
+            assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestPrecalculo:
+    """Precálculo en Celery y push por WebSocket"""
+
+    @pytest.mark.celery
+    def test_precalcular_todos(self, db):
+        """La tarea de beat deja en caché todos los dashboards"""
+        from apps.reports.tasks import precalcular_dashboards
+
+        resultado = precalcular_dashboards()
+
+        assert resultado == {"global": list(dashboards.DASHBOARDS)}
+        for nombre in dashboards.DASHBOARDS:
+            assert dashboards.leer(nombre)["datos"]
+
+    @pytest.mark.celery
+    def test_push_a_usuarios_del_rol(self, admin_user, supervisor_user, mecanico_user):
+        """El data_update global llega una vez al grupo de cada rol del dashboard"""
+        channel_layer = MagicMock()
+        channel_layer.group_send = AsyncMock()
+
+        with patch("apps.notifications.realtime.get_channel_layer", return_value=channel_layer):
+            dashboards.precalcular("supervisor")
+
+        grupos = {c.args[0] for c in channel_layer.group_send.call_args_list}
+        assert grupos == {"notifications_rol_ADMIN", "notifications_rol_SUPERVISOR"}
+        mensaje = json.loads(channel_layer.group_send.call_args.args[1]["frame"])
+        assert mensaje["type"] == "data_update"
+        assert mensaje["entity_type"] == "dashboard"
+        assert mensaje["entity_id"] == "supervisor"
+        assert "carga_trabajo" in mensaje["data"]["datos"]
+
+    @pytest.mark.celery
+    def test_rafaga_de_escrituras_programa_un_recalculo(
+        self, vehiculo, supervisor_user, django_capture_on_commit_callbacks
+    ):
+        """Varias escrituras seguidas comparten un solo recálculo con retardo"""
+        # Crear el vehículo de la fixture ya programó un recálculo
+        cache.clear()
+        with patch("apps.reports.tasks.precalcular_dashboards.apply_async") as apply_async:
+            with django_capture_on_commit_callbacks(execute=True):
+                for _ in range(3):
+                    OrdenTrabajo.objects.create(
+                        vehiculo=vehiculo, supervisor=supervisor_user, motivo="Ráfaga"
+                    )
+
+        apply_async.assert_called_once_with(
+            kwargs={"forzar": True}, countdown=dashboards.RETARDO_ESCRITURAS
+        )
+
+
+class TestRefresco:
+    """?refresh=true limitado por usuario y agrupado por dashboard/alcance"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_payload_reciente_no_se_recalcula(self, client, sin_worker):
+        """Un payload recién generado no se vuelve a calcular"""
+        dashboards.precalcular("supervisor", notificar=False)
+
+        response = client.get("/api/v1/reports/dashboard-supervisor/?refresh=true")
+
+        assert response["X-Dashboard-Refresh"] == "reciente"
+        sin_worker.assert_not_called()
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_limite_por_usuario(self, client, sin_worker):
+        """Un mismo usuario no puede encadenar refrescos"""
+        _precalcular_antiguo("supervisor")
+        _precalcular_antiguo("coordinador")
+
+        client.get("/api/v1/reports/dashboard-supervisor/?refresh=true")
+        response = client.get("/api/v1/reports/dashboard-coordinador/?refresh=true")
+
+        assert response["X-Dashboard-Refresh"] == "limitado"
+        assert sin_worker.call_count == 1
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_refrescos_de_varios_usuarios_se_agrupan(self, client, jefe_taller_user, sin_worker):
+        """Dos usuarios que refrescan el mismo dashboard comparten un cálculo"""
+        _precalcular_antiguo("jefe_taller")
+        otro = APIClient()
+        otro.force_authenticate(user=jefe_taller_user)
+
+        primero = client.get("/api/v1/reports/dashboard-jefe-taller/?refresh=true")
+        segundo = otro.get("/api/v1/reports/dashboard-jefe-taller/?refresh=true")
+
+        assert primero["X-Dashboard-Refresh"] == "encolado"
+        assert segundo["X-Dashboard-Refresh"] == "en_curso"
+        sin_worker.assert_called_once_with("jefe_taller", alcance=[], forzar=True)
+
+
+class TestAlcance:
+    """Caché por alcance de datos (apps/reports/scopes.py)"""
+
+    @pytest.mark.unit
+    def test_alcance_por_rol(self, admin_user, supervisor_user, vehiculo):
+        """El supervisor queda acotado a las zonas de sus vehículos"""
+        assert scopes.alcance_de(admin_user) == scopes.GLOBAL
+        assert scopes.alcance_de(supervisor_user) == ("ZONA_TEST",)
+        assert scopes.alcance_de(admin_user, "ZONA_TEST") == ("ZONA_TEST",)
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_zona_desconocida_o_ajena(self, client, supervisor_user, vehiculo):
+        """?zona= se valida contra las zonas existentes y las del usuario"""
+        response = client.get("/api/v1/reports/dashboard-supervisor/?zona=NO_EXISTE")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        supervisor = APIClient()
+        supervisor.force_authenticate(user=supervisor_user)
+        response = supervisor.get("/api/v1/reports/dashboard-supervisor/?zona=OTRA")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_payload_por_alcance(self, client, supervisor_user, vehiculo):
+        """El supervisor solo ve su zona; el admin sigue viendo todo"""
+        _crear_ot(vehiculo, supervisor_user, "ZONA_TEST")
+        _crear_ot(vehiculo, supervisor_user, "OTRA")
+        _crear_ot(vehiculo, supervisor_user, "OTRA")
+        supervisor = APIClient()
+        supervisor.force_authenticate(user=supervisor_user)
+
+        propio = supervisor.get("/api/v1/reports/dashboard-supervisor/")
+        global_ = client.get("/api/v1/reports/dashboard-supervisor/")
+
+        assert propio["X-Dashboard-Alcance"] != global_["X-Dashboard-Alcance"]
+        assert propio.data["carga_trabajo"] == [{"estado": "ABIERTA", "cantidad": 1}]
+        assert global_.data["carga_trabajo"] == [{"estado": "ABIERTA", "cantidad": 3}]
+
+    @pytest.mark.model
+    def test_metricas_compartidas_entre_dashboards(self, db):
+        """Los dashboards de un alcance resuelven sus métricas en una sola pasada"""
+        with patch.object(aggregation, "calcular", wraps=aggregation.calcular) as calcular:
+            calculados = dashboards.precalcular_alcance()
+
+        assert calculados == list(dashboards.DASHBOARDS)
+        assert calcular.call_count == 1
+
+    @pytest.mark.celery
+    def test_beat_recalcula_alcances_activos(self, admin_user, supervisor_user, vehiculo):
+        """El beat recalcula los alcances consultados y solo se los empuja a quienes los ven"""
+        dashboards.registrar_alcance(("ZONA_TEST",), supervisor_user.id)
+        channel_layer = MagicMock()
+        channel_layer.group_send = AsyncMock()
+
+        with patch("apps.notifications.realtime.get_channel_layer", return_value=channel_layer):
+            resultado = dashboards.precalcular_todos()
+
+        clave = scopes.clave(("ZONA_TEST",))
+        assert resultado[clave] == list(dashboards.DASHBOARDS)
+        assert dashboards.leer("supervisor", ("ZONA_TEST",))["alcance"] == ["ZONA_TEST"]
+        grupos_zona = {
+            c.args[0] for c in channel_layer.group_send.call_args_list
+            if json.loads(c.args[1]["frame"])["data"]["alcance"] == ["ZONA_TEST"]
+        }
+        assert grupos_zona == {f"notifications_{supervisor_user.id}"}
@@ -0,0 +1,253 @@
+# apps/reports/tests/test_jobs.py
+"""
+Tests para los reportes PDF asíncronos (apps/reports/jobs.py).
+
+Verifican que:
+- Los parámetros equivalentes producen la misma huella
+- POST /jobs/ crea un job y lo encola una sola vez al confirmar
+- Las solicitudes iguales en curso se deduplican (salvo jobs atascados)
+- La tarea genera el PDF, lo sube a S3 y avisa por WebSocket
+- GET /pdf/ sigue siendo síncrono solo para rangos chicos
+"""
+
+import json
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.reports import jobs
+from apps.reports.models import ReporteJob
+from apps.reports.tasks import generar_reporte_pdf
+
+
+@pytest.fixture
+def s3():
+    """Cliente S3 simulado (sin LocalStack)"""
+    cliente = MagicMock()
+    cliente.generate_presigned_url.return_value = "https://s3.test/reporte.pdf?firma"
+    with patch.object(jobs, "_cliente_s3", return_value=cliente):
+        yield cliente
+
+
+@pytest.fixture
+def sin_worker():
+    with patch("apps.reports.tasks.generar_reporte_pdf.delay") as delay:
+        yield delay
+
+
+def _cliente(usuario):
+    client = APIClient()
+    client.force_authenticate(user=usuario)
+    return client
+
+
+class TestParametros:
+    """Normalización de parámetros"""
+
+    @pytest.mark.unit
+    def test_valores_por_defecto_resueltos(self):
+        """"mensual" sin fechas equivale a los últimos 30 días explícitos"""
+        hoy = timezone.localdate()
+        implicito = jobs.parametros_desde({"tipo": "mensual"})
+        explicito = jobs.parametros_desde({
+            "tipo": "mensual",
+            "fecha_inicio": (hoy - timedelta(days=30)).isoformat(),
+            "fecha_fin": hoy.isoformat(),
+        })
+
+        assert implicito == explicito
+        assert jobs.huella(implicito) == jobs.huella(explicito)
+        assert jobs.dias(implicito) == 30
+        assert not jobs.es_sincrono(implicito)
+        assert jobs.es_sincrono(jobs.parametros_desde({"tipo": "diario"}))
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("datos", [
+        {"tipo": "invalido"},
+        {"tipo_reporte": "inventario"},
+        {"tipo": "semanal", "fecha_inicio": "19-10-2026"},
+        {"tipo": "semanal", "fecha_inicio": "2026-10-19", "fecha_fin": "2026-10-01"},
+    ])
+    def test_parametros_invalidos(self, datos):
+        with pytest.raises(jobs.ParametrosInvalidos):
+            jobs.parametros_desde(datos)
+
+
+class TestSolicitud:
+    """Creación y deduplicación de jobs"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_post_crea_y_encola(self, admin_user, sin_worker, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = _cliente(admin_user).post(
+                "/api/v1/reports/jobs/", {"tipo": "mensual"}, format="json"
+            )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data["estado"] == "PENDIENTE"
+        assert response.data["deduplicado"] is False
+        assert response["Location"] == f"/api/v1/reports/jobs/{response.data['id']}/"
+        sin_worker.assert_called_once_with(response.data["id"])
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_solicitudes_iguales_se_deduplican(
+        self, admin_user, jefe_taller_user, sin_worker, django_capture_on_commit_callbacks
+    ):
+        """Un segundo usuario que pide el mismo reporte se suma al job en curso"""
+        with django_capture_on_commit_callbacks(execute=True):
+            primero = _cliente(admin_user).post("/api/v1/reports/jobs/", {"tipo": "mensual"}, format="json")
+            segundo = _cliente(jefe_taller_user).post("/api/v1/reports/jobs/", {"tipo": "mensual"}, format="json")
+
+        assert segundo.data["id"] == primero.data["id"]
+        assert segundo.data["deduplicado"] is True
+        assert sin_worker.call_count == 1
+        job = ReporteJob.objects.get()
+        assert set(job.interesados.values_list("id", flat=True)) == {admin_user.id, jefe_taller_user.id}
+
+    @pytest.mark.model
+    def test_job_terminado_no_deduplica(self, admin_user, sin_worker):
+        """Un job ya completado no bloquea una nueva solicitud"""
+        parametros = jobs.parametros_desde({"tipo": "mensual"})
+        job, _ = jobs.solicitar(parametros, admin_user)
+        ReporteJob.objects.filter(id=job.id).update(estado=ReporteJob.Estado.COMPLETADO)
+
+        nuevo, creado = jobs.solicitar(parametros, admin_user)
+
+        assert creado is True
+        assert nuevo.id != job.id
+
+    @pytest.mark.model
+    def test_job_atascado_no_deduplica(self, admin_user, jefe_taller_user, sin_worker):
+        """Un job en curso hace demasiado tiempo queda en ERROR y se crea otro"""
+        parametros = jobs.parametros_desde({"tipo": "mensual"})
+        job, _ = jobs.solicitar(parametros, admin_user)
+        hace = timezone.now() - timedelta(seconds=jobs.EN_PROCESO_MAXIMO_SEGUNDOS + 60)
+        ReporteJob.objects.filter(id=job.id).update(estado=ReporteJob.Estado.EN_PROCESO, iniciado_en=hace)
+
+        with patch("apps.notifications.realtime.enviar_actualizacion_reporte") as aviso:
+            nuevo, creado = jobs.solicitar(parametros, jefe_taller_user)
+
+        job.refresh_from_db()
+        assert creado is True and nuevo.id != job.id
+        assert job.estado == ReporteJob.Estado.ERROR and job.terminado_en is not None
+        assert aviso.call_args.args[0].id == job.id
+
+    @pytest.mark.celery
+    def test_barrido_de_atascados(self, admin_user, sin_worker):
+        """La tarea periódica solo expira los jobs que superan su tiempo máximo"""
+        from apps.reports.tasks import expirar_reportes_atascados
+
+        viejo, _ = jobs.solicitar(jobs.parametros_desde({"tipo": "mensual"}), admin_user)
+        reciente, _ = jobs.solicitar(jobs.parametros_desde({"tipo": "semanal"}), admin_user)
+        ReporteJob.objects.filter(id=viejo.id).update(
+            creado_en=timezone.now() - timedelta(seconds=jobs.PENDIENTE_MAXIMO_SEGUNDOS + 60)
+        )
+
+        assert expirar_reportes_atascados() == 1
+        assert ReporteJob.objects.get(id=viejo.id).estado == ReporteJob.Estado.ERROR
+        assert ReporteJob.objects.get(id=reciente.id).estado == ReporteJob.Estado.PENDIENTE
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_broker_caido_marca_error(self, admin_user, sin_worker, django_capture_on_commit_callbacks):
+        """Si no se puede encolar, el job queda en ERROR y el request no falla"""
+        sin_worker.side_effect = ConnectionError("broker caído")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = _cliente(admin_user).post("/api/v1/reports/jobs/", {"tipo": "mensual"}, format="json")
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job = ReporteJob.objects.get(id=response.data["id"])
+        assert job.estado == ReporteJob.Estado.ERROR
+        assert "encolar" in job.error
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_pdf_rango_grande_responde_202(self, admin_user, sin_worker):
+        """GET /pdf/ deriva los rangos grandes a un job"""
+        response = _cliente(admin_user).get("/api/v1/reports/pdf/?tipo=mensual")
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert ReporteJob.objects.filter(id=response.data["id"], tipo="mensual").exists()
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_roles(self, mecanico_user):
+        response = _cliente(mecanico_user).post("/api/v1/reports/jobs/", {"tipo": "mensual"}, format="json")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestGeneracion:
+    """Tarea Celery generar_reporte_pdf"""
+
+    @pytest.mark.celery
+    def test_genera_sube_y_avisa(self, admin_user, jefe_taller_user, s3, sin_worker):
+        parametros = jobs.parametros_desde({"tipo": "mensual"})
+        job, _ = jobs.solicitar(parametros, admin_user)
+        jobs.solicitar(parametros, jefe_taller_user)
+        channel_layer = MagicMock()
+        channel_layer.group_send = AsyncMock()
+
+        with patch.object(jobs, "renderizar", return_value=(b"%PDF-1.4 test", "reporte.pdf")), \
+                patch("apps.notifications.realtime.get_channel_layer", return_value=channel_layer):
+            key = generar_reporte_pdf(str(job.id))
+
+        job.refresh_from_db()
+        assert job.estado == ReporteJob.Estado.COMPLETADO
+        assert key == job.s3_key == f"reportes/mensual/{job.id}.pdf"
+        assert job.tamano_bytes == len(b"%PDF-1.4 test")
+        s3.upload_fileobj.assert_called_once()
+
+        grupos = {c.args[0] for c in channel_layer.group_send.call_args_list}
+        assert grupos == {f"notifications_{admin_user.id}", f"notifications_{jefe_taller_user.id}"}
+        mensaje = json.loads(channel_layer.group_send.call_args.args[1]["frame"])
+        assert mensaje["entity_type"] == "report_job"
+        assert mensaje["action"] == "completed"
+        assert mensaje["data"]["download_url"] == "https://s3.test/reporte.pdf?firma"
+
+    @pytest.mark.celery
+    def test_error_reintenta_y_luego_falla(self, admin_user, s3, sin_worker):
+        """Un error vuelve el job a PENDIENTE para reintentar; sin reintentos queda en ERROR"""
+        from celery.exceptions import Retry
+
+        job, _ = jobs.solicitar(jobs.parametros_desde({"tipo": "mensual"}), admin_user)
+
+        with patch.object(jobs, "renderizar", side_effect=RuntimeError("sin datos")), \
+                patch.object(generar_reporte_pdf, "retry", side_effect=Retry):
+            with pytest.raises(Retry):
+                generar_reporte_pdf(str(job.id))
+        job.refresh_from_db()
+        assert job.estado == ReporteJob.Estado.PENDIENTE
+
+        with patch.object(jobs, "renderizar", side_effect=RuntimeError("sin datos")), \
+                patch.object(generar_reporte_pdf, "max_retries", 0):
+            assert generar_reporte_pdf(str(job.id)) is None
+        job.refresh_from_db()
+        assert job.estado == ReporteJob.Estado.ERROR
+        assert "sin datos" in job.error
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_detalle(self, admin_user, jefe_taller_user, supervisor_user, s3, sin_worker):
+        """El detalle entrega la URL firmada y solo lo ven los interesados"""
+        job, _ = jobs.solicitar(jobs.parametros_desde({"tipo": "mensual"}), jefe_taller_user)
+        url = f"/api/v1/reports/jobs/{job.id}/"
+
+        pendiente = _cliente(jefe_taller_user).get(url)
+        assert pendiente.data["download_url"] is None
+        assert "Retry-After" in pendiente
+
+        ReporteJob.objects.filter(id=job.id).update(
+            estado=ReporteJob.Estado.COMPLETADO, s3_key="reportes/mensual/x.pdf"
+        )
+        completado = _cliente(jefe_taller_user).get(url)
+        assert completado.data["download_url"] == "https://s3.test/reporte.pdf?firma"
+
+        assert _cliente(supervisor_user).get(url).status_code == status.HTTP_404_NOT_FOUND
+        assert _cliente(admin_user).get(url).status_code == status.HTTP_200_OK
@@ -0,0 +1,196 @@
+# apps/reports/tests/test_pdf_cache.py
+"""
+Tests para la caché de PDFs generados (apps/reports/pdf_cache.py).
+
+Verifican que:
+- Un reporte de período cerrado se genera una vez y luego se sirve desde la caché
+- Los cambios en los datos del período (rollup) cambian la clave
+- Las escrituras invalidan los reportes de períodos abiertos
+- El desalojo LRU mantiene la caché dentro de sus límites
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.reports import jobs, pdf_cache, rollups
+from apps.reports.models import PDFCacheado, ReporteJob
+from apps.workorders.models import OrdenTrabajo
+
+PDF = b"%PDF-1.4 cacheado"
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache():
+    """La versión de los períodos abiertos vive en la caché de Django"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def renderizar():
+    with patch.object(jobs, "renderizar", return_value=(PDF, "reporte.pdf")) as renderizar:
+        yield renderizar
+
+
+@pytest.fixture
+def client(admin_user):
+    client = APIClient()
+    client.force_authenticate(user=admin_user)
+    return client
+
+
+def _semana_cerrada():
+    """Parámetros de query de una semana que terminó hace 14 días"""
+    fin = timezone.localdate() - timedelta(days=14)
+    return f"tipo=semanal&fecha_inicio={fin - timedelta(days=6)}&fecha_fin={fin}"
+
+
+def _contenido(response):
+    return b"".join(response.streaming_content) if response.streaming else response.content
+
+
+class TestPeriodoCerrado:
+    """Reportes de períodos que ya no cambian"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_segunda_descarga_desde_cache(self, client, renderizar):
+        url = f"/api/v1/reports/pdf/?{_semana_cerrada()}"
+
+        primera = client.get(url)
+        segunda = client.get(url)
+
+        assert primera["X-Reporte-Cache"] == "MISS"
+        assert segunda["X-Reporte-Cache"] == "HIT"
+        assert _contenido(segunda) == PDF
+        assert 'filename="reporte.pdf"' in segunda["Content-Disposition"]
+        assert renderizar.call_count == 1
+        assert PDFCacheado.objects.get().accesos == 1
+
+    @pytest.mark.model
+    def test_cambio_en_el_rollup_cambia_la_clave(self, orden_trabajo):
+        """Si el rollup reescribe días del rango, la clave ya no coincide"""
+        parametros = jobs.parametros_desde({"tipo": "mensual"})
+        parametros["fecha_fin"] = (timezone.localdate() - timedelta(days=14)).isoformat()
+        rollups.refrescar_kpis_diarios()
+        antes, version = pdf_cache.clave(parametros)
+
+        assert version == ""
+        assert pdf_cache.clave(parametros)[0] == antes
+
+        dia = timezone.now() - timedelta(days=20)
+        OrdenTrabajo.objects.filter(id=orden_trabajo.id).update(apertura=dia)
+        rollups.refrescar_kpis_diarios(desde=timezone.localdate(dia))
+
+        assert pdf_cache.clave(parametros)[0] != antes
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_rango_grande_en_cache_no_crea_job(self, client, renderizar):
+        """Un mensual ya generado se sirve directo, sin pasar por un job"""
+        fin = timezone.localdate() - timedelta(days=14)
+        url = f"/api/v1/reports/pdf/?tipo=mensual&fecha_inicio={fin - timedelta(days=30)}&fecha_fin={fin}"
+        parametros = jobs.parametros_desde({
+            "tipo": "mensual", "fecha_inicio": str(fin - timedelta(days=30)), "fecha_fin": str(fin)
+        })
+        pdf_cache.guardar(*pdf_cache.clave(parametros), parametros, PDF, "reporte.pdf")
+
+        response = client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["X-Reporte-Cache"] == "HIT"
+        assert not ReporteJob.objects.exists()
+        renderizar.assert_not_called()
+
+
+class TestPeriodoAbierto:
+    """Reportes que incluyen la semana en curso"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_escrituras_invalidan(
+        self, client, renderizar, vehiculo, supervisor_user, django_capture_on_commit_callbacks
+    ):
+        url = "/api/v1/reports/pdf/?tipo=diario"
+        client.get(url)
+        assert client.get(url)["X-Reporte-Cache"] == "HIT"
+
+        with django_capture_on_commit_callbacks(execute=True):
+            OrdenTrabajo.objects.create(vehiculo=vehiculo, supervisor=supervisor_user, motivo="Nueva")
+
+        assert client.get(url)["X-Reporte-Cache"] == "MISS"
+        assert renderizar.call_count == 2
+
+    @pytest.mark.model
+    def test_purga_de_versiones_superadas(self, db):
+        parametros = jobs.parametros_desde({"tipo": "diario"})
+        entrada = pdf_cache.guardar(*pdf_cache.clave(parametros), parametros, PDF, "reporte.pdf")
+        assert entrada.abierto
+
+        pdf_cache.invalidar_abiertos()
+        borradas = pdf_cache.desalojar(purgar_abiertos=True)
+
+        assert borradas == 1
+        assert not PDFCacheado.objects.exists()
+        assert not default_storage.exists(entrada.ruta)
+
+
+class TestDesalojo:
+    """Límites de tamaño y cantidad"""
+
+    @pytest.mark.model
+    def test_lru(self, db):
+        entradas = []
+        for dias in (30, 20, 10):
+            fin = timezone.localdate() - timedelta(days=dias)
+            parametros = jobs.parametros_desde({"tipo": "diario", "fecha_inicio": fin.isoformat()})
+            entradas.append(pdf_cache.guardar(*pdf_cache.clave(parametros), parametros, PDF, f"{dias}.pdf"))
+        # La más antigua se usa: pasa a ser la más reciente
+        pdf_cache.obtener(entradas[0].clave)
+
+        borradas = pdf_cache.desalojar(max_entradas=2)
+
+        assert borradas == 1
+        assert set(PDFCacheado.objects.values_list("clave", flat=True)) == {
+            entradas[0].clave, entradas[2].clave
+        }
+        assert not default_storage.exists(entradas[1].ruta)
+
+    @pytest.mark.model
+    def test_limite_de_bytes(self, db):
+        for dias in (30, 20):
+            fin = timezone.localdate() - timedelta(days=dias)
+            parametros = jobs.parametros_desde({"tipo": "diario", "fecha_inicio": fin.isoformat()})
+            pdf_cache.guardar(*pdf_cache.clave(parametros), parametros, PDF, f"{dias}.pdf")
+
+        pdf_cache.desalojar(max_bytes=len(PDF))
+
+        assert PDFCacheado.objects.count() == 1
+
+    @pytest.mark.celery
+    def test_job_reutiliza_pdf_cacheado(self, admin_user, renderizar):
+        """La tarea del job no regenera un PDF que ya está en la caché"""
+        from apps.reports.tasks import generar_reporte_pdf
+
+        fin = timezone.localdate() - timedelta(days=14)
+        parametros = jobs.parametros_desde({
+            "tipo": "mensual", "fecha_inicio": str(fin - timedelta(days=30)), "fecha_fin": str(fin)
+        })
+        pdf_cache.guardar(*pdf_cache.clave(parametros), parametros, PDF, "reporte.pdf")
+        with patch("apps.reports.tasks.generar_reporte_pdf.delay"):
+            job, _ = jobs.solicitar(parametros, admin_user)
+
+        with patch.object(jobs, "subir_pdf", return_value="reportes/x.pdf") as subir:
+            generar_reporte_pdf(str(job.id))
+
+        renderizar.assert_not_called()
+        subir.assert_called_once()
+        assert subir.call_args.args[1] == PDF
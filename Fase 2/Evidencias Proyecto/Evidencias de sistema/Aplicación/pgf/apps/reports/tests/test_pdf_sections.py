@@ -0,0 +1,221 @@
+# apps/reports/tests/test_pdf_sections.py
+"""
+Tests para el renderizado de reportes PDF por secciones (apps/reports/pdf_sections.py).
+
+Verifican que:
+- La concatenación produce un PDF con todas las páginas de las partes
+- Solo se renumeran referencias reales (no texto dentro de strings) y las
+  entradas libres de la tabla xref se conservan
+- Dibujar en procesos aparte da el mismo resultado que en el proceso actual
+- En un proceso daemon (worker de Celery) o si el pool falla no se pierden secciones
+- El reporte de OT completo incluye todas las OT del período
+- "completo" forma parte de la huella y siempre se genera en un job
+"""
+
+import io
+import multiprocessing
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from reportlab import rl_config
+
+from apps.reports import jobs, pdf_sections
+from apps.reports.pdf_generator_completo import generar_reporte_ordenes_trabajo
+from apps.workorders.models import OrdenTrabajo
+
+
+def _secciones(cantidad, filas=120):
+    yield [("titulo", "Reporte de prueba"), ("texto", "Sección inicial")]
+    for numero in range(cantidad):
+        datos = [["N°", "Detalle"]] + [[str(i), f"Fila {numero}-{i}"] for i in range(filas)]
+        yield [("tabla", datos, [1, 4])]
+
+
+@pytest.fixture
+def sin_compresion(monkeypatch):
+    """Streams de página sin comprimir, para buscar texto en el PDF"""
+    monkeypatch.setattr(rl_config, "pageCompression", 0)
+
+
+def _pdf_con_entrada_libre():
+    """PDF de una página cuyo objeto 3 está libre en la tabla xref"""
+    objetos = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [ 4 0 R ] /Count 1 >>",
+        4: b"<< /Type /Page /Parent 2 0 R /MediaBox [ 0 0 612 792 ] /Contents 5 0 R >>",
+        5: b"<< /Length 5 >>\nstream\nBT ET\nendstream",
+    }
+    contenido = b"%PDF-1.4\n"
+    entradas = [b"0000000000 65535 f \n"]
+    for numero in range(1, 6):
+        if numero not in objetos:
+            entradas.append(b"0000000000 00001 f \n")
+            continue
+        entradas.append(b"%010d 00000 n \n" % len(contenido))
+        contenido += b"%d 0 obj\n%s\nendobj\n" % (numero, objetos[numero])
+    inicio_xref = len(contenido)
+    return contenido + b"xref\n0 6\n" + b"".join(entradas) + (
+        b"trailer\n<< /Size 6 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % inicio_xref
+    )
+
+
+def _renderizar_y_unir(directorio, resultado):
+    """Objetivo del proceso daemon: dibuja con pool y concatena"""
+    try:
+        rutas = pdf_sections.renderizar_secciones(_secciones(3), directorio, procesos=2)
+        resultado.put((all(os.path.exists(ruta) for ruta in rutas), _unir(rutas)[0]))
+    except Exception as exc:
+        resultado.put(repr(exc))
+
+
+def _unir(rutas):
+    destino = io.BytesIO()
+    paginas = pdf_sections.concatenar(rutas, destino)
+    return paginas, destino.getvalue()
+
+
+class TestConcatenar:
+    """Tests para concatenar"""
+
+    @pytest.mark.unit
+    def test_paginas_y_estructura(self, tmp_path, sin_compresion):
+        rutas = pdf_sections.renderizar_secciones(_secciones(3), str(tmp_path), procesos=1)
+        paginas_partes = []
+        for ruta in rutas:
+            paginas_partes.append(pdf_sections.concatenar([ruta], io.BytesIO()))
+
+        paginas, contenido = _unir(rutas)
+
+        assert len(rutas) == 4
+        assert paginas == sum(paginas_partes)
+        # El resultado se vuelve a leer: xref coherente y raíz con todas las páginas
+        objetos, raiz, total = pdf_sections._leer_partes(contenido)
+        assert len(objetos) == total - 1
+        catalogo = dict(objetos)[raiz]
+        assert b"/Type /Catalog" in catalogo
+        numero_paginas = int(pdf_sections._REFERENCIA.search(catalogo).group(1))
+        assert f"/Count {paginas}".encode() in dict(objetos)[numero_paginas]
+        assert b"Fila 2-119" in contenido
+
+    @pytest.mark.unit
+    def test_referencias_renumeradas(self, tmp_path):
+        rutas = pdf_sections.renderizar_secciones(_secciones(1), str(tmp_path), procesos=1)
+        _, contenido = _unir(rutas)
+
+        objetos, _, total = pdf_sections._leer_partes(contenido)
+        for _, objeto in objetos:
+            for referencia in pdf_sections._REFERENCIA.findall(objeto.split(b"stream", 1)[0]):
+                assert 0 < int(referencia) < total
+
+
+    @pytest.mark.unit
+    def test_no_renumera_texto_en_strings(self):
+        objeto = (
+            b"7 0 obj\n<< /Title (Ver 5 0 R \\) (3 0 R)) /Parent 2 0 R "
+            b"/Kids [1 0 R <3520302052> 4 0 R] /F1 6 0 R >>\nendobj\n"
+        )
+
+        renumerado = pdf_sections._renumerar(objeto, 10)
+
+        assert renumerado == (
+            b"17 0 obj\n<< /Title (Ver 5 0 R \\) (3 0 R)) /Parent 12 0 R "
+            b"/Kids [11 0 R <3520302052> 14 0 R] /F1 16 0 R >>\nendobj\n"
+        )
+
+    @pytest.mark.unit
+    def test_entradas_libres(self, tmp_path):
+        ruta = tmp_path / "libre.pdf"
+        ruta.write_bytes(_pdf_con_entrada_libre())
+
+        paginas, contenido = _unir([str(ruta), str(ruta)])
+
+        assert paginas == 2
+        objetos, raiz, total = pdf_sections._leer_partes(contenido)
+        # Dos partes de 4 objetos + /Pages raíz y catálogo; el 3 de cada parte sigue libre
+        assert (len(objetos), total) == (10, 13)
+        assert {3, 8} & {numero for numero, _ in objetos} == set()
+        assert b"/Count 2" in dict(objetos)[int(pdf_sections._REFERENCIA.search(dict(objetos)[raiz]).group(1))]
+
+
+class TestRenderizarSecciones:
+    """Tests para renderizar_secciones"""
+
+    @pytest.mark.slow
+    def test_procesos_igual_a_secuencial(self, tmp_path):
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        secuencial = pdf_sections.renderizar_secciones(_secciones(5), str(tmp_path / "a"), procesos=1)
+        paralelo = pdf_sections.renderizar_secciones(_secciones(5), str(tmp_path / "b"), procesos=2)
+
+        assert [r.rsplit("/", 1)[1] for r in secuencial] == [r.rsplit("/", 1)[1] for r in paralelo]
+        assert _unir(secuencial)[0] == _unir(paralelo)[0]
+
+    @pytest.mark.unit
+    def test_proceso_daemon_dibuja_secuencial(self, tmp_path):
+        """Un worker prefork de Celery es daemon y no puede crear el pool"""
+        contexto = multiprocessing.get_context("fork")
+        resultado = contexto.Queue()
+        proceso = contexto.Process(target=_renderizar_y_unir, args=(str(tmp_path), resultado), daemon=True)
+        proceso.start()
+        salida = resultado.get(timeout=60)
+        proceso.join()
+
+        esperado = _unir(pdf_sections.renderizar_secciones(_secciones(3), str(tmp_path), procesos=1))[0]
+        assert salida == (True, esperado)
+
+    @pytest.mark.unit
+    def test_pool_roto_no_pierde_secciones(self, tmp_path, monkeypatch):
+        """Si submit falla, la sección que se estaba enviando también se dibuja"""
+        class PoolRoto:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def submit(self, *args):
+                raise BrokenProcessPool("sin procesos")
+
+        monkeypatch.setattr(pdf_sections, "ProcessPoolExecutor", PoolRoto)
+
+        rutas = pdf_sections.renderizar_secciones(_secciones(3), str(tmp_path), procesos=2)
+
+        assert len(rutas) == 4 and all(os.path.exists(ruta) for ruta in rutas)
+        assert _unir(rutas)[0] > 0
+
+
+class TestReporteCompleto:
+    """Tests para generar_reporte_ordenes_trabajo(completo=True)"""
+
+    @pytest.mark.django_db
+    def test_incluye_todas_las_ot(self, settings, monkeypatch, sin_compresion, vehiculo, supervisor_user):
+        settings.REPORTES_PDF_PROCESOS = 1
+        monkeypatch.setattr(pdf_sections, "FILAS_POR_SECCION", 25)
+        for i in range(60):
+            OrdenTrabajo.objects.create(vehiculo=vehiculo, supervisor=supervisor_user, motivo=f"Motivo {i}")
+        motivos = [f"(Motivo {i})".encode() for i in range(60)]
+
+        contenido = generar_reporte_ordenes_trabajo(completo=True)
+        normal = generar_reporte_ordenes_trabajo()
+
+        assert contenido.startswith(b"%PDF")
+        assert all(motivo in contenido for motivo in motivos)
+        # El modo normal sigue limitado a las primeras 50
+        assert sum(motivo in normal for motivo in motivos) == 50
+
+    @pytest.mark.unit
+    def test_parametro_completo(self):
+        normal = jobs.parametros_desde({"tipo_reporte": "ordenes_trabajo", "fecha_inicio": "2026-10-18"})
+        completo = jobs.parametros_desde({
+            "tipo_reporte": "ordenes_trabajo", "fecha_inicio": "2026-10-18", "completo": "true"
+        })
+
+        assert normal["completo"] is False
+        assert completo["completo"] is True
+        assert jobs.huella(normal) != jobs.huella(completo)
+        assert not jobs.es_sincrono(completo)
+        assert "completo" not in jobs.parametros_desde({"tipo": "semanal"})
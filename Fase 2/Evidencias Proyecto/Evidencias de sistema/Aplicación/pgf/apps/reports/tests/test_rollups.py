@@ -0,0 +1,253 @@
+# apps/reports/tests/test_rollups.py
+"""
+Tests para los KPIs diarios (apps/reports/rollups.py).
+
+Verifican que:
+- Las métricas agregadas coinciden con las calculadas directamente sobre OrdenTrabajo/Pausa
+- El refresco incremental solo recalcula los días tocados desde el watermark
+- Las fotos por estado de días anteriores se conservan
+- Los dashboards leen los KPIs diarios
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.core.date_filters import inicio_dia
+from apps.reports import rollups
+from apps.reports.models import ControlRollup, KPIDiario
+from apps.workorders.models import Auditoria, OrdenTrabajo, Pausa
+
+
+@pytest.fixture(autouse=True)
+def limpiar_cache():
+    """Los dashboards y el rate limiting usan caché"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _crear_ot(vehiculo, supervisor, mecanico=None, dias_atras=0, estado="ABIERTA",
+              horas_ciclo=None, sla_horas=None, tipo="MANTENCION", zona="NORTE"):
+    """
+    Crea una OT abierta hace `dias_atras` días (10:00 local).
+
+    Si se indica horas_ciclo la OT queda CERRADA ese mismo número de horas
+    después de la apertura; sla_horas fija el límite de SLA desde la apertura.
+    """
+    apertura = inicio_dia(timezone.localdate() - timedelta(days=dias_atras)) + timedelta(hours=10)
+    ot = OrdenTrabajo.objects.create(
+        vehiculo=vehiculo,
+        supervisor=supervisor,
+        responsable=supervisor,
+        mecanico=mecanico,
+        motivo="KPIs",
+        estado=estado,
+        tipo=tipo,
+        zona=zona,
+    )
+    cambios = {"apertura": apertura}
+    if horas_ciclo is not None:
+        cambios.update(estado="CERRADA", cierre=apertura + timedelta(hours=horas_ciclo))
+    if sla_horas is not None:
+        cambios["fecha_limite_sla"] = apertura + timedelta(hours=sla_horas)
+    OrdenTrabajo.objects.filter(pk=ot.pk).update(**cambios)
+    ot.refresh_from_db()
+    return ot
+
+
+class TestRecalculo:
+    """Las métricas agregadas coinciden con el cálculo directo"""
+
+    @pytest.mark.model
+    def test_metricas_por_dia(self, vehiculo, supervisor_user, mecanico_user):
+        """Creadas, cerradas, SLA y ciclo quedan en el día del evento"""
+        _crear_ot(vehiculo, supervisor_user, mecanico_user, dias_atras=2, horas_ciclo=4, sla_horas=8)
+        _crear_ot(vehiculo, supervisor_user, mecanico_user, dias_atras=2, horas_ciclo=10, sla_horas=8)
+        _crear_ot(vehiculo, supervisor_user, dias_atras=1)
+        _crear_ot(vehiculo, supervisor_user, dias_atras=0, estado="EN_EJECUCION")
+
+        rollups.refrescar_kpis_diarios()
+
+        hoy = timezone.localdate()
+        hace_2 = rollups.totales(desde=hoy - timedelta(days=2), hasta=hoy - timedelta(days=2))
+        assert hace_2["ot_creadas"] == 2
+        assert hace_2["ot_cerradas"] == 2
+        assert hace_2["sla_cumplido"] == 1
+        assert hace_2["sla_incumplido"] == 1
+        assert hace_2["ciclo_segundos"] == 14 * 3600
+
+        total = rollups.totales()
+        assert total["ot_creadas"] == OrdenTrabajo.objects.count()
+        assert rollups.porcentaje_sla(total) == 50.0
+
+    @pytest.mark.model
+    def test_dimension_mecanico(self, vehiculo, supervisor_user, mecanico_user):
+        """Las métricas se pueden filtrar por mecánico y zona"""
+        _crear_ot(vehiculo, supervisor_user, mecanico_user, horas_ciclo=1)
+        _crear_ot(vehiculo, supervisor_user, horas_ciclo=1, zona="SUR")
+
+        rollups.refrescar_kpis_diarios()
+
+        assert rollups.totales(mecanico=mecanico_user)["ot_cerradas"] == 1
+        assert rollups.totales(zona="SUR")["ot_cerradas"] == 1
+        assert rollups.totales()["ot_cerradas"] == 2
+
+    @pytest.mark.model
+    def test_conteo_por_estado(self, vehiculo, supervisor_user):
+        """La foto del día coincide con un GROUP BY por estado"""
+        _crear_ot(vehiculo, supervisor_user, dias_atras=3)
+        _crear_ot(vehiculo, supervisor_user, dias_atras=1, estado="EN_PAUSA")
+        _crear_ot(vehiculo, supervisor_user, horas_ciclo=2)
+
+        rollups.refrescar_kpis_diarios()
+
+        esperado = {
+            r["estado"]: r["total"]
+            for r in OrdenTrabajo.objects.values("estado").annotate(total=Count("id"))
+        }
+        assert rollups.conteo_por_estado() == esperado
+
+    @pytest.mark.model
+    def test_pausas(self, vehiculo, supervisor_user, mecanico_user):
+        """La duración de las pausas se suma en el día en que terminan"""
+        ot = _crear_ot(vehiculo, supervisor_user, mecanico_user, estado="EN_EJECUCION")
+        pausa = Pausa.objects.create(ot=ot, usuario=mecanico_user, motivo="Colación")
+        ahora = timezone.now()
+        Pausa.objects.filter(pk=pausa.pk).update(inicio=ahora - timedelta(minutes=45), fin=ahora)
+
+        rollups.refrescar_kpis_diarios()
+
+        assert rollups.totales(desde=timezone.localdate())["pausa_segundos"] == 45 * 60
+
+    @pytest.mark.unit
+    def test_tramos_contiguos(self):
+        """Los días se agrupan en rangos contiguos para filtrar con pocos predicados"""
+        hoy = timezone.localdate()
+        dias = {hoy, hoy - timedelta(days=1), hoy - timedelta(days=2), hoy - timedelta(days=10)}
+        assert rollups._tramos(dias) == [
+            (hoy - timedelta(days=10), hoy - timedelta(days=10)),
+            (hoy - timedelta(days=2), hoy),
+        ]
+
+
+class TestRefrescoIncremental:
+    """El refresco incremental usa el watermark"""
+
+    @pytest.mark.model
+    def test_primer_refresco_reconstruye_desde_la_primera_ot(self, vehiculo, supervisor_user):
+        """Sin watermark se recalculan todos los días desde la primera apertura"""
+        _crear_ot(vehiculo, supervisor_user, dias_atras=20)
+
+        resultado = rollups.refrescar_kpis_diarios()
+
+        assert resultado["dias"] == 21
+        assert ControlRollup.objects.get(nombre=rollups.NOMBRE_ROLLUP).watermark is not None
+
+    @pytest.mark.model
+    def test_solo_recalcula_dias_tocados(self, vehiculo, supervisor_user, mecanico_user):
+        """Tras el primer refresco solo se recalcula hoy y los días afectados por cambios"""
+        _crear_ot(vehiculo, supervisor_user, mecanico_user, dias_atras=20, horas_ciclo=5)
+        rollups.refrescar_kpis_diarios()
+
+        _crear_ot(vehiculo, supervisor_user, dias_atras=0)
+        resultado = rollups.refrescar_kpis_diarios()
+
+        assert resultado["dias"] == 1
+        assert rollups.totales(desde=timezone.localdate())["ot_creadas"] == 1
+        # El día de la OT antigua no se tocó
+        assert rollups.totales(hasta=timezone.localdate() - timedelta(days=1))["ot_cerradas"] == 1
+
+    @pytest.mark.model
+    def test_reapertura_recalcula_dia_de_cierre(self, vehiculo, supervisor_user, mecanico_user, admin_user):
+        """Una OT reabierta (auditada) se descuenta del día en que se había cerrado"""
+        ot = _crear_ot(vehiculo, supervisor_user, mecanico_user, dias_atras=5, horas_ciclo=3)
+        rollups.refrescar_kpis_diarios()
+        dia_cierre = timezone.localdate(ot.cierre)
+        assert rollups.totales(desde=dia_cierre, hasta=dia_cierre)["ot_cerradas"] == 1
+
+        OrdenTrabajo.objects.filter(pk=ot.pk).update(estado="RETRABAJO")
+        Auditoria.objects.create(
+            usuario=admin_user, accion="CAMBIO_ESTADO", objeto_tipo="OrdenTrabajo",
+            objeto_id=str(ot.id), payload={"estado_anterior": "CERRADA", "estado_nuevo": "RETRABAJO"}
+        )
+        resultado = rollups.refrescar_kpis_diarios()
+
+        assert resultado["dias"] == 2
+        assert rollups.totales(desde=dia_cierre, hasta=dia_cierre)["ot_cerradas"] == 0
+
+    @pytest.mark.model
+    def test_conserva_foto_de_dias_anteriores(self, vehiculo, supervisor_user):
+        """La foto por estado de un día pasado no se pierde al recalcularlo"""
+        ayer = timezone.localdate() - timedelta(days=1)
+        KPIDiario.objects.create(fecha=ayer, zona="NORTE", tipo="MANTENCION", por_estado={"ABIERTA": 7})
+
+        rollups.recalcular_dias({ayer})
+
+        fila = KPIDiario.objects.get(fecha=ayer)
+        assert fila.por_estado == {"ABIERTA": 7}
+
+    @pytest.mark.model
+    def test_asegurar_frescos_no_refresca_si_es_reciente(self, vehiculo, supervisor_user):
+        """Con un watermark reciente, leer no dispara un refresco"""
+        rollups.refrescar_kpis_diarios()
+        _crear_ot(vehiculo, supervisor_user)
+
+        rollups.asegurar_frescos()
+        assert rollups.totales()["ot_creadas"] == 0
+
+        rollups.asegurar_frescos(forzar=True)
+        assert rollups.totales()["ot_creadas"] == 1
+
+
+class TestDashboards:
+    """Los dashboards leen los KPIs diarios"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_dashboard_ejecutivo(self, vehiculo, supervisor_user, mecanico_user, admin_user):
+        """Los KPIs del dashboard ejecutivo coinciden con los datos"""
+        _crear_ot(vehiculo, supervisor_user, mecanico_user, horas_ciclo=1, sla_horas=2)
+        _crear_ot(vehiculo, supervisor_user, mecanico_user, dias_atras=3, horas_ciclo=5, sla_horas=2)
+        _crear_ot(vehiculo, supervisor_user, estado="EN_PAUSA")
+
+        client = APIClient()
+        client.force_authenticate(user=admin_user)
+        response = client.get("/api/v1/reports/dashboard-ejecutivo/")
+
+        assert response.status_code == status.HTTP_200_OK
+        kpis = response.data["kpis"]
+        assert kpis["ot_en_pausa"] == 1
+        assert kpis["productividad_7_dias"] == 2
+        assert kpis["sla_cumplimiento"] == 50.0
+        graficos = response.data["graficos"]
+        assert len(graficos["ot_cerradas_por_dia"]) == 7
+        assert graficos["ot_cerradas_por_dia"][-1]["cantidad"] == kpis["ot_cerradas_hoy"]
+        assert graficos["mecanicos_productividad"][0]["ot_cerradas"] == 2
+        assert graficos["cumplimiento_sla_por_dia"][-1]["cumplimiento"] in (0, 100.0)
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_dashboard_subgerente_tendencias(self, vehiculo, supervisor_user, admin_user):
+        """Las tendencias semanales se arman desde una sola serie diaria"""
+        _crear_ot(vehiculo, supervisor_user, horas_ciclo=2)
+
+        client = APIClient()
+        client.force_authenticate(user=admin_user)
+        rollups.refrescar_kpis_diarios()
+        with CaptureQueriesContext(connection) as contexto:
+            response = client.get("/api/v1/reports/dashboard-subgerente/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["kpis"]["ot_cerradas_mes"] == 1
+        assert response.data["kpis"]["tiempo_reparacion_promedio_horas"] == 2.0
+        assert sum(s["ot_cerradas"] for s in response.data["tendencias_semanales"]) == 1
+        # Antes: 2 queries por semana + 3 de KPIs mensuales
+        assert len(contexto.captured_queries) <= 6
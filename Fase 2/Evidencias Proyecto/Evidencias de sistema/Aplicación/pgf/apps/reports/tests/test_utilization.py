@@ -0,0 +1,179 @@
+# apps/reports/tests/test_utilization.py
+"""
+Tests para la utilización de mecánicos (apps/reports/utilization.py).
+
+Verifican que:
+- El cálculo con NumPy une intervalos solapados y descuenta las pausas
+  solo mientras hay ejecución
+- La pausa de una OT no descuenta el trabajo en otra OT del mismo mecánico
+- Las OT y pausas reales (incluida la colación) se cruzan con la jornada
+- recalcular() guarda las filas y consultar() las lee, calculando en línea
+  los días posteriores a la marca de agua y los anteriores sin filas
+- El endpoint /api/v1/reports/utilizacion/ aplica permisos y valida fechas
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.reports import utilization
+from apps.reports.models import ControlRollup, UtilizacionDiaria
+from apps.workorders.models import OrdenTrabajo, Pausa
+
+
+@pytest.fixture(autouse=True)
+def jornada(settings):
+    """Jornada 08:00-18:00 todos los días (los tests no dependen del día de la semana)"""
+    settings.UTILIZACION_JORNADA_INICIO = "08:00"
+    settings.UTILIZACION_JORNADA_FIN = "18:00"
+    settings.UTILIZACION_DIAS_LABORALES = list(range(7))
+
+
+def _a_las(dia, hora, minuto=0):
+    return timezone.make_aware(datetime.combine(dia, datetime.min.time())) + timedelta(hours=hora, minutes=minuto)
+
+
+def _ot_ejecutada(vehiculo, supervisor, mecanico, inicio, cierre=None):
+    ot = OrdenTrabajo.objects.create(vehiculo=vehiculo, supervisor=supervisor, mecanico=mecanico, motivo="Utilización")
+    OrdenTrabajo.objects.filter(pk=ot.pk).update(
+        estado="CERRADA" if cierre else "EN_EJECUCION", fecha_inicio_ejecucion=inicio, cierre=cierre
+    )
+    return ot
+
+
+def _pausa(ot, usuario, inicio, fin, tipo="OTRO"):
+    pausa = Pausa.objects.create(ot=ot, usuario=usuario, tipo=tipo, motivo=tipo, es_automatica=tipo == "COLACION")
+    Pausa.objects.filter(pk=pausa.pk).update(inicio=inicio, fin=fin)
+
+
+class TestCalcularSegundos:
+    """Tests para calcular_segundos (sin base de datos)"""
+
+    @pytest.mark.unit
+    def test_union_y_pausas(self):
+        limites = np.array([[0, 36000], [86400, 122400]])
+        ejecuciones = ([0, 0, 0], [0, 1, 2], [3600, 15000, 90000], [20000, 30000, 86400 + 40000])
+        # La segunda pausa cae fuera de la ejecución de su OT: cuenta como ocioso
+        pausas = ([0, 1], [10000, 32000], [11000, 33000])
+
+        segundos = utilization.calcular_segundos(2, limites, ejecuciones, pausas)
+
+        assert segundos["productivo_segundos"].tolist() == [[25400, 32400], [0, 0]]
+        assert segundos["pausa_segundos"].tolist() == [[1000, 0], [0, 0]]
+        assert segundos["ocioso_segundos"].tolist() == [[9600, 3600], [36000, 36000]]
+
+    @pytest.mark.unit
+    def test_pausa_de_una_ot_no_descuenta_otra(self):
+        """OT 0 detenida casi toda la jornada mientras el mecánico trabaja en la OT 1"""
+        limites = np.array([[0, 36000]])
+        ejecuciones = ([0, 0], [0, 1], [0, 5000], [36000, 20000])
+        pausas = ([0], [1000], [30000])
+
+        segundos = utilization.calcular_segundos(1, limites, ejecuciones, pausas)
+
+        assert segundos["productivo_segundos"].tolist() == [[1000 + 15000 + 6000]]
+        assert segundos["pausa_segundos"].tolist() == [[4000 + 10000]]
+        assert segundos["ocioso_segundos"].tolist() == [[0]]
+
+
+@pytest.mark.django_db
+class TestUtilizacion:
+    """Tests para calcular, recalcular y consultar"""
+
+    def test_ot_y_colacion(self, vehiculo, supervisor_user, mecanico_user):
+        ayer = timezone.localdate() - timedelta(days=1)
+        ot = _ot_ejecutada(vehiculo, supervisor_user, mecanico_user, _a_las(ayer, 7), _a_las(ayer, 15))
+        _pausa(ot, mecanico_user, _a_las(ayer, 12, 30), _a_las(ayer, 13, 15), tipo="COLACION")
+
+        filas = utilization.calcular(ayer, ayer)
+
+        fila = next(f for f in filas if f["mecanico_id"] == mecanico_user.id)
+        assert fila["productivo_segundos"] == 7 * 3600 - 45 * 60
+        assert fila["pausa_segundos"] == 45 * 60
+        assert fila["ocioso_segundos"] == 3 * 3600
+
+    def test_ot_solapadas(self, vehiculo, supervisor_user, mecanico_user):
+        """Una OT esperando repuestos no vuelve pausa el trabajo en otra OT"""
+        ayer = timezone.localdate() - timedelta(days=1)
+        esperando = _ot_ejecutada(vehiculo, supervisor_user, mecanico_user, _a_las(ayer, 8))
+        _pausa(esperando, mecanico_user, _a_las(ayer, 9), None)
+        _ot_ejecutada(vehiculo, supervisor_user, mecanico_user, _a_las(ayer, 10), _a_las(ayer, 16))
+
+        fila = next(f for f in utilization.calcular(ayer, ayer) if f["mecanico_id"] == mecanico_user.id)
+
+        assert fila["productivo_segundos"] == 7 * 3600
+        assert fila["pausa_segundos"] == 3 * 3600
+        assert fila["ocioso_segundos"] == 0
+
+    def test_recalcular_y_consultar(self, vehiculo, supervisor_user, mecanico_user):
+        hoy = timezone.localdate()
+        ayer = hoy - timedelta(days=1)
+        _ot_ejecutada(vehiculo, supervisor_user, mecanico_user, _a_las(ayer, 9), _a_las(ayer, 10))
+
+        filas = utilization.recalcular(desde=ayer - timedelta(days=1), hasta=ayer)
+
+        assert filas == 2 * UtilizacionDiaria.objects.values("mecanico").distinct().count()
+        assert utilization.recalcular(desde=ayer - timedelta(days=1), hasta=ayer) == filas
+        assert ControlRollup.objects.get(nombre=utilization.NOMBRE_ROLLUP).watermark == _a_las(hoy, 0)
+        # Los días guardados se leen de la tabla; hoy se calcula en línea
+        UtilizacionDiaria.objects.filter(mecanico=mecanico_user, fecha=ayer).update(productivo_segundos=1)
+
+        resultado = utilization.consultar(ayer, hoy, mecanico_id=mecanico_user.id, por_dia=True)
+
+        assert [d["fecha"] for d in resultado[mecanico_user.id]["dias"]] == [ayer, hoy]
+        assert resultado[mecanico_user.id]["productivo_segundos"] == 1
+        assert resultado[mecanico_user.id]["dias"][1]["productivo_segundos"] == 0
+
+
+    def test_dias_anteriores_sin_filas(self, vehiculo, supervisor_user, mecanico_user):
+        """Los días antes de la primera corrida nocturna se calculan, no salen en cero"""
+        hoy = timezone.localdate()
+        hace_un_mes = hoy - timedelta(days=30)
+        siguiente = hace_un_mes + timedelta(days=1)
+        _ot_ejecutada(vehiculo, supervisor_user, mecanico_user, _a_las(hace_un_mes, 9), _a_las(hace_un_mes, 11))
+        utilization.recalcular()
+
+        resultado = utilization.consultar(hace_un_mes, siguiente, mecanico_id=mecanico_user.id, por_dia=True)
+
+        assert not UtilizacionDiaria.objects.filter(fecha=hace_un_mes).exists()
+        assert [d["fecha"] for d in resultado[mecanico_user.id]["dias"]] == [hace_un_mes, siguiente]
+        assert resultado[mecanico_user.id]["productivo_segundos"] == 2 * 3600
+
+
+@pytest.mark.api
+@pytest.mark.django_db
+class TestReporteUtilizacionView:
+    """Tests para GET /api/v1/reports/utilizacion/"""
+
+    URL = "/api/v1/reports/utilizacion/"
+
+    def test_minutos_por_mecanico(self, authenticated_client, vehiculo, supervisor_user, mecanico_user):
+        ayer = timezone.localdate() - timedelta(days=1)
+        _ot_ejecutada(vehiculo, supervisor_user, mecanico_user, _a_las(ayer, 8), _a_las(ayer, 13))
+
+        response = authenticated_client.get(self.URL, {
+            "fecha_inicio": ayer.isoformat(), "fecha_fin": ayer.isoformat(), "por_dia": "true"
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        fila = next(m for m in response.data["mecanicos"] if m["mecanico_id"] == mecanico_user.id)
+        assert fila["productivo_minutos"] == 300.0
+        assert fila["ocioso_minutos"] == 300.0
+        assert fila["utilizacion"] == 0.5
+        assert fila["dias"] == [{
+            "fecha": ayer.isoformat(), "productivo_minutos": 300.0, "pausa_minutos": 0.0, "ocioso_minutos": 300.0
+        }]
+
+    def test_permisos_y_fechas(self, authenticated_client, mecanico_user):
+        mecanico_client = APIClient()
+        mecanico_client.force_authenticate(user=mecanico_user)
+
+        assert mecanico_client.get(self.URL).status_code == status.HTTP_403_FORBIDDEN
+        assert authenticated_client.get(self.URL, {"fecha_inicio": "ayer"}).status_code == status.HTTP_400_BAD_REQUEST
+        assert authenticated_client.get(self.URL, {
+            "fecha_inicio": "2026-10-10", "fecha_fin": "2026-10-01"
+        }).status_code == status.HTTP_400_BAD_REQUEST
@@ -8,7 +8,11 @@ from .views import (
     DashboardSubgerenteView,
     ReporteProductividadView,
     ReportePausasView,
-    ReportePDFView
+    ReporteUtilizacionView,
+    ReporteCuboView,
+    ReportePDFView,
+    ReporteJobListView,
+    ReporteJobDetailView
 )
 
 urlpatterns = [
@@ -19,6 +23,10 @@ urlpatterns = [
     path('dashboard-subgerente/', DashboardSubgerenteView.as_view(), name='dashboard-subgerente'),
     path('productividad/', ReporteProductividadView.as_view(), name='reporte-productividad'),
     path('pausas/', ReportePausasView.as_view(), name='reporte-pausas'),
+    path('utilizacion/', ReporteUtilizacionView.as_view(), name='reporte-utilizacion'),
+    path('cube/', ReporteCuboView.as_view(), name='reporte-cubo'),
     path('pdf/', ReportePDFView.as_view(), name='reporte-pdf'),
+    path('jobs/', ReporteJobListView.as_view(), name='reporte-jobs'),
+    path('jobs/<uuid:pk>/', ReporteJobDetailView.as_view(), name='reporte-job-detalle'),
 ]
 
@@ -0,0 +1,400 @@
+# apps/reports/utilization.py
+"""
+Utilización de mecánicos: minutos productivos, en pausa y ociosos por día.
+
+Para cada mecánico y día laboral se cruzan, dentro de la jornada del
+taller (UTILIZACION_JORNADA_INICIO/FIN), tres capas de intervalos:
+- Jornada: un intervalo por día laboral
+- Ejecución: fecha_inicio_ejecucion → cierre de las OT asignadas al
+  mecánico (OrdenTrabajo.mecanico); si la OT sigue abierta, hasta ahora
+- Pausa: inicio → fin de las pausas de esas OT (manuales y colación)
+
+Cálculo (calcular_segundos):
+Las capas se cargan en bloque (dos consultas) como arreglos de segundos
+epoch y se resuelven con NumPy, sin recorrer OT ni pausas en Python. Cada
+intervalo aporta un evento +1 en su inicio y -1 en su fin en la columna
+de su capa. Ordenando los eventos por (clave, instante) y acumulando
+(cumsum), cada tramo entre dos eventos consecutivos queda con el número
+de intervalos activos de cada capa (_barrido). Se hacen dos pasadas:
+1. Por OT: ejecución menos sus propias pausas = trabajo activo. Una
+   pausa de una OT no descuenta el trabajo en otra OT del mismo mecánico
+2. Por mecánico, cruzando jornada, ejecución y trabajo activo:
+   - productivo: jornada y alguna OT en trabajo activo
+   - pausa: jornada, alguna OT en ejecución y todas pausadas
+   - ocioso: jornada sin ejecución
+Los tramos se suman por (mecánico, día) con np.bincount. Como cada capa
+suma cero por clave, el acumulado vuelve a cero al pasar a la siguiente y
+todas se resuelven en una sola pasada.
+
+Persistencia:
+- recalcular(): guarda UtilizacionDiaria de un rango de días (tarea
+  nocturna calcular_utilizacion_mecanicos) y avanza la marca de agua
+  (ControlRollup "utilizacion")
+- consultar(): suma las filas guardadas y calcula en línea los días
+  posteriores a la marca de agua (normalmente solo el día actual) y los
+  anteriores que nunca se guardaron
+
+NumPy se importa recién al calcular (apps/core/lazy.py), no al arrancar.
+
+Relaciones:
+- Usa: apps/workorders/models.py (OrdenTrabajo, Pausa)
+- Usa: apps/reports/models.py (UtilizacionDiaria, ControlRollup)
+- Usado por: apps/reports/tasks.py, apps/reports/views.py (ReporteUtilizacionView)
+"""
+
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import BigIntegerField, DateTimeField, F, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Extract
+from django.utils import timezone
+
+from apps.core.date_filters import inicio_dia
+from apps.core.lazy import importar_diferido
+from apps.workorders.models import OrdenTrabajo, Pausa
+
+from .models import ControlRollup, UtilizacionDiaria
+
+np = importar_diferido("numpy")
+
+# Nombre de la marca de agua en ControlRollup
+NOMBRE_ROLLUP = "utilizacion"
+
+# Días hacia atrás que recalcula la tarea nocturna (cubre cierres y
+# reasignaciones registradas con atraso)
+DIAS_RECALCULO = 7
+
+CAMPOS = ("productivo_segundos", "pausa_segundos", "ocioso_segundos")
+
+# Estados en que una OT sin cierre sigue contando como en ejecución (una
+# OT ANULADA sin cierre no tiene fin conocido y se ignora)
+ESTADOS_ABIERTOS = ("EN_EJECUCION", "EN_PAUSA", "EN_QA", "RETRABAJO")
+
+
+# ==================== CÁLCULO ====================
+
+def _hora(texto):
+    return datetime.strptime(texto, "%H:%M").time()
+
+
+def jornadas(desde, hasta):
+    """
+    Días laborales del rango y su jornada en segundos epoch.
+
+    Parámetros:
+    - desde, hasta: date (inclusivos)
+
+    Retorna:
+    - (dias, limites): lista de date y arreglo (n_dias, 2) con inicio/fin
+    """
+    inicio, fin = _hora(settings.UTILIZACION_JORNADA_INICIO), _hora(settings.UTILIZACION_JORNADA_FIN)
+    dias, limites = [], []
+    dia = desde
+    while dia <= hasta:
+        if dia.weekday() in settings.UTILIZACION_DIAS_LABORALES:
+            dias.append(dia)
+            limites.append((
+                int(timezone.make_aware(datetime.combine(dia, inicio)).timestamp()),
+                int(timezone.make_aware(datetime.combine(dia, fin)).timestamp()),
+            ))
+        dia += timedelta(days=1)
+    return dias, np.array(limites, dtype=np.int64).reshape(-1, 2)
+
+
+def _barrido(capas):
+    """
+    Tramos entre eventos consecutivos de varias capas de intervalos.
+
+    Parámetros:
+    - capas: Lista de (indice, inicio, fin) como arreglos; el índice es la
+      clave de cada intervalo (mecánico u OT)
+
+    Retorna:
+    - (clave, inicio, fin, activos): un tramo por fila, con activos[i, c]
+      True si algún intervalo de la capa c cubre el tramo i. Los tramos sin
+      largo (cambios de clave o eventos simultáneos) se descartan
+    """
+    n_capas = len(capas)
+    indices_eventos, instantes, deltas = [], [], []
+    for numero, (indices, inicios, fines) in enumerate(capas):
+        indices, inicios, fines = (np.asarray(a, dtype=np.int64) for a in (indices, inicios, fines))
+        validos = fines > inicios
+        indices, inicios, fines = indices[validos], inicios[validos], fines[validos]
+        delta = np.zeros((2 * len(indices), n_capas), dtype=np.int64)
+        delta[:len(indices), numero] = 1
+        delta[len(indices):, numero] = -1
+        indices_eventos.append(np.concatenate([indices, indices]))
+        instantes.append(np.concatenate([inicios, fines]))
+        deltas.append(delta)
+
+    indices_eventos = np.concatenate(indices_eventos).astype(np.int64)
+    instantes = np.concatenate(instantes).astype(np.int64)
+    orden = np.lexsort((instantes, indices_eventos))
+    indices_eventos, instantes = indices_eventos[orden], instantes[orden]
+    if len(instantes) < 2:
+        vacio = np.zeros(0, dtype=np.int64)
+        return vacio, vacio, vacio, np.zeros((0, n_capas), dtype=bool)
+    activos = np.cumsum(np.concatenate(deltas)[orden], axis=0)[:-1] > 0
+
+    # Tramo i: de instantes[i] a instantes[i + 1], dentro de la misma clave
+    con_largo = (instantes[1:] > instantes[:-1]) & (indices_eventos[1:] == indices_eventos[:-1])
+    return indices_eventos[:-1][con_largo], instantes[:-1][con_largo], instantes[1:][con_largo], activos[con_largo]
+
+
+def calcular_segundos(n_mecanicos, limites, ejecuciones, pausas):
+    """
+    Segundos productivos, en pausa y ociosos por mecánico y día.
+
+    Parámetros:
+    - n_mecanicos: Número de mecánicos (índices 0..n-1)
+    - limites: Arreglo (n_dias, 2) con la jornada de cada día (epoch)
+    - ejecuciones: (indice_mecanico, indice_ot, inicio, fin) como arreglos
+    - pausas: (indice_ot, inicio, fin) como arreglos
+
+    Cada pausa descuenta solo la ejecución de su propia OT: un mecánico
+    con una OT detenida (esperando repuestos) y otra en curso está
+    trabajando. Primero se obtienen, por OT, los tramos de ejecución sin
+    pausa (trabajo activo); luego se cruzan por mecánico con la jornada:
+    - productivo: jornada y alguna OT en trabajo activo
+    - pausa: jornada, alguna OT en ejecución y todas pausadas
+    - ocioso: jornada sin ninguna OT en ejecución
+
+    Retorna:
+    - Dict {"productivo_segundos", "pausa_segundos", "ocioso_segundos"}
+      con arreglos (n_mecanicos, n_dias)
+    """
+    n_dias = len(limites)
+    mecanico_de_ot, ot_de_ejecucion, inicios, fines = (np.asarray(a, dtype=np.int64) for a in ejecuciones)
+    n_ots = int(ot_de_ejecucion.max()) + 1 if len(ot_de_ejecucion) else 0
+    mecanico_por_ot = np.zeros(n_ots, dtype=np.int64)
+    mecanico_por_ot[ot_de_ejecucion] = mecanico_de_ot
+
+    # Trabajo activo por OT: su ejecución menos sus propias pausas
+    ot_pausada = np.asarray(pausas[0], dtype=np.int64)
+    de_ots_conocidas = ot_pausada < n_ots
+    ots, t0, t1, capas_ot = _barrido([
+        (ot_de_ejecucion, inicios, fines),
+        tuple(np.asarray(a, dtype=np.int64)[de_ots_conocidas] for a in pausas),
+    ])
+    trabajo = capas_ot[:, 0] & ~capas_ot[:, 1]
+
+    mecanicos, instantes, fin_tramo, activos = _barrido([
+        (np.repeat(np.arange(n_mecanicos), n_dias), np.tile(limites[:, 0], n_mecanicos),
+         np.tile(limites[:, 1], n_mecanicos)),
+        (mecanico_de_ot, inicios, fines),
+        (mecanico_por_ot[ots[trabajo]], t0[trabajo], t1[trabajo]),
+    ])
+    largo = fin_tramo - instantes
+    en_jornada, en_ejecucion, trabajando = activos[:, 0], activos[:, 1], activos[:, 2]
+
+    # Dentro de la jornada cada tramo pertenece a un solo día
+    dia = np.clip(np.searchsorted(limites[:, 0], instantes, side="right") - 1, 0, None)
+    celda = mecanicos * n_dias + dia
+
+    def sumar(mascara):
+        total = np.bincount(celda[mascara], weights=largo[mascara], minlength=n_mecanicos * n_dias)
+        return total.astype(np.int64).reshape(n_mecanicos, n_dias)
+
+    return {
+        "productivo_segundos": sumar(en_jornada & trabajando),
+        "pausa_segundos": sumar(en_jornada & en_ejecucion & ~trabajando),
+        "ocioso_segundos": sumar(en_jornada & ~en_ejecucion),
+    }
+
+
+# Extract("epoch") sobre un DateTimeField convierte antes a hora local; se
+# extrae de la diferencia con el epoch para obtener segundos UTC
+_EPOCH = Value(datetime(1970, 1, 1, tzinfo=dt_timezone.utc), output_field=DateTimeField())
+
+
+def _epoch(expresion):
+    return Cast(Extract(expresion - _EPOCH, "epoch"), BigIntegerField())
+
+
+def _intervalos(queryset, claves, inicio, fin, ahora):
+    """Filas (*claves, inicio, fin) de un queryset en segundos epoch, con los abiertos hasta `ahora`."""
+    return queryset.annotate(
+        t0=_epoch(F(inicio)), t1=_epoch(Coalesce(fin, Value(ahora, output_field=DateTimeField())))
+    ).values_list(*claves, "t0", "t1").iterator(chunk_size=5000)
+
+
+def _columnas(filas, n):
+    return tuple(np.array(filas, dtype=np.int64).reshape(-1, n).T)
+
+
+def calcular(desde, hasta, mecanico_ids=None):
+    """
+    Calcula la utilización de un rango de días sin guardarla.
+
+    Parámetros:
+    - desde, hasta: date (inclusivos)
+    - mecanico_ids: Mecánicos a calcular (default: usuarios MECANICO activos
+      y cualquier mecánico con OT en ejecución en el rango)
+
+    Retorna:
+    - Lista de dicts {"mecanico_id", "fecha", "productivo_segundos",
+      "pausa_segundos", "ocioso_segundos"}, una por mecánico y día laboral
+    """
+    dias, limites = jornadas(desde, hasta)
+    if not dias:
+        return []
+    ahora = timezone.now()
+    rango_inicio = inicio_dia(desde)
+    rango_fin = inicio_dia(hasta + timedelta(days=1))
+
+    ots = OrdenTrabajo.objects.filter(
+        mecanico__isnull=False,
+        fecha_inicio_ejecucion__lt=rango_fin,
+    ).filter(
+        Q(cierre__gt=rango_inicio) | Q(cierre__isnull=True, estado__in=ESTADOS_ABIERTOS)
+    )
+    if mecanico_ids is None:
+        mecanico_ids = set(
+            get_user_model().objects.filter(rol="MECANICO", is_active=True).values_list("id", flat=True)
+        )
+        mecanico_ids |= set(ots.order_by().values_list("mecanico_id", flat=True).distinct())
+    else:
+        ots = ots.filter(mecanico_id__in=mecanico_ids)
+    pausas = Pausa.objects.filter(
+        ot__in=ots,
+        inicio__lt=rango_fin,
+    ).filter(Q(fin__gt=rango_inicio) | Q(fin__isnull=True))
+    mecanico_ids = sorted(mecanico_ids)
+    indices = {mecanico_id: i for i, mecanico_id in enumerate(mecanico_ids)}
+
+    # Las OT se numeran al leerlas: las pausas se asocian a su OT
+    indices_ot, ejecuciones = {}, []
+    for ot_id, m, t0, t1 in _intervalos(ots, ("id", "mecanico_id"), "fecha_inicio_ejecucion", "cierre", ahora):
+        if m in indices:
+            ejecuciones.append((indices[m], indices_ot.setdefault(ot_id, len(indices_ot)), t0, t1))
+    pausas_ot = [
+        (indices_ot[ot_id], t0, t1)
+        for ot_id, t0, t1 in _intervalos(pausas, ("ot_id",), "inicio", "fin", ahora)
+        if ot_id in indices_ot
+    ]
+
+    segundos = calcular_segundos(len(mecanico_ids), limites, _columnas(ejecuciones, 4), _columnas(pausas_ot, 3))
+    return [
+        {
+            "mecanico_id": mecanico_id,
+            "fecha": dia,
+            **{campo: int(segundos[campo][i, j]) for campo in CAMPOS},
+        }
+        for i, mecanico_id in enumerate(mecanico_ids)
+        for j, dia in enumerate(dias)
+    ]
+
+
+# ==================== PERSISTENCIA ====================
+
+def recalcular(desde=None, hasta=None):
+    """
+    Recalcula y guarda UtilizacionDiaria de un rango de días.
+
+    Parámetros:
+    - desde: date inicial (default: DIAS_RECALCULO días antes de hasta)
+    - hasta: date final (default: ayer)
+
+    Los días del rango se reemplazan en una transacción. Si el rango llega
+    a la marca de agua o la supera, la marca avanza hasta `hasta`.
+
+    Retorna:
+    - Número de filas guardadas
+    """
+    hasta = hasta or timezone.localdate() - timedelta(days=1)
+    desde = desde or hasta - timedelta(days=DIAS_RECALCULO - 1)
+    filas = [UtilizacionDiaria(**fila) for fila in calcular(desde, hasta)]
+
+    with transaction.atomic():
+        UtilizacionDiaria.objects.filter(fecha__gte=desde, fecha__lte=hasta).delete()
+        UtilizacionDiaria.objects.bulk_create(filas, batch_size=1000)
+        control, _ = ControlRollup.objects.select_for_update().get_or_create(nombre=NOMBRE_ROLLUP)
+        calculado_hasta = inicio_dia(hasta + timedelta(days=1))
+        if control.watermark is None or control.watermark < calculado_hasta:
+            control.watermark = calculado_hasta
+            control.save(update_fields=["watermark", "actualizado_en"])
+    return len(filas)
+
+
+def _dias_sin_guardar(desde, hasta):
+    """
+    Rangos (desde, hasta) de días laborales hasta la marca de agua que no
+    tienen filas en UtilizacionDiaria (anteriores al primer recalcular()
+    o a un período reconstruido), agrupando los días consecutivos.
+    """
+    guardados = set(
+        UtilizacionDiaria.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+        .values_list("fecha", flat=True).distinct().order_by()
+    )
+    rangos, abierto = [], False
+    dia = desde
+    while dia <= hasta:
+        if dia in guardados:
+            abierto = False
+        elif dia.weekday() in settings.UTILIZACION_DIAS_LABORALES:
+            # Los días no laborales entre dos faltantes no cortan el rango
+            if abierto:
+                rangos[-1] = (rangos[-1][0], dia)
+            else:
+                rangos.append((dia, dia))
+                abierto = True
+        dia += timedelta(days=1)
+    return rangos
+
+
+def consultar(desde, hasta, mecanico_id=None, por_dia=False):
+    """
+    Utilización por mecánico de un rango de días.
+
+    Los días hasta la marca de agua se leen de UtilizacionDiaria (una suma
+    agrupada por mecánico); los posteriores, y los anteriores que no tienen
+    filas guardadas (p. ej. antes de la primera corrida nocturna), se
+    calculan en línea.
+
+    Parámetros:
+    - desde, hasta: date (inclusivos)
+    - mecanico_id: Limitar a un mecánico (opcional)
+    - por_dia: Incluir el detalle por día de cada mecánico
+
+    Retorna:
+    - Dict {mecanico_id: {"productivo_segundos", "pausa_segundos",
+      "ocioso_segundos", "dias"?: [...]}}
+    """
+    control = ControlRollup.objects.filter(nombre=NOMBRE_ROLLUP).values_list("watermark", flat=True).first()
+    ultimo_guardado = timezone.localdate(control) - timedelta(days=1) if control else desde - timedelta(days=1)
+
+    resultado = {}
+
+    def acumular(mecanico, valores, fecha=None):
+        totales = resultado.setdefault(mecanico, {campo: 0 for campo in CAMPOS})
+        for campo in CAMPOS:
+            totales[campo] += valores[campo] or 0
+        if por_dia and fecha is not None:
+            totales.setdefault("dias", []).append({"fecha": fecha, **{c: valores[c] for c in CAMPOS}})
+
+    ids = None if mecanico_id is None else [mecanico_id]
+    guardado_hasta = min(hasta, ultimo_guardado)
+    guardadas = UtilizacionDiaria.objects.filter(fecha__gte=desde, fecha__lte=guardado_hasta)
+    if mecanico_id is not None:
+        guardadas = guardadas.filter(mecanico_id=mecanico_id)
+    if por_dia:
+        for fila in guardadas.order_by("mecanico_id", "fecha").values("mecanico_id", "fecha", *CAMPOS):
+            acumular(fila["mecanico_id"], fila, fila["fecha"])
+    else:
+        for fila in guardadas.values("mecanico_id").annotate(**{c: Sum(c) for c in CAMPOS}).order_by():
+            acumular(fila["mecanico_id"], fila)
+
+    pendientes = _dias_sin_guardar(desde, guardado_hasta) if desde <= guardado_hasta else []
+    pendiente_desde = max(desde, ultimo_guardado + timedelta(days=1))
+    if pendiente_desde <= hasta:
+        pendientes.append((pendiente_desde, hasta))
+    for inicio, fin in pendientes:
+        for fila in calcular(inicio, fin, mecanico_ids=ids):
+            acumular(fila["mecanico_id"], fila, fila["fecha"])
+    if por_dia:
+        for totales in resultado.values():
+            totales.get("dias", []).sort(key=lambda d: d["fecha"])
+    return resultado
@@ -10,39 +10,119 @@ Este módulo define todos los endpoints de la API relacionados con:
 
 Relaciones:
 - Usa: apps/workorders/models.py (OrdenTrabajo, Pausa)
+- Usa: apps/reports/aggregation.py (duraciones por estado del ledger TramoEstado)
 - Usa: apps/vehicles/models.py (Vehiculo)
 - Usa: apps/users/models.py (User)
 - Usa: apps/inventory/models.py (SolicitudRepuesto, MovimientoStock)
 - Usa: apps/reports/pdf_generator.py (generación de PDFs)
+- Usa: apps/reports/dashboards.py (payloads precalculados de los dashboards)
+- Usa: apps/reports/jobs.py (reportes PDF asíncronos)
+- Usa: apps/reports/pdf_cache.py (caché de PDFs generados)
+- Usa: apps/reports/utilization.py (utilización diaria de mecánicos)
+- Usa: apps/reports/cube.py (cubo de análisis sobre HechoOT)
 - Conectado a: apps/reports/urls.py
 
 Endpoints principales:
 - /api/v1/reports/dashboard-ejecutivo/ → KPIs del dashboard ejecutivo
 - /api/v1/reports/productividad/ → Reporte de productividad
 - /api/v1/reports/pdf/ → Generar reporte PDF
+- /api/v1/reports/jobs/ → Reportes PDF asíncronos (Celery + S3)
 - /api/v1/reports/pausas/ → Reporte de pausas
+- /api/v1/reports/utilizacion/ → Minutos productivos/en pausa/ociosos por mecánico
+- /api/v1/reports/cube/ → Cubo de análisis (dimensiones, medidas y filtros)
 
 Características:
-- Caché de KPIs (2 minutos) para optimizar rendimiento
+- Dashboards precalculados en Celery y servidos desde caché (apps/reports/dashboards.py)
 - Generación de PDFs con ReportLab
 - Agregaciones complejas con Django ORM
 """
 
 from rest_framework import views, status, permissions
 from rest_framework.response import Response
-from django.db.models import Count, Avg, Sum, Q, F  # Funciones de agregación
+from django.db.models import Count, Avg, Q, F  # Funciones de agregación
+from django.conf import settings
 from django.utils import timezone
-from django.core.cache import cache  # Sistema de caché
-from datetime import timedelta
+from datetime import date, timedelta
 from drf_spectacular.utils import extend_schema
 
 from apps.workorders.models import OrdenTrabajo, Pausa
-from apps.vehicles.models import Vehiculo
 from apps.users.models import User
 from apps.inventory.models import SolicitudRepuesto, MovimientoStock
+from apps.reports import aggregation, cube, dashboards, jobs, pdf_cache, scopes, utilization
+from apps.reports.models import ReporteJob
 
 
-class DashboardEjecutivoView(views.APIView):
+class DashboardPrecalculadoView(views.APIView):
+    """
+    Base de los dashboards por rol: solo lee el payload precalculado.
+    
+    Los payloads se calculan en Celery (apps/reports/dashboards.py) cada minuto
+    y tras ráfagas de escrituras; el GET nunca calcula en el request. Cada
+    usuario lee el payload de su alcance de datos (zonas, ver
+    apps/reports/scopes.py).
+    
+    Subclases definen:
+    - dashboard: Clave en apps/reports/dashboards.py DASHBOARDS
+    - mensaje_no_autorizado: Detalle del 403
+    
+    Query params:
+    - zona: Acota el dashboard a una zona (dentro de las del usuario, si tiene)
+    - refresh: "true" pide un recálculo forzado, limitado por usuario y
+      agrupado con otros refrescos del mismo dashboard (el resultado llega por
+      WebSocket como "data_update" con entity_type "dashboard")
+    
+    Retorna:
+    - 200: Payload del dashboard (headers X-Dashboard-Generado-En,
+      X-Dashboard-Alcance y, si se pidió refresh, X-Dashboard-Refresh)
+    - 202: Si aún no hay payload; el cálculo quedó encolado (header Retry-After)
+    - 400: Si la zona no existe
+    - 403: Si no tiene permisos o la zona está fuera de su alcance
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    dashboard = None
+    mensaje_no_autorizado = "No autorizado."
+    
+    def get(self, request):
+        if request.user.rol not in dashboards.DASHBOARDS[self.dashboard]["roles"]:
+            return Response(
+                {"detail": self.mensaje_no_autorizado},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        alcance = scopes.alcance_de(request.user, request.query_params.get("zona"))
+        dashboards.registrar_alcance(alcance, request.user.id)
+        headers = {"X-Dashboard-Alcance": scopes.clave(alcance)}
+        
+        # ?refresh=true ya no invalida la caché: pide un recálculo forzado
+        # (limitado y agrupado) y se sigue sirviendo el último payload
+        if request.query_params.get('refresh', '').lower() == 'true':
+            headers["X-Dashboard-Refresh"] = dashboards.solicitar_refresco(
+                self.dashboard, alcance, request.user.id
+            )
+        
+        entrada = dashboards.leer(self.dashboard, alcance)
+        if entrada is None:
+            # Sin payload (arranque en frío, caché vaciada o alcance nuevo):
+            # encolar y volver a leer por si el worker ya lo dejó en caché
+            # (o Celery corre en modo eager)
+            dashboards.solicitar_precalculo(self.dashboard, alcance)
+            entrada = dashboards.leer(self.dashboard, alcance)
+        
+        if entrada is None:
+            headers["Retry-After"] = str(dashboards.REINTENTAR_EN)
+            return Response(
+                {"detail": "El dashboard se está calculando. Reintente en unos segundos.",
+                 "estado": "calculando"},
+                status=status.HTTP_202_ACCEPTED,
+                headers=headers
+            )
+        
+        headers["X-Dashboard-Generado-En"] = entrada["generado_en"].isoformat()
+        return Response(entrada["datos"], headers=headers)
+
+
+class DashboardEjecutivoView(DashboardPrecalculadoView):
     """
     Dashboard con KPIs para el ejecutivo y jefe de taller.
     
@@ -52,8 +132,8 @@ class DashboardEjecutivoView(views.APIView):
     - EJECUTIVO, ADMIN, SPONSOR, JEFE_TALLER, SUPERVISOR, COORDINADOR_ZONA
     
     Características:
-    - Caché de 2 minutos para optimizar rendimiento
-    - KPIs en tiempo real
+    - Payload precalculado en Celery (apps/reports/dashboards.py calcular_ejecutivo)
+    - KPIs actualizados cada minuto y tras escrituras, con push por WebSocket
     - Últimas 5 OT
     - Pausas más frecuentes
     - Mecánicos con más carga
@@ -80,289 +160,18 @@ class DashboardEjecutivoView(views.APIView):
         "mecanicos_carga": [...],
         "tiempos_promedio": {...}
       }
+    - 202: Si el payload aún se está calculando
     - 403: Si no tiene permisos
     """
-    permission_classes = [permissions.IsAuthenticated]
+    dashboard = "ejecutivo"
+    mensaje_no_autorizado = "No autorizado para ver el dashboard ejecutivo."
     
     @extend_schema(
         description="Obtiene todos los KPIs del dashboard ejecutivo",
         responses={200: None}
     )
     def get(self, request):
-        """
-        Retorna todos los KPIs requeridos para el dashboard ejecutivo.
-        
-        Proceso:
-        1. Verifica permisos
-        2. Intenta obtener del caché (válido 2 minutos)
-        3. Si no está en caché, calcula todos los KPIs
-        4. Guarda en caché
-        5. Retorna datos
-        
-        Optimizaciones:
-        - Caché de 2 minutos reduce carga en la base de datos
-        - select_related para reducir queries
-        - Agregaciones eficientes con Django ORM
-        """
-        # Verificar que el usuario tenga rol EJECUTIVO, ADMIN, SPONSOR, JEFE_TALLER, SUPERVISOR o COORDINADOR_ZONA
-        if request.user.rol not in ("EJECUTIVO", "ADMIN", "SPONSOR", "JEFE_TALLER", "SUPERVISOR", "COORDINADOR_ZONA"):
-            return Response(
-                {"detail": "No autorizado para ver el dashboard ejecutivo."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        # Verificar si se solicita refrescar (invalidar caché)
-        refresh = request.query_params.get('refresh', '').lower() == 'true'
-        
-        # Intentar obtener del cache (válido por 2 minutos)
-        # Esto reduce la carga en la base de datos para consultas frecuentes
-        from apps.core.caching import get_or_set_cache
-        cache_key = "dashboard_ejecutivo_kpis"
-        
-        # Si se solicita refrescar, invalidar el caché primero
-        if refresh:
-            cache.delete(cache_key)
-        
-        def calculate_kpis():
-            """Calcula todos los KPIs del dashboard"""
-            # Fecha actual para cálculos
-            hoy = timezone.now().date()
-            inicio_dia = timezone.make_aware(timezone.datetime.combine(hoy, timezone.datetime.min.time()))
-            
-            # ==================== KPIs DE OT ====================
-            # Contar OT por estado
-            ot_abiertas = OrdenTrabajo.objects.filter(estado="ABIERTA").count()
-            ot_en_diagnostico = OrdenTrabajo.objects.filter(estado="EN_DIAGNOSTICO").count()
-            ot_en_ejecucion = OrdenTrabajo.objects.filter(estado="EN_EJECUCION").count()
-            ot_en_pausa = OrdenTrabajo.objects.filter(estado="EN_PAUSA").count()
-            ot_en_qa = OrdenTrabajo.objects.filter(estado="EN_QA").count()
-            ot_retrabajo = OrdenTrabajo.objects.filter(estado="RETRABAJO").count()
-            
-            # OT cerradas hoy
-            ot_cerradas_hoy = OrdenTrabajo.objects.filter(
-                estado="CERRADA",
-                cierre__date=hoy
-            ).count()
-            
-            # ==================== OTs ATRASADAS ====================
-            # OTs que tienen fecha_limite_sla vencida y aún no están cerradas
-            ot_atrasadas = OrdenTrabajo.objects.filter(
-                fecha_limite_sla__lt=timezone.now(),
-                estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA", "EN_QA"]
-            ).count()
-            
-            # ==================== ÚLTIMAS 5 OT ====================
-            # Obtener las 5 OT más recientes con optimización
-            ultimas_5_ot = OrdenTrabajo.objects.select_related(
-                'vehiculo', 'responsable', 'chofer'
-            ).order_by('-apertura')[:5]
-            
-            # Serializar datos de las últimas 5 OT
-            ultimas_5_ot_data = [{
-                "id": str(ot.id),
-                "patente": ot.vehiculo.patente if ot.vehiculo else "N/A",
-                "estado": ot.estado,
-                "responsable": f"{ot.responsable.first_name} {ot.responsable.last_name}" if ot.responsable else "Sin responsable",
-                "apertura": ot.apertura.isoformat(),
-                "tipo": ot.tipo if hasattr(ot, 'tipo') else None,
-            } for ot in ultimas_5_ot]
-            
-            # ==================== VEHÍCULOS EN TALLER ====================
-            # Total vehículos en taller (EN_ESPERA o EN_MANTENIMIENTO)
-            vehiculos_en_taller = Vehiculo.objects.filter(
-                estado__in=["EN_ESPERA", "EN_MANTENIMIENTO"]
-            ).count()
-            
-            # ==================== INFORMACIÓN DE GUARDIAS ====================
-            # Ingresos registrados hoy por guardia
-            from apps.vehicles.models import IngresoVehiculo
-            ingresos_hoy_por_guardia = User.objects.filter(
-                rol="GUARDIA"
-            ).annotate(
-                ingresos_hoy=Count('ingresos_registrados', filter=Q(
-                    ingresos_registrados__fecha_ingreso__date=hoy
-                ), distinct=True)
-            ).filter(ingresos_hoy__gt=0).order_by('-ingresos_hoy')
-            
-            guardias_data = [{
-                "id": str(g.id),
-                "nombre": f"{g.first_name} {g.last_name}",
-                "username": g.username,
-                "ingresos_hoy": g.ingresos_hoy
-            } for g in ingresos_hoy_por_guardia]
-            
-            # ==================== PRODUCTIVIDAD ====================
-            # Productividad del taller (OT cerradas en los últimos 7 días)
-            hace_7_dias = hoy - timedelta(days=7)
-            ot_cerradas_7_dias = OrdenTrabajo.objects.filter(
-                estado="CERRADA",
-                cierre__date__gte=hace_7_dias
-            ).count()
-            
-            # ==================== DATOS PARA GRÁFICOS ====================
-            # OT cerradas por día (últimos 7 días) para gráfico de línea
-            ot_cerradas_por_dia = []
-            for i in range(7):
-                fecha = hoy - timedelta(days=6-i)
-                cantidad = OrdenTrabajo.objects.filter(
-                    estado="CERRADA",
-                    cierre__date=fecha
-                ).count()
-                ot_cerradas_por_dia.append({
-                    "fecha": fecha.isoformat(),
-                    "cantidad": cantidad,
-                    "dia": fecha.strftime("%d/%m")
-                })
-            
-            # OT por estado para gráfico de barras
-            ot_por_estado = [
-                {"estado": "Abiertas", "cantidad": ot_abiertas},
-                {"estado": "En Diagnóstico", "cantidad": ot_en_diagnostico},
-                {"estado": "En Ejecución", "cantidad": ot_en_ejecucion},
-                {"estado": "En Pausa", "cantidad": ot_en_pausa},
-                {"estado": "En QA", "cantidad": ot_en_qa},
-                {"estado": "Retrabajo", "cantidad": ot_retrabajo},
-            ]
-            
-            # Productividad por mecánico (últimos 7 días) para gráfico de barras
-            # Usar ots_asignadas (relación desde OrdenTrabajo.mecanico)
-            mecanicos_productividad = User.objects.filter(
-                rol="MECANICO"
-            ).annotate(
-                ot_cerradas=Count('ots_asignadas', filter=Q(
-                    ots_asignadas__estado="CERRADA",
-                    ots_asignadas__cierre__date__gte=hace_7_dias
-                ), distinct=True)
-            ).filter(ot_cerradas__gt=0).order_by('-ot_cerradas')[:10]
-            
-            mecanicos_productividad_data = [{
-                "nombre": f"{m.first_name} {m.last_name}",
-                "ot_cerradas": m.ot_cerradas
-            } for m in mecanicos_productividad]
-            
-            # ==================== PAUSAS MÁS FRECUENTES ====================
-            # Agrupar pausas por motivo y contar
-            pausas_frecuentes = Pausa.objects.values('motivo').annotate(
-                cantidad=Count('id')
-            ).order_by('-cantidad')[:5]  # Top 5
-            
-            # ==================== MECÁNICOS CON MÁS CARGA ====================
-            # Mecánicos con más carga de trabajo (OT activas)
-            mecanicos_carga = User.objects.filter(
-                rol="MECANICO",
-                ots_responsable__estado__in=["ABIERTA", "EN_EJECUCION", "EN_PAUSA"]
-            ).annotate(
-                total_ots=Count('ots_responsable')
-            ).order_by('-total_ots')[:5]  # Top 5
-            
-            # Serializar datos de mecánicos
-            mecanicos_carga_data = [{
-                "id": m.id,
-                "nombre": f"{m.first_name} {m.last_name}",
-                "total_ots": m.total_ots
-            } for m in mecanicos_carga]
-            
-            # ==================== TIEMPOS PROMEDIO ====================
-            # Calcular tiempos promedio por estado
-            tiempos_promedio = {}
-            estados = ["ABIERTA", "EN_EJECUCION", "EN_PAUSA", "EN_QA"]
-            
-            for estado in estados:
-                ots = OrdenTrabajo.objects.filter(estado=estado)
-                if estado == "CERRADA":
-                    # Para cerradas, calcular tiempo desde apertura hasta cierre
-                    tiempos = ots.filter(cierre__isnull=False).annotate(
-                        tiempo_total=F('cierre') - F('apertura')
-                    ).aggregate(
-                        promedio=Avg('tiempo_total')
-                    )
-                else:
-                    # Para otros estados, calcular tiempo desde apertura hasta ahora
-                    tiempos = ots.annotate(
-                        tiempo_actual=timezone.now() - F('apertura')
-                    ).aggregate(
-                        promedio=Avg('tiempo_actual')
-                    )
-                
-                if tiempos['promedio']:
-                    tiempos_promedio[estado] = str(tiempos['promedio'])
-                else:
-                    tiempos_promedio[estado] = None
-            
-            # ==================== CUMPLIMIENTO SLA ====================
-            # Calcular cumplimiento SLA (OT cerradas dentro del plazo / Total OT cerradas)
-            # Solo considerar OT cerradas en los últimos 30 días para tener una muestra representativa
-            hace_30_dias = hoy - timedelta(days=30)
-            ot_cerradas_30_dias = OrdenTrabajo.objects.filter(
-                estado="CERRADA",
-                cierre__date__gte=hace_30_dias,
-                fecha_limite_sla__isnull=False
-            )
-            
-            total_ot_cerradas_con_sla = ot_cerradas_30_dias.count()
-            ot_cumplieron_sla = ot_cerradas_30_dias.filter(
-                cierre__lte=F('fecha_limite_sla')
-            ).count()
-            
-            # Calcular porcentaje de cumplimiento
-            if total_ot_cerradas_con_sla > 0:
-                sla_cumplimiento = round((ot_cumplieron_sla / total_ot_cerradas_con_sla) * 100, 1)
-            else:
-                sla_cumplimiento = 0.0
-            
-            # Datos para gráfico de cumplimiento SLA (últimos 7 días)
-            cumplimiento_sla_por_dia = []
-            for i in range(7):
-                fecha = hoy - timedelta(days=6-i)
-                ot_dia = OrdenTrabajo.objects.filter(
-                    estado="CERRADA",
-                    cierre__date=fecha,
-                    fecha_limite_sla__isnull=False
-                )
-                total_dia = ot_dia.count()
-                cumplieron_dia = ot_dia.filter(cierre__lte=F('fecha_limite_sla')).count()
-                porcentaje_dia = round((cumplieron_dia / total_dia * 100), 1) if total_dia > 0 else 0
-                cumplimiento_sla_por_dia.append({
-                    "fecha": fecha.isoformat(),
-                    "dia": fecha.strftime("%d/%m"),
-                    "cumplimiento": porcentaje_dia,
-                    "total": total_dia,
-                    "cumplieron": cumplieron_dia
-                })
-            
-            # ==================== CONSTRUIR RESPUESTA ====================
-            response_data = {
-                "kpis": {
-                    "ot_abiertas": ot_abiertas,
-                    "ot_en_diagnostico": ot_en_diagnostico,
-                    "ot_en_ejecucion": ot_en_ejecucion,
-                    "ot_en_pausa": ot_en_pausa,
-                    "ot_en_qa": ot_en_qa,
-                    "ot_retrabajo": ot_retrabajo,
-                    "ot_cerradas_hoy": ot_cerradas_hoy,
-                    "ot_atrasadas": ot_atrasadas,
-                    "vehiculos_en_taller": vehiculos_en_taller,
-                    "productividad_7_dias": ot_cerradas_7_dias,
-                    "sla_cumplimiento": sla_cumplimiento,
-                },
-                "guardias": guardias_data,
-                "ultimas_5_ot": ultimas_5_ot_data,
-                "pausas_frecuentes": list(pausas_frecuentes),
-                "mecanicos_carga": mecanicos_carga_data,
-                "tiempos_promedio": tiempos_promedio,
-                # Datos para gráficos
-                "graficos": {
-                    "ot_cerradas_por_dia": ot_cerradas_por_dia,
-                    "ot_por_estado": ot_por_estado,
-                    "mecanicos_productividad": mecanicos_productividad_data,
-                    "cumplimiento_sla_por_dia": cumplimiento_sla_por_dia,
-                }
-            }
-            return response_data
-
-        # Obtener del cache o calcular
-        response_data = get_or_set_cache(cache_key, calculate_kpis, timeout=120)
-        return Response(response_data)
+        return super().get(request)
 
 
 class ReporteProductividadView(views.APIView):
@@ -385,6 +194,7 @@ class ReporteProductividadView(views.APIView):
             "fin": "..."
         },
         "total_ot_cerradas": 45,
+        "duraciones_por_estado": {"EN_EJECUCION": {"tramos", "promedio_horas", "p50_horas", "p90_horas"}, ...},
         "estadisticas_mecanicos": [...]
       }
     - 403: Si no tiene permisos
@@ -403,7 +213,9 @@ class ReporteProductividadView(views.APIView):
         
         Calcula:
         - Total de OT cerradas en el período
-        - Estadísticas por mecánico (total de OT cerradas)
+        - Duración real de cada estado (tramos terminados en el período,
+          ledger TramoEstado): promedio y percentiles 50/90
+        - Estadísticas por mecánico (total de OT cerradas y horas en ejecución)
         
         Parámetros:
         - fecha_inicio: Fecha de inicio del período
@@ -487,22 +299,178 @@ class ReporteProductividadView(views.APIView):
             total_cerradas=Count('ots_responsable', filter=Q(ots_responsable__estado="CERRADA"))
         )
         
+        # Duraciones por estado de los tramos terminados en el período
+        duraciones_por_estado = aggregation.duraciones_en_periodo(fecha_inicio, fecha_fin)
+        ejecucion_por_mecanico = aggregation.duraciones_en_periodo(
+            fecha_inicio, fecha_fin, estados=["EN_EJECUCION"], por="ot__responsable_id"
+        )
+        
         return Response({
             "periodo": {
                 "inicio": fecha_inicio.isoformat(),
                 "fin": fecha_fin.isoformat(),
             },
             "total_ot_cerradas": ot_cerradas.count(),
+            "duraciones_por_estado": duraciones_por_estado,
             "estadisticas_mecanicos": [{
                 "mecanico": f"{m.first_name} {m.last_name}",
                 "total_cerradas": m.total_cerradas,
+                "ejecucion": ejecucion_por_mecanico.get(m.id, {}).get("EN_EJECUCION"),
             } for m in estadisticas_mecanicos],
         })
 
 
+
+def _minutos(segundos):
+    return round(segundos / 60, 1)
+
+
+class ReporteUtilizacionView(views.APIView):
+    """
+    Utilización de los mecánicos: tiempo productivo, en pausa y ocioso.
+
+    Endpoint: GET /api/v1/reports/utilizacion/
+
+    Permisos:
+    - EJECUTIVO, ADMIN, JEFE_TALLER, SUPERVISOR
+
+    Parámetros (query):
+    - fecha_inicio: Fecha (YYYY-MM-DD, opcional, default: 30 días atrás)
+    - fecha_fin: Fecha (YYYY-MM-DD, opcional, default: hoy)
+    - mecanico: ID de un mecánico (opcional)
+    - por_dia: "true" para incluir el detalle diario de cada mecánico
+
+    Retorna:
+    - 200: {
+        "periodo": {"inicio": "...", "fin": "..."},
+        "jornada": {"inicio": "08:00", "fin": "18:00"},
+        "mecanicos": [{
+            "mecanico_id": 5, "mecanico": "...",
+            "productivo_minutos": 1200.0, "pausa_minutos": 90.0, "ocioso_minutos": 510.0,
+            "utilizacion": 0.667,
+            "dias": [...]  # solo con por_dia=true
+        }, ...]
+      }
+    - 400: Fechas inválidas
+    - 403: Si no tiene permisos
+
+    Los días anteriores se leen de UtilizacionDiaria (recalculada cada
+    noche); solo los días más recientes se calculan en la consulta.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        description="Utilización de mecánicos por día (productivo, pausa, ocioso)",
+        responses={200: None}
+    )
+    def get(self, request):
+        """
+        Retorna la utilización de cada mecánico en el período.
+
+        utilizacion = tiempo productivo / tiempo de jornada del período.
+        """
+        if request.user.rol not in ("EJECUTIVO", "ADMIN", "JEFE_TALLER", "SUPERVISOR"):
+            return Response(
+                {"detail": "No autorizado."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        hoy = timezone.localdate()
+        try:
+            fecha_fin = date.fromisoformat(request.query_params.get("fecha_fin") or hoy.isoformat())
+            fecha_inicio = date.fromisoformat(
+                request.query_params.get("fecha_inicio") or (fecha_fin - timedelta(days=30)).isoformat()
+            )
+            mecanico_id = int(request.query_params["mecanico"]) if request.query_params.get("mecanico") else None
+        except ValueError:
+            return Response(
+                {"detail": "Parámetros inválidos. Use fechas YYYY-MM-DD y un ID de mecánico numérico."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        from apps.core.validators import validar_rango_fechas
+        es_valido, mensaje = validar_rango_fechas(fecha_inicio, fecha_fin)
+        if not es_valido:
+            return Response({"detail": mensaje}, status=status.HTTP_400_BAD_REQUEST)
+
+        por_dia = request.query_params.get("por_dia", "").lower() == "true"
+        resultado = utilization.consultar(fecha_inicio, fecha_fin, mecanico_id=mecanico_id, por_dia=por_dia)
+        nombres = {
+            u.id: f"{u.first_name} {u.last_name}".strip() or u.username
+            for u in User.objects.filter(id__in=resultado).only("id", "first_name", "last_name", "username")
+        }
+
+        mecanicos = []
+        for mid, totales in sorted(resultado.items(), key=lambda item: nombres.get(item[0], "")):
+            jornada = sum(totales[campo] for campo in utilization.CAMPOS)
+            fila = {
+                "mecanico_id": mid,
+                "mecanico": nombres.get(mid, ""),
+                "productivo_minutos": _minutos(totales["productivo_segundos"]),
+                "pausa_minutos": _minutos(totales["pausa_segundos"]),
+                "ocioso_minutos": _minutos(totales["ocioso_segundos"]),
+                "utilizacion": round(totales["productivo_segundos"] / jornada, 3) if jornada else None,
+            }
+            if por_dia:
+                fila["dias"] = [{
+                    "fecha": d["fecha"].isoformat(),
+                    "productivo_minutos": _minutos(d["productivo_segundos"]),
+                    "pausa_minutos": _minutos(d["pausa_segundos"]),
+                    "ocioso_minutos": _minutos(d["ocioso_segundos"]),
+                } for d in totales.get("dias", [])]
+            mecanicos.append(fila)
+
+        return Response({
+            "periodo": {"inicio": fecha_inicio.isoformat(), "fin": fecha_fin.isoformat()},
+            "jornada": {"inicio": settings.UTILIZACION_JORNADA_INICIO, "fin": settings.UTILIZACION_JORNADA_FIN},
+            "mecanicos": mecanicos,
+        })
+
+# Roles que pueden generar reportes PDF
+ROLES_REPORTES_PDF = ("EJECUTIVO", "ADMIN", "JEFE_TALLER", "SUPERVISOR", "COORDINADOR_ZONA")
+
+# Parámetros (query o body) comunes a los reportes PDF
+PARAMETROS_REPORTE_PDF = [
+    {
+        "name": "tipo",
+        "in": "query",
+        "required": False,
+        "schema": {"type": "string", "enum": ["diario", "semanal", "mensual"]}
+    },
+    {
+        "name": "tipo_reporte",
+        "in": "query",
+        "required": False,
+        "schema": {"type": "string", "enum": ["estado_flota", "ordenes_trabajo", "por_site"]}
+    },
+    {
+        "name": "fecha_inicio",
+        "in": "query",
+        "required": False,
+        "schema": {"type": "string", "format": "date"}
+    },
+    {
+        "name": "fecha_fin",
+        "in": "query",
+        "required": False,
+        "schema": {"type": "string", "format": "date"}
+    }
+]
+
+
+def _respuesta_job(job, creado):
+    """202 con el job (nuevo o reutilizado) y Location para hacer polling."""
+    response = Response(
+        {**jobs.serializar(job, con_descarga=False), "deduplicado": not creado},
+        status=status.HTTP_202_ACCEPTED
+    )
+    response["Location"] = f"/api/v1/reports/jobs/{job.id}/"
+    return response
+
+
 class ReportePDFView(views.APIView):
     """
-    Genera reportes en PDF (diario, semanal, mensual).
+    Genera reportes en PDF (diario, semanal, mensual y reportes completos).
     
     Endpoint: GET /api/v1/reports/pdf/
     
@@ -511,43 +479,30 @@ class ReportePDFView(views.APIView):
     
     Parámetros (query):
     - tipo: Tipo de reporte ("diario", "semanal", "mensual")
+    - tipo_reporte: Reporte completo ("estado_flota", "ordenes_trabajo", "por_site")
     - fecha_inicio: Fecha de inicio (YYYY-MM-DD, opcional)
     - fecha_fin: Fecha de fin (YYYY-MM-DD, opcional)
     
     Retorna:
-    - 200: Archivo PDF descargable
-    - 400: Si el tipo es inválido
+    - 200: Archivo PDF descargable (en caché o rangos de hasta DIAS_MAXIMOS_SINCRONO días);
+      header X-Reporte-Cache: HIT / MISS
+    - 202: Rango mayor: se creó (o reutilizó) un ReporteJob; ver Location
+    - 400: Si el tipo o las fechas son inválidos
     - 403: Si no tiene permisos
     
     Tipos de reporte:
     - diario: Reporte del día (usa fecha_inicio o hoy)
     - semanal: Reporte de 7 días (usa fecha_inicio/fin o últimos 7 días)
     - mensual: Reporte de 30 días (usa fecha_inicio/fin o últimos 30 días)
+    
+    Los reportes grandes se generan en Celery (apps/reports/jobs.py); para
+    pedirlos directamente usar POST /api/v1/reports/jobs/.
     """
     permission_classes = [permissions.IsAuthenticated]
     
     @extend_schema(
-        description="Genera reporte PDF según tipo (diario, semanal, mensual)",
-        parameters=[
-            {
-                "name": "tipo",
-                "in": "query",
-                "required": True,
-                "schema": {"type": "string", "enum": ["diario", "semanal", "mensual"]}
-            },
-            {
-                "name": "fecha_inicio",
-                "in": "query",
-                "required": False,
-                "schema": {"type": "string", "format": "date"}
-            },
-            {
-                "name": "fecha_fin",
-                "in": "query",
-                "required": False,
-                "schema": {"type": "string", "format": "date"}
-            }
-        ],
+        description="Genera reporte PDF según tipo (diario, semanal, mensual); rangos grandes responden 202 con un job",
+        parameters=PARAMETROS_REPORTE_PDF,
         responses={200: {"content": {"application/pdf": {}}}}
     )
     def get(self, request):
@@ -556,196 +511,135 @@ class ReportePDFView(views.APIView):
         
         Proceso:
         1. Valida permisos
-        2. Obtiene tipo de reporte y fechas
-        3. Llama al generador de PDF apropiado
-        4. Retorna PDF como descarga
-        
-        Tipos soportados:
-        - diario: Reporte de un día
-        - semanal: Reporte de 7 días
-        - mensual: Reporte de 30 días
+        2. Normaliza tipo de reporte y fechas (apps/reports/jobs.py)
+        3. Si el PDF ya se generó con los mismos datos, lo sirve desde la caché
+           (apps/reports/pdf_cache.py)
+        4. Rango chico: genera el PDF en el request, lo guarda en la caché y
+           lo retorna como descarga
+        5. Rango grande: crea o reutiliza un ReporteJob y responde 202
         """
-        if request.user.rol not in ("EJECUTIVO", "ADMIN", "JEFE_TALLER", "SUPERVISOR", "COORDINADOR_ZONA"):
+        if request.user.rol not in ROLES_REPORTES_PDF:
             return Response(
                 {"detail": "No autorizado."},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        tipo = request.query_params.get("tipo", "semanal")
-        fecha_inicio_str = request.query_params.get("fecha_inicio")
-        fecha_fin_str = request.query_params.get("fecha_fin")
-        
-        from .pdf_generator import generar_reporte_semanal_pdf, generar_reporte_diario_pdf
-        from .pdf_generator_completo import (
-            generar_reporte_estado_flota,
-            generar_reporte_ordenes_trabajo,
-        )
-        from datetime import datetime, timedelta
-        
-        # Parsear fechas
-        fecha_inicio = None
-        fecha_fin = None
-        if fecha_inicio_str:
-            try:
-                fecha_inicio = datetime.strptime(fecha_inicio_str, "%Y-%m-%d").date()
-            except ValueError:
-                return Response(
-                    {"detail": "Formato de fecha_inicio inválido. Use YYYY-MM-DD."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        if fecha_fin_str:
-            try:
-                fecha_fin = datetime.strptime(fecha_fin_str, "%Y-%m-%d").date()
-            except ValueError:
-                return Response(
-                    {"detail": "Formato de fecha_fin inválido. Use YYYY-MM-DD."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Validar rango de fechas
-        if fecha_inicio and fecha_fin:
-            from apps.core.validators import validar_rango_fechas
-            es_valido, mensaje = validar_rango_fechas(fecha_inicio, fecha_fin)
-            if not es_valido:
-                return Response(
-                    {"detail": mensaje},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Validar permisos por rol
-        # Supervisores ven todos los datos
-        # Guardias no pueden acceder a reportes
-        # Mecánicos solo ven OT asignadas
-        if request.user.rol == "GUARDIA":
-            return Response(
-                {"detail": "Los guardias no pueden acceder a reportes."},
-                status=status.HTTP_403_FORBIDDEN
+        try:
+            parametros = jobs.parametros_desde(request.query_params)
+        except jobs.ParametrosInvalidos as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # PDF ya generado con los mismos datos: se sirve en streaming
+        clave_pdf, version = pdf_cache.clave(parametros)
+        entrada = pdf_cache.obtener(clave_pdf)
+        if entrada is not None:
+            from django.http import FileResponse
+            response = FileResponse(
+                pdf_cache.abrir(entrada),
+                as_attachment=True,
+                filename=entrada.nombre_archivo,
+                content_type='application/pdf'
             )
-        
-        # Supervisores pueden ver todos los reportes
-        
-        # Tipos de reporte completos
-        tipo_reporte = request.query_params.get("tipo_reporte")  # Nuevo parámetro para reportes completos
-        
-        if tipo_reporte:
-            # Reportes completos
-            if tipo_reporte == "estado_flota":
-                supervisor = request.query_params.get("supervisor")
-                tipo_vehiculo = request.query_params.get("tipo_vehiculo")
-                estado_operativo = request.query_params.get("estado_operativo")
-                pdf_bytes = generar_reporte_estado_flota(
-                    fecha=fecha_inicio or timezone.now().date(),
-                    supervisor=supervisor,
-                    tipo_vehiculo=tipo_vehiculo,
-                    estado_operativo=estado_operativo
-                )
-            elif tipo_reporte == "ordenes_trabajo":
-                if not fecha_inicio:
-                    fecha_fin = timezone.now().date()
-                    fecha_inicio = fecha_fin - timedelta(days=30)
-                if not fecha_fin:
-                    fecha_fin = timezone.now().date()
-                pdf_bytes = generar_reporte_ordenes_trabajo(
-                    fecha_inicio=fecha_inicio,
-                    fecha_fin=fecha_fin
-                )
-            elif tipo_reporte == "uso_vehiculo":
-                # Función no implementada aún - usar reporte de órdenes de trabajo como alternativa
-                return Response(
-                    {"detail": "Reporte de uso de vehículo no está disponible aún. Use 'ordenes_trabajo'."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            elif tipo_reporte == "mantenimientos":
-                # Función no implementada aún
-                return Response(
-                    {"detail": "Reporte de mantenimientos recurrentes no está disponible aún."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            elif tipo_reporte == "por_site":
-                # Usar reporte de órdenes de trabajo
-                if not fecha_inicio:
-                    fecha_fin = timezone.now().date()
-                    fecha_inicio = fecha_fin - timedelta(days=30)
-                if not fecha_fin:
-                    fecha_fin = timezone.now().date()
-                pdf_bytes = generar_reporte_ordenes_trabajo(
-                    fecha_inicio=fecha_inicio,
-                    fecha_fin=fecha_fin
-                )
-            elif tipo_reporte == "cumplimiento":
-                # Función no implementada aún
-                return Response(
-                    {"detail": "Reporte de cumplimiento y política no está disponible aún."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            elif tipo_reporte == "inventario":
-                # Función no implementada aún
-                return Response(
-                    {"detail": "Reporte de inventario no está disponible aún."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            else:
-                return Response(
-                    {"detail": f"Tipo de reporte '{tipo_reporte}' no válido."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Retornar PDF
-            from django.http import HttpResponse
-            response = HttpResponse(pdf_bytes, content_type='application/pdf')
-            fecha_str = (fecha_inicio or timezone.now().date()).strftime('%Y-%m-%d')
-            response['Content-Disposition'] = f'attachment; filename="reporte_{tipo_reporte}_{fecha_str}.pdf"'
+            response['X-Reporte-Cache'] = 'HIT'
             return response
         
-        # Reportes originales (diario, semanal, mensual)
-        if tipo == "diario":
-            # Reporte diario
-            fecha = None
-            if fecha_inicio_str:
-                fecha = datetime.strptime(fecha_inicio_str, "%Y-%m-%d").date()
-            pdf_bytes = generar_reporte_diario_pdf(fecha)
-            filename = f"reporte_diario_{fecha or timezone.now().date()}.pdf"
+        if not jobs.es_sincrono(parametros):
+            return _respuesta_job(*jobs.solicitar(parametros, request.user))
         
-        elif tipo == "semanal":
-            # Reporte semanal (7 días)
-            fecha_inicio = None
-            fecha_fin = None
-            if fecha_inicio_str:
-                fecha_inicio = datetime.strptime(fecha_inicio_str, "%Y-%m-%d").date()
-            if fecha_fin_str:
-                fecha_fin = datetime.strptime(fecha_fin_str, "%Y-%m-%d").date()
-            if not fecha_inicio:
-                # Default: últimos 7 días
-                fecha_fin = timezone.now().date()
-                fecha_inicio = fecha_fin - timedelta(days=7)
-            pdf_bytes = generar_reporte_semanal_pdf(fecha_inicio, fecha_fin)
-            filename = f"reporte_semanal_{fecha_inicio}_al_{fecha_fin}.pdf"
-        
-        elif tipo == "mensual":
-            # Reporte mensual (30 días)
-            fecha_inicio = None
-            fecha_fin = None
-            if fecha_inicio_str:
-                fecha_inicio = datetime.strptime(fecha_inicio_str, "%Y-%m-%d").date()
-            if fecha_fin_str:
-                fecha_fin = datetime.strptime(fecha_fin_str, "%Y-%m-%d").date()
-            if not fecha_inicio:
-                # Default: últimos 30 días
-                fecha_fin = timezone.now().date()
-                fecha_inicio = fecha_fin - timedelta(days=30)
-            pdf_bytes = generar_reporte_semanal_pdf(fecha_inicio, fecha_fin)  # Usa generador semanal con 30 días
-            filename = f"reporte_mensual_{fecha_inicio}_al_{fecha_fin}.pdf"
-        
-        else:
-            return Response(
-                {"detail": "Tipo de reporte inválido. Use: diario, semanal o mensual"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        pdf_bytes, filename = jobs.renderizar(parametros)
+        pdf_cache.guardar(clave_pdf, version, parametros, pdf_bytes, filename)
         
         # Retornar PDF como descarga
         from django.http import HttpResponse
         response = HttpResponse(pdf_bytes, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Reporte-Cache'] = 'MISS'
+        return response
+
+
+class ReporteJobListView(views.APIView):
+    """
+    Reportes PDF asíncronos.
+    
+    Endpoints:
+    - POST /api/v1/reports/jobs/ → Solicita un reporte (mismos parámetros que /pdf/)
+    - GET /api/v1/reports/jobs/ → Últimos jobs del usuario
+    
+    Permisos:
+    - EJECUTIVO, ADMIN, JEFE_TALLER, SUPERVISOR, COORDINADOR_ZONA
+    
+    El POST responde 202 con el job. Si el mismo reporte ya se está
+    generando se reutiliza ese job ("deduplicado": true). Cuando termina,
+    el usuario recibe un "data_update" con entity_type "report_job" por
+    WebSocket, o puede consultar GET /api/v1/reports/jobs/{id}/.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    # Cantidad de jobs que retorna el listado
+    LIMITE_LISTADO = 20
+    
+    @extend_schema(
+        description="Últimos reportes PDF asíncronos solicitados por el usuario",
+        responses={200: {"type": "array"}}
+    )
+    def get(self, request):
+        if request.user.rol not in ROLES_REPORTES_PDF:
+            return Response({"detail": "No autorizado."}, status=status.HTTP_403_FORBIDDEN)
+        
+        recientes = (
+            ReporteJob.objects
+            .filter(Q(solicitado_por=request.user) | Q(interesados=request.user))
+            .distinct()[:self.LIMITE_LISTADO]
+        )
+        # Sin URLs firmadas en el listado: se obtienen en el detalle
+        return Response([jobs.serializar(job, con_descarga=False) for job in recientes])
+    
+    @extend_schema(
+        description="Solicita la generación asíncrona de un reporte PDF",
+        parameters=PARAMETROS_REPORTE_PDF,
+        responses={202: {"type": "object"}}
+    )
+    def post(self, request):
+        if request.user.rol not in ROLES_REPORTES_PDF:
+            return Response({"detail": "No autorizado."}, status=status.HTTP_403_FORBIDDEN)
+        
+        # Se aceptan los parámetros en el body o en la query
+        datos = request.data if request.data else request.query_params
+        try:
+            parametros = jobs.parametros_desde(datos)
+        except jobs.ParametrosInvalidos as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return _respuesta_job(*jobs.solicitar(parametros, request.user))
+
+
+class ReporteJobDetailView(views.APIView):
+    """
+    Estado de un reporte PDF asíncrono.
+    
+    Endpoint: GET /api/v1/reports/jobs/{id}/
+    
+    Permisos:
+    - Solicitante, usuarios que pidieron el mismo reporte y ADMIN
+    
+    Retorna:
+    - 200: Job; con estado COMPLETADO incluye download_url (URL firmada)
+    - 404: Si el job no existe o no es visible para el usuario
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @extend_schema(
+        description="Estado del reporte PDF asíncrono y link de descarga cuando está listo",
+        responses={200: {"type": "object"}}
+    )
+    def get(self, request, pk):
+        job = ReporteJob.objects.filter(pk=pk).first()
+        if job is None or not jobs.puede_ver(job, request.user):
+            return Response({"detail": "No encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        
+        response = Response(jobs.serializar(job))
+        if job.estado in ReporteJob.EN_CURSO:
+            response["Retry-After"] = str(dashboards.REINTENTAR_EN)
         return response
 
 
@@ -826,7 +720,7 @@ class ReportePausasView(views.APIView):
         })
 
 
-class DashboardJefeTallerView(views.APIView):
+class DashboardJefeTallerView(DashboardPrecalculadoView):
     """
     Dashboard específico para Jefe de Taller.
     
@@ -840,99 +734,17 @@ class DashboardJefeTallerView(views.APIView):
     - OTs atrasadas
     - Historial de OTs por vehículo/mecánico
     """
-    permission_classes = [permissions.IsAuthenticated]
+    dashboard = "jefe_taller"
     
     @extend_schema(
         description="Obtiene reportes específicos para Jefe de Taller",
         responses={200: None}
     )
     def get(self, request):
-        if request.user.rol not in ("JEFE_TALLER", "ADMIN"):
-            return Response(
-                {"detail": "No autorizado."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        refresh = request.query_params.get('refresh', '').lower() == 'true'
-        from apps.core.caching import get_or_set_cache
-        cache_key = "dashboard_jefe_taller"
-        
-        if refresh:
-            cache.delete(cache_key)
-        
-        def calculate_report():
-            hoy = timezone.now().date()
-            
-            # OTs por estado
-            ot_por_estado = OrdenTrabajo.objects.values('estado').annotate(
-                cantidad=Count('id')
-            ).order_by('estado')
-            
-            # OTs atrasadas (con fecha_limite_sla vencida)
-            ot_atrasadas = OrdenTrabajo.objects.filter(
-                fecha_limite_sla__lt=timezone.now(),
-                estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA", "EN_QA"]
-            ).select_related('vehiculo', 'mecanico', 'responsable').order_by('fecha_limite_sla')
-            
-            ot_atrasadas_data = [{
-                "id": str(ot.id),
-                "patente": ot.vehiculo.patente if ot.vehiculo else "N/A",
-                "estado": ot.estado,
-                "mecanico": f"{ot.mecanico.first_name} {ot.mecanico.last_name}" if ot.mecanico else "Sin asignar",
-                "fecha_limite_sla": ot.fecha_limite_sla.isoformat() if ot.fecha_limite_sla else None,
-                "dias_atraso": (timezone.now() - ot.fecha_limite_sla).days if ot.fecha_limite_sla else 0,
-            } for ot in ot_atrasadas]
-            
-            # Historial de OTs por vehículo (últimos 30 días)
-            hace_30_dias = hoy - timedelta(days=30)
-            historial_por_vehiculo = Vehiculo.objects.filter(
-                ordenes__apertura__date__gte=hace_30_dias
-            ).annotate(
-                total_ots=Count('ordenes', distinct=True),
-                ot_cerradas=Count('ordenes', filter=Q(ordenes__estado="CERRADA"), distinct=True),
-                ot_activas=Count('ordenes', filter=Q(ordenes__estado__in=["ABIERTA", "EN_EJECUCION", "EN_PAUSA"]), distinct=True)
-            ).filter(total_ots__gt=0).order_by('-total_ots')[:20]
-            
-            historial_vehiculos_data = [{
-                "patente": v.patente,
-                "marca": v.marca.nombre if v.marca else "N/A",
-                "modelo": v.modelo,
-                "total_ots": v.total_ots,
-                "ot_cerradas": v.ot_cerradas,
-                "ot_activas": v.ot_activas,
-            } for v in historial_por_vehiculo]
-            
-            # Historial de OTs por mecánico (últimos 30 días)
-            historial_por_mecanico = User.objects.filter(
-                rol="MECANICO",
-                ots_asignadas__apertura__date__gte=hace_30_dias
-            ).annotate(
-                total_ots=Count('ots_asignadas', distinct=True),
-                ot_cerradas=Count('ots_asignadas', filter=Q(ots_asignadas__estado="CERRADA"), distinct=True),
-                ot_activas=Count('ots_asignadas', filter=Q(ots_asignadas__estado__in=["ABIERTA", "EN_EJECUCION", "EN_PAUSA"]), distinct=True)
-            ).filter(total_ots__gt=0).order_by('-total_ots')
-            
-            historial_mecanicos_data = [{
-                "id": str(m.id),
-                "nombre": f"{m.first_name} {m.last_name}",
-                "total_ots": m.total_ots,
-                "ot_cerradas": m.ot_cerradas,
-                "ot_activas": m.ot_activas,
-            } for m in historial_por_mecanico]
-            
-            return {
-                "ot_por_estado": list(ot_por_estado),
-                "ot_atrasadas": ot_atrasadas_data,
-                "total_atrasadas": len(ot_atrasadas_data),
-                "historial_por_vehiculo": historial_vehiculos_data,
-                "historial_por_mecanico": historial_mecanicos_data,
-            }
-        
-        response_data = get_or_set_cache(cache_key, calculate_report, timeout=120)
-        return Response(response_data)
+        return super().get(request)
 
 
-class DashboardSupervisorView(views.APIView):
+class DashboardSupervisorView(DashboardPrecalculadoView):
     """
     Dashboard específico para Supervisor Zonal.
     
@@ -946,106 +758,17 @@ class DashboardSupervisorView(views.APIView):
     - Carga de trabajo
     - Tiempos promedio
     """
-    permission_classes = [permissions.IsAuthenticated]
+    dashboard = "supervisor"
     
     @extend_schema(
         description="Obtiene reportes específicos para Supervisor Zonal",
         responses={200: None}
     )
     def get(self, request):
-        if request.user.rol not in ("SUPERVISOR", "ADMIN"):
-            return Response(
-                {"detail": "No autorizado."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        refresh = request.query_params.get('refresh', '').lower() == 'true'
-        from apps.core.caching import get_or_set_cache
-        cache_key = "dashboard_supervisor"
-        
-        if refresh:
-            cache.delete(cache_key)
-        
-        def calculate_report():
-            hoy = timezone.now().date()
-            hace_30_dias = hoy - timedelta(days=30)
-            
-            # Carga de trabajo (OT activas por estado)
-            carga_trabajo = OrdenTrabajo.objects.filter(
-                estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA", "EN_QA"]
-            ).values('estado').annotate(
-                cantidad=Count('id')
-            ).order_by('estado')
-            
-            # Tiempos promedio por estado (últimos 30 días)
-            tiempos_promedio = {}
-            estados = ["ABIERTA", "EN_EJECUCION", "EN_PAUSA", "EN_QA", "CERRADA"]
-            
-            for estado in estados:
-                ots = OrdenTrabajo.objects.filter(
-                    estado=estado,
-                    apertura__date__gte=hace_30_dias
-                )
-                
-                if estado == "CERRADA":
-                    tiempos = ots.filter(cierre__isnull=False).annotate(
-                        tiempo_total=F('cierre') - F('apertura')
-                    ).aggregate(promedio=Avg('tiempo_total'))
-                else:
-                    tiempos = ots.annotate(
-                        tiempo_actual=timezone.now() - F('apertura')
-                    ).aggregate(promedio=Avg('tiempo_actual'))
-                
-                if tiempos['promedio'] and tiempos['promedio'] is not None:
-                    try:
-                        # Convertir a horas
-                        if hasattr(tiempos['promedio'], 'total_seconds'):
-                            total_seconds = tiempos['promedio'].total_seconds()
-                        else:
-                            # Si es un timedelta, usar directamente
-                            total_seconds = tiempos['promedio'].total_seconds() if hasattr(tiempos['promedio'], 'total_seconds') else 0
-                        horas = total_seconds / 3600
-                        tiempos_promedio[estado] = round(horas, 2)
-                    except (AttributeError, TypeError) as e:
-                        # Si hay error al calcular, usar None
-                        tiempos_promedio[estado] = None
-                else:
-                    tiempos_promedio[estado] = None
-            
-            # Comparación entre talleres (solo Santa Marta por ahora, pero estructura lista para múltiples)
-            # Calcular SLA cumplimiento
-            ot_cerradas = OrdenTrabajo.objects.filter(
-                estado="CERRADA",
-                cierre__date__gte=hace_30_dias,
-                fecha_limite_sla__isnull=False
-            )
-            total_sla = ot_cerradas.count()
-            cumplieron_sla = ot_cerradas.filter(cierre__lte=F('fecha_limite_sla')).count()
-            sla_cumplimiento = round((cumplieron_sla / total_sla * 100), 1) if total_sla > 0 else 0
-            
-            talleres_data = [{
-                "nombre": "Santa Marta",
-                "ot_activas": OrdenTrabajo.objects.filter(
-                    estado__in=["ABIERTA", "EN_EJECUCION", "EN_PAUSA"]
-                ).count(),
-                "ot_cerradas_mes": OrdenTrabajo.objects.filter(
-                    estado="CERRADA",
-                    cierre__date__gte=hace_30_dias
-                ).count(),
-                "sla_cumplimiento": sla_cumplimiento,
-            }]
-            
-            return {
-                "carga_trabajo": list(carga_trabajo),
-                "tiempos_promedio": tiempos_promedio,
-                "comparacion_talleres": talleres_data,
-            }
-        
-        response_data = get_or_set_cache(cache_key, calculate_report, timeout=120)
-        return Response(response_data)
+        return super().get(request)
 
 
-class DashboardCoordinadorView(views.APIView):
+class DashboardCoordinadorView(DashboardPrecalculadoView):
     """
     Dashboard específico para Coordinador de Zona.
     
@@ -1059,89 +782,17 @@ class DashboardCoordinadorView(views.APIView):
     - Vehículos críticos
     - Emergencias
     """
-    permission_classes = [permissions.IsAuthenticated]
+    dashboard = "coordinador"
     
     @extend_schema(
         description="Obtiene reportes específicos para Coordinador de Zona",
         responses={200: None}
     )
     def get(self, request):
-        if request.user.rol not in ("COORDINADOR_ZONA", "ADMIN"):
-            return Response(
-                {"detail": "No autorizado."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        refresh = request.query_params.get('refresh', '').lower() == 'true'
-        from apps.core.caching import get_or_set_cache
-        cache_key = "dashboard_coordinador"
-        
-        if refresh:
-            cache.delete(cache_key)
-        
-        def calculate_report():
-            hoy = timezone.now().date()
-            
-            # Backlog de OTs por taller (solo Santa Marta por ahora)
-            backlog_talleres = [{
-                "taller": "Santa Marta",
-                "ot_pendientes": OrdenTrabajo.objects.filter(
-                    estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
-                ).count(),
-                "ot_atrasadas": OrdenTrabajo.objects.filter(
-                    fecha_limite_sla__lt=timezone.now(),
-                    estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
-                ).count(),
-            }]
-            
-            # Vehículos críticos (con múltiples OTs activas o con OT atrasada)
-            vehiculos_criticos = Vehiculo.objects.filter(
-                ordenes__estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
-            ).annotate(
-                ot_activas=Count('ordenes', filter=Q(
-                    ordenes__estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
-                ), distinct=True),
-                tiene_ot_atrasada=Count('ordenes', filter=Q(
-                    ordenes__fecha_limite_sla__lt=timezone.now(),
-                    ordenes__estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
-                ), distinct=True)
-            ).filter(
-                Q(ot_activas__gte=2) | Q(tiene_ot_atrasada__gt=0)
-            ).distinct()[:20]
-            
-            vehiculos_criticos_data = [{
-                "patente": v.patente,
-                "marca": v.marca.nombre if v.marca else "N/A",
-                "modelo": v.modelo,
-                "ot_activas": v.ot_activas,
-                "tiene_ot_atrasada": v.tiene_ot_atrasada > 0,
-            } for v in vehiculos_criticos]
-            
-            # Emergencias (OTs con prioridad ALTA y estado activo)
-            emergencias = OrdenTrabajo.objects.filter(
-                prioridad="ALTA",
-                estado__in=["ABIERTA", "EN_DIAGNOSTICO", "EN_EJECUCION", "EN_PAUSA"]
-            ).select_related('vehiculo', 'mecanico').order_by('-apertura')[:10]
-            
-            emergencias_data = [{
-                "id": str(ot.id),
-                "patente": ot.vehiculo.patente if ot.vehiculo else "N/A",
-                "estado": ot.estado,
-                "mecanico": f"{ot.mecanico.first_name} {ot.mecanico.last_name}" if ot.mecanico else "Sin asignar",
-                "apertura": ot.apertura.isoformat(),
-            } for ot in emergencias]
-            
-            return {
-                "backlog_talleres": backlog_talleres,
-                "vehiculos_criticos": vehiculos_criticos_data,
-                "emergencias": emergencias_data,
-            }
-        
-        response_data = get_or_set_cache(cache_key, calculate_report, timeout=120)
-        return Response(response_data)
+        return super().get(request)
 
 
-class DashboardSubgerenteView(views.APIView):
+class DashboardSubgerenteView(DashboardPrecalculadoView):
     """
     Dashboard específico para Subgerente de Flota (Alexis).
     
@@ -1153,100 +804,87 @@ class DashboardSubgerenteView(views.APIView):
     Muestra:
     - KPIs globales (OTs mensuales, tiempos de reparación, disponibilidad estimada)
     """
-    permission_classes = [permissions.IsAuthenticated]
+    dashboard = "subgerente"
     
     @extend_schema(
         description="Obtiene reportes ejecutivos nacionales para Subgerente de Flota",
         responses={200: None}
     )
     def get(self, request):
-        if request.user.rol not in ("SUBGERENTE_NACIONAL", "EJECUTIVO", "ADMIN"):
+        return super().get(request)
+
+
+# Roles que pueden consultar el cubo de análisis
+ROLES_CUBO = ("EJECUTIVO", "ADMIN", "JEFE_TALLER", "SUPERVISOR", "COORDINADOR_ZONA", "SUBGERENTE_NACIONAL")
+
+
+class ReporteCuboView(views.APIView):
+    """
+    Cubo de análisis ad-hoc sobre las OT (apps/reports/cube.py).
+
+    Endpoint: GET /api/v1/reports/cube/
+
+    Permisos:
+    - EJECUTIVO, ADMIN, JEFE_TALLER, SUPERVISOR, COORDINADOR_ZONA, SUBGERENTE_NACIONAL
+    - SUPERVISOR y COORDINADOR_ZONA solo ven sus zonas (apps/reports/scopes.py)
+
+    Parámetros (query):
+    - dimensiones: Lista separada por comas (dia, semana, mes, trimestre,
+      zona, tipo, prioridad, marca, mecanico), opcional
+    - medidas: Lista separada por comas (ot, cerradas, sla_pct,
+      ciclo_promedio_horas, ciclo_p90_horas, costo_total, costo_promedio),
+      default: ot
+    - fecha_inicio / fecha_fin: YYYY-MM-DD (default: últimos 90 días)
+    - base: apertura (default) o cierre: fecha sobre la que se filtra el
+      período y se arman las cubetas
+    - zona, tipo, prioridad, marca, mecanico: Filtros (valores separados por comas)
+
+    Ejemplo: ?dimensiones=zona,tipo&medidas=ot,sla_pct&fecha_inicio=2026-07-01
+
+    Retorna:
+    - 200: {
+        "consulta": {...},  # consulta normalizada
+        "filas": [{"zona": "NORTE", "tipo": "MANTENCION", "ot": 12, "sla_pct": 91.7}, ...],
+        "truncado": false,
+        "costo_estimado": 123.4
+      }
+    - 400: Parámetros inválidos o consulta demasiado costosa
+    - 403: Si no tiene permisos
+    - 503: La consulta superó el statement_timeout (acotarla y reintentar)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        description="Cubo de análisis de OT: dimensiones, medidas y filtros arbitrarios",
+        responses={200: None}
+    )
+    def get(self, request):
+        """
+        Responde una consulta del cubo desde la tabla de hechos HechoOT.
+        """
+        if request.user.rol not in ROLES_CUBO:
             return Response(
                 {"detail": "No autorizado."},
                 status=status.HTTP_403_FORBIDDEN
             )
-        
-        refresh = request.query_params.get('refresh', '').lower() == 'true'
-        from apps.core.caching import get_or_set_cache
-        cache_key = "dashboard_subgerente"
-        
-        if refresh:
-            cache.delete(cache_key)
-        
-        def calculate_report():
-            hoy = timezone.now().date()
-            inicio_mes = hoy.replace(day=1)
-            hace_30_dias = hoy - timedelta(days=30)
-            
-            # OTs mensuales
-            ot_mensuales = OrdenTrabajo.objects.filter(
-                apertura__date__gte=inicio_mes
-            ).count()
-            
-            ot_cerradas_mes = OrdenTrabajo.objects.filter(
-                estado="CERRADA",
-                cierre__date__gte=inicio_mes
-            ).count()
-            
-            # Tiempos de reparación promedio (últimos 30 días)
-            ot_cerradas_30_dias = OrdenTrabajo.objects.filter(
-                estado="CERRADA",
-                cierre__date__gte=hace_30_dias,
-                cierre__isnull=False
-            ).annotate(
-                tiempo_reparacion=F('cierre') - F('apertura')
-            ).aggregate(
-                promedio=Avg('tiempo_reparacion')
+
+        parametros = request.query_params
+        try:
+            hasta = date.fromisoformat(parametros.get("fecha_fin") or timezone.localdate().isoformat())
+            desde = date.fromisoformat(parametros.get("fecha_inicio") or (hasta - timedelta(days=89)).isoformat())
+        except ValueError:
+            return Response(
+                {"detail": "Formato de fecha inválido. Use YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            tiempo_promedio_horas = None
-            if ot_cerradas_30_dias['promedio']:
-                total_seconds = ot_cerradas_30_dias['promedio'].total_seconds()
-                tiempo_promedio_horas = round(total_seconds / 3600, 2)
-            
-            # Disponibilidad estimada de flota
-            total_vehiculos = Vehiculo.objects.filter(estado__in=["ACTIVO", "EN_ESPERA", "EN_MANTENIMIENTO"]).count()
-            vehiculos_operativos = Vehiculo.objects.filter(estado="ACTIVO").count()
-            disponibilidad = round((vehiculos_operativos / total_vehiculos * 100), 1) if total_vehiculos > 0 else 0
-            
-            # Tendencias (OTs por semana en el último mes)
-            tendencias_semanales = []
-            for i in range(4):
-                semana_inicio = inicio_mes + timedelta(weeks=i)
-                semana_fin = semana_inicio + timedelta(days=6)
-                if semana_fin > hoy:
-                    semana_fin = hoy
-                
-                ot_semana = OrdenTrabajo.objects.filter(
-                    apertura__date__gte=semana_inicio,
-                    apertura__date__lte=semana_fin
-                ).count()
-                
-                ot_cerradas_semana = OrdenTrabajo.objects.filter(
-                    estado="CERRADA",
-                    cierre__date__gte=semana_inicio,
-                    cierre__date__lte=semana_fin
-                ).count()
-                
-                tendencias_semanales.append({
-                    "semana": f"Semana {i+1}",
-                    "fecha_inicio": semana_inicio.isoformat(),
-                    "fecha_fin": semana_fin.isoformat(),
-                    "ot_creadas": ot_semana,
-                    "ot_cerradas": ot_cerradas_semana,
-                })
-            
-            return {
-                "kpis": {
-                    "ot_mensuales": ot_mensuales,
-                    "ot_cerradas_mes": ot_cerradas_mes,
-                    "tiempo_reparacion_promedio_horas": tiempo_promedio_horas,
-                    "disponibilidad_flota": disponibilidad,
-                    "vehiculos_operativos": vehiculos_operativos,
-                    "total_vehiculos": total_vehiculos,
-                },
-                "tendencias_semanales": tendencias_semanales,
-            }
-        
-        response_data = get_or_set_cache(cache_key, calculate_report, timeout=120)
-        return Response(response_data)
+
+        consulta = cube.normalizar(
+            parametros.get("dimensiones"),
+            parametros.get("medidas"),
+            {nombre: parametros.get(nombre) for nombre in cube.FILTROS if parametros.get(nombre)},
+            desde,
+            hasta,
+            base=parametros.get("base") or "apertura",
+        )
+        resultado = cube.consultar(consulta, scopes.zonas_de_usuario(request.user))
+        return Response({"consulta": consulta, **resultado})
@@ -32,6 +32,7 @@ from .models import Agenda, CupoDiario
 from .serializers import AgendaSerializer, AgendaListSerializer, CupoDiarioSerializer
 from apps.workorders.models import OrdenTrabajo
 from apps.core.audit_logging import log_audit, log_data_change, get_client_ip
+from apps.core.date_filters import rango_dia
 
 
 class AgendaViewSet(viewsets.ModelViewSet):
@@ -205,8 +206,8 @@ class AgendaViewSet(viewsets.ModelViewSet):
         
         # Verificar que no haya solapamiento
         solapamiento = Agenda.objects.filter(
+            rango_dia("fecha_programada", timezone.localdate(fecha_programada)),
             vehiculo=vehiculo,
-            fecha_programada__date=fecha_programada.date(),
             estado__in=["PROGRAMADA", "CONFIRMADA", "EN_PROCESO"]
         ).exists()
         
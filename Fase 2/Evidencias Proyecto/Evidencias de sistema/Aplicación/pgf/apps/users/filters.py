@@ -0,0 +1,20 @@
+# apps/users/filters.py
+from rest_framework.filters import SearchFilter
+
+from .search import buscar_usuarios
+
+
+class BusquedaUsuarioFilter(SearchFilter):
+    """
+    Reemplazo de SearchFilter para usuarios.
+
+    Mantiene el parámetro ?search= de DRF, pero en lugar de encadenar
+    icontains con OR sobre username/email/first_name/last_name/rut
+    (que obliga a escanear la tabla) usa la columna indexada User.busqueda.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        termino = request.query_params.get(self.search_param, "").strip()
+        if not termino:
+            return queryset
+        return buscar_usuarios(queryset, termino)
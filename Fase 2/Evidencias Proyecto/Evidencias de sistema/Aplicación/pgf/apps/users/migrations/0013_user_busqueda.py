@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2025-12-10 11:20
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+from apps.users.search import construir_texto_busqueda
+
+
+def poblar_texto_busqueda(apps, schema_editor):
+    """Calcula texto_busqueda para los usuarios existentes."""
+    User = apps.get_model('users', 'User')
+    usuarios = []
+    for user in User.objects.only('id', 'username', 'first_name', 'last_name', 'email', 'rut').iterator(chunk_size=1000):
+        user.texto_busqueda = construir_texto_busqueda(user)
+        usuarios.append(user)
+    User.objects.bulk_update(usuarios, ['texto_busqueda'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_alter_user_rol'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='texto_busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(poblar_texto_busqueda, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='user',
+            name='busqueda',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('texto_busqueda', config='simple'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busqueda'], name='users_user_busqueda_gin'),
+        ),
+    ]
@@ -7,6 +7,10 @@ Este módulo define:
 - Profile: Perfil adicional del usuario
 - PasswordResetToken: Tokens para recuperación de contraseña
 
+Búsqueda:
+- User.texto_busqueda se recalcula en cada save() (ver apps/users/search.py)
+- User.busqueda es un tsvector generado por PostgreSQL con índice GIN
+
 Relaciones:
 - User -> Profile (OneToOne)
 - User -> PasswordResetToken (OneToMany)
@@ -16,6 +20,8 @@ Relaciones:
 
 from django.db import models
 from django.contrib.auth.models import AbstractUser  # Extiende el modelo de usuario base de Django
+from django.contrib.postgres.indexes import GinIndex  # Índice para la columna de búsqueda
+from django.contrib.postgres.search import SearchVector, SearchVectorField  # tsvector generado para la búsqueda
 from django.conf import settings
 from django.db.models.signals import post_save  # Señal que se dispara después de guardar
 from django.dispatch import receiver  # Decorador para conectar señales
@@ -24,6 +30,8 @@ import secrets  # Para generar tokens seguros
 from django.utils import timezone  # Para manejar fechas con timezone
 from datetime import timedelta  # Para calcular fechas futuras
 
+from .search import CONFIG_BUSQUEDA, construir_texto_busqueda
+
 
 class User(AbstractUser):
     """
@@ -87,9 +95,42 @@ class User(AbstractUser):
         help_text="Si está marcado, este usuario no se puede eliminar, solo editar y ver"
     )
     
+    # Texto de búsqueda normalizado (sin tildes, minúsculas, sin puntuación)
+    # Se recalcula en save() a partir de username, nombre, apellido, email y RUT
+    texto_busqueda = models.TextField(blank=True, default="", editable=False)
+    
+    # tsvector generado por PostgreSQL a partir de texto_busqueda
+    # Tiene índice GIN (ver Meta.indexes): búsquedas por prefijo sin escanear la tabla
+    busqueda = models.GeneratedField(
+        expression=SearchVector("texto_busqueda", config=CONFIG_BUSQUEDA),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    
     # REQUIRED_FIELDS: le dice a Django que el email es obligatorio al crear superusuario
     # Además de username (que ya es requerido por AbstractUser)
     REQUIRED_FIELDS = ['email']
+    
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Índice GIN para búsqueda de usuarios (filtro de mecánicos, /users/search/)
+            GinIndex(fields=["busqueda"], name="users_user_busqueda_gin"),
+        ]
+    
+    def save(self, *args, **kwargs):
+        """
+        Guarda el usuario recalculando texto_busqueda.
+        
+        Si se usa update_fields con algún campo que forma parte de la búsqueda,
+        texto_busqueda se agrega automáticamente para no dejarlo desactualizado.
+        """
+        self.texto_busqueda = construir_texto_busqueda(self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            campos = set(update_fields)
+            if campos & {"username", "first_name", "last_name", "email", "rut"}:
+                kwargs["update_fields"] = campos | {"texto_busqueda"}
+        super().save(*args, **kwargs)
 
 
 class Profile(models.Model):
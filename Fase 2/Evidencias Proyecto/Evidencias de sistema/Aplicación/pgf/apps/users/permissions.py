@@ -10,8 +10,8 @@ class UserPermission(BasePermission):
         if getattr(view, 'action', None) == 'me':
             return request.user and request.user.is_authenticated
 
-        # Listar todos: admin, supervisor, jefe de taller, coordinador (necesitan ver mecánicos para asignar/coordinar)
-        if view.action == 'list':
+        # Listar/buscar todos: admin, supervisor, jefe de taller, coordinador (necesitan ver mecánicos para asignar/coordinar)
+        if view.action in ('list', 'search'):
             return request.user and request.user.is_authenticated and request.user.rol in ["ADMIN", "SUPERVISOR", "JEFE_TALLER", "COORDINADOR_ZONA"]
 
         # Resto: autenticado
@@ -0,0 +1,117 @@
+# apps/users/search.py
+"""
+Búsqueda indexada del directorio de usuarios.
+
+Este módulo define:
+- normalizar_texto_busqueda: Normaliza texto (minúsculas, sin tildes ni puntuación)
+- construir_texto_busqueda: Arma el texto de búsqueda de un User
+- construir_query_busqueda: Convierte un término libre en un tsquery por prefijos
+- buscar_usuarios: Filtra (y opcionalmente ordena por relevancia) un QuerySet de usuarios
+
+El texto normalizado se guarda en User.texto_busqueda cada vez que se guarda
+el usuario, y la columna generada User.busqueda (tsvector) tiene un índice GIN.
+Así, buscar "perez" encuentra "Pérez" sin recorrer toda la tabla con
+varios icontains encadenados con OR.
+
+Relaciones:
+- Usado por: apps/users/models.py (User.save)
+- Usado por: apps/users/filters.py (BusquedaUsuarioFilter)
+- Usado por: apps/users/views.py (UserViewSet.search)
+- Usado por: apps/workorders/filters.py (OrdenTrabajoFilter.filter_mecanico)
+"""
+
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Case, F, FloatField, Value, When
+
+# Configuración de texto de PostgreSQL: "simple" no aplica stemming ni stopwords,
+# lo que es lo correcto para nombres propios, usernames, emails y RUT
+CONFIG_BUSQUEDA = "simple"
+
+# Todo lo que no sea letra o dígito se trata como separador de palabras
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar_texto_busqueda(texto):
+    """
+    Normaliza un texto para búsqueda.
+
+    - Quita tildes y diacríticos (Pérez → perez, Muñoz → munoz)
+    - Pasa a minúsculas
+    - Reemplaza puntuación por espacios (juan.perez@x.cl → juan perez x cl)
+
+    Retorna:
+    - String normalizado (puede ser vacío)
+    """
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", str(texto))
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return _SEPARADORES.sub(" ", sin_tildes.lower()).strip()
+
+
+def construir_texto_busqueda(user):
+    """
+    Construye el texto de búsqueda de un usuario.
+
+    Incluye username, nombre, apellido, email y RUT, todos normalizados.
+    El username va primero para que pese más en el ranking.
+    """
+    partes = [user.username, user.first_name, user.last_name, user.email, user.rut]
+    return " ".join(filter(None, (normalizar_texto_busqueda(p) for p in partes)))
+
+
+def construir_query_busqueda(termino):
+    """
+    Convierte un término libre en un SearchQuery por prefijos.
+
+    "jua per" → to_tsquery('simple', 'jua:* & per:*')
+
+    Cada palabra debe coincidir con el comienzo de alguna palabra del usuario.
+    Los tokens ya vienen normalizados (solo [0-9a-z]), por lo que no hay
+    caracteres especiales de tsquery que escapar.
+
+    Retorna:
+    - SearchQuery, o None si el término no tiene palabras buscables
+    """
+    tokens = normalizar_texto_busqueda(termino).split()
+    if not tokens:
+        return None
+    raw = " & ".join(f"{token}:*" for token in tokens)
+    return SearchQuery(raw, search_type="raw", config=CONFIG_BUSQUEDA)
+
+
+def buscar_usuarios(queryset, termino, campo="busqueda", ordenar=False):
+    """
+    Filtra un QuerySet usando la columna de búsqueda indexada.
+
+    Parámetros:
+    - queryset: QuerySet a filtrar (de User, o de un modelo relacionado)
+    - termino: Texto ingresado por el usuario
+    - campo: Ruta a la columna tsvector (ej: "mecanico__busqueda" para OTs)
+    - ordenar: Si es True, anota "relevancia" y ordena de mayor a menor
+      (solo tiene sentido cuando queryset es de User)
+
+    Retorna:
+    - QuerySet filtrado (vacío si el término no tiene palabras buscables)
+    """
+    query = construir_query_busqueda(termino)
+    if query is None:
+        return queryset.none()
+
+    queryset = queryset.filter(**{campo: query})
+    if not ordenar:
+        return queryset
+
+    # Coincidencia exacta de username primero, luego ranking de tsvector
+    exacto = normalizar_texto_busqueda(termino)
+    return queryset.annotate(
+        relevancia=SearchRank(F(campo), query) + Case(
+            When(username__iexact=termino.strip(), then=Value(1.0)),
+            When(texto_busqueda__startswith=exacto, then=Value(0.5)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    ).order_by("-relevancia", "username")
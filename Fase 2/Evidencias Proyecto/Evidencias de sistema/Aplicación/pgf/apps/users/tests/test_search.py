@@ -0,0 +1,131 @@
+# apps/users/tests/test_search.py
+"""
+Tests para la búsqueda indexada de usuarios.
+"""
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework import status
+
+from apps.users.search import normalizar_texto_busqueda, buscar_usuarios
+from apps.workorders.filters import OrdenTrabajoFilter
+from apps.workorders.models import OrdenTrabajo
+
+User = get_user_model()
+
+
+@pytest.fixture
+def mecanico_con_tildes(db):
+    """Mecánico con nombre acentuado."""
+    return User.objects.create_user(
+        username="jperez",
+        email="jose.perez@test.com",
+        password="testpass123",
+        first_name="José",
+        last_name="Pérez Muñoz",
+        rol=User.Rol.MECANICO,
+        rut="66666666-6"
+    )
+
+
+class TestNormalizacion:
+    """Tests para normalizar_texto_busqueda"""
+
+    @pytest.mark.unit
+    def test_quita_tildes_y_mayusculas(self):
+        assert normalizar_texto_busqueda("José PÉREZ Muñoz") == "jose perez munoz"
+
+    @pytest.mark.unit
+    def test_puntuacion_como_separador(self):
+        assert normalizar_texto_busqueda("jose.perez@test.com") == "jose perez test com"
+
+    @pytest.mark.unit
+    def test_vacio(self):
+        assert normalizar_texto_busqueda(None) == ""
+        assert normalizar_texto_busqueda("  ") == ""
+
+
+class TestTextoBusqueda:
+    """Tests para el mantenimiento de User.texto_busqueda"""
+
+    @pytest.mark.model
+    def test_se_calcula_al_crear(self, mecanico_con_tildes):
+        assert "jose" in mecanico_con_tildes.texto_busqueda
+        assert "munoz" in mecanico_con_tildes.texto_busqueda
+
+    @pytest.mark.model
+    def test_se_actualiza_con_update_fields(self, mecanico_con_tildes):
+        mecanico_con_tildes.last_name = "González"
+        mecanico_con_tildes.save(update_fields=["last_name"])
+        mecanico_con_tildes.refresh_from_db()
+        assert "gonzalez" in mecanico_con_tildes.texto_busqueda
+        assert "munoz" not in mecanico_con_tildes.texto_busqueda
+
+    @pytest.mark.model
+    def test_buscar_por_prefijo_sin_tildes(self, mecanico_con_tildes, admin_user):
+        resultados = buscar_usuarios(User.objects.all(), "jos per")
+        assert list(resultados) == [mecanico_con_tildes]
+
+    @pytest.mark.model
+    def test_buscar_sin_palabras_retorna_vacio(self, mecanico_con_tildes):
+        assert not buscar_usuarios(User.objects.all(), "---").exists()
+
+
+class TestUserSearchEndpoint:
+    """Tests para GET /api/v1/users/search/"""
+
+    @pytest.mark.api
+    def test_search_rankea_username_exacto_primero(self, authenticated_client, mecanico_con_tildes):
+        User.objects.create_user(
+            username="jperez2",
+            email="otro@test.com",
+            password="testpass123",
+            first_name="Juan",
+            last_name="Perez",
+            rol=User.Rol.MECANICO,
+        )
+        response = authenticated_client.get("/api/v1/users/search/", {"q": "jperez"})
+        assert response.status_code == status.HTTP_200_OK
+        assert [u["username"] for u in response.data] == ["jperez", "jperez2"]
+
+    @pytest.mark.api
+    def test_search_filtra_por_rol(self, authenticated_client, mecanico_con_tildes, supervisor_user):
+        response = authenticated_client.get("/api/v1/users/search/", {"q": "test", "rol": "MECANICO"})
+        assert response.status_code == status.HTTP_200_OK
+        assert {u["rol"] for u in response.data} == {"MECANICO"}
+
+    @pytest.mark.api
+    def test_search_requiere_q(self, authenticated_client):
+        response = authenticated_client.get("/api/v1/users/search/")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.api
+    def test_search_no_permitido_para_mecanico(self, api_client, mecanico_con_tildes):
+        api_client.force_authenticate(user=mecanico_con_tildes)
+        response = api_client.get("/api/v1/users/search/", {"q": "jose"})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    @pytest.mark.api
+    def test_list_search_param_usa_busqueda(self, authenticated_client, mecanico_con_tildes):
+        response = authenticated_client.get("/api/v1/users/", {"search": "PEREZ"})
+        assert response.status_code == status.HTTP_200_OK
+        usernames = [u["username"] for u in response.data["results"]]
+        assert usernames == ["jperez"]
+
+
+class TestFiltroMecanico:
+    """Tests para OrdenTrabajoFilter.filter_mecanico con la columna indexada"""
+
+    @pytest.mark.unit
+    def test_filtro_por_nombre_acentuado(self, orden_trabajo, mecanico_con_tildes):
+        orden_trabajo.mecanico = mecanico_con_tildes
+        orden_trabajo.save()
+        filtro = OrdenTrabajoFilter({"mecanico": "jose perez"}, queryset=OrdenTrabajo.objects.all())
+        assert list(filtro.qs) == [orden_trabajo]
+
+    @pytest.mark.unit
+    def test_filtro_por_id_numerico(self, orden_trabajo, mecanico_con_tildes):
+        orden_trabajo.mecanico = mecanico_con_tildes
+        orden_trabajo.save()
+        filtro = OrdenTrabajoFilter({"mecanico": str(mecanico_con_tildes.id)}, queryset=OrdenTrabajo.objects.all())
+        assert list(filtro.qs) == [orden_trabajo]
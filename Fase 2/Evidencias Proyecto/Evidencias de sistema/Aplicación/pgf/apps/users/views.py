@@ -3,7 +3,7 @@
 Vistas y ViewSets para gestión de usuarios y autenticación.
 
 Este módulo define:
-- UserViewSet: CRUD de usuarios con permisos personalizados
+- UserViewSet: CRUD de usuarios con permisos personalizados (incluye búsqueda rankeada)
 - ProfileViewSet: Gestión de perfiles de usuario
 - LoginView: Autenticación JWT con cookies
 - RefreshCookieView: Renovación de tokens
@@ -29,6 +29,8 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from .models import User, Profile
 from .serializers import UserSerializer, ProfileSerializer
 from .permissions import UserPermission
+from .filters import BusquedaUsuarioFilter
+from .search import buscar_usuarios
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -49,10 +51,11 @@ class UserViewSet(viewsets.ModelViewSet):
     - DELETE /api/v1/users/{id}/ → Eliminar usuario
     - GET /api/v1/users/me/ → Ver perfil propio
     - PUT/PATCH /api/v1/users/me/ → Editar perfil propio
+    - GET /api/v1/users/search/?q=... → Búsqueda rankeada (columna indexada)
     
     Permisos:
     - Crear: Público (cualquiera puede registrarse)
-    - Listar: Solo ADMIN y SUPERVISOR
+    - Listar/Buscar: Solo ADMIN, SUPERVISOR, JEFE_TALLER y COORDINADOR_ZONA
     - Ver/Editar/Eliminar: ADMIN, SUPERVISOR, o el propio usuario
     - /me/: Cualquier usuario autenticado puede ver/editar su propio perfil
     
@@ -65,7 +68,8 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [UserPermission]  # Permisos personalizados
     
     # Configuración de filtros
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # ?search= usa la columna indexada User.busqueda (ver apps/users/search.py)
+    filter_backends = [DjangoFilterBackend, BusquedaUsuarioFilter, OrderingFilter]
     filterset_fields = ['rol', 'is_active']
     search_fields = ['username', 'email', 'first_name', 'last_name', 'rut']
     ordering_fields = ['username', 'email', 'date_joined']
@@ -355,6 +359,50 @@ class UserViewSet(viewsets.ModelViewSet):
                 from rest_framework.exceptions import ValidationError
                 raise ValidationError({"detail": f"Error al eliminar el usuario: {str(e)}"})
 
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Búsqueda rankeada de usuarios.
+        
+        Endpoint: GET /api/v1/users/search/?q=juan per&rol=MECANICO&limit=20
+        
+        Cada palabra de q se busca como prefijo (sin tildes ni mayúsculas) sobre
+        username, nombre, apellido, email y RUT. Usa el índice GIN de User.busqueda,
+        por lo que responde rápido aunque haya miles de usuarios.
+        
+        Parámetros (query):
+        - q: Texto a buscar (requerido)
+        - rol: Filtrar por rol (opcional)
+        - is_active: "true"/"false" (opcional, default: true)
+        - limit: Máximo de resultados (opcional, default: 20, máximo: 50)
+        
+        Retorna:
+        - 200: Lista de usuarios (UsuarioListSerializer) ordenada por relevancia
+        - 400: Si q está vacío o limit no es un número
+        """
+        termino = request.query_params.get('q', '').strip()
+        if not termino:
+            return Response(
+                {"detail": "Debe indicar el parámetro q."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 50)
+        except ValueError:
+            return Response(
+                {"detail": "El parámetro limit debe ser un número."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.get_queryset()
+        is_active = request.query_params.get('is_active', 'true').lower()
+        if is_active in ('true', 'false'):
+            queryset = queryset.filter(is_active=(is_active == 'true'))
+        
+        usuarios = buscar_usuarios(queryset, termino, ordenar=True)[:max(limit, 1)]
+        return Response(UsuarioListSerializer(usuarios, many=True).data)
+
     @action(detail=False, methods=['get', 'put', 'patch'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request, *args, **kwargs):
         """
@@ -748,6 +796,7 @@ class UsuarioListViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all().order_by('id')
     serializer_class = UsuarioListSerializer  # Serializer simplificado (menos campos)
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [BusquedaUsuarioFilter]  # ?search= sobre la columna indexada
 
     def get_queryset(self):
         """
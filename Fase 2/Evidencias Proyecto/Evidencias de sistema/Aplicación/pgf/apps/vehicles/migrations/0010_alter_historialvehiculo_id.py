@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:37
+
+import apps.core.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0009_merge_0007_normalizar_patentes_0008_remove_site_field'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historialvehiculo',
+            name='id',
+            field=models.UUIDField(default=apps.core.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -23,6 +23,7 @@ Estados del vehículo:
 from django.db import models
 from django.conf import settings  # Para acceder a AUTH_USER_MODEL
 import uuid  # Para generar IDs únicos
+from apps.core.ids import uuid7  # UUIDv7 ordenado por tiempo para PKs de alta inserción
 
 
 class Marca(models.Model):
@@ -524,7 +525,7 @@ class HistorialVehiculo(models.Model):
     - ForeignKey a User (supervisor responsable)
     """
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     
     # Vehículo al que pertenece este historial
     vehiculo = models.ForeignKey(
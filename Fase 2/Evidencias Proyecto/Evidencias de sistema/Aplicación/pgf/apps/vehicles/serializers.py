@@ -271,14 +271,14 @@ class IngresoVehiculoSerializer(serializers.ModelSerializer):
         from datetime import timedelta
         
         # Buscar OTs del vehículo que se crearon cerca de la fecha de ingreso (mismo día o día siguiente)
-        fecha_ingreso = obj.fecha_ingreso.date()
+        from apps.core.date_filters import rango_fechas
+        fecha_ingreso = timezone.localdate(obj.fecha_ingreso)
         fecha_limite = fecha_ingreso + timedelta(days=1)
         
         # Hacer la consulta directamente (más eficiente que usar prefetch para este caso)
         ots = OrdenTrabajo.objects.filter(
-            vehiculo=obj.vehiculo,
-            apertura__date__gte=fecha_ingreso,
-            apertura__date__lte=fecha_limite
+            rango_fechas("apertura", desde=fecha_ingreso, hasta=fecha_limite),
+            vehiculo=obj.vehiculo
         ).order_by('-apertura')[:5]  # Máximo 5 OTs más recientes
         
         return [{
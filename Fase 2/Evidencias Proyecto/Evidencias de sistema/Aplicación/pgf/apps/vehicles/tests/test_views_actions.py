@@ -124,7 +124,7 @@ class TestVehiculoActions:
         # Verificar que el ingreso se creó correctamente
         from apps.vehicles.models import IngresoVehiculo
         from django.utils import timezone
-        hoy = timezone.now().date()
+        hoy = timezone.localdate()
         ingresos_count = IngresoVehiculo.objects.filter(fecha_ingreso__date=hoy).count()
         assert ingresos_count >= 1, f"No se encontraron ingresos para hoy ({hoy}). Total en DB: {IngresoVehiculo.objects.count()}"
         
@@ -31,6 +31,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db import transaction  # Para transacciones atómicas
 from django.utils import timezone  # Para timestamps
 from drf_spectacular.utils import extend_schema  # Para documentación OpenAPI
+from apps.core.date_filters import rango_dia, rango_fechas  # Rangos de fechas que usan índices
 
 from .models import Vehiculo, IngresoVehiculo, EvidenciaIngreso, HistorialVehiculo, BackupVehiculo, Marca
 from apps.workorders.models import BloqueoVehiculo
@@ -306,9 +307,9 @@ class VehiculoViewSet(viewsets.ModelViewSet):
         
         # Buscar si hay una agenda programada para este vehículo hoy
         agenda = Agenda.objects.filter(
+            rango_dia("fecha_programada", timezone.localdate()),  # Solo del día actual
             vehiculo=vehiculo,
-            estado__in=["PROGRAMADA", "CONFIRMADA"],  # Estados válidos
-            fecha_programada__date=timezone.now().date()  # Solo del día actual
+            estado__in=["PROGRAMADA", "CONFIRMADA"]  # Estados válidos
         ).first()
         
         # Obtener motivo del ingreso
@@ -638,12 +639,12 @@ class VehiculoViewSet(viewsets.ModelViewSet):
             )
         
         # Obtener fecha de hoy
-        hoy = timezone.now().date()
+        hoy = timezone.localdate()
         
         # Filtrar ingresos del día (mostrar todos, tanto los que han salido como los que no)
         # Mostrar todos los ingresos del día, independientemente de si tienen OTs activas o si han salido
         ingresos = IngresoVehiculo.objects.filter(
-            fecha_ingreso__date=hoy
+            rango_dia("fecha_ingreso", hoy)
         ).select_related(
             "vehiculo", 
             "vehiculo__marca",
@@ -801,7 +802,7 @@ class VehiculoViewSet(viewsets.ModelViewSet):
             try:
                 from datetime import datetime
                 fecha_desde_obj = datetime.strptime(fecha_desde, "%Y-%m-%d").date()
-                ingresos = ingresos.filter(fecha_ingreso__date__gte=fecha_desde_obj)
+                ingresos = ingresos.filter(rango_fechas("fecha_ingreso", desde=fecha_desde_obj))
             except ValueError:
                 pass  # Ignorar fecha inválida
         
@@ -810,15 +811,15 @@ class VehiculoViewSet(viewsets.ModelViewSet):
             try:
                 from datetime import datetime
                 fecha_hasta_obj = datetime.strptime(fecha_hasta, "%Y-%m-%d").date()
-                ingresos = ingresos.filter(fecha_ingreso__date__lte=fecha_hasta_obj)
+                ingresos = ingresos.filter(rango_fechas("fecha_ingreso", hasta=fecha_hasta_obj))
             except ValueError:
                 pass  # Ignorar fecha inválida
         
         # Si no se proporcionaron fechas, usar últimos 30 días por defecto
         if not fecha_desde and not fecha_hasta:
             from datetime import timedelta
-            fecha_desde_default = timezone.now().date() - timedelta(days=30)
-            ingresos = ingresos.filter(fecha_ingreso__date__gte=fecha_desde_default)
+            fecha_desde_default = timezone.localdate() - timedelta(days=30)
+            ingresos = ingresos.filter(rango_fechas("fecha_ingreso", desde=fecha_desde_default))
         
         # Filtrar por estado de salida
         if salio_param.lower() == "true":
@@ -1182,10 +1183,10 @@ class VehiculoViewSet(viewsets.ModelViewSet):
             ot_asociada = None
             try:
                 # Buscar OT que se creó el mismo día del ingreso
-                fecha_ingreso = ing.fecha_ingreso.date()
+                fecha_ingreso = timezone.localdate(ing.fecha_ingreso)
                 ot_asociada = OrdenTrabajo.objects.filter(
-                    vehiculo=vehiculo,
-                    apertura__date=fecha_ingreso
+                    rango_dia("apertura", fecha_ingreso),
+                    vehiculo=vehiculo
                 ).order_by('-apertura').first()
             except Exception:
                 pass
@@ -1,12 +1,14 @@
 # apps/workorders/filters.py
 import django_filters as filters
 from django.db.models import Q
+from apps.core.date_filters import RangoFechaFilter
 from .models import OrdenTrabajo
 
 class OrdenTrabajoFilter(filters.FilterSet):
     estado = filters.CharFilter(field_name="estado", lookup_expr="iexact")
-    apertura_from = filters.DateFilter(field_name="apertura", lookup_expr="date__gte")
-    apertura_to   = filters.DateFilter(field_name="apertura", lookup_expr="date__lte")
+    # Rangos de timestamps en hora local (ver apps/core/date_filters.py) para usar el índice de apertura
+    apertura_from = RangoFechaFilter(field_name="apertura", lookup_expr="gte")
+    apertura_to   = RangoFechaFilter(field_name="apertura", lookup_expr="lte")
     patente = filters.CharFilter(label="Patente", method="filter_patente")
     mecanico = filters.CharFilter(label="Mecánico", method="filter_mecanico")
 
@@ -15,40 +17,29 @@ class OrdenTrabajoFilter(filters.FilterSet):
     
     def filter_mecanico(self, queryset, name, value):
         """
-        Filtra por mecánico usando el ID (UUID).
-        Maneja errores de formato UUID de forma más flexible.
+        Filtra por mecánico usando su ID o un texto de búsqueda.
+        
+        - Si el valor es numérico (ID de User), filtra por mecanico_id.
+        - Si no, busca por username, nombre, apellido, email o RUT usando la
+          columna indexada User.busqueda (ver apps/users/search.py). Cada palabra
+          se compara como prefijo y sin tildes: "jose per" encuentra "José Pérez".
         
         Si el usuario autenticado es MECANICO y se envía su propio ID,
         el filtro funciona correctamente con el filtrado automático de get_queryset.
         """
-        if not value:
+        value_clean = str(value).strip() if value else ""
+        if not value_clean:
             return queryset
         
-        try:
-            import uuid
-            # Limpiar el valor (quitar espacios, guiones, etc.)
-            value_clean = str(value).strip()
-            # Intentar convertir a UUID
-            mecanico_uuid = uuid.UUID(value_clean)
-            # Filtrar por mecanico_id (el campo ForeignKey)
-            # Usar select_related para optimizar la consulta
-            return queryset.filter(mecanico_id=mecanico_uuid).select_related('mecanico')
-        except (ValueError, TypeError, AttributeError) as e:
-            # Si no es un UUID válido, intentar buscar por username o nombre
-            # Esto es útil para búsquedas más flexibles
-            try:
-                return queryset.filter(
-                    Q(mecanico__username__icontains=str(value)) |
-                    Q(mecanico__first_name__icontains=str(value)) |
-                    Q(mecanico__last_name__icontains=str(value))
-                ).select_related('mecanico')
-            except Exception:
-                # Si todo falla, retornar queryset sin filtrar (evitar error 400)
-                # Pero loguear el error para debugging
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f"Error al filtrar por mecánico con valor '{value}': {e}")
-                return queryset
+        # IDs de usuario son BigAutoField: un valor numérico es un ID
+        if value_clean.isdigit():
+            return queryset.filter(mecanico_id=int(value_clean)).select_related('mecanico')
+        
+        # Texto libre: usar el índice de búsqueda de usuarios
+        from apps.users.search import buscar_usuarios
+        return buscar_usuarios(
+            queryset, value_clean, campo="mecanico__busqueda"
+        ).select_related('mecanico')
 
     class Meta:
         model = OrdenTrabajo
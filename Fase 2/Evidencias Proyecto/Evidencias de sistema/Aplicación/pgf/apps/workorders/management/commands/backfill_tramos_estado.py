@@ -0,0 +1,34 @@
+# apps/workorders/management/commands/backfill_tramos_estado.py
+"""
+Reconstruye el ledger de tiempo por estado (TramoEstado) desde Auditoria.
+
+Las OT creadas antes del ledger no tienen tramos. Este comando los arma a
+partir de los registros CAMBIO_ESTADO (payload estado_anterior/estado_nuevo)
+de cada OT. Solo procesa OT sin tramos, así que se puede correr varias veces.
+
+Uso:
+    python manage.py backfill_tramos_estado
+    python manage.py backfill_tramos_estado --lote 1000
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.workorders import tramos
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los tramos de tiempo por estado de las OT desde la auditoría"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=tramos.TAMANO_LOTE,
+            help="OT por lote (una consulta de auditoría por lote)",
+        )
+
+    def handle(self, *args, **options):
+        ot_procesadas, tramos_creados = tramos.reconstruir_desde_auditoria(tamano=options["lote"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{ot_procesadas} OT procesadas, {tramos_creados} tramos creados"
+        ))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0001_initial'),
+        ('vehicles', '0009_merge_0007_normalizar_patentes_0008_remove_site_field'),
+        ('workorders', '0018_itemot_repuesto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ordentrabajo',
+            index=models.Index(fields=['cierre'], name='workorders__cierre_789004_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:37
+
+import apps.core.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workorders', '0019_ordentrabajo_cierre_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='evidencia',
+            name='id',
+            field=models.UUIDField(default=apps.core.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='ordentrabajo',
+            name='id',
+            field=models.UUIDField(default=apps.core.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
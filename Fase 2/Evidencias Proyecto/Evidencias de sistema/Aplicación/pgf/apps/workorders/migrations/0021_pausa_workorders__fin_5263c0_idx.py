@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workorders', '0020_alter_evidencia_id_alter_ordentrabajo_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pausa',
+            index=models.Index(fields=['fin'], name='workorders__fin_5263c0_idx'),
+        ),
+    ]
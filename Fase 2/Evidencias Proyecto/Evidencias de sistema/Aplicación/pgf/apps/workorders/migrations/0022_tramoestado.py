@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workorders', '0021_pausa_workorders__fin_5263c0_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TramoEstado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('ABIERTA', 'ABIERTA'), ('EN_DIAGNOSTICO', 'EN_DIAGNOSTICO'), ('EN_EJECUCION', 'EN_EJECUCION'), ('EN_PAUSA', 'EN_PAUSA'), ('EN_QA', 'EN_QA'), ('RETRABAJO', 'RETRABAJO'), ('CERRADA', 'CERRADA'), ('ANULADA', 'ANULADA')], max_length=20)),
+                ('inicio', models.DateTimeField()),
+                ('fin', models.DateTimeField(blank=True, null=True)),
+                ('segundos', models.BigIntegerField(blank=True, null=True)),
+                ('zona', models.CharField(blank=True, default='', max_length=100)),
+                ('ot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tramos_estado', to='workorders.ordentrabajo')),
+            ],
+            options={
+                'ordering': ['ot', 'inicio'],
+                'indexes': [models.Index(fields=['ot', 'inicio'], name='workorders__ot_id_83e69d_idx'), models.Index(fields=['fin', 'estado'], name='workorders__fin_10b610_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workorders', '0022_tramoestado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tramoestado',
+            name='inicio',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -14,6 +14,7 @@ de mantenimiento y reparación de vehículos:
 - Checklist: Checklists de calidad
 - Evidencia: Evidencias fotográficas/documentales
 - Auditoria: Registro de todas las acciones del sistema
+- TramoEstado: Tiempo que una OT pasó en cada estado (ledger de transiciones)
 
 Relaciones principales:
 - OrdenTrabajo -> Vehiculo (ForeignKey)
@@ -22,6 +23,7 @@ Relaciones principales:
 - Presupuesto -> OrdenTrabajo (OneToOne)
 - Pausa -> OrdenTrabajo (ForeignKey)
 - Evidencia -> OrdenTrabajo (ForeignKey)
+- TramoEstado -> OrdenTrabajo (ForeignKey)
 
 Flujo de estados:
 ABIERTA -> EN_DIAGNOSTICO -> EN_EJECUCION -> EN_PAUSA -> EN_EJECUCION -> EN_QA -> CERRADA
@@ -33,6 +35,7 @@ from django.db import models
 from django.conf import settings  # Para acceder a AUTH_USER_MODEL
 from apps.vehicles.models import Vehiculo  # Modelo de vehículo
 import uuid  # Para generar IDs únicos
+from apps.core.ids import uuid7  # UUIDv7 ordenado por tiempo para PKs de alta inserción
 
 
 class OrdenTrabajo(models.Model):
@@ -81,8 +84,9 @@ class OrdenTrabajo(models.Model):
     
     # ==================== CAMPOS PRINCIPALES ====================
     
-    # ID único: UUID4 para evitar colisiones y no exponer información
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # ID único: UUIDv7 (ordenado por tiempo) para insertar al final del índice de la PK
+    # sin exponer un contador secuencial; ver apps/core/ids.py
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     
     # Vehículo asociado: PROTECT evita eliminar vehículo si tiene OTs activas
     # related_name="ordenes" permite acceder desde vehiculo.ordenes.all()
@@ -302,7 +306,8 @@ class OrdenTrabajo(models.Model):
         """
         indexes = [
             models.Index(fields=["estado"]),  # Búsquedas por estado (muy frecuente)
-            models.Index(fields=["apertura"])  # Ordenamiento por fecha de apertura
+            models.Index(fields=["apertura"]),  # Ordenamiento por fecha de apertura
+            models.Index(fields=["cierre"]),  # Rangos de cierre en dashboards y reportes
         ]
 
 
@@ -592,6 +597,7 @@ class Pausa(models.Model):
             models.Index(fields=["ot", "inicio"]),  # Búsquedas por OT y fecha
             models.Index(fields=["tipo", "inicio"]),  # Filtros por tipo
             models.Index(fields=["es_automatica"]),  # Filtros de pausas automáticas
+            models.Index(fields=["fin"]),  # Pausas terminadas por día (KPIs diarios)
         ]
         ordering = ["-inicio"]  # Más recientes primero
     
@@ -696,7 +702,7 @@ class Evidencia(models.Model):
         COMPRIMIDO = "COMPRIMIDO", "COMPRIMIDO"  # Archivos comprimidos
         OTRO = "OTRO", "OTRO"  # Otro tipo de archivo
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     
     # OT a la que pertenece la evidencia (opcional)
     # Si es None, la evidencia es general y no está asociada a una OT específica
@@ -826,6 +832,64 @@ class Auditoria(models.Model):
         return f"{self.ts} {self.accion} {self.objeto_tipo}:{self.objeto_id}"
 
 
+class TramoEstado(models.Model):
+    """
+    Tramo de tiempo que una Orden de Trabajo pasó en un estado.
+
+    Los dashboards solo podían promediar (ahora - apertura) de las OT que
+    están hoy en cada estado, porque no se guardaba cuánto duró cada estado.
+    Cada transición (apps/workorders/services.py: transition) cierra el
+    tramo abierto de la OT y abre uno nuevo en el estado destino; una OT
+    tiene a lo más un tramo abierto (fin NULL), el de su estado actual.
+
+    segundos se calcula al cerrar el tramo, así que las duraciones por
+    estado se agregan (promedio, percentiles) sobre una columna, con rangos
+    por fin que usan índice.
+
+    zona se copia de la OT (igual que en KPIDiario) para acotar por alcance
+    sin JOIN (apps/reports/scopes.py).
+
+    Los tramos anteriores a este registro se reconstruyen desde Auditoria
+    (comando backfill_tramos_estado, ver apps/workorders/tramos.py).
+    """
+
+    ot = models.ForeignKey(
+        OrdenTrabajo,
+        on_delete=models.CASCADE,
+        related_name="tramos_estado"
+    )
+
+    # Estado en el que estuvo la OT durante el tramo
+    estado = models.CharField(max_length=20, choices=OrdenTrabajo.ESTADOS)
+
+    # Inicio y fin del tramo (fin NULL = estado actual de la OT). inicio
+    # NULL: inicio desconocido (tramo reconstruido tras una transición sin
+    # auditoría); al cerrarse queda sin segundos y no entra en las duraciones
+    inicio = models.DateTimeField(null=True, blank=True)
+    fin = models.DateTimeField(null=True, blank=True)
+
+    # Duración en segundos (se completa al cerrar el tramo)
+    segundos = models.BigIntegerField(null=True, blank=True)
+
+    # Zona de la OT al abrir el tramo
+    zona = models.CharField(max_length=100, blank=True, default="")
+
+    class Meta:
+        """
+        Configuración del modelo.
+
+        - indexes: tramo abierto de una OT y tramos cerrados por rango de fechas
+        """
+        indexes = [
+            models.Index(fields=["ot", "inicio"]),  # Tramos de una OT (y su tramo abierto)
+            models.Index(fields=["fin", "estado"]),  # Duraciones por estado en un rango
+        ]
+        ordering = ["ot", "inicio"]
+
+    def __str__(self):
+        return f"OT {self.ot_id} {self.estado} {self.inicio:%Y-%m-%d %H:%M}"
+
+
 class ComentarioOT(models.Model):
     """
     Comentarios internos en una Orden de Trabajo.
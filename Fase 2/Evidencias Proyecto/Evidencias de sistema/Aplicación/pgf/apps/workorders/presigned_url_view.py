@@ -3,9 +3,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import permissions
 from rest_framework import status
-import boto3, os, uuid
+import os, uuid
 from datetime import timedelta
-from botocore.exceptions import ClientError
 
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated])
@@ -26,6 +25,10 @@ def presigned_url_view(request):
     tipo = request.data.get("tipo", "FOTO")
     descripcion = request.data.get("descripcion", "")
     
+    # boto3 se importa aquí para no cargarlo al arrancar el proceso
+    import boto3
+    from botocore.exceptions import ClientError
+
     # Configurar S3
     bucket = os.getenv("AWS_STORAGE_BUCKET_NAME", "pgf-evidencias-dev")
     s3_endpoint_internal = os.getenv("AWS_S3_ENDPOINT_URL", "http://localstack:4566")
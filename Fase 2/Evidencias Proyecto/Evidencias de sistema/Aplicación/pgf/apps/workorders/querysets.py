@@ -0,0 +1,220 @@
+"""
+Perfiles de queryset para Órdenes de Trabajo.
+
+Cada acción de OrdenTrabajoViewSet necesita relaciones distintas:
+- El listado (OrdenTrabajoListSerializer) solo usa vehículo, marca y los usuarios
+  asignados; no necesita items, evidencias, comentarios, pausas ni checklists.
+- El detalle (OrdenTrabajoSerializer) usa todo lo anterior más el supervisor del
+  vehículo, el chofer, items con su repuesto, evidencias vigentes y comentarios
+  principales con sus respuestas.
+- Las transiciones de estado (en-pausa, cerrar, etc.) solo usan los usuarios
+  asignados y el vehículo para notificar y enviar la actualización en tiempo real.
+
+Cada perfil declara además su presupuesto de queries (para una OT o una página),
+que los tests verifican con django_assert_max_num_queries.
+
+Relaciones:
+- Usado por: apps/workorders/views.py (OrdenTrabajoViewSet.get_queryset)
+- Usado por: apps/workorders/serializers.py (evidencias_vigentes, comentarios_ot)
+"""
+
+from django.db.models import Prefetch
+
+from .models import ComentarioOT, Evidencia, ItemOT
+
+
+# Relaciones ForeignKey que usa OrdenTrabajoListSerializer
+RELACIONES_LISTADO = (
+    "vehiculo",
+    "vehiculo__marca",
+    "responsable",
+    "mecanico",
+    "supervisor",
+    "jefe_taller",
+)
+
+# OrdenTrabajoSerializer usa además el supervisor del vehículo y el chofer
+RELACIONES_DETALLE = RELACIONES_LISTADO + (
+    "vehiculo__supervisor",
+    "chofer",
+)
+
+# Transiciones: usuarios a notificar y datos básicos del vehículo/chofer
+# (ver apps/notifications/realtime.py → enviar_actualizacion_ot)
+RELACIONES_TRANSICION = (
+    "vehiculo",
+    "responsable",
+    "mecanico",
+    "supervisor",
+    "jefe_taller",
+    "chofer",
+)
+
+
+def prefetch_detalle():
+    """
+    Prefetches del detalle de OT.
+
+    Las evidencias se filtran y ordenan en la misma query del prefetch y se
+    guardan en un atributo propio (to_attr), porque el serializer las filtraba
+    con .filter() y eso descartaba cualquier prefetch genérico. Los comentarios
+    (principales y respuestas a cualquier nivel) se traen en una sola query y
+    el árbol se arma en Python con armar_hilos_comentarios().
+
+    Retorna:
+    - Lista de lookups para prefetch_related()
+    """
+    return [
+        Prefetch("items", queryset=ItemOT.objects.select_related("repuesto")),
+        Prefetch(
+            "evidencias",
+            queryset=Evidencia.objects.filter(invalidado=False)
+            .select_related("subido_por", "invalidado_por")
+            .order_by("-subido_en"),
+            to_attr="evidencias_vigentes",
+        ),
+        Prefetch(
+            "comentarios",
+            queryset=ComentarioOT.objects.select_related("usuario").order_by("creado_en"),
+            to_attr="comentarios_ot",
+        ),
+    ]
+
+
+def armar_hilos_comentarios(comentarios):
+    """
+    Arma el árbol de comentarios a partir de la lista plana de la OT.
+
+    Cada comentario queda con el atributo respuestas_ordenadas (por fecha
+    ascendente), que ComentarioOTSerializer usa en lugar de consultar
+    obj.respuestas.
+
+    Parámetros:
+    - comentarios: Lista de ComentarioOT de una OT ordenada por creado_en
+
+    Retorna:
+    - Lista de comentarios principales, más recientes primero
+    """
+    for comentario in comentarios:
+        comentario.respuestas_ordenadas = []
+    por_id = {comentario.id: comentario for comentario in comentarios}
+
+    principales = []
+    for comentario in comentarios:
+        padre = por_id.get(comentario.comentario_padre_id)
+        if padre is not None:
+            padre.respuestas_ordenadas.append(comentario)
+        elif comentario.comentario_padre_id is None:
+            principales.append(comentario)
+    principales.reverse()
+    return principales
+
+
+def precargar_auditoria(ot_ids):
+    """
+    Precarga la auditoría reciente de varias OT en 2 queries.
+
+    OrdenTrabajoSerializer muestra los últimos 5 eventos y el total de eventos
+    de cada OT. Al serializar muchas OT (endpoint batch) eso serían 2 queries
+    por OT; esta función los trae para todas juntas y el serializer los toma
+    desde context["auditoria_por_ot"].
+
+    Parámetros:
+    - ot_ids: Iterable de IDs de OrdenTrabajo
+
+    Retorna:
+    - Dict {str(ot_id): {"recientes": [Auditoria, ...], "total": int}}
+    """
+    from django.db.models import Count, F, Window
+    from django.db.models.functions import RowNumber
+    from .models import Auditoria
+
+    ids = [str(ot_id) for ot_id in ot_ids]
+    resultado = {ot_id: {"recientes": [], "total": 0} for ot_id in ids}
+    if not ids:
+        return resultado
+
+    eventos = Auditoria.objects.filter(
+        objeto_tipo="OrdenTrabajo",
+        objeto_id__in=ids
+    )
+
+    # Últimos 5 eventos por OT (ROW_NUMBER particionado por objeto_id)
+    recientes = eventos.select_related("usuario").annotate(
+        posicion=Window(
+            expression=RowNumber(),
+            partition_by=[F("objeto_id")],
+            order_by=F("ts").desc(),
+        )
+    ).filter(posicion__lte=5).order_by("objeto_id", "posicion")
+    for evento in recientes:
+        resultado[evento.objeto_id]["recientes"].append(evento)
+
+    # Total de eventos por OT
+    for fila in eventos.values("objeto_id").annotate(total=Count("id")).order_by():
+        resultado[fila["objeto_id"]]["total"] = fila["total"]
+
+    return resultado
+
+
+# Perfiles disponibles. presupuesto_queries es el máximo de queries que la acción
+# puede ejecutar para un usuario ya autenticado (sin contar la autenticación):
+# - listado: COUNT de paginación + página (select_related en un solo JOIN)
+# - detalle: OT + items + evidencias + comentarios
+#   + 2 de auditoría del serializer (últimos eventos y total)
+# - transicion: OT + UPDATE + INSERT de auditoría + destinatarios de la
+#   actualización en tiempo real (admins)
+# - exportacion: por cada lote de OT, el fetch del cursor + los items del
+#   lote (las columnas salen de values_list, sin instanciar modelos)
+# Los SAVEPOINT de transaction.atomic no cuentan para el presupuesto.
+PERFILES = {
+    "listado": {
+        "select_related": RELACIONES_LISTADO,
+        "prefetch_related": (),
+        "presupuesto_queries": 2,
+    },
+    "detalle": {
+        "select_related": RELACIONES_DETALLE,
+        "prefetch_related": prefetch_detalle,
+        "presupuesto_queries": 6,
+    },
+    "transicion": {
+        "select_related": RELACIONES_TRANSICION,
+        "prefetch_related": (),
+        # + UPDATE/INSERT del ledger de tiempo por estado (apps/workorders/tramos.py)
+        "presupuesto_queries": 6,
+    },
+    "exportacion": {
+        "select_related": (),
+        "prefetch_related": (),
+        "presupuesto_queries": 2,
+    },
+}
+
+
+# Queries adicionales que agrega el alcance de cada rol en get_queryset
+# (BODEGA verifica si existen OTs que requieren repuestos antes de filtrar)
+QUERIES_EXTRA_POR_ROL = {
+    "BODEGA": 1,
+}
+
+
+def aplicar_perfil(queryset, perfil: str):
+    """
+    Aplica select_related/prefetch_related del perfil indicado.
+
+    Parámetros:
+    - queryset: QuerySet de OrdenTrabajo
+    - perfil: "listado", "detalle", "transicion" o "exportacion"
+
+    Retorna:
+    - QuerySet con las relaciones del perfil
+    """
+    config = PERFILES[perfil]
+    queryset = queryset.select_related(*config["select_related"])
+    prefetch = config["prefetch_related"]
+    if callable(prefetch):
+        prefetch = prefetch()
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
@@ -214,6 +214,32 @@ class OrdenTrabajoSerializer(serializers.ModelSerializer):
             }
         return None
     
+    def _auditoria_reciente(self, obj):
+        """
+        Retorna los últimos 5 eventos de auditoría de la OT (con usuario).
+        
+        Se consulta una sola vez por OT y se reutiliza en get_trazabilidad
+        y get_historial_reciente.
+        """
+        from apps.workorders.models import Auditoria
+        
+        # Auditoría precargada para varias OT (ver querysets.precargar_auditoria)
+        precargada = self.context.get("auditoria_por_ot", {}).get(str(obj.id))
+        if precargada is not None:
+            return precargada["recientes"]
+        
+        if not hasattr(self, "_auditoria_por_ot"):
+            self._auditoria_por_ot = {}
+        cache = self._auditoria_por_ot
+        if obj.id not in cache:
+            cache[obj.id] = list(
+                Auditoria.objects.filter(
+                    objeto_tipo="OrdenTrabajo",
+                    objeto_id=str(obj.id)
+                ).select_related("usuario").order_by('-ts')[:5]
+            )
+        return cache[obj.id]
+    
     def get_trazabilidad(self, obj):
         """
         Retorna información de trazabilidad de la OT.
@@ -221,17 +247,19 @@ class OrdenTrabajoSerializer(serializers.ModelSerializer):
         """
         from apps.workorders.models import Auditoria
         
-        # Obtener última auditoría relacionada a esta OT
-        ultima_auditoria = Auditoria.objects.filter(
-            objeto_tipo="OrdenTrabajo",
-            objeto_id=str(obj.id)
-        ).order_by('-ts').first()
+        # Última auditoría relacionada a esta OT
+        eventos = self._auditoria_reciente(obj)
+        ultima_auditoria = eventos[0] if eventos else None
         
-        # Contar total de eventos de auditoría
-        total_eventos = Auditoria.objects.filter(
-            objeto_tipo="OrdenTrabajo",
-            objeto_id=str(obj.id)
-        ).count()
+        # Contar total de eventos de auditoría (o usar el total precargado)
+        precargada = self.context.get("auditoria_por_ot", {}).get(str(obj.id))
+        if precargada is not None:
+            total_eventos = precargada["total"]
+        else:
+            total_eventos = Auditoria.objects.filter(
+                objeto_tipo="OrdenTrabajo",
+                objeto_id=str(obj.id)
+            ).count()
         
         return {
             "ultima_auditoria": {
@@ -248,13 +276,8 @@ class OrdenTrabajoSerializer(serializers.ModelSerializer):
     
     def get_historial_reciente(self, obj):
         """Retorna un resumen del historial reciente de la OT."""
-        from apps.workorders.models import Auditoria
-        
-        # Obtener últimos 5 eventos de auditoría
-        eventos_recientes = Auditoria.objects.filter(
-            objeto_tipo="OrdenTrabajo",
-            objeto_id=str(obj.id)
-        ).order_by('-ts')[:5]
+        # Últimos 5 eventos de auditoría
+        eventos_recientes = self._auditoria_reciente(obj)
         
         return [
             {
@@ -268,14 +291,23 @@ class OrdenTrabajoSerializer(serializers.ModelSerializer):
     
     def get_evidencias(self, obj):
         """Retorna las evidencias de la OT."""
-        # Obtener evidencias no invalidadas, ordenadas por fecha de subida
-        evidencias = obj.evidencias.filter(invalidado=False).order_by('-subido_en')
+        # Evidencias no invalidadas, ordenadas por fecha de subida
+        # (precargadas por el perfil "detalle" de apps/workorders/querysets.py)
+        evidencias = getattr(obj, "evidencias_vigentes", None)
+        if evidencias is None:
+            evidencias = obj.evidencias.filter(invalidado=False).order_by('-subido_en')
         return EvidenciaSerializer(evidencias, many=True).data
     
     def get_comentarios(self, obj):
         """Retorna los comentarios de la OT (solo comentarios principales, sin respuestas)."""
-        # Obtener solo comentarios principales (sin comentario_padre), ordenados por fecha
-        comentarios = obj.comentarios.filter(comentario_padre__isnull=True).order_by('-creado_en')
+        # Solo comentarios principales (sin comentario_padre), ordenados por fecha
+        # (precargados por el perfil "detalle" de apps/workorders/querysets.py)
+        comentarios_ot = getattr(obj, "comentarios_ot", None)
+        if comentarios_ot is not None:
+            from .querysets import armar_hilos_comentarios
+            comentarios = armar_hilos_comentarios(comentarios_ot)
+        else:
+            comentarios = obj.comentarios.filter(comentario_padre__isnull=True).order_by('-creado_en')
         return ComentarioOTSerializer(comentarios, many=True).data
 
     class Meta:
@@ -581,7 +613,10 @@ class ComentarioOTSerializer(serializers.ModelSerializer):
     
     def get_respuestas(self, obj):
         """Obtiene las respuestas de un comentario."""
-        respuestas = obj.respuestas.all().order_by("creado_en")
+        # Usar las respuestas armadas desde el prefetch si existen (perfil "detalle" de la OT)
+        respuestas = getattr(obj, "respuestas_ordenadas", None)
+        if respuestas is None:
+            respuestas = obj.respuestas.all().order_by("creado_en")
         return ComentarioOTSerializer(respuestas, many=True).data
     
     def validate(self, attrs):
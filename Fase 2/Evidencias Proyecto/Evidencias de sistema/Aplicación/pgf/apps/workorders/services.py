@@ -12,6 +12,7 @@ ABIERTA → EN_DIAGNOSTICO → EN_EJECUCION → EN_PAUSA → EN_EJECUCION → EN
 Relaciones:
 - Importado por: apps/workorders/views.py (OrdenTrabajoViewSet)
 - Usado en: apps/workorders/tasks_colacion.py (para pausas automáticas)
+- Usa: apps/workorders/tramos.py (ledger de tiempo por estado)
 """
 
 from django.utils import timezone  # Para obtener la fecha/hora actual con timezone
@@ -102,7 +103,7 @@ def can_transition(current: str, target: str) -> bool:
     return target in allowed_targets
 
 
-def transition(ot, target: str):
+def transition(ot, target: str, cuando=None):
     """
     Realiza una transición de estado en una Orden de Trabajo.
     
@@ -115,6 +116,8 @@ def transition(ot, target: str):
     Parámetros:
     - ot: Instancia de OrdenTrabajo a modificar
     - target: Estado destino (str)
+    - cuando: Momento de la transición (opcional, default: ahora). Las
+      tareas de colación pasan la misma hora que la pausa que crean
     
     Retorna:
     - Tupla (success: bool, error: str | None)
@@ -127,6 +130,9 @@ def transition(ot, target: str):
     - fecha_inicio_ejecucion: si target == "EN_EJECUCION" (solo la primera vez)
     - cierre: si target == "CERRADA"
     
+    Además registra la transición en el ledger de tiempo por estado
+    (TramoEstado, ver apps/workorders/tramos.py).
+    
     Uso:
     - Llamado desde apps/workorders/views.py en acciones de OrdenTrabajoViewSet
     - Llamado desde apps/workorders/tasks_colacion.py para pausas automáticas
@@ -136,6 +142,9 @@ def transition(ot, target: str):
         error_msg = f"Transición inválida: {ot.estado} → {target}"
         return False, error_msg
     
+    estado_anterior = ot.estado
+    ahora = cuando or timezone.now()
+    
     # Actualizar el estado
     ot.estado = target
     
@@ -144,17 +153,17 @@ def transition(ot, target: str):
     
     if target == "EN_DIAGNOSTICO":
         # Registrar cuándo se inició el diagnóstico
-        ot.fecha_diagnostico = timezone.now()
+        ot.fecha_diagnostico = ahora
     
     elif target == "EN_EJECUCION":
         # Solo registrar la primera vez que se inicia ejecución
         # Si ya existe, no sobrescribir (permite rastrear la fecha original)
         if not ot.fecha_inicio_ejecucion:
-            ot.fecha_inicio_ejecucion = timezone.now()
+            ot.fecha_inicio_ejecucion = ahora
     
     elif target == "CERRADA":
         # Registrar cuándo se cerró la OT
-        ot.cierre = timezone.now()
+        ot.cierre = ahora
     
     # Determinar qué campos actualizar en la base de datos
     # Usar update_fields para optimizar la consulta SQL
@@ -172,11 +181,16 @@ def transition(ot, target: str):
     # Esto evita actualizar campos que no cambiaron
     ot.save(update_fields=update_fields)
     
+    # Cerrar el tramo del estado anterior y abrir el del nuevo
+    if estado_anterior != target:
+        from .tramos import registrar
+        registrar(ot, estado_anterior, target, ahora)
+    
     # Retornar éxito
     return True, None
 
 
-def do_transition(ot, target: str, usuario=None):
+def do_transition(ot, target: str, usuario=None, cuando=None):
     """
     Versión que lanza excepción en lugar de retornar tupla.
     
@@ -191,6 +205,7 @@ def do_transition(ot, target: str, usuario=None):
     - ot: Instancia de OrdenTrabajo
     - target: Estado destino (str)
     - usuario: Usuario que realiza la transición (opcional, para auditoría)
+    - cuando: Momento de la transición (opcional, ver transition())
     
     Lanza:
     - ValueError: Si la transición no es válida
@@ -203,7 +218,7 @@ def do_transition(ot, target: str, usuario=None):
     estado_anterior = ot.estado
     
     # Intentar la transición
-    ok, err = transition(ot, target)
+    ok, err = transition(ot, target, cuando=cuando)
     
     # Si falló, lanzar excepción con el mensaje de error
     if not ok:
@@ -1,7 +1,5 @@
 import io
 from celery import shared_task
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
 from django.core.files.storage import default_storage
 from django.utils import timezone
 
@@ -34,6 +32,7 @@ def generar_pdf_cierre(self, ot_id: str, user_id: int | None):
     
     try:
         from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
         from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
         from reportlab.lib.units import inch
         from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
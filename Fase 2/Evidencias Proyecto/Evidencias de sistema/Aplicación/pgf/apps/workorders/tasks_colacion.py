@@ -1,12 +1,25 @@
 # apps/workorders/tasks_colacion.py
 """
 Tareas Celery para manejo automático de colación (12:30-13:15)
+
+Las transiciones usan la misma hora que el inicio y el fin de la pausa
+(cuando=...), así el tramo EN_PAUSA del ledger (TramoEstado) coincide con
+la pausa de colación.
+
+Cada OT pausada/reanudada se publica en tiempo real; las actualizaciones se
+agrupan (apps/notifications/dispatcher.py) y salen cada
+REALTIME_VENTANA_AGRUPACION segundos, un mensaje por destinatario, en vez
+de uno por OT y destinatario.
 """
 import logging
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, time
+from apps.notifications.dispatcher import agrupar
+from apps.notifications.realtime import enviar_actualizacion_ot
 from .models import OrdenTrabajo, Pausa
+from .querysets import RELACIONES_TRANSICION
 from django.db.models import Q
 
 logger = logging.getLogger(__name__)
@@ -24,37 +37,41 @@ def iniciar_colacion_automatica():
     ots_en_ejecucion = OrdenTrabajo.objects.filter(
         estado="EN_EJECUCION",
         mecanico__isnull=False
-    )
+    ).select_related(*RELACIONES_TRANSICION)
     
     pausas_creadas = []
-    for ot in ots_en_ejecucion:
-        # Verificar que no tenga una pausa activa
-        pausa_activa = Pausa.objects.filter(
-            ot=ot,
-            fin__isnull=True,
-            tipo="COLACION"
-        ).exists()
-        
-        if not pausa_activa:
-            # Crear pausa de colación automática
-            pausa = Pausa.objects.create(
+    with agrupar(ventana=settings.REALTIME_VENTANA_AGRUPACION):
+        for ot in ots_en_ejecucion:
+            # Verificar que no tenga una pausa activa
+            pausa_activa = Pausa.objects.filter(
                 ot=ot,
-                usuario=ot.mecanico,
-                tipo="COLACION",
-                motivo="Colación automática (12:30-13:15)",
-                es_automatica=True,
-                inicio=ahora  # Establecer inicio explícitamente
-            )
-            
-            # Cambiar estado de OT a EN_PAUSA
-            from .services import do_transition
-            try:
-                do_transition(ot, "EN_PAUSA")
-            except (ValueError, Exception) as e:
-                # Si no puede cambiar, registrar error pero continuar
-                logger.warning(f"No se pudo cambiar estado de OT {ot.id} a EN_PAUSA: {e}")
+                fin__isnull=True,
+                tipo="COLACION"
+            ).exists()
             
-            pausas_creadas.append(str(pausa.id))
+            if not pausa_activa:
+                # Crear pausa de colación automática
+                pausa = Pausa.objects.create(
+                    ot=ot,
+                    usuario=ot.mecanico,
+                    tipo="COLACION",
+                    motivo="Colación automática (12:30-13:15)",
+                    es_automatica=True,
+                    inicio=ahora  # Establecer inicio explícitamente
+                )
+                
+                # Cambiar estado de OT a EN_PAUSA
+                from .services import do_transition
+                try:
+                    # Pausa.inicio es auto_now_add: el tramo EN_PAUSA empieza con la pausa
+                    do_transition(ot, "EN_PAUSA", cuando=pausa.inicio)
+                except (ValueError, Exception) as e:
+                    # Si no puede cambiar, registrar error pero continuar
+                    logger.warning(f"No se pudo cambiar estado de OT {ot.id} a EN_PAUSA: {e}")
+                else:
+                    enviar_actualizacion_ot(ot, action="state_changed")
+                
+                pausas_creadas.append(str(pausa.id))
     
     return {
         "pausas_creadas": len(pausas_creadas),
@@ -76,24 +93,27 @@ def finalizar_colacion_automatica():
         tipo="COLACION",
         es_automatica=True,
         fin__isnull=True
-    )
+    ).select_related(*(f"ot__{relacion}" for relacion in RELACIONES_TRANSICION))
     
     pausas_finalizadas = []
-    for pausa in pausas_colacion:
-        pausa.fin = ahora
-        pausa.save(update_fields=["fin"])
+    with agrupar(ventana=settings.REALTIME_VENTANA_AGRUPACION):
+        for pausa in pausas_colacion:
+            pausa.fin = ahora
+            pausa.save(update_fields=["fin"])
         
-        # Reanudar OT
-        ot = pausa.ot
-        if ot.estado == "EN_PAUSA":
-            from .services import do_transition
-            try:
-                do_transition(ot, "EN_EJECUCION")
-            except (ValueError, Exception) as e:
-                # Si no puede cambiar, registrar error pero continuar
-                logger.warning(f"No se pudo cambiar estado de OT {ot.id} a EN_EJECUCION: {e}")
+            # Reanudar OT
+            ot = pausa.ot
+            if ot.estado == "EN_PAUSA":
+                from .services import do_transition
+                try:
+                    do_transition(ot, "EN_EJECUCION", cuando=ahora)
+                except (ValueError, Exception) as e:
+                    # Si no puede cambiar, registrar error pero continuar
+                    logger.warning(f"No se pudo cambiar estado de OT {ot.id} a EN_EJECUCION: {e}")
+                else:
+                    enviar_actualizacion_ot(ot, action="state_changed")
         
-        pausas_finalizadas.append(str(pausa.id))
+            pausas_finalizadas.append(str(pausa.id))
     
     return {
         "pausas_finalizadas": len(pausas_finalizadas),
@@ -2,8 +2,9 @@
 Tests de integración para Celery y tareas asíncronas.
 """
 
+import json
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 from datetime import timedelta
 from apps.workorders.tasks import generar_pdf_cierre, ping_task
 from apps.workorders.tasks_colacion import iniciar_colacion_automatica, finalizar_colacion_automatica
@@ -124,3 +125,28 @@ class TestColacionAutomatica:
         pausa.refresh_from_db()
         assert pausa.fin is not None, f"La pausa no fue finalizada. Estado: {pausa.fin}. Pausas finalizadas: {result_data['pausas_finalizadas']}"
 
+    
+    @pytest.mark.celery
+    def test_colacion_agrupa_actualizaciones(
+        self, db, vehiculo, supervisor_user, mecanico_user, django_capture_on_commit_callbacks
+    ):
+        """Test que la ráfaga de colación envía un mensaje por grupo, no uno por OT."""
+        for _ in range(3):
+            OrdenTrabajo.objects.create(
+                vehiculo=vehiculo, supervisor=supervisor_user, mecanico=mecanico_user,
+                motivo="Colación", estado="EN_EJECUCION", zona="ZONA_TEST"
+            )
+        channel_layer = MagicMock()
+        channel_layer.group_send = AsyncMock()
+        
+        with patch("apps.notifications.realtime.get_channel_layer", return_value=channel_layer), \
+                django_capture_on_commit_callbacks(execute=True):
+            result_data = iniciar_colacion_automatica()
+        
+        assert result_data["pausas_creadas"] == 3
+        grupos = [c.args[0] for c in channel_layer.group_send.call_args_list]
+        # ADMIN, zona, supervisor y mecánico: un lote de 3 OT cada uno
+        assert len(grupos) == len(set(grupos)) == 4
+        lote = channel_layer.group_send.call_args.args[1]
+        assert lote["type"] == "data_update_batch"
+        assert {json.loads(u["frame"])["data"]["estado"] for u in lote["updates"]} == {"EN_PAUSA"}
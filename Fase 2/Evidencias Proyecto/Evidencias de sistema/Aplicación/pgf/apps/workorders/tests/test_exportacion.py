@@ -0,0 +1,146 @@
+# apps/workorders/tests/test_exportacion.py
+"""
+Tests para la exportación de OT y auditoría (GET .../exportar/).
+
+Verifican que:
+- La exportación de OT trae una fila por item, respeta filtros y alcance por rol
+- Las queries no crecen con el número de OT dentro de un lote
+- XLSX y validación de ?formato=
+- Bajo ASGI la exportación se entrega como streaming asíncrono
+- La auditoría solo la exporta ADMIN
+"""
+
+import csv
+import io
+import zipfile
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.workorders.models import Auditoria, ItemOT, OrdenTrabajo
+
+
+URL_OT = "/api/v1/work/ordenes/exportar/"
+
+
+def _cliente(usuario):
+    client = APIClient()
+    client.force_authenticate(user=usuario)
+    return client
+
+
+def _csv(response):
+    assert response.status_code == status.HTTP_200_OK
+    contenido = b"".join(response.streaming_content).decode("utf-8").lstrip("\ufeff")
+    return list(csv.DictReader(io.StringIO(contenido)))
+
+
+class TestExportarOT:
+    """Tests para OrdenTrabajoViewSet.exportar"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_una_fila_por_item(self, admin_user, orden_trabajo, vehiculo, supervisor_user):
+        ItemOT.objects.create(ot=orden_trabajo, tipo="SERVICIO", descripcion="Cambio de aceite",
+                              cantidad=1, costo_unitario=Decimal("25000"))
+        ItemOT.objects.create(ot=orden_trabajo, tipo="SERVICIO", descripcion="Alineación",
+                              cantidad=2, costo_unitario=Decimal("15000"))
+        sin_items = OrdenTrabajo.objects.create(vehiculo=vehiculo, supervisor=supervisor_user, motivo="Sin items")
+
+        response = _cliente(admin_user).get(URL_OT)
+        filas = _csv(response)
+
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        assert len(filas) == 3
+        por_ot = {}
+        for fila in filas:
+            por_ot.setdefault(fila["OT"], []).append(fila["Ítem descripción"])
+        assert sorted(por_ot[str(orden_trabajo.id)]) == ["Alineación", "Cambio de aceite"]
+        assert por_ot[str(sin_items.id)] == [""]
+        assert filas[0]["Patente"] == vehiculo.patente
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_respeta_filtros_y_alcance(self, admin_user, mecanico_user, orden_trabajo, vehiculo, supervisor_user):
+        cerrada = OrdenTrabajo.objects.create(
+            vehiculo=vehiculo, supervisor=supervisor_user, motivo="Cerrada", estado="CERRADA",
+            mecanico=mecanico_user
+        )
+
+        filtradas = _csv(_cliente(admin_user).get(URL_OT + "?estado=CERRADA"))
+        assert [fila["OT"] for fila in filtradas] == [str(cerrada.id)]
+
+        # El mecánico solo exporta sus OT asignadas, igual que en el listado
+        propias = _csv(_cliente(mecanico_user).get(URL_OT))
+        assert [fila["OT"] for fila in propias] == [str(cerrada.id)]
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_queries_constantes(self, admin_user, vehiculo, supervisor_user):
+        """Cursor de OT + una query de items por lote, sin importar cuántas OT haya"""
+        for i in range(30):
+            ot = OrdenTrabajo.objects.create(vehiculo=vehiculo, supervisor=supervisor_user, motivo=f"OT {i}")
+            ItemOT.objects.create(ot=ot, tipo="SERVICIO", descripcion="Revisión",
+                                  cantidad=1, costo_unitario=Decimal("1000"))
+        client = _cliente(admin_user)
+
+        with CaptureQueriesContext(connection) as contexto:
+            filas = _csv(client.get(URL_OT))
+
+        assert len(filas) == 30
+        assert len(contexto.captured_queries) <= 3
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_xlsx_y_formato_invalido(self, admin_user, orden_trabajo):
+        client = _cliente(admin_user)
+
+        response = client.get(URL_OT + "?formato=xlsx")
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Disposition"].endswith('.xlsx"')
+        archivo = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        assert str(orden_trabajo.id) in archivo.read("xl/worksheets/sheet1.xml").decode("utf-8")
+
+        assert client.get(URL_OT + "?formato=pdf").status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_streaming_bajo_asgi(self, admin_user, orden_trabajo):
+        """Por ASGI (Daphne) el contenido es asíncrono: no se lee completo antes de enviarlo"""
+        autorizacion = {"Authorization": f"Bearer {AccessToken.for_user(admin_user)}"}
+
+        @async_to_sync
+        async def descargar():
+            response = await AsyncClient().get(URL_OT, headers=autorizacion)
+            return response, b"".join([bloque async for bloque in response.streaming_content])
+
+        response, contenido = descargar()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.is_async
+        assert str(orden_trabajo.id) in contenido.decode("utf-8")
+
+
+class TestExportarAuditoria:
+    """Tests para AuditoriaViewSet.exportar"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_solo_admin(self, admin_user, jefe_taller_user):
+        Auditoria.objects.create(usuario=admin_user, accion="CERRAR_OT", objeto_tipo="OrdenTrabajo",
+                                 objeto_id="1", payload={"motivo": "fin"})
+        Auditoria.objects.create(usuario=admin_user, accion="CREAR_OT", objeto_tipo="OrdenTrabajo",
+                                 objeto_id="2")
+
+        filas = _csv(_cliente(admin_user).get("/api/v1/work/auditoria/exportar/?accion=CERRAR_OT"))
+        assert [(f["Acción"], f["Detalle"]) for f in filas] == [("CERRAR_OT", '{"motivo": "fin"}')]
+
+        response = _cliente(jefe_taller_user).get("/api/v1/work/auditoria/exportar/")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
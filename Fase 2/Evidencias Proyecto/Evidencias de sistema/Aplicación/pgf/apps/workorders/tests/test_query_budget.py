@@ -0,0 +1,188 @@
+# apps/workorders/tests/test_query_budget.py
+"""
+Tests de presupuesto de queries por perfil de OrdenTrabajoViewSet.
+
+Cada perfil de apps/workorders/querysets.py declara cuántas queries puede
+ejecutar. Estos tests crean varias OT con relaciones (items, evidencias,
+comentarios con respuestas) y verifican que el número de queries no crece
+con la cantidad de filas ni supera el presupuesto declarado.
+"""
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.workorders.models import ComentarioOT, Evidencia, ItemOT, OrdenTrabajo
+from apps.workorders.querysets import PERFILES, QUERIES_EXTRA_POR_ROL
+from apps.workorders.views import OrdenTrabajoViewSet
+
+
+@pytest.fixture(autouse=True)
+def clear_rate_limit_cache():
+    """Limpia el cache de rate limiting antes de cada test"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def ordenes_con_relaciones(db, vehiculo, supervisor_user, mecanico_user, admin_user):
+    """Crea 5 OT asignadas al mecánico, cada una con item, evidencia y comentarios anidados."""
+    ordenes = []
+    for i in range(5):
+        ot = OrdenTrabajo.objects.create(
+            vehiculo=vehiculo,
+            supervisor=supervisor_user,
+            responsable=supervisor_user,
+            mecanico=mecanico_user,
+            motivo=f"OT presupuesto {i}",
+            estado="EN_EJECUCION",
+        )
+        ItemOT.objects.create(ot=ot, tipo="REPUESTO", descripcion="Filtro", cantidad=1, costo_unitario=100)
+        Evidencia.objects.create(ot=ot, url="https://example.com/foto.jpg", subido_por=admin_user)
+        principal = ComentarioOT.objects.create(ot=ot, usuario=admin_user, contenido="Revisar frenos")
+        respuesta = ComentarioOT.objects.create(
+            ot=ot, usuario=mecanico_user, contenido="Revisado", comentario_padre=principal
+        )
+        ComentarioOT.objects.create(ot=ot, usuario=admin_user, contenido="Ok", comentario_padre=respuesta)
+        ordenes.append(ot)
+    return ordenes
+
+
+def _ejecutar(client, metodo, url):
+    """Ejecuta la request y retorna (response, queries sin contar SAVEPOINT/RELEASE)."""
+    with CaptureQueriesContext(connection) as contexto:
+        response = getattr(client, metodo)(url)
+    queries = [
+        q["sql"] for q in contexto.captured_queries
+        if not q["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT"))
+    ]
+    return response, queries
+
+
+def _cliente(usuario):
+    client = APIClient()
+    client.force_authenticate(user=usuario)
+    return client
+
+
+class TestPerfilesPorAccion:
+    """Cada acción usa el perfil que corresponde"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("accion,perfil", [
+        ("list", "listado"),
+        ("retrieve", "detalle"),
+        ("update", "detalle"),
+        ("aprobar_asignacion", "detalle"),
+        ("en_pausa", "transicion"),
+        ("cerrar", "transicion"),
+    ])
+    def test_perfil_por_accion(self, accion, perfil):
+        """El mapa PERFIL_POR_ACCION asigna el perfil esperado"""
+        view = OrdenTrabajoViewSet()
+        view.action = accion
+        assert view.get_perfil_queryset() == perfil
+
+    @pytest.mark.unit
+    def test_listado_no_precarga_relaciones_inversas(self):
+        """El listado no hace prefetch de items/evidencias/comentarios/pausas/checklists"""
+        assert not PERFILES["listado"]["prefetch_related"]
+        assert "chofer" not in PERFILES["listado"]["select_related"]
+
+
+class TestPresupuestoQueries:
+    """El número de queries no supera el presupuesto declarado del perfil"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_listado(self, ordenes_con_relaciones, admin_user):
+        """El listado usa COUNT + página, sin importar cuántas OT haya"""
+        response, queries = _ejecutar(_cliente(admin_user), "get", "/api/v1/work/ordenes/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 5
+        assert len(queries) <= PERFILES["listado"]["presupuesto_queries"], queries
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_listado_mecanico(self, ordenes_con_relaciones, mecanico_user):
+        """El alcance de MECANICO es un filtro más, sin queries extra"""
+        response, queries = _ejecutar(_cliente(mecanico_user), "get", "/api/v1/work/ordenes/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 5
+        assert len(queries) <= PERFILES["listado"]["presupuesto_queries"], queries
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_listado_bodega(self, ordenes_con_relaciones, bodega_user):
+        """BODEGA resuelve las OT con repuestos con EXISTS (una query extra declarada)"""
+        response, queries = _ejecutar(_cliente(bodega_user), "get", "/api/v1/work/ordenes/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 5
+        presupuesto = PERFILES["listado"]["presupuesto_queries"] + QUERIES_EXTRA_POR_ROL["BODEGA"]
+        assert len(queries) <= presupuesto, queries
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_listado_bodega_filtra_ots_con_repuestos(self, ordenes_con_relaciones, bodega_user, vehiculo, supervisor_user):
+        """Con OTs que requieren repuestos, BODEGA solo ve esas"""
+        OrdenTrabajo.objects.create(
+            vehiculo=vehiculo, supervisor=supervisor_user, responsable=supervisor_user, motivo="Sin repuestos"
+        )
+        response, _ = _ejecutar(_cliente(bodega_user), "get", "/api/v1/work/ordenes/")
+        assert response.data["count"] == 5
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_detalle(self, ordenes_con_relaciones, admin_user):
+        """El detalle carga items, evidencias y el árbol de comentarios en queries fijas"""
+        ot = ordenes_con_relaciones[0]
+        response, queries = _ejecutar(_cliente(admin_user), "get", f"/api/v1/work/ordenes/{ot.id}/")
+        assert response.status_code == status.HTTP_200_OK
+        assert len(queries) <= PERFILES["detalle"]["presupuesto_queries"], queries
+
+        # El árbol de comentarios se mantiene: principal → respuesta → respuesta
+        comentarios = response.data["comentarios"]
+        assert len(comentarios) == 1
+        assert comentarios[0]["respuestas"][0]["contenido"] == "Revisado"
+        assert comentarios[0]["respuestas"][0]["respuestas"][0]["contenido"] == "Ok"
+        assert len(response.data["evidencias"]) == 1
+        assert response.data["items"][0]["descripcion"] == "Filtro"
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_transicion(self, ordenes_con_relaciones, mecanico_user):
+        """en-pausa solo carga la OT con sus usuarios, actualiza y audita"""
+        ot = ordenes_con_relaciones[0]
+        response, queries = _ejecutar(
+            _cliente(mecanico_user), "post", f"/api/v1/work/ordenes/{ot.id}/en-pausa/"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["estado"] == "EN_PAUSA"
+        assert len(queries) <= PERFILES["transicion"]["presupuesto_queries"], queries
+
+
+class TestAlcanceMecanico:
+    """get_object ya no tiene una query de respaldo para MECANICO"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_ot_no_asignada_responde_404_con_una_query(self, orden_trabajo, mecanico_user):
+        """Una OT no asignada al mecánico responde 404 con la única query del detalle"""
+        response, queries = _ejecutar(
+            _cliente(mecanico_user), "get", f"/api/v1/work/ordenes/{orden_trabajo.id}/"
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert len(queries) == 1
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_ver_todas_permite_detalle(self, orden_trabajo, mecanico_user):
+        """Con ver_todas=true el mecánico puede ver una OT no asignada"""
+        response, _ = _ejecutar(
+            _cliente(mecanico_user), "get", f"/api/v1/work/ordenes/{orden_trabajo.id}/?ver_todas=true"
+        )
+        assert response.status_code == status.HTTP_200_OK
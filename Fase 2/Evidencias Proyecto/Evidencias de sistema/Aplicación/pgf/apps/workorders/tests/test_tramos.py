@@ -0,0 +1,127 @@
+# apps/workorders/tests/test_tramos.py
+"""
+Tests para el ledger de tiempo por estado (apps/workorders/tramos.py).
+
+Verifican que:
+- transition() cierra el tramo abierto y abre el del estado destino
+- La primera transición cuenta el estado anterior desde la apertura
+- Las tareas de colación usan la misma hora que la pausa
+- La reconstrucción desde Auditoria arma los tramos y es idempotente
+- Sin auditoría del último cambio, el inicio del estado actual queda desconocido
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.workorders import tramos
+from apps.workorders.models import Auditoria, OrdenTrabajo, Pausa, TramoEstado
+from apps.workorders.services import do_transition, transition
+from apps.workorders.tasks_colacion import iniciar_colacion_automatica
+
+
+def _tramos(ot):
+    return list(TramoEstado.objects.filter(ot=ot).order_by("inicio").values_list("estado", "segundos", "fin"))
+
+
+class TestRegistrar:
+    """Tests para el registro en transition()"""
+
+    @pytest.mark.model
+    def test_transiciones(self, orden_trabajo):
+        apertura = timezone.now() - timedelta(hours=3)
+        OrdenTrabajo.objects.filter(pk=orden_trabajo.pk).update(apertura=apertura)
+        orden_trabajo.refresh_from_db()
+
+        transition(orden_trabajo, "EN_DIAGNOSTICO", cuando=apertura + timedelta(hours=1))
+        transition(orden_trabajo, "EN_EJECUCION", cuando=apertura + timedelta(hours=2, minutes=30))
+
+        assert [(estado, segundos) for estado, segundos, _ in _tramos(orden_trabajo)] == [
+            ("ABIERTA", 3600), ("EN_DIAGNOSTICO", 5400), ("EN_EJECUCION", None)
+        ]
+        abierto = TramoEstado.objects.get(ot=orden_trabajo, fin__isnull=True)
+        assert abierto.zona == "ZONA_TEST"
+        assert abierto.inicio == orden_trabajo.fecha_inicio_ejecucion
+
+    @pytest.mark.model
+    def test_transicion_invalida_no_registra(self, orden_trabajo):
+        ok, _ = transition(orden_trabajo, "CERRADA")
+
+        assert not ok
+        assert not TramoEstado.objects.filter(ot=orden_trabajo).exists()
+
+    @pytest.mark.celery
+    def test_colacion_usa_hora_de_la_pausa(self, orden_trabajo, mecanico_user):
+        orden_trabajo.mecanico = mecanico_user
+        orden_trabajo.save(update_fields=["mecanico"])
+        do_transition(orden_trabajo, "EN_EJECUCION")
+
+        iniciar_colacion_automatica()
+
+        pausa = Pausa.objects.get(ot=orden_trabajo, tipo="COLACION")
+        abierto = TramoEstado.objects.get(ot=orden_trabajo, fin__isnull=True)
+        assert abierto.estado == "EN_PAUSA"
+        assert abierto.inicio == pausa.inicio
+
+
+class TestReconstruir:
+    """Tests para reconstruir_desde_auditoria y el comando backfill_tramos_estado"""
+
+    @pytest.mark.model
+    def test_desde_auditoria(self, orden_trabajo, admin_user):
+        t0 = timezone.now() - timedelta(days=2)
+        cierre = t0 + timedelta(hours=10)
+        OrdenTrabajo.objects.filter(pk=orden_trabajo.pk).update(apertura=t0, estado="CERRADA", cierre=cierre)
+        for horas, anterior, nuevo in [(2, "ABIERTA", "EN_EJECUCION"), (6, "EN_EJECUCION", "EN_QA")]:
+            auditoria = Auditoria.objects.create(
+                usuario=admin_user, accion="CAMBIO_ESTADO", objeto_tipo="OrdenTrabajo",
+                objeto_id=str(orden_trabajo.id),
+                payload={"estado_anterior": anterior, "estado_nuevo": nuevo},
+            )
+            Auditoria.objects.filter(pk=auditoria.pk).update(ts=t0 + timedelta(hours=horas))
+
+        assert tramos.reconstruir_desde_auditoria() == (1, 4)
+
+        # El cierre sin auditoría se toma de OrdenTrabajo.cierre
+        assert [(estado, segundos) for estado, segundos, _ in _tramos(orden_trabajo)] == [
+            ("ABIERTA", 2 * 3600), ("EN_EJECUCION", 4 * 3600), ("EN_QA", 4 * 3600), ("CERRADA", None)
+        ]
+
+    @pytest.mark.model
+    def test_transicion_sin_auditoria_inicio_desconocido(self, orden_trabajo, admin_user):
+        """Si la auditoría no llega al estado actual, no se adivina desde cuándo está en él"""
+        t0 = timezone.now() - timedelta(days=1)
+        OrdenTrabajo.objects.filter(pk=orden_trabajo.pk).update(apertura=t0, estado="EN_PAUSA")
+        auditoria = Auditoria.objects.create(
+            usuario=admin_user, accion="CAMBIO_ESTADO", objeto_tipo="OrdenTrabajo",
+            objeto_id=str(orden_trabajo.id),
+            payload={"estado_anterior": "ABIERTA", "estado_nuevo": "EN_EJECUCION"},
+        )
+        Auditoria.objects.filter(pk=auditoria.pk).update(ts=t0 + timedelta(hours=2))
+
+        assert tramos.reconstruir_desde_auditoria() == (1, 2)
+        abierto = TramoEstado.objects.get(ot=orden_trabajo, fin__isnull=True)
+        assert (abierto.estado, abierto.inicio) == ("EN_PAUSA", None)
+
+        # Al cerrarse sigue sin duración
+        orden_trabajo.refresh_from_db()
+        transition(orden_trabajo, "EN_EJECUCION")
+        abierto.refresh_from_db()
+        assert abierto.fin is not None and abierto.segundos is None
+
+    @pytest.mark.model
+    def test_idempotente(self, orden_trabajo, vehiculo, supervisor_user):
+        sin_auditoria = OrdenTrabajo.objects.create(vehiculo=vehiculo, supervisor=supervisor_user, motivo="Otra")
+        transition(orden_trabajo, "EN_DIAGNOSTICO")
+        salida = StringIO()
+
+        call_command("backfill_tramos_estado", stdout=salida)
+        call_command("backfill_tramos_estado", stdout=salida)
+
+        assert "1 OT procesadas, 1 tramos creados" in salida.getvalue()
+        assert "0 OT procesadas" in salida.getvalue()
+        assert _tramos(sin_auditoria) == [("ABIERTA", None, None)]
+        assert TramoEstado.objects.filter(ot=orden_trabajo).count() == 2
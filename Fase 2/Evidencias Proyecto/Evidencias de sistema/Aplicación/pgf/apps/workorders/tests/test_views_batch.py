@@ -0,0 +1,138 @@
+# apps/workorders/tests/test_views_batch.py
+"""
+Tests para el endpoint batch de OT: GET/POST /api/v1/work/ordenes/batch/
+"""
+
+import uuid
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.workorders.models import Auditoria, ComentarioOT, ItemOT, OrdenTrabajo
+from apps.workorders.querysets import PERFILES
+
+URL = "/api/v1/work/ordenes/batch/"
+
+
+@pytest.fixture(autouse=True)
+def clear_rate_limit_cache():
+    """Limpia el cache de rate limiting antes de cada test"""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def ordenes(db, vehiculo, supervisor_user, mecanico_user, admin_user):
+    """Crea 6 OT: las 3 primeras asignadas al mecánico, con item, comentario y auditoría."""
+    resultado = []
+    for i in range(6):
+        ot = OrdenTrabajo.objects.create(
+            vehiculo=vehiculo,
+            supervisor=supervisor_user,
+            responsable=supervisor_user,
+            mecanico=mecanico_user if i < 3 else None,
+            motivo=f"OT batch {i}",
+        )
+        ItemOT.objects.create(ot=ot, tipo="SERVICIO", descripcion="Revisión", cantidad=1, costo_unitario=10)
+        ComentarioOT.objects.create(ot=ot, usuario=admin_user, contenido=f"Comentario {i}")
+        for accion in ("CREAR_OT", "CAMBIO_ESTADO"):
+            Auditoria.objects.create(
+                usuario=admin_user, accion=accion, objeto_tipo="OrdenTrabajo", objeto_id=str(ot.id), payload={}
+            )
+        resultado.append(ot)
+    return resultado
+
+
+def _cliente(usuario):
+    client = APIClient()
+    client.force_authenticate(user=usuario)
+    return client
+
+
+class TestOrdenTrabajoBatch:
+    """Tests para OrdenTrabajoViewSet.batch"""
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_get_respeta_orden_de_ids(self, ordenes, admin_user):
+        """GET ?ids= retorna las OT en el orden solicitado"""
+        ids = [str(ordenes[4].id), str(ordenes[0].id), str(ordenes[2].id)]
+        response = _cliente(admin_user).get(URL, {"ids": ",".join(ids)})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 3
+        assert [ot["id"] for ot in response.data["results"]] == ids
+        assert response.data["no_encontradas"] == []
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_post_con_lista_en_body(self, ordenes, admin_user):
+        """POST {"ids": [...]} retorna el detalle completo con auditoría precargada"""
+        ids = [str(ot.id) for ot in ordenes]
+        response = _cliente(admin_user).post(URL, {"ids": ids}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 6
+        primera = response.data["results"][0]
+        assert primera["trazabilidad"]["total_eventos"] == 2
+        assert len(primera["historial_reciente"]) == 2
+        assert primera["comentarios"][0]["contenido"] == "Comentario 0"
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_alcance_mecanico(self, ordenes, mecanico_user):
+        """El mecánico solo recibe sus OT; el resto se informa como no encontradas"""
+        ids = [str(ot.id) for ot in ordenes]
+        response = _cliente(mecanico_user).get(URL, {"ids": ",".join(ids)})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 3
+        assert set(response.data["no_encontradas"]) == set(ids[3:])
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_queries_constantes(self, ordenes, admin_user):
+        """Pedir 6 OT cuesta lo mismo que el detalle de una sola"""
+        ids = ",".join(str(ot.id) for ot in ordenes)
+        with CaptureQueriesContext(connection) as contexto:
+            response = _cliente(admin_user).get(URL, {"ids": ids})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(contexto.captured_queries) <= PERFILES["detalle"]["presupuesto_queries"]
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_ids_invalidos(self, admin_user):
+        """IDs que no son UUID responden 400"""
+        response = _cliente(admin_user).get(URL, {"ids": "abc,123"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["ids_invalidos"] == ["abc", "123"]
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_sin_ids(self, admin_user):
+        """Sin IDs responde 400"""
+        response = _cliente(admin_user).get(URL)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_limite(self, admin_user):
+        """Más de LIMITE_BATCH IDs responde 400"""
+        ids = [str(uuid.uuid4()) for _ in range(201)]
+        response = _cliente(admin_user).post(URL, {"ids": ids}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.api
+    @pytest.mark.view
+    def test_limite_antes_de_parsear(self, admin_user):
+        """Un body sobre el límite se rechaza sin validar cada ID"""
+        response = _cliente(admin_user).post(URL, {"ids": ["x"] * 10_000}, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "ids_invalidos" not in response.data
@@ -0,0 +1,147 @@
+# apps/workorders/tramos.py
+"""
+Ledger de tiempo por estado de las Órdenes de Trabajo (TramoEstado).
+
+- registrar(): lo llama services.transition() en cada cambio de estado
+  (vistas y tareas de colación). Cierra el tramo abierto de la OT y abre
+  el del estado destino.
+- reconstruir_desde_auditoria(): arma los tramos de las OT que aún no
+  tienen, a partir de los registros CAMBIO_ESTADO de Auditoria
+  (comando backfill_tramos_estado).
+
+Relaciones:
+- Usa: apps/workorders/models.py (TramoEstado, OrdenTrabajo, Auditoria)
+- Usado por: apps/workorders/services.py, apps/workorders/management/commands/backfill_tramos_estado.py
+- Leído por: apps/reports/aggregation.py (duraciones por estado), apps/reports/views.py
+"""
+
+from django.db.models import BigIntegerField, Case, DateTimeField, F, Value, When
+from django.db.models.functions import Cast, Extract, Greatest
+
+from .models import Auditoria, OrdenTrabajo, TramoEstado
+
+
+# OT por lote en la reconstrucción (una consulta de auditoría por lote)
+TAMANO_LOTE = 500
+
+
+def _segundos(inicio, fin):
+    return max(int((fin - inicio).total_seconds()), 0)
+
+
+def _cerrado(ot_id, estado, inicio, fin, zona):
+    return TramoEstado(
+        ot_id=ot_id, estado=estado, inicio=inicio, fin=fin,
+        segundos=_segundos(inicio, fin), zona=zona or ""
+    )
+
+
+def registrar(ot, estado_anterior, estado_nuevo, cuando):
+    """
+    Registra una transición en el ledger (dos queries: UPDATE + INSERT).
+
+    Si la OT no tenía tramo abierto (creada antes del ledger o sin
+    transiciones), el estado anterior se cuenta desde la apertura.
+
+    Parámetros:
+    - ot: OrdenTrabajo ya guardada con el estado nuevo
+    - estado_anterior: Estado desde el que se transicionó
+    - estado_nuevo: Estado destino
+    - cuando: Momento de la transición
+    """
+    # La duración se calcula en SQL para no leer el tramo antes de cerrarlo.
+    # Un tramo con inicio desconocido queda sin duración (GREATEST ignora NULL)
+    cerrados = TramoEstado.objects.filter(ot=ot, fin__isnull=True).update(
+        fin=cuando,
+        segundos=Case(
+            When(inicio__isnull=True, then=Value(None)),
+            default=Greatest(Cast(Extract(Value(cuando, output_field=DateTimeField()) - F("inicio"), "epoch"),
+                                  BigIntegerField()), Value(0)),
+            output_field=BigIntegerField(),
+        ),
+    )
+    nuevos = []
+    if not cerrados:
+        nuevos.append(_cerrado(ot.id, estado_anterior, min(ot.apertura, cuando), cuando, ot.zona))
+    nuevos.append(TramoEstado(ot=ot, estado=estado_nuevo, inicio=cuando, zona=ot.zona or ""))
+    TramoEstado.objects.bulk_create(nuevos)
+
+
+def _tramos_de(ot_id, apertura, estado_actual, cierre, zona, cambios):
+    """
+    Tramos de una OT a partir de sus cambios de estado auditados.
+
+    Parámetros:
+    - cambios: Lista de (ts, estado_anterior, estado_nuevo) ordenada por ts
+
+    Si el último estado auditado no coincide con el estado actual (hubo
+    transiciones sin auditoría, p. ej. cierres automáticos o colación), el
+    tramo de ese estado solo se cierra cuando se conoce su fin: el cierre
+    de la OT si está CERRADA. Si no, se omite (duración desconocida) y el
+    tramo abierto del estado actual queda con inicio desconocido (NULL):
+    no se sabe cuándo entró la OT en él.
+    """
+    tramos = []
+    inicio = apertura
+    estado = cambios[0][1] if cambios else estado_actual
+    for ts, anterior, nuevo in cambios:
+        ts = max(ts, inicio)
+        tramos.append(_cerrado(ot_id, anterior or estado, inicio, ts, zona))
+        inicio, estado = ts, nuevo
+
+    if estado != estado_actual:
+        if estado_actual == "CERRADA" and cierre and cierre >= inicio:
+            tramos.append(_cerrado(ot_id, estado, inicio, cierre, zona))
+            inicio = cierre
+        else:
+            inicio = None
+    tramos.append(TramoEstado(ot_id=ot_id, estado=estado_actual, inicio=inicio, zona=zona or ""))
+    return tramos
+
+
+def reconstruir_desde_auditoria(tamano=TAMANO_LOTE):
+    """
+    Crea los tramos de las OT que no tienen ninguno.
+
+    Es idempotente: una OT con tramos (registrados por transition() o por
+    una corrida anterior) no se toca.
+
+    Retorna:
+    - (ot_procesadas, tramos_creados)
+    """
+    pendientes = OrdenTrabajo.objects.filter(tramos_estado__isnull=True).order_by("id").values_list(
+        "id", "apertura", "estado", "cierre", "zona"
+    )
+    ot_procesadas = tramos_creados = 0
+    lote = []
+    for fila in pendientes.iterator(chunk_size=tamano):
+        lote.append(fila)
+        if len(lote) >= tamano:
+            tramos_creados += _reconstruir_lote(lote)
+            ot_procesadas += len(lote)
+            lote = []
+    if lote:
+        tramos_creados += _reconstruir_lote(lote)
+        ot_procesadas += len(lote)
+    return ot_procesadas, tramos_creados
+
+
+def _reconstruir_lote(lote):
+    cambios = {}
+    auditorias = Auditoria.objects.filter(
+        accion="CAMBIO_ESTADO",
+        objeto_tipo="OrdenTrabajo",
+        objeto_id__in=[str(ot_id) for ot_id, *_ in lote],
+    ).order_by("ts", "id").values_list("objeto_id", "ts", "payload")
+    for objeto_id, ts, payload in auditorias:
+        payload = payload or {}
+        if payload.get("estado_nuevo"):
+            cambios.setdefault(objeto_id, []).append(
+                (ts, payload.get("estado_anterior"), payload["estado_nuevo"])
+            )
+
+    tramos = []
+    for ot_id, apertura, estado, cierre, zona in lote:
+        tramos.extend(_tramos_de(ot_id, apertura, estado, cierre, zona, cambios.get(str(ot_id), [])))
+    TramoEstado.objects.bulk_create(tramos, batch_size=1000)
+    return len(tramos)
@@ -36,8 +36,11 @@ import re  # Para expresiones regulares
 from decimal import Decimal  # Para cálculos precisos de dinero
 from urllib.parse import urlparse, urlunparse  # Para manipular URLs
 
-import boto3  # Cliente AWS S3
-from botocore.config import Config  # Configuración de boto3
+from apps.core.lazy import importar_diferido
+
+# boto3 tarda ~250 ms en importarse: se carga recién en el primer uso
+# (presigned, perform_destroy y download), no al arrancar el proceso
+boto3 = importar_diferido("boto3")  # Cliente AWS S3
 
 from django.db import transaction  # Para transacciones atómicas
 from django.db.models import Q  # Para consultas complejas con OR
@@ -135,6 +138,7 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
     - POST /api/v1/work/ordenes/{id}/diagnostico/ → Realizar diagnóstico
     - POST /api/v1/work/ordenes/{id}/aprobar-asignacion/ → Aprobar asignación
     - POST /api/v1/work/ordenes/{id}/retrabajo/ → Marcar como retrabajo
+    - GET/POST /api/v1/work/ordenes/batch/ → Detalle de varias OT en una request
     
     Permisos:
     - Usa WorkOrderPermission (permisos personalizados por rol)
@@ -144,27 +148,35 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
     - Búsqueda por patente de vehículo
     - Ordenamiento por fecha, estado, etc.
     """
-    # QuerySet base con optimización (select_related reduce queries)
-    # select_related: para ForeignKey (una sola query)
-    # prefetch_related: para relaciones reversas (ManyToMany, reverse ForeignKey)
-    queryset = OrdenTrabajo.objects.select_related(
-        "vehiculo", 
-        "vehiculo__marca", 
-        "vehiculo__supervisor",
-        "responsable", 
-        "mecanico", 
-        "supervisor", 
-        "jefe_taller", 
-        "chofer"
-    ).prefetch_related(
-        "items",
-        "evidencias",
-        "comentarios",
-        "pausas",
-        "checklists"
-    ).all().order_by("-apertura")
+    # QuerySet base sin relaciones: get_queryset aplica el perfil de la acción
+    # (ver apps/workorders/querysets.py)
+    queryset = OrdenTrabajo.objects.all().order_by("-apertura")
     serializer_class = OrdenTrabajoSerializer
 
+    # Perfil de queryset por acción. Las acciones que no aparecen usan "detalle"
+    # (retrieve, create, update, aprobar-asignacion y cualquier acción que
+    # devuelva la OT serializada completa).
+    PERFIL_POR_ACCION = {
+        "list": "listado",
+        "en_ejecucion": "transicion",
+        "en_qa": "transicion",
+        "en_pausa": "transicion",
+        "esperando_repuestos": "transicion",
+        "cerrar": "transicion",
+        "anular": "transicion",
+        "aprobar_qa": "transicion",
+        "rechazar_qa": "transicion",
+        "diagnostico": "transicion",
+        "cambiar_prioridad": "transicion",
+        "retrabajo": "transicion",
+        "destroy": "transicion",
+        "exportar": "exportacion",
+    }
+
+    def get_perfil_queryset(self):
+        """Retorna el nombre del perfil de queryset para la acción actual."""
+        return self.PERFIL_POR_ACCION.get(self.action, "detalle")
+
     def get_serializer_class(self):
         """
         Retorna el serializer apropiado según la acción.
@@ -192,7 +204,8 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
         - BODEGA: OTs que requieren repuestos
         - Otros roles: Sin filtrado adicional (se aplican permisos en has_permission)
         """
-        queryset = super().get_queryset()
+        from .querysets import aplicar_perfil
+        queryset = aplicar_perfil(super().get_queryset(), self.get_perfil_queryset())
         user = self.request.user
         
         if not user or not user.is_authenticated:
@@ -201,32 +214,24 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
         rol = getattr(user, "rol", None)
         
         # MECANICO: Solo OTs asignadas a él, a menos que se pida ver todas
-        # NOTA: Para acciones de detalle (retrieve), se permite acceso si la OT está asignada
-        # (se valida en get_object)
+        # El mismo filtro aplica al detalle: una OT no asignada responde 404
         if rol == "MECANICO":
             # Si se pasa el parámetro ver_todas=true, mostrar todas las OTs
             ver_todas = self.request.query_params.get('ver_todas', 'false').lower() == 'true'
             if not ver_todas:
-                # Para listado, filtrar solo OTs asignadas
-                # Para detalle (retrieve), el filtro se aplica pero get_object permite acceso
                 return queryset.filter(mecanico=user)
             # Si ver_todas=true, no filtrar (mostrar todas)
         
         # CHOFER: Solo OTs de su vehículo asignado
         if rol == "CHOFER":
-            try:
-                from apps.drivers.models import Chofer
-                # Buscar chofer asociado al usuario por RUT
-                chofer = Chofer.objects.filter(rut=user.rut).first()
-                if chofer and chofer.vehiculo_asignado:
-                    # Filtrar OTs del vehículo asignado al chofer
-                    return queryset.filter(vehiculo=chofer.vehiculo_asignado)
-                else:
-                    # Si no tiene vehículo asignado, no ver ninguna OT
-                    return queryset.none()
-            except Exception:
-                # Si hay error, retornar queryset vacío
-                return queryset.none()
+            from apps.drivers.models import Chofer
+            # Subquery sobre el chofer asociado al usuario por RUT (sin query extra).
+            # Si no tiene vehículo asignado, el subquery queda vacío y no ve ninguna OT
+            vehiculo_chofer = Chofer.objects.filter(
+                rut=user.rut,
+                vehiculo_asignado__isnull=False
+            ).values("vehiculo_asignado")
+            return queryset.filter(vehiculo__in=vehiculo_chofer)
         
         # ADMINISTRATIVO_TALLER: Todas las OTs del taller
         if rol == "ADMINISTRATIVO_TALLER":
@@ -234,82 +239,29 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
         
         # BODEGA: OTs que requieren repuestos o tienen items de repuestos
         if rol == "BODEGA":
-            # Filtrar OTs que tienen items de tipo REPUESTO o solicitudes de repuestos
-            try:
-                from apps.inventory.models import SolicitudRepuesto
-                from apps.workorders.models import ItemOT
-                
-                # OTs con items de repuestos
-                ot_ids_con_items_repuestos = ItemOT.objects.filter(
-                    tipo="REPUESTO"
-                ).values_list("ot_id", flat=True).distinct()
-                
-                # OTs con solicitudes de repuestos pendientes
-                ot_ids_con_solicitudes = SolicitudRepuesto.objects.filter(
+            from django.db.models import Exists, OuterRef
+            from apps.inventory.models import SolicitudRepuesto
+            from apps.workorders.models import ItemOT
+            
+            # OTs con items de repuestos o con solicitudes de repuestos pendientes,
+            # resuelto con EXISTS en la misma query (antes se traían todos los IDs a Python)
+            requiere_repuestos = Exists(
+                ItemOT.objects.filter(ot=OuterRef("pk"), tipo="REPUESTO")
+            ) | Exists(
+                SolicitudRepuesto.objects.filter(
+                    ot=OuterRef("pk"),
                     estado__in=["PENDIENTE", "APROBADA", "EN_PREPARACION"]
-                ).values_list("ot_id", flat=True).distinct()
-                
-                # Combinar ambas listas
-                ot_ids = set(ot_ids_con_items_repuestos) | set(ot_ids_con_solicitudes)
-                
-                if ot_ids:
-                    return queryset.filter(id__in=ot_ids)
-                else:
-                    # Si no hay OTs con repuestos, mostrar todas (para que bodega pueda ver el estado general)
-                    return queryset
-            except Exception:
-                # Si hay error, retornar todas las OTs
+                )
+            )
+            
+            # Si no hay OTs con repuestos, mostrar todas (para que bodega pueda ver el estado general)
+            if not OrdenTrabajo.objects.filter(requiere_repuestos).exists():
                 return queryset
+            return queryset.filter(requiere_repuestos)
         
         # Otros roles: sin filtrado adicional
         return queryset
     
-    def get_object(self):
-        """
-        Obtiene un objeto específico, permitiendo acceso a MECANICO para OTs asignadas.
-        
-        Para MECANICO: Si la OT no está en el queryset filtrado pero está asignada a él,
-        se permite el acceso.
-        """
-        # Obtener el objeto usando el método base
-        try:
-            obj = super().get_object()
-            return obj
-        except OrdenTrabajo.DoesNotExist:
-            # Si no se encuentra en el queryset filtrado, verificar si es MECANICO
-            # y si la OT está asignada a él
-            user = self.request.user
-            rol = getattr(user, "rol", None)
-            
-            if rol == "MECANICO":
-                # Intentar obtener la OT directamente si está asignada al mecánico
-                pk = self.kwargs.get('pk')
-                if pk:
-                    try:
-                        ot = OrdenTrabajo.objects.select_related(
-                            "vehiculo", 
-                            "vehiculo__marca", 
-                            "vehiculo__supervisor",
-                            "responsable", 
-                            "mecanico", 
-                            "supervisor", 
-                            "jefe_taller", 
-                            "chofer"
-                        ).prefetch_related(
-                            "items",
-                            "evidencias",
-                            "comentarios",
-                            "pausas",
-                            "checklists"
-                        ).get(pk=pk, mecanico=user)
-                        return ot
-                    except OrdenTrabajo.DoesNotExist:
-                        pass
-            
-            # Si no se encuentra, lanzar la excepción original
-            from rest_framework.exceptions import NotFound
-            raise NotFound("No OrdenTrabajo matches the given query.")
-
     def create(self, request, *args, **kwargs):
         """
         Crea una nueva OT y envía notificaciones a usuarios relevantes.
@@ -1696,6 +1648,190 @@ class OrdenTrabajoViewSet(viewsets.ModelViewSet):
         
         return Response({"estado": ot.estado, "motivo": motivo})
 
+    # Máximo de OT por request en el endpoint batch
+    LIMITE_BATCH = 200
+
+    @extend_schema(
+        description=(
+            "Obtiene el detalle de varias OT en una sola request. "
+            "GET con ?ids=uuid1,uuid2,... o POST con {\"ids\": [...]}. "
+            "Máximo 200 IDs; aplica el mismo alcance por rol que el listado."
+        ),
+        request=None,
+        responses={200: None}
+    )
+    @action(detail=False, methods=['get', 'post'], url_path='batch')
+    def batch(self, request):
+        """
+        Retorna el detalle de varias OT en una sola request.
+        
+        Endpoint:
+        - GET /api/v1/work/ordenes/batch/?ids=uuid1,uuid2 (también ?ids=uuid1&ids=uuid2)
+        - POST /api/v1/work/ordenes/batch/ con {"ids": ["uuid1", "uuid2"]}
+          (para listas largas que no caben en la URL)
+        
+        Los dashboards y la app del mecánico obtienen IDs desde listados o
+        notificaciones y luego pedían cada OT por separado. Este endpoint usa
+        el perfil "detalle" (apps/workorders/querysets.py) y precarga la
+        auditoría de todas las OT juntas, así que el número de queries no
+        depende de cuántas OT se pidan.
+        
+        Alcance:
+        - Se aplica el mismo filtrado por rol que get_queryset (MECANICO,
+          CHOFER, BODEGA...). Los IDs no visibles o inexistentes se informan
+          en "no_encontradas" sin revelar cuál de los dos casos es.
+        
+        Retorna:
+        - 200: {"count": n, "results": [...], "no_encontradas": [...]}
+          (results en el mismo orden de los IDs solicitados)
+        - 400: Si no se envían IDs, hay IDs inválidos o se supera el límite
+        """
+        from .querysets import precargar_auditoria
+        
+        # Obtener IDs desde el body (POST) o query params (GET)
+        if request.method == "POST":
+            ids_raw = request.data.get("ids", [])
+            if isinstance(ids_raw, str):
+                ids_raw = ids_raw.split(",")
+        else:
+            ids_raw = []
+            for valor in request.query_params.getlist("ids"):
+                ids_raw.extend(valor.split(","))
+        
+        if not isinstance(ids_raw, (list, tuple)):
+            return Response(
+                {"detail": "El parámetro 'ids' debe ser una lista de IDs."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # El tope se verifica antes de parsear: un body enorme no cuesta CPU
+        if len(ids_raw) > self.LIMITE_BATCH:
+            return Response(
+                {"detail": f"Máximo {self.LIMITE_BATCH} OT por request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Validar UUIDs y eliminar duplicados manteniendo el orden
+        validos = []
+        invalidos = []
+        for valor in ids_raw:
+            valor = str(valor).strip()
+            if not valor:
+                continue
+            try:
+                validos.append(uuid.UUID(valor))
+            except ValueError:
+                invalidos.append(valor)
+        ids = list(dict.fromkeys(validos))
+        
+        if invalidos:
+            return Response(
+                {"detail": "IDs inválidos.", "ids_invalidos": invalidos},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not ids:
+            return Response(
+                {"detail": "Debe indicar al menos un ID en 'ids'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # get_queryset aplica el alcance por rol y el perfil "detalle"
+        ordenes = {ot.id: ot for ot in self.get_queryset().filter(id__in=ids)}
+        encontradas = [ordenes[ot_id] for ot_id in ids if ot_id in ordenes]
+        no_encontradas = [str(ot_id) for ot_id in ids if ot_id not in ordenes]
+        
+        context = self.get_serializer_context()
+        context["auditoria_por_ot"] = precargar_auditoria(ot.id for ot in encontradas)
+        serializer = OrdenTrabajoSerializer(encontradas, many=True, context=context)
+        
+        return Response({
+            "count": len(encontradas),
+            "results": serializer.data,
+            "no_encontradas": no_encontradas,
+        })
+
+    # Columnas de la exportación de OT: (encabezado, lookup)
+    COLUMNAS_EXPORTACION = (
+        ("OT", "id"),
+        ("Estado", "estado"),
+        ("Tipo", "tipo"),
+        ("Prioridad", "prioridad"),
+        ("Patente", "vehiculo__patente"),
+        ("Zona", "zona"),
+        ("Supervisor", "supervisor__username"),
+        ("Jefe de taller", "jefe_taller__username"),
+        ("Mecánico", "mecanico__username"),
+        ("Motivo", "motivo"),
+        ("Apertura", "apertura"),
+        ("Cierre", "cierre"),
+        ("SLA vencido", "sla_vencido"),
+        ("Tiempo total reparación (días)", "tiempo_total_reparacion"),
+    )
+    COLUMNAS_EXPORTACION_ITEMS = (
+        ("Ítem tipo", "tipo"),
+        ("Ítem descripción", "descripcion"),
+        ("Código repuesto", "repuesto__codigo"),
+        ("Cantidad", "cantidad"),
+        ("Costo unitario", "costo_unitario"),
+    )
+
+    @extend_schema(
+        description=(
+            "Exporta las OT con sus items en CSV (?formato=csv) o XLSX (?formato=xlsx), "
+            "en streaming. Acepta los mismos filtros, búsqueda y orden que el listado "
+            "y aplica el mismo alcance por rol."
+        ),
+        responses={200: None}
+    )
+    @action(detail=False, methods=['get'], url_path='exportar')
+    def exportar(self, request):
+        """
+        Exporta las OT visibles para el usuario, una fila por item.
+
+        Endpoint:
+        - GET /api/v1/work/ordenes/exportar/?formato=csv|xlsx&estado=...&search=...
+
+        Las OT sin items salen en una fila con las columnas del item vacías.
+        Las OT se leen por lotes con un cursor (apps/core/exports.py) y los
+        items de cada lote en una sola query, así que la memoria no crece con
+        el rango exportado.
+
+        Retorna:
+        - 200: Archivo en streaming
+        - 400: Formato no soportado
+        """
+        from apps.core import exports
+
+        try:
+            formato = exports.formato_desde(request)
+        except exports.FormatoInvalido as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        encabezados = [c[0] for c in self.COLUMNAS_EXPORTACION + self.COLUMNAS_EXPORTACION_ITEMS]
+        return exports.respuesta(
+            encabezados, self._filas_exportacion(queryset), "ordenes_trabajo", formato, request
+        )
+
+    def _filas_exportacion(self, queryset):
+        """Filas OT + item, leyendo los items de cada lote de OT en una query."""
+        from collections import defaultdict
+        from apps.core import exports
+
+        campos_ot = [c[1] for c in self.COLUMNAS_EXPORTACION]
+        campos_item = [c[1] for c in self.COLUMNAS_EXPORTACION_ITEMS]
+        sin_items = [(None,) * len(campos_item)]
+
+        for lote in exports.en_lotes(exports.filas(queryset, campos_ot)):
+            items = defaultdict(list)
+            for ot_id, *item in ItemOT.objects.filter(
+                ot_id__in=[fila[0] for fila in lote]
+            ).order_by("id").values_list("ot_id", *campos_item):
+                items[ot_id].append(tuple(item))
+            for fila in lote:
+                for item in items.get(fila[0], sin_items):
+                    yield fila + item
+
 
 # ============== ITEMS =================
 class ItemOTViewSet(viewsets.ModelViewSet):
@@ -3060,6 +3196,7 @@ class EvidenciaViewSet(viewsets.ModelViewSet):
         use_local = endpoint_url_internal is not None and ("localstack" in endpoint_url_internal.lower() or "localhost:4566" in endpoint_url_internal.lower())
         
         # Crear cliente S3
+        from botocore.config import Config  # Configuración de boto3
         s3 = boto3.client(
             "s3",
             region_name=region,
@@ -3541,6 +3678,57 @@ class AuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
             return Auditoria.objects.none()
         return super().get_queryset()
     
+    # Columnas de la exportación de auditoría: (encabezado, lookup)
+    COLUMNAS_EXPORTACION = (
+        ("Fecha", "ts"),
+        ("Usuario", "usuario__username"),
+        ("Acción", "accion"),
+        ("Objeto", "objeto_tipo"),
+        ("ID objeto", "objeto_id"),
+        ("Detalle", "payload"),
+    )
+
+    @extend_schema(
+        description=(
+            "Exporta la auditoría en CSV (?formato=csv) o XLSX (?formato=xlsx), en streaming, "
+            "con los mismos filtros, búsqueda y orden que el listado. Solo ADMIN."
+        ),
+        responses={200: None}
+    )
+    @action(detail=False, methods=['get'], url_path='exportar')
+    def exportar(self, request):
+        """
+        Exporta los registros de auditoría filtrados.
+
+        Endpoint:
+        - GET /api/v1/work/auditoria/exportar/?formato=csv|xlsx&accion=...&usuario=...
+
+        Retorna:
+        - 200: Archivo en streaming (apps/core/exports.py)
+        - 400: Formato no soportado
+        - 403: Usuario que no es ADMIN
+        """
+        from apps.core import exports
+
+        if request.user.rol != "ADMIN":
+            return Response(
+                {"detail": "No autorizado."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            formato = exports.formato_desde(request)
+        except exports.FormatoInvalido as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return exports.respuesta(
+            [c[0] for c in self.COLUMNAS_EXPORTACION],
+            exports.filas(queryset, [c[1] for c in self.COLUMNAS_EXPORTACION]),
+            "auditoria",
+            formato,
+            request,
+        )
+
     @extend_schema(
         description="Obtiene cambios críticos recientes del sistema",
         responses={200: None}
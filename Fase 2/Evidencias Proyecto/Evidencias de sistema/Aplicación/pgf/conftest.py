@@ -16,6 +16,12 @@ import uuid
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def envio_realtime_sincrono(settings):
+    """Los envíos WebSocket se hacen en el mismo hilo para poder verificarlos."""
+    settings.REALTIME_ENVIO_EN_SEGUNDO_PLANO = False
+
+
 @pytest.fixture
 def admin_user(db):
     """Crea un usuario administrador para pruebas."""
@@ -144,10 +150,11 @@ def ingreso_vehiculo(db, vehiculo, guardia_user):
     from django.utils import timezone
     from datetime import datetime, time as dt_time
     # Asegurar que la fecha sea exactamente de hoy
-    # El filtro usa fecha_ingreso__date=hoy, así que necesitamos que la fecha del datetime sea de hoy
-    ahora = timezone.now()
+    # El filtro usa rango_dia("fecha_ingreso", timezone.localdate()), así que la fecha debe ser
+    # el día local (America/Santiago), no el día UTC
+    hoy = timezone.localdate()
     # Usar la fecha de hoy con una hora específica (12:00)
-    fecha_ingreso = timezone.make_aware(datetime.combine(ahora.date(), dt_time(12, 0)))
+    fecha_ingreso = timezone.make_aware(datetime.combine(hoy, dt_time(12, 0)))
     
     # Crear el ingreso (fecha_ingreso tiene auto_now_add=True, así que se establecerá automáticamente)
     ingreso = IngresoVehiculo.objects.create(
@@ -0,0 +1,57 @@
+/**
+ * Tests para el hook useDashboardFetch
+ */
+
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
+import { renderHook } from '@testing-library/react';
+import { estaCalculando, useDashboardFetch, REINTENTAR_CALCULANDO_MS } from '@/hooks/useDashboardFetch';
+
+describe('useDashboardFetch', () => {
+  beforeEach(() => {
+    vi.clearAllMocks();
+    vi.useFakeTimers();
+    global.fetch = vi.fn();
+  });
+
+  afterEach(() => {
+    vi.useRealTimers();
+  });
+
+  it('debe retornar la respuesta sin reintentar si el dashboard está listo', async () => {
+    (global.fetch as any).mockResolvedValueOnce({ ok: true, status: 200 });
+
+    const { result } = renderHook(() => useDashboardFetch());
+    const response = await result.current('/api/proxy/reports/dashboard-ejecutivo/');
+
+    expect(response.status).toBe(200);
+    expect(global.fetch).toHaveBeenCalledTimes(1);
+  });
+
+  it('debe reintentar mientras el dashboard se está calculando', async () => {
+    (global.fetch as any)
+      .mockResolvedValueOnce({ ok: true, status: 202 })
+      .mockResolvedValueOnce({ ok: true, status: 200 });
+
+    const { result } = renderHook(() => useDashboardFetch());
+    const pendiente = result.current('/api/proxy/reports/dashboard-ejecutivo/?refresh=true');
+    await vi.advanceTimersByTimeAsync(REINTENTAR_CALCULANDO_MS);
+    const response = await pendiente;
+
+    expect(estaCalculando(response)).toBe(false);
+    expect(global.fetch).toHaveBeenCalledTimes(2);
+    // El reintento no vuelve a forzar el refresco
+    expect((global.fetch as any).mock.calls[1][0]).toBe('/api/proxy/reports/dashboard-ejecutivo/');
+  });
+
+  it('debe dejar de reintentar al desmontar', async () => {
+    (global.fetch as any).mockResolvedValue({ ok: true, status: 202 });
+
+    const { result, unmount } = renderHook(() => useDashboardFetch());
+    const pendiente = result.current('/api/proxy/reports/dashboard-ejecutivo/');
+    unmount();
+    await vi.advanceTimersByTimeAsync(REINTENTAR_CALCULANDO_MS);
+
+    expect(estaCalculando(await pendiente)).toBe(true);
+    expect(global.fetch).toHaveBeenCalledTimes(1);
+  });
+});
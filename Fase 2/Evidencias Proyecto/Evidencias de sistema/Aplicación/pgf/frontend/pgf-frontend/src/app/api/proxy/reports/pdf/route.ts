@@ -47,6 +47,11 @@ export async function GET(request: NextRequest) {
       );
     }
 
+    // Rangos grandes: el backend crea un job asíncrono (202) en lugar del PDF
+    if (response.status === 202) {
+      return NextResponse.json(await response.json(), { status: 202 });
+    }
+
     // Obtener el PDF como ArrayBuffer para preservar los datos binarios
     const arrayBuffer = await response.arrayBuffer();
     
@@ -228,6 +228,7 @@ export async function proxyFetch(
     );
   }
 
-  // Si todo está bien, retornar el JSON parseado
-  return NextResponse.json(json);
+  // Si todo está bien, retornar el JSON parseado con el status del backend
+  // (ej: 202 de los dashboards que aún se están calculando)
+  return NextResponse.json(json, { status: r.status });
 }
@@ -7,6 +7,7 @@ import { useAuth } from "@/store/auth";
 import RoleGuard from "@/components/RoleGuard";
 import Link from "next/link";
 import { withSession } from "@/lib/api.client";
+import { estaCalculando, useDashboardFetch } from "@/hooks/useDashboardFetch";
 
 /**
  * Dashboard para Coordinador de Zona.
@@ -26,6 +27,7 @@ export default function CoordinadorDashboardPage() {
 
   const [reporte, setReporte] = useState<any>(null);
   const [loading, setLoading] = useState(true);
+  const fetchDashboard = useDashboardFetch();
 
   useEffect(() => {
     cargarDatos();
@@ -42,12 +44,15 @@ export default function CoordinadorDashboardPage() {
       const url = forceRefresh 
         ? "/api/proxy/reports/dashboard-coordinador/?refresh=true"
         : "/api/proxy/reports/dashboard-coordinador/";
-      const response = await fetch(url, {
+      const response = await fetchDashboard(url, {
         method: "GET",
         ...withSession(),
       });
 
-      if (response.ok) {
+      if (estaCalculando(response)) {
+        // Se mantienen los datos anteriores hasta el próximo refresco
+        console.warn("El dashboard de coordinador aún se está calculando");
+      } else if (response.ok) {
         const data = await response.json();
         setReporte(data);
       } else {
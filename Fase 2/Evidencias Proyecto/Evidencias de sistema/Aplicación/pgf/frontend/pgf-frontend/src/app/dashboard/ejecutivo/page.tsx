@@ -4,6 +4,7 @@ import { useEffect, useState } from "react";
 import { useAuth } from "@/store/auth";
 import RoleGuard from "@/components/RoleGuard";
 import { useToast } from "@/components/ToastContainer";
+import { estaCalculando, useDashboardFetch } from "@/hooks/useDashboardFetch";
 import {
   BarChart,
   Bar,
@@ -25,6 +26,7 @@ export default function DashboardEjecutivo() {
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
   const toast = useToast();
+  const fetchDashboard = useDashboardFetch();
 
   const load = async (forceRefresh = false) => {
     if (forceRefresh) {
@@ -36,10 +38,16 @@ export default function DashboardEjecutivo() {
       const url = forceRefresh 
         ? "/api/proxy/reports/dashboard-ejecutivo/?refresh=true"
         : "/api/proxy/reports/dashboard-ejecutivo/";
-      const r = await fetch(url, {
+      const r = await fetchDashboard(url, {
         credentials: "include",
       });
 
+      if (estaCalculando(r)) {
+        // Se mantienen los datos anteriores hasta el próximo refresco
+        console.warn("El dashboard ejecutivo aún se está calculando");
+        return;
+      }
+
       if (!r.ok) {
         toast.error("Error al cargar el dashboard ejecutivo");
         return;
@@ -8,6 +8,7 @@ import RoleGuard from "@/components/RoleGuard";
 import Link from "next/link";
 import { ENDPOINTS } from "@/lib/constants";
 import { withSession } from "@/lib/api.client";
+import { estaCalculando, useDashboardFetch } from "@/hooks/useDashboardFetch";
 import {
   BarChart,
   Bar,
@@ -40,6 +41,7 @@ export default function JefeTallerDashboardPage() {
   const [mecanicosCarga, setMecanicosCarga] = useState<any[]>([]);
   const [reporteJefeTaller, setReporteJefeTaller] = useState<any>(null);
   const [loading, setLoading] = useState(true);
+  const fetchDashboard = useDashboardFetch();
 
   useEffect(() => {
     cargarDatos();
@@ -58,12 +60,15 @@ export default function JefeTallerDashboardPage() {
       const url = forceRefresh 
         ? "/api/proxy/reports/dashboard-ejecutivo/?refresh=true"
         : "/api/proxy/reports/dashboard-ejecutivo/";
-      const dashboardResponse = await fetch(url, {
+      const dashboardResponse = await fetchDashboard(url, {
         method: "GET",
         ...withSession(),
       });
 
-      if (dashboardResponse.ok) {
+      if (estaCalculando(dashboardResponse)) {
+        // Se mantienen los datos anteriores hasta el próximo refresco
+        console.warn("El dashboard ejecutivo aún se está calculando");
+      } else if (dashboardResponse.ok) {
         const dashboardData = await dashboardResponse.json();
         setKpis(dashboardData.kpis || {});
         setMecanicosCarga(dashboardData.mecanicos_carga || []);
@@ -95,14 +100,16 @@ export default function JefeTallerDashboardPage() {
       }
 
       // Cargar reporte específico de Jefe de Taller
-      const reporteResponse = await fetch(forceRefresh 
+      const reporteResponse = await fetchDashboard(forceRefresh 
         ? "/api/proxy/reports/dashboard-jefe-taller/?refresh=true"
         : "/api/proxy/reports/dashboard-jefe-taller/", {
         method: "GET",
         ...withSession(),
       });
 
-      if (reporteResponse.ok) {
+      if (estaCalculando(reporteResponse)) {
+        console.warn("El reporte de jefe de taller aún se está calculando");
+      } else if (reporteResponse.ok) {
         const reporteData = await reporteResponse.json();
         setReporteJefeTaller(reporteData);
       } else {
@@ -2,6 +2,7 @@
 
 import { useState, useEffect } from "react";
 import { useToast } from "@/components/ToastContainer";
+import { estaCalculando, useDashboardFetch } from "@/hooks/useDashboardFetch";
 import { useAuth } from "@/store/auth";
 import RoleGuard from "@/components/RoleGuard";
 import {
@@ -23,6 +24,7 @@ import {
 export default function ReportsPage() {
   const toast = useToast();
   const { hasRole } = useAuth();
+  const fetchDashboard = useDashboardFetch();
   const [fechaInicio, setFechaInicio] = useState("");
   const [fechaFin, setFechaFin] = useState("");
   const [loading, setLoading] = useState(false);
@@ -57,10 +59,15 @@ export default function ReportsPage() {
 
     try {
       // Usar el endpoint de dashboard ejecutivo para mostrar los datos
-      const r = await fetch("/api/proxy/reports/dashboard-ejecutivo/", {
+      const r = await fetchDashboard("/api/proxy/reports/dashboard-ejecutivo/", {
         credentials: "include",
       });
 
+      if (estaCalculando(r)) {
+        toast.info("Los datos del reporte aún se están calculando. Intente nuevamente en unos segundos.");
+        return;
+      }
+
       if (!r.ok) {
         const error = await r.json().catch(() => ({ detail: "Error al cargar datos del reporte" }));
         toast.error(error.detail || "Error al cargar datos del reporte");
@@ -84,6 +91,28 @@ export default function ReportsPage() {
     }
   };
 
+  // Consultar un reporte PDF asíncrono hasta que termine (retorna la URL de descarga)
+  const esperarReporte = async (jobId: string): Promise<string | null> => {
+    for (let intento = 0; intento < 60; intento++) {
+      await new Promise((resolve) => setTimeout(resolve, 5000));
+      const r = await fetch(`/api/proxy/reports/jobs/${jobId}/`, { credentials: "include" });
+      if (!r.ok) {
+        toast.error("Error al consultar el estado del reporte");
+        return null;
+      }
+      const job = await r.json();
+      if (job.estado === "COMPLETADO") {
+        return job.download_url;
+      }
+      if (job.estado === "ERROR") {
+        toast.error(job.error || "Error al generar PDF");
+        return null;
+      }
+    }
+    toast.error("El reporte está tardando más de lo esperado, intenta nuevamente más tarde");
+    return null;
+  };
+
   // Exportar a PDF
   const exportarPDF = async () => {
     if (!tipoReporte) {
@@ -128,6 +157,18 @@ export default function ReportsPage() {
         return;
       }
 
+      // Rangos grandes: el PDF se genera en segundo plano, esperar el job
+      if (r.status === 202) {
+        const job = await r.json();
+        toast.info("Generando el reporte, la descarga comenzará cuando esté listo");
+        const downloadUrl = await esperarReporte(job.id);
+        if (downloadUrl) {
+          window.open(downloadUrl, "_blank");
+          toast.success("PDF generado correctamente");
+        }
+        return;
+      }
+
       // Verificar que la respuesta sea un PDF
       const contentType = r.headers.get("content-type");
       if (!contentType || !contentType.includes("application/pdf")) {
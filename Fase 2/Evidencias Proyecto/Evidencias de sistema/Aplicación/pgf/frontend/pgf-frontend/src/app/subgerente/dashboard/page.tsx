@@ -8,6 +8,7 @@ import RoleGuard from "@/components/RoleGuard";
 import Link from "next/link";
 import { ENDPOINTS } from "@/lib/constants";
 import { withSession } from "@/lib/api.client";
+import { estaCalculando, useDashboardFetch } from "@/hooks/useDashboardFetch";
 
 /**
  * Dashboard Nacional para Subgerente de Flota Nacional.
@@ -30,6 +31,7 @@ export default function SubgerenteDashboardPage() {
   const [kpis, setKpis] = useState<any>({});
   const [reporteSubgerente, setReporteSubgerente] = useState<any>(null);
   const [loading, setLoading] = useState(true);
+  const fetchDashboard = useDashboardFetch();
 
   useEffect(() => {
     cargarDatos();
@@ -43,27 +45,28 @@ export default function SubgerenteDashboardPage() {
   const cargarDatos = async (forceRefresh = false) => {
     setLoading(true);
     try {
-      const dashboardResponse = await fetch(forceRefresh 
+      const dashboardResponse = await fetchDashboard(forceRefresh 
         ? "/api/proxy/reports/dashboard-ejecutivo/?refresh=true"
         : "/api/proxy/reports/dashboard-ejecutivo/", {
         method: "GET",
         ...withSession(),
       });
 
-      if (dashboardResponse.ok) {
+      // Si aún se está calculando, se mantienen los datos anteriores
+      if (dashboardResponse.ok && !estaCalculando(dashboardResponse)) {
         const dashboardData = await dashboardResponse.json();
         setKpis(dashboardData.kpis || {});
       }
 
       // Cargar reporte específico de Subgerente
-      const reporteResponse = await fetch(forceRefresh 
+      const reporteResponse = await fetchDashboard(forceRefresh 
         ? "/api/proxy/reports/dashboard-subgerente/?refresh=true"
         : "/api/proxy/reports/dashboard-subgerente/", {
         method: "GET",
         ...withSession(),
       });
 
-      if (reporteResponse.ok) {
+      if (reporteResponse.ok && !estaCalculando(reporteResponse)) {
         const reporteData = await reporteResponse.json();
         setReporteSubgerente(reporteData);
       }
@@ -8,6 +8,7 @@ import RoleGuard from "@/components/RoleGuard";
 import Link from "next/link";
 import { ENDPOINTS } from "@/lib/constants";
 import { withSession } from "@/lib/api.client";
+import { estaCalculando, useDashboardFetch } from "@/hooks/useDashboardFetch";
 import {
   LineChart,
   Line,
@@ -41,6 +42,7 @@ export default function SupervisorDashboardPage() {
   const [graficos, setGraficos] = useState<any>({});
   const [reporteSupervisor, setReporteSupervisor] = useState<any>(null);
   const [loading, setLoading] = useState(true);
+  const fetchDashboard = useDashboardFetch();
 
   useEffect(() => {
     cargarDatos();
@@ -59,12 +61,15 @@ export default function SupervisorDashboardPage() {
       const url = forceRefresh 
         ? "/api/proxy/reports/dashboard-ejecutivo/?refresh=true"
         : "/api/proxy/reports/dashboard-ejecutivo/";
-      const dashboardResponse = await fetch(url, {
+      const dashboardResponse = await fetchDashboard(url, {
         method: "GET",
         ...withSession(),
       });
 
-      if (dashboardResponse.ok) {
+      if (estaCalculando(dashboardResponse)) {
+        // Se mantienen los datos anteriores hasta el próximo refresco
+        console.warn("El dashboard ejecutivo aún se está calculando");
+      } else if (dashboardResponse.ok) {
         const dashboardData = await dashboardResponse.json();
         setKpis(dashboardData.kpis || {});
         setGraficos(dashboardData.graficos || {});
@@ -79,14 +84,16 @@ export default function SupervisorDashboardPage() {
       }
 
       // Cargar reporte específico de Supervisor
-      const reporteResponse = await fetch(forceRefresh 
+      const reporteResponse = await fetchDashboard(forceRefresh 
         ? "/api/proxy/reports/dashboard-supervisor/?refresh=true"
         : "/api/proxy/reports/dashboard-supervisor/", {
         method: "GET",
         ...withSession(),
       });
 
-      if (reporteResponse.ok) {
+      if (estaCalculando(reporteResponse)) {
+        console.warn("El reporte de supervisor aún se está calculando");
+      } else if (reporteResponse.ok) {
         const reporteData = await reporteResponse.json();
         setReporteSupervisor(reporteData);
       } else {
@@ -0,0 +1,60 @@
+/**
+ * Hook para leer los dashboards precalculados (/api/proxy/reports/dashboard-*/).
+ *
+ * Mientras Celery calcula el payload, el backend responde 202
+ * {"estado": "calculando"} (apps/reports/views.py). En ese caso el hook
+ * vuelve a consultar cada pocos segundos, en vez de dejar la página con
+ * ceros hasta su próximo refresco de 30 segundos.
+ */
+
+import { useCallback, useEffect, useRef } from 'react'
+
+// Igual que REINTENTAR_EN en apps/reports/dashboards.py
+export const REINTENTAR_CALCULANDO_MS = 5000
+const MAX_REINTENTOS = 24
+
+/**
+ * Indica si la respuesta es un dashboard que aún se está calculando
+ */
+export function estaCalculando(response: Response): boolean {
+  return response.status === 202
+}
+
+/**
+ * Hook que retorna un fetch que espera a que el dashboard esté calculado.
+ *
+ * Retorna la primera respuesta que no sea 202. Si se agotan los reintentos
+ * o el componente se desmonta, retorna la última respuesta 202 (usar
+ * estaCalculando() para no mostrarla como datos).
+ *
+ * Ejemplo de uso:
+ * ```tsx
+ * const fetchDashboard = useDashboardFetch()
+ * const r = await fetchDashboard("/api/proxy/reports/dashboard-ejecutivo/", withSession())
+ * if (estaCalculando(r)) return
+ * ```
+ */
+export function useDashboardFetch() {
+  const montado = useRef(true)
+
+  useEffect(() => {
+    montado.current = true
+    return () => {
+      montado.current = false
+    }
+  }, [])
+
+  return useCallback(async (url: string, init: RequestInit = {}): Promise<Response> => {
+    let response = await fetch(url, init)
+    // El refresco forzado ya quedó pedido: los reintentos solo leen
+    const lectura = url.replace(/[?&]refresh=true/, '')
+    for (let intento = 0; intento < MAX_REINTENTOS && estaCalculando(response); intento++) {
+      await new Promise((resolve) => setTimeout(resolve, REINTENTAR_CALCULANDO_MS))
+      if (!montado.current) {
+        break
+      }
+      response = await fetch(lectura, init)
+    }
+    return response
+  }, [])
+}
@@ -0,0 +1,61 @@
+"""
+Arranque de daphne con compresión permessage-deflate negociable.
+
+daphne rechaza por defecto la extensión permessage-deflate (RFC 7692)
+aunque el cliente la ofrezca. Este módulo arranca el mismo CLI de daphne
+con una fábrica de WebSocket que la acepta si WS_COMPRESION está activo:
+los navegadores y apps móviles la ofrecen solos, y los clientes que no la
+ofrecen siguen sin compresión.
+
+Uso (mismos argumentos que daphne):
+    python -m pgf_core.servidor_ws -b 0.0.0.0 -p 8000 pgf_core.asgi:application
+
+Relaciones:
+- Usado por: docker-compose*.yml (servicio api)
+- Configuración: WS_COMPRESION en pgf_core/settings/base.py
+"""
+
+from autobahn.websocket.compress import PerMessageDeflateOffer, PerMessageDeflateOfferAccept
+from daphne import server
+from daphne.cli import CommandLineInterface
+from daphne.ws_protocol import WebSocketFactory
+
+
+def aceptar_compresion(ofertas):
+    """
+    Elige la oferta permessage-deflate del cliente, si la hay.
+
+    Parámetros:
+    - ofertas: Ofertas de compresión del handshake (autobahn)
+
+    Retorna:
+    - PerMessageDeflateOfferAccept, o None para no comprimir
+    """
+    # Se lee en cada handshake: la aplicación ASGI ya configuró Django
+    from django.conf import settings
+
+    if not getattr(settings, "WS_COMPRESION", False):
+        return None
+    for oferta in ofertas:
+        if isinstance(oferta, PerMessageDeflateOffer):
+            return PerMessageDeflateOfferAccept(oferta)
+    return None
+
+
+class FabricaWebSocketComprimida(WebSocketFactory):
+    """WebSocketFactory de daphne que acepta permessage-deflate."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # daphne luego fija sus propias opciones sin tocar esta
+        self.setProtocolOptions(perMessageCompressionAccept=aceptar_compresion)
+
+
+def main():
+    # Server.run() crea la fábrica con el nombre del módulo daphne.server
+    server.WebSocketFactory = FabricaWebSocketComprimida
+    CommandLineInterface.entrypoint()
+
+
+if __name__ == "__main__":
+    main()
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # Búsqueda full-text e índices GIN (apps/users/search.py)
     "channels",  # Django Channels para WebSockets
     "rest_framework",
     "rest_framework_simplejwt",
@@ -71,6 +72,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",       # ✔ requerido
     "django.contrib.messages.middleware.MessageMiddleware",          # ✔ requerido
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "apps.notifications.middleware.ActualizacionesAgrupadasMiddleware",  # Agrupa los data_update del request
 ]
 
 
@@ -305,6 +307,34 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Segundos que las tareas en segundo plano (p. ej. colación) acumulan
+# actualizaciones en tiempo real antes de enviarlas agrupadas
+REALTIME_VENTANA_AGRUPACION = float(os.getenv("REALTIME_VENTANA_AGRUPACION", "2"))
+
+# Los group_send los hace un hilo despachador (apps/notifications/dispatcher.py),
+# no el request: cola de a lo sumo REALTIME_COLA_MAXIMA lotes y timeout por envío
+REALTIME_ENVIO_EN_SEGUNDO_PLANO = os.getenv("REALTIME_ENVIO_EN_SEGUNDO_PLANO", "true").lower() == "true"
+REALTIME_COLA_MAXIMA = int(os.getenv("REALTIME_COLA_MAXIMA", "10000"))
+REALTIME_TIMEOUT_ENVIO = float(os.getenv("REALTIME_TIMEOUT_ENVIO", "5"))
+
+# Vida del último snapshot publicado de cada OT/vehículo, base de las
+# diferencias versionadas (apps/notifications/payloads.py)
+REALTIME_SNAPSHOT_SEGUNDOS = int(os.getenv("REALTIME_SNAPSHOT_SEGUNDOS", "3600"))
+
+# Aceptar permessage-deflate si el cliente lo ofrece (pgf_core/servidor_ws.py)
+WS_COMPRESION = os.getenv("WS_COMPRESION", "true").lower() == "true"
+
+# Admisión de conexiones WebSocket (apps/notifications/admission.py): caché
+# del estado de los usuarios, topes ante tormentas de reconexión y espera
+# base sugerida a los clientes rechazados (con jitter, entre 1x y 3x).
+# WS_PRESENCIA_SEGUNDOS: vida del lugar de cada conexión en el tope por
+# usuario; el consumer lo renueva cada un tercio de ese tiempo
+WS_CACHE_USUARIO_SEGUNDOS = int(os.getenv("WS_CACHE_USUARIO_SEGUNDOS", "60"))
+WS_MAX_CONEXIONES_POR_SEGUNDO = int(os.getenv("WS_MAX_CONEXIONES_POR_SEGUNDO", "200"))
+WS_MAX_CONEXIONES_POR_USUARIO = int(os.getenv("WS_MAX_CONEXIONES_POR_USUARIO", "5"))
+WS_REINTENTO_BASE_SEGUNDOS = float(os.getenv("WS_REINTENTO_BASE_SEGUNDOS", "2"))
+WS_PRESENCIA_SEGUNDOS = int(os.getenv("WS_PRESENCIA_SEGUNDOS", "90"))
+
 # -------- AWS S3 --------
 
 
@@ -347,6 +377,21 @@ SERVER_EMAIL = DEFAULT_FROM_EMAIL
 # URL del frontend para enlaces de recuperación
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
+# -------- REPORTES PDF --------
+# Gráficos de barras/líneas como vectores de ReportLab (True) o PNG de matplotlib (False)
+REPORTES_GRAFICOS_VECTORIALES = os.getenv("REPORTES_GRAFICOS_VECTORIALES", "True") == "True"
+# Procesos para dibujar las secciones de los reportes completos (1 = en el mismo worker)
+REPORTES_PDF_PROCESOS = int(os.getenv("REPORTES_PDF_PROCESOS", "2"))
+# Cubo de análisis: costo máximo estimado por EXPLAIN y timeout de la consulta
+REPORTES_CUBO_COSTO_MAXIMO = float(os.getenv("REPORTES_CUBO_COSTO_MAXIMO", "50000"))
+REPORTES_CUBO_TIMEOUT_MS = int(os.getenv("REPORTES_CUBO_TIMEOUT_MS", "5000"))
+
+# -------- UTILIZACIÓN DE MECÁNICOS --------
+# Jornada del taller (hora local) y días laborales (0 = lunes)
+UTILIZACION_JORNADA_INICIO = os.getenv("UTILIZACION_JORNADA_INICIO", "08:00")
+UTILIZACION_JORNADA_FIN = os.getenv("UTILIZACION_JORNADA_FIN", "18:00")
+UTILIZACION_DIAS_LABORALES = [int(d) for d in os.getenv("UTILIZACION_DIAS_LABORALES", "0,1,2,3,4").split(",")]
+
 # -------- CACHING (Redis) --------
 # Nota: Requiere django-redis instalado
 try:
@@ -22,6 +22,31 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'apps.workorders.tasks_colacion.finalizar_colacion_automatica',
         'schedule': crontab(hour=13, minute=15),  # Todos los días a las 13:15
     },
+    # KPIs diarios de dashboards: refresco incremental desde el último watermark
+    'refrescar-kpis-diarios': {
+        'task': 'apps.reports.tasks.refrescar_kpis_diarios',
+        'schedule': crontab(minute='*/5'),  # Cada 5 minutos
+    },
+    # Dashboards por rol: precálculo en caché + push por WebSocket
+    'precalcular-dashboards': {
+        'task': 'apps.reports.tasks.precalcular_dashboards',
+        'schedule': crontab(),  # Cada minuto
+    },
+    # Reportes PDF asíncronos: jobs en curso que ningún worker terminará
+    'expirar-reportes-atascados': {
+        'task': 'apps.reports.tasks.expirar_reportes_atascados',
+        'schedule': crontab(minute='*/5'),  # Cada 5 minutos
+    },
+    # Caché de PDFs de reportes: purga de períodos abiertos invalidados + LRU
+    'desalojar-pdfs-cacheados': {
+        'task': 'apps.reports.tasks.desalojar_pdfs_cacheados',
+        'schedule': crontab(minute=0),  # Cada hora
+    },
+    # Utilización de mecánicos: recálculo nocturno de los últimos días
+    'calcular-utilizacion-mecanicos': {
+        'task': 'apps.reports.tasks.calcular_utilizacion_mecanicos',
+        'schedule': crontab(hour=2, minute=0),  # Todos los días a las 02:00
+    },
 }
 
 CELERY_TIMEZONE = 'America/Santiago'